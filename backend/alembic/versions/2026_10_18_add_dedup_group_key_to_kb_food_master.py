@@ -0,0 +1,56 @@
+"""add_dedup_group_key_to_kb_food_master
+
+Revision ID: add_food_dedup_group_key
+Revises: add_food_allocation_approval
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.platform.utils.food_name_index import food_group_key
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_food_dedup_group_key'
+down_revision: Union[str, None] = 'add_food_allocation_approval'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add precomputed variation group key used by FoodDeduplicator
+    op.add_column(
+        'kb_food_master',
+        sa.Column('dedup_group_key', sa.String(250), nullable=True)
+    )
+    op.create_index('ix_kb_food_master_dedup_group_key', 'kb_food_master', ['dedup_group_key'])
+    
+    # Backfill existing foods (same function the ORM uses on write)
+    conn = op.get_bind()
+    foods = sa.table(
+        'kb_food_master',
+        sa.column('id', postgresql.UUID(as_uuid=True)),
+        sa.column('display_name', sa.String),
+        sa.column('dedup_group_key', sa.String),
+    )
+    rows = conn.execute(sa.select(foods.c.id, foods.c.display_name)).fetchall()
+    updates = [
+        {"row_id": row.id, "key": food_group_key(row.display_name)}
+        for row in rows
+    ]
+    if updates:
+        conn.execute(
+            foods.update()
+            .where(foods.c.id == sa.bindparam("row_id"))
+            .values(dedup_group_key=sa.bindparam("key")),
+            updates
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_kb_food_master_dedup_group_key', table_name='kb_food_master')
+    op.drop_column('kb_food_master', 'dedup_group_key')
@@ -0,0 +1,47 @@
+"""add_diet_plan_days_table
+
+Revision ID: add_diet_plan_days
+Revises: add_food_dedup_group_key
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_diet_plan_days'
+down_revision: Union[str, None] = 'add_food_dedup_group_key'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-day rows for chunked meal plans (existing inline plans keep working
+    # and are chunked the next time their meal_plan is saved)
+    op.create_table(
+        'platform_diet_plan_days',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            'plan_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('platform_diet_plans.id', ondelete='CASCADE'),
+            nullable=False
+        ),
+        sa.Column('day_number', sa.Integer(), nullable=False),
+        sa.Column('day_key', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('plan_id', 'day_number', name='uq_platform_diet_plan_days_plan_day'),
+    )
+    op.create_index('ix_platform_diet_plan_days_id', 'platform_diet_plan_days', ['id'])
+    op.create_index('ix_platform_diet_plan_days_plan_id', 'platform_diet_plan_days', ['plan_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_platform_diet_plan_days_plan_id', table_name='platform_diet_plan_days')
+    op.drop_index('ix_platform_diet_plan_days_id', table_name='platform_diet_plan_days')
+    op.drop_table('platform_diet_plan_days')
@@ -0,0 +1,62 @@
+"""add_diet_plan_version_deltas
+
+Revision ID: add_diet_plan_version_deltas
+Revises: add_diet_plan_days
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_diet_plan_version_deltas'
+down_revision: Union[str, None] = 'add_diet_plan_days'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Base version for plans whose meal_plan is stored as a delta
+    op.add_column(
+        'platform_diet_plans',
+        sa.Column(
+            'base_plan_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('platform_diet_plans.id', ondelete='SET NULL'),
+            nullable=True
+        )
+    )
+    op.create_index('ix_platform_diet_plans_base_plan_id', 'platform_diet_plans', ['base_plan_id'])
+    op.create_index(
+        'ix_platform_diet_plans_assessment_version',
+        'platform_diet_plans',
+        ['assessment_id', 'plan_version']
+    )
+
+    # Per-assessment version sequence, seeded from existing plans
+    op.create_table(
+        'platform_diet_plan_version_counters',
+        sa.Column(
+            'assessment_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('platform_assessments.id'),
+            primary_key=True
+        ),
+        sa.Column('last_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.execute(
+        "INSERT INTO platform_diet_plan_version_counters (assessment_id, last_version) "
+        "SELECT assessment_id, COALESCE(MAX(plan_version), COUNT(*)) "
+        "FROM platform_diet_plans GROUP BY assessment_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('platform_diet_plan_version_counters')
+    op.drop_index('ix_platform_diet_plans_assessment_version', table_name='platform_diet_plans')
+    op.drop_index('ix_platform_diet_plans_base_plan_id', table_name='platform_diet_plans')
+    op.drop_column('platform_diet_plans', 'base_plan_id')
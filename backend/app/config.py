@@ -1,7 +1,7 @@
 """
 Configuration settings for the application.
 """
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -22,19 +22,79 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 120  # Max lifetime of a cached authenticated user (0 = disabled)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4  # Threads for bcrypt so logins don't block the event loop
     
     # OpenRouter AI Configuration
     OPENROUTER_API_KEY: str = "sk-or-v1-placeholder-get-from-openrouter-ai"
     DIET_PLAN_MODEL: str = "anthropic/claude-3.5-sonnet"  # or "meta-llama/llama-3.1-70b-instruct"
     DIET_PLAN_TEMPERATURE: float = 0.7
+    RECIPE_BATCH_MEALS: int = 0  # Meals per recipe LLM call (0 = all meals of a day, 1 = one call per meal)
+    RECIPE_TEMPLATE_MATCHING: bool = True  # Use recipe_kb_complete.json recipes for matching meals (no LLM call)
+    RECIPE_TEMPLATE_MAX_MISSING: int = 0  # Required recipe ingredients a matched meal may lack
+    RECIPE_TEMPLATE_MAX_EXTRA: int = 1  # Meal foods not in the recipe (served alongside)
     # Food Enrichment Model - Use qwen/qwen-2.5-72b-instruct or qwen/qwen-2.5-7b-instruct
     # Note: qwen-2.5-32b-instruct does NOT exist. Available: 7B and 72B versions
     FOOD_ENRICHMENT_MODEL: str = "qwen/qwen-2.5-72b-instruct"  # Verified available on OpenRouter
     FOOD_ENRICHMENT_TEMPERATURE: float = 0.3  # Lower temperature for consistent enrichment
     
+    # LLM gateway (shared client for all LLM calls)
+    LLM_BACKEND: str = "openrouter"  # "openrouter" or "stub" (canned responses for tests/benchmarks)
+    LLM_MAX_CONCURRENCY: int = 8  # Concurrent upstream calls per process
+    LLM_MAX_CONNECTIONS: int = 20  # Keep-alive connection pool size
+    LLM_HTTP2: bool = True  # Used when the h2 package is installed
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_RETRIES: int = 2  # Retries per model for transient errors (429/5xx/timeouts)
+    LLM_MODEL_PRICES: Dict[str, List[float]] = {}  # {"model": [usd_per_1m_prompt, usd_per_1m_completion]}
+    
+    # Engine contract validation: "full" (dev), "sampled" (production) or "off" (batch jobs)
+    CONTRACT_VALIDATION_MODE: str = "full"
+    CONTRACT_VALIDATION_SAMPLE_RATE: float = 0.1  # Fraction of calls validated in "sampled" mode
+    
+    # Build shared NCP engines at startup instead of on the first request
+    WARM_ENGINES_ON_STARTUP: bool = True
+    KB_PREFORK_PRELOAD: bool = True  # gunicorn.conf.py: load and gc.freeze() KB data in the master before forking
+    KB_ARTIFACT_PATH: str = ""  # Memory-mapped KB artifact (scripts/build_kb_artifact.py); JSON KBs and DB-less FoodEngine read from it (empty = off)
+    KB_RELOAD_INTERVAL_SECONDS: int = 0  # Poll KB files for changes and hot-swap a new KB version (0 = only via POST /admin/knowledge-base/update)
+    KB_RELOAD_CHECK_TABLES: bool = False  # Also detect changes to the food KB tables (row count and last update per table)
+
+    # Reuse deterministic stage outputs (diagnosis → exchange) for identical assessment snapshots
+    PIPELINE_CACHE_ENABLED: bool = True
+    PIPELINE_CACHE_MAX_ENTRIES: int = 256  # In-process LRU entries
+    PIPELINE_CACHE_SQLITE_PATH: str = ""  # Shared SQLite tier, e.g. "cache/pipeline_results.sqlite3" (empty = memory only)
+    PIPELINE_CACHE_SQLITE_MAX_ENTRIES: int = 10000
+
+    # Platform cache (infra/cache): in-process LRU, plus a shared SQLite tier if a path is set
+    PLATFORM_CACHE_MAX_ENTRIES: int = 10000
+    PLATFORM_CACHE_DEFAULT_TTL_SECONDS: int = 3600  # For entries set without a TTL (0 = no expiry)
+    PLATFORM_CACHE_SQLITE_PATH: str = ""  # e.g. "cache/platform_cache.sqlite3" (empty = memory only)
+    PLATFORM_CACHE_SQLITE_MAX_ENTRIES: int = 100000
+    PLATFORM_CACHE_LOCAL_TTL_SECONDS: int = 60  # Max staleness of the memory tier over the shared tier
+
+    # Store diet plan days as per-day rows with food references (False = inline meal_plan JSONB)
+    DIET_PLAN_CHUNKED_STORAGE: bool = True
+    DIET_PLAN_DELTA_VERSIONS: bool = True  # Store later plan versions as deltas against a full base version
+    DIET_PLAN_DELTA_REBASE_INTERVAL: int = 10  # Store a full version at most this many versions after the base
+    DIET_PLAN_DELTA_MAX_RATIO: float = 0.5  # Store in full when the delta exceeds this fraction of the full plan
+
+    # Food substitutions (nutrient-vector nearest-neighbour index over the food KB)
+    FOOD_SUBSTITUTION_USE_FAISS: bool = True  # Used when faiss is installed; NumPy brute force otherwise
+
+    # Static KB/quiz responses (pre-encoded, ETag-cached)
+    STATIC_RESPONSE_MAX_AGE_SECONDS: int = 3600
+    STATIC_RESPONSE_COMPRESSION: bool = True  # gzip (and brotli if installed)
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
+
+    # Decision logs (platform_decision_logs): queued and bulk-inserted by a background thread
+    DECISION_LOG_BATCH_SIZE: int = 100  # Insert when this many rows are queued
+    DECISION_LOG_FLUSH_INTERVAL_MS: int = 500  # ... or when the oldest queued row is this old
+    DECISION_LOG_QUEUE_SIZE: int = 10000
+    DECISION_LOG_BLOCK_MS: int = 0  # How long a full queue may block the caller before overflow
+    DECISION_LOG_SPILL_PATH: str = ""  # Overflow and failed batches as JSON lines, e.g. "logs/decision_log_spill.jsonl" (empty = drop)
     
     model_config = SettingsConfigDict(
         case_sensitive=True,
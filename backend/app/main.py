@@ -20,6 +20,10 @@ from app.platform.api.plans import router as platform_plans_router
 from app.platform.api.monitoring.monitoring import router as platform_monitoring_router
 from app.platform.api.admin import router as platform_admin_router
 from app.platform.api.quizzes import router as platform_quizzes_router
+from app.platform.core.orchestration.engine_pool import engine_pool
+from app.platform.core.orchestration.kb_preload import report_process_memory
+from app.platform.core.orchestration.kb_manager import get_kb_manager
+from app.platform.infra.logging import close_decision_log_writer
 
 
 @asynccontextmanager
@@ -28,8 +32,9 @@ async def lifespan(app: FastAPI):
     Application lifespan events.
     
     Handles startup and shutdown tasks:
-    - Startup: Initialize database, log startup information
-    - Shutdown: Log shutdown information
+    - Startup: Initialize database, warm shared engines, start KB change polling,
+      log startup information and memory
+    - Shutdown: Stop KB change polling, flush queued decision logs, log shutdown information
     """
     # Startup
     logger.info("Starting DrAssistent API...")
@@ -41,12 +46,27 @@ async def lifespan(app: FastAPI):
     init_db()
     logger.info("Database initialized")
     
+    # Build shared NCP engines once per process
+    if settings.WARM_ENGINES_ON_STARTUP:
+        ready = engine_pool.warm()
+        logger.info(f"Engine pool warmed: {len(ready)} engines ready")
+    
+    # Hot-swap KB edits without a restart (per worker)
+    if settings.KB_RELOAD_INTERVAL_SECONDS > 0:
+        get_kb_manager().start_polling(settings.KB_RELOAD_INTERVAL_SECONDS)
+        logger.info(f"KB reload: checking for changes every {settings.KB_RELOAD_INTERVAL_SECONDS}s")
+    
+    # Per-worker memory (KB data preloaded before fork shows up as shared)
+    report_process_memory("worker")
+    
     # Log router registration
     logger.info("Registered platform routers at /api/v1/platform")
     
     yield
     
     # Shutdown
+    get_kb_manager().stop_polling()
+    close_decision_log_writer()
     logger.info("Shutting down DrAssistent API...")
 
 
@@ -18,6 +18,12 @@ from app.platform.ai.generation import (
     TextGenerator,
     GenerationService,
 )
+from app.platform.ai.gateway import (
+    LLMGateway,
+    LLMResponse,
+    StubLLMBackend,
+    get_llm_gateway,
+)
 
 __all__ = [
     # Extraction
@@ -32,4 +38,9 @@ __all__ = [
     "MealPlanNarrator",
     "TextGenerator",
     "GenerationService",
+    # Gateway
+    "LLMGateway",
+    "LLMResponse",
+    "StubLLMBackend",
+    "get_llm_gateway",
 ]
@@ -5,6 +5,8 @@ OCR, lab report extraction, and free-text intake normalization.
 from typing import Dict, Any, Optional, List
 from abc import ABC, abstractmethod
 
+from app.platform.utils.food_name_index import FoodNameIndex
+
 
 class LabReportExtractor(ABC):
     """
@@ -156,7 +158,8 @@ class ExtractionService:
     def __init__(
         self,
         lab_extractor: Optional[LabReportExtractor] = None,
-        intake_normalizer: Optional[IntakeTextNormalizer] = None
+        intake_normalizer: Optional[IntakeTextNormalizer] = None,
+        food_index: Optional[FoodNameIndex] = None
     ):
         """
         Initialize extraction service.
@@ -164,9 +167,11 @@ class ExtractionService:
         Args:
             lab_extractor: Optional lab report extractor implementation
             intake_normalizer: Optional intake text normalizer implementation
+            food_index: Optional KB food name index (see FoodNameIndex.from_food_master)
         """
         self.lab_extractor = lab_extractor
         self.intake_normalizer = intake_normalizer
+        self.food_index = food_index
     
     def extract_lab_report(self, lab_report: Any) -> Dict[str, Any]:
         """
@@ -201,4 +206,23 @@ class ExtractionService:
         if not self.intake_normalizer:
             raise NotImplementedError("Intake normalizer not configured")
         return self.intake_normalizer.normalize_intake_text(free_text)
-
+    
+    def extract_food_references(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Extract KB food references from text.
+        
+        Args:
+            text: Text containing food references
+            
+        Returns:
+            List of food references (food_id, food_name, confidence, needs_review)
+            
+        Note:
+            Delegates to intake normalizer if configured, otherwise matches
+            against the KB food name index. Only KB food IDs are returned.
+        """
+        if self.intake_normalizer:
+            return self.intake_normalizer.extract_food_references(text)
+        if not self.food_index:
+            raise NotImplementedError("Intake normalizer or food index not configured")
+        return self.food_index.extract_food_references(text)
@@ -0,0 +1,38 @@
+"""
+AI Gateway Module.
+Shared, pooled LLM client used by recipe generation and KB enrichment.
+"""
+
+from .llm_gateway import (
+    LLMGateway,
+    LLMBackend,
+    OpenAICompatibleBackend,
+    StubLLMBackend,
+    LLMRequest,
+    LLMResponse,
+    LLMToolCall,
+    UsageTracker,
+    get_llm_gateway,
+    set_llm_gateway,
+    reset_llm_gateways,
+    is_rate_limit_error,
+    is_retryable_error,
+    is_model_unavailable_error,
+)
+
+__all__ = [
+    "LLMGateway",
+    "LLMBackend",
+    "OpenAICompatibleBackend",
+    "StubLLMBackend",
+    "LLMRequest",
+    "LLMResponse",
+    "LLMToolCall",
+    "UsageTracker",
+    "get_llm_gateway",
+    "set_llm_gateway",
+    "reset_llm_gateways",
+    "is_rate_limit_error",
+    "is_retryable_error",
+    "is_model_unavailable_error",
+]
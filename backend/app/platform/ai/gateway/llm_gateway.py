@@ -0,0 +1,591 @@
+"""
+LLM Gateway.
+Single entry point for chat-completion calls made by the platform.
+
+All LLM traffic (recipe generation, KB enrichment scripts) goes through one
+gateway per API key, which provides:
+- One pooled HTTP client (keep-alive; HTTP/2 when the `h2` package is installed)
+- A global concurrency limit shared by every caller in the process
+- Coalescing of identical in-flight requests (one upstream call, many waiters)
+- One retry/backoff policy and model fallback chain
+- Token and cost accounting per model
+
+Backends are pluggable; StubLLMBackend returns canned responses for tests and
+benchmarks (LLM_BACKEND="stub").
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+import hashlib
+import importlib.util
+import json
+import logging
+import random
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+PLACEHOLDER_API_KEY = "sk-or-v1-placeholder-get-from-openrouter-ai"
+DEFAULT_HEADERS = {
+    "HTTP-Referer": "https://drassistent.com",
+    "X-Title": "DrAssistent",
+}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an LLM client error is a rate limit (429) error.
+
+    Uses the HTTP status code when the error has one; only errors without a
+    status code (e.g. from the old scripts) are matched by message.
+    """
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code == 429
+    if type(error).__name__ == "RateLimitError":
+        return True
+    error_str = str(error).lower()
+    return "429" in error_str or "rate limit" in error_str or "rate-limit" in error_str
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether an LLM client error is transient.
+
+    Rate limits, upstream 5xx, timeouts and connection errors are retryable.
+    Bad requests (unsupported tools/response_format, unknown model) are not.
+    """
+    if is_rate_limit_error(error):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code >= 500
+    name = type(error).__name__
+    return name in ("APITimeoutError", "APIConnectionError", "TimeoutException", "ConnectError") or isinstance(
+        error, (TimeoutError, ConnectionError)
+    )
+
+
+def is_model_unavailable_error(error: Exception) -> bool:
+    """
+    Check whether an LLM client error is specific to the requested model.
+
+    404s and bad requests naming an unknown or unavailable model are not
+    retried, but another model may serve the request.
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code == 404:
+        return True
+    if status_code not in (400, 422):
+        return False
+    error_str = str(error).lower()
+    return "model" in error_str and any(
+        phrase in error_str
+        for phrase in ("not found", "not available", "unavailable", "not a valid", "does not exist", "unknown", "no endpoints")
+    )
+
+
+@dataclass
+class LLMToolCall:
+    """Function call returned by the model."""
+    name: str
+    arguments: str  # JSON string, as returned by the API
+
+
+@dataclass
+class LLMRequest:
+    """Chat-completion request (model-independent)."""
+    messages: List[Dict[str, Any]]
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    response_format: Optional[Dict[str, Any]] = None
+    tools: Optional[List[Dict[str, Any]]] = None
+    tool_choice: Optional[Any] = None
+
+    def key(self, models: Tuple[str, ...]) -> str:
+        """Stable hash identifying identical requests (for coalescing)."""
+        payload = json.dumps(
+            [models, self.messages, self.temperature, self.max_tokens,
+             self.response_format, self.tools, self.tool_choice],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LLMResponse:
+    """Chat-completion result."""
+    content: Optional[str]
+    model: str
+    tool_calls: List[LLMToolCall] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: Optional[float] = None  # Provider-reported cost, if any
+    finish_reason: Optional[str] = None
+    latency_seconds: float = 0.0
+    coalesced: bool = False  # True if served from another caller's in-flight request
+
+
+class LLMBackend(ABC):
+    """Transport that performs a single chat-completion call."""
+
+    @abstractmethod
+    def complete(self, request: LLMRequest, model: str) -> LLMResponse:
+        """
+        Perform one call (no retries).
+
+        Args:
+            request: Request
+            model: Model to call
+
+        Returns:
+            LLMResponse
+        """
+        pass
+
+    def close(self):
+        """Release transport resources."""
+        pass
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    OpenAI-compatible HTTP backend (OpenRouter by default).
+
+    Holds one httpx connection pool for the process. The SDK's own retries are
+    disabled; retry policy lives in LLMGateway.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = OPENROUTER_BASE_URL,
+        default_headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 20,
+        http2: bool = True,
+        timeout_seconds: float = 120.0
+    ):
+        """
+        Initialize backend.
+
+        Args:
+            api_key: Provider API key
+            base_url: API base URL (None for api.openai.com)
+            default_headers: Extra headers sent with every request
+            max_connections: Connection pool size (also the keep-alive pool size)
+            http2: Use HTTP/2 if the h2 package is available
+            timeout_seconds: Per-request timeout
+        """
+        try:
+            import httpx
+            from openai import OpenAI
+        except ImportError:
+            raise ImportError("openai package not installed. Run: pip install openai")
+
+        use_http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not use_http2:
+            logger.info("h2 not installed; LLM gateway using HTTP/1.1 keep-alive")
+
+        self._http_client = httpx.Client(
+            http2=use_http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout_seconds,
+        )
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers=default_headers if default_headers is not None else DEFAULT_HEADERS,
+            http_client=self._http_client,
+            max_retries=0,
+        )
+
+    def complete(self, request: LLMRequest, model: str) -> LLMResponse:
+        kwargs: Dict[str, Any] = {"model": model, "messages": request.messages}
+        for name in ("temperature", "max_tokens", "response_format", "tools", "tool_choice"):
+            value = getattr(request, name)
+            if value is not None:
+                kwargs[name] = value
+
+        response = self.client.chat.completions.create(**kwargs)
+
+        choice = response.choices[0]
+        message = choice.message
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            content=message.content,
+            model=model,
+            tool_calls=[
+                LLMToolCall(name=call.function.name, arguments=call.function.arguments)
+                for call in (message.tool_calls or [])
+            ],
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cost_usd=getattr(usage, "cost", None),
+            finish_reason=choice.finish_reason,
+        )
+
+    def close(self):
+        self._http_client.close()
+
+
+class StubLLMBackend(LLMBackend):
+    """
+    Local backend returning canned responses (tests and benchmarks).
+
+    The responder receives (request, model) and returns either the content
+    string or a full LLMResponse.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[LLMRequest, str], Union[str, LLMResponse]]] = None,
+        latency_seconds: float = 0.0
+    ):
+        """
+        Initialize stub.
+
+        Args:
+            responder: Response factory (defaults to returning "{}")
+            latency_seconds: Simulated upstream latency
+        """
+        self.responder = responder or (lambda request, model: "{}")
+        self.latency_seconds = latency_seconds
+        self.calls: List[Tuple[str, LLMRequest]] = []
+        self._lock = threading.Lock()
+
+    def complete(self, request: LLMRequest, model: str) -> LLMResponse:
+        with self._lock:
+            self.calls.append((model, request))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        result = self.responder(request, model)
+        if isinstance(result, LLMResponse):
+            return result
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in request.messages)
+        return LLMResponse(
+            content=result,
+            model=model,
+            prompt_tokens=prompt_chars // 4,
+            completion_tokens=len(result or "") // 4,
+            finish_reason="stop",
+        )
+
+
+@dataclass
+class ModelUsage:
+    """Accumulated usage for one model."""
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    coalesced: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_seconds: float = 0.0
+
+
+class UsageTracker:
+    """Thread-safe token/cost accounting per model."""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Initialize tracker.
+
+        Args:
+            prices: Model -> (USD per 1M prompt tokens, USD per 1M completion tokens),
+                used when the provider does not report cost
+        """
+        self.prices = dict(prices or {})
+        self._models: Dict[str, ModelUsage] = {}
+        self._lock = threading.Lock()
+
+    def _usage(self, model: str) -> ModelUsage:
+        usage = self._models.get(model)
+        if usage is None:
+            usage = self._models[model] = ModelUsage()
+        return usage
+
+    def cost(self, response: LLMResponse) -> float:
+        """Cost of a response (provider-reported, else from the price table)."""
+        if response.cost_usd is not None:
+            return float(response.cost_usd)
+        prompt_price, completion_price = self.prices.get(response.model, (0.0, 0.0))
+        return (response.prompt_tokens * prompt_price + response.completion_tokens * completion_price) / 1_000_000
+
+    def record(self, response: LLMResponse):
+        with self._lock:
+            usage = self._usage(response.model)
+            usage.requests += 1
+            usage.prompt_tokens += response.prompt_tokens
+            usage.completion_tokens += response.completion_tokens
+            usage.cost_usd += self.cost(response)
+            usage.latency_seconds += response.latency_seconds
+
+    def record_error(self, model: str, retried: bool):
+        with self._lock:
+            usage = self._usage(model)
+            usage.errors += 1
+            if retried:
+                usage.retries += 1
+
+    def record_coalesced(self, model: str):
+        with self._lock:
+            self._usage(model).coalesced += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Usage summary.
+
+        Returns:
+            {"models": {model: {...counters}}, "totals": {...counters}}
+        """
+        with self._lock:
+            models = {name: dict(vars(usage)) for name, usage in self._models.items()}
+        totals: Dict[str, float] = {}
+        for counters in models.values():
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return {"models": models, "totals": totals}
+
+    def reset(self):
+        with self._lock:
+            self._models.clear()
+
+
+class LLMGateway:
+    """
+    Shared LLM client with pooling, concurrency limit, coalescing, retries
+    and accounting.
+
+    Retry policy: transient errors (see is_retryable_error) are retried on the
+    same model with exponential backoff and jitter, then the next fallback
+    model is tried. Errors about the model itself (see
+    is_model_unavailable_error) move on to the next model without retries.
+    Other errors are raised immediately. When every model fails, the last
+    error is re-raised unchanged so callers can inspect it.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 30.0,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        """
+        Initialize gateway.
+
+        Args:
+            backend: Transport
+            max_concurrency: Maximum concurrent upstream calls in this process
+            max_retries: Retries per model for transient errors
+            backoff_base_seconds: First backoff delay (doubles per retry)
+            backoff_max_seconds: Backoff cap
+            prices: Per-model token prices for cost accounting (see UsageTracker)
+        """
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.usage = UsageTracker(prices)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def complete(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        fallback_models: Optional[List[str]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Any] = None,
+        max_retries: Optional[int] = None,
+        coalesce: bool = True
+    ) -> LLMResponse:
+        """
+        Run a chat completion.
+
+        Args:
+            messages: Chat messages
+            model: Primary model
+            fallback_models: Models tried in order after the primary fails
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            response_format: e.g. {"type": "json_object"}
+            tools: Tool definitions
+            tool_choice: Tool choice
+            max_retries: Override retries per model (0 when the caller has its own retry loop)
+            coalesce: Share the result with identical concurrent requests
+
+        Returns:
+            LLMResponse (response.model is the model that served it)
+        """
+        request = LLMRequest(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+        models = tuple(dict.fromkeys([model] + list(fallback_models or [])))
+        retries = self.max_retries if max_retries is None else max_retries
+
+        if not coalesce:
+            return self._complete_with_fallback(request, models, retries)
+
+        key = request.key(models)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            response = future.result()
+            self.usage.record_coalesced(response.model)
+            return replace(response, coalesced=True)
+
+        try:
+            response = self._complete_with_fallback(request, models, retries)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _complete_with_fallback(self, request: LLMRequest, models: Tuple[str, ...], retries: int) -> LLMResponse:
+        last_error: Optional[Exception] = None
+        for model in models:
+            for attempt in range(retries + 1):
+                try:
+                    return self._call(request, model)
+                except Exception as e:
+                    last_error = e
+                    retryable = is_retryable_error(e)
+                    will_retry = retryable and attempt < retries
+                    self.usage.record_error(model, retried=will_retry)
+                    if not retryable:
+                        # Unknown/unavailable model: try the next one; other bad requests fail as they are
+                        if not is_model_unavailable_error(e):
+                            raise
+                        break
+                    if will_retry:
+                        delay = self._backoff(attempt)
+                        logger.warning(f"LLM call to {model} failed ({e}); retrying in {delay:.1f}s")
+                        time.sleep(delay)
+            if model != models[-1]:
+                logger.warning(f"LLM model {model} unavailable, falling back")
+        raise last_error
+
+    def _call(self, request: LLMRequest, model: str) -> LLMResponse:
+        with self._semaphore:
+            started = time.perf_counter()
+            response = self.backend.complete(request, model)
+        response.latency_seconds = time.perf_counter() - started
+        self.usage.record(response)
+        return response
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def close(self):
+        """Close the backend's connections."""
+        self.backend.close()
+
+
+_gateways: Dict[Tuple[str, Optional[str]], LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(api_key: Optional[str] = None, base_url: Optional[str] = OPENROUTER_BASE_URL) -> LLMGateway:
+    """
+    Get the process-wide gateway for an API key.
+
+    Gateways are created on first use and shared, so all callers with the same
+    key share one connection pool, concurrency limit and usage tracker. With
+    LLM_BACKEND="stub" a single stub gateway is returned regardless of key.
+
+    Args:
+        api_key: API key (defaults to settings.OPENROUTER_API_KEY)
+        base_url: API base URL (None for api.openai.com)
+
+    Returns:
+        LLMGateway
+
+    Raises:
+        ValueError: If no API key is configured
+    """
+    if settings.LLM_BACKEND == "stub":
+        cache_key: Tuple[str, Optional[str]] = ("stub", None)
+    else:
+        api_key = api_key or settings.OPENROUTER_API_KEY
+        if not api_key or api_key == PLACEHOLDER_API_KEY:
+            raise ValueError(
+                "LLM API key not configured. Set OPENROUTER_API_KEY in .env file or pass via api_key parameter"
+            )
+        cache_key = (api_key, base_url)
+
+    with _gateways_lock:
+        gateway = _gateways.get(cache_key)
+        if gateway is None:
+            if settings.LLM_BACKEND == "stub":
+                backend: LLMBackend = StubLLMBackend()
+            else:
+                backend = OpenAICompatibleBackend(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    http2=settings.LLM_HTTP2,
+                    timeout_seconds=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                )
+            gateway = LLMGateway(
+                backend,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_retries=settings.LLM_MAX_RETRIES,
+                prices={model: tuple(price) for model, price in settings.LLM_MODEL_PRICES.items()},
+            )
+            _gateways[cache_key] = gateway
+        return gateway
+
+
+def set_llm_gateway(gateway: LLMGateway, api_key: Optional[str] = None, base_url: Optional[str] = OPENROUTER_BASE_URL):
+    """
+    Install a gateway for an API key (e.g. a stub gateway in tests/benchmarks).
+
+    Args:
+        gateway: Gateway to return from get_llm_gateway
+        api_key: API key it serves (defaults to settings.OPENROUTER_API_KEY)
+        base_url: API base URL
+    """
+    cache_key = ("stub", None) if settings.LLM_BACKEND == "stub" else (api_key or settings.OPENROUTER_API_KEY, base_url)
+    with _gateways_lock:
+        _gateways[cache_key] = gateway
+
+
+def reset_llm_gateways():
+    """Close and drop all shared gateways."""
+    with _gateways_lock:
+        gateways = list(_gateways.values())
+        _gateways.clear()
+    for gateway in gateways:
+        gateway.close()
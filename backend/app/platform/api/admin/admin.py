@@ -6,16 +6,17 @@ from typing import Optional, Dict, Any, List
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.platform.core.orchestration.kb_manager import get_kb_manager
 
 router = APIRouter(prefix="/admin", tags=["Platform Admin"])
 
 
 # Request/Response Models (Placeholders)
 class KnowledgeBaseUpdateRequest(BaseModel):
-    """Knowledge base update request model."""
-    kb_type: str  # medical | nutrition_diagnosis | mnt_rules | ayurveda | foods
-    data: Dict[str, Any]
-    version: Optional[str] = None
+    """Knowledge base update (reload) request model."""
+    force: bool = False  # Build a new KB version even if no KB file or table changed
 
 
 class KnowledgeBaseResponse(BaseModel):
@@ -26,6 +27,15 @@ class KnowledgeBaseResponse(BaseModel):
     record_count: Optional[int]
 
 
+class KnowledgeBaseReloadResponse(BaseModel):
+    """Knowledge base reload response model."""
+    version: int
+    reloaded: bool
+    changed: List[str]
+    failed: Dict[str, str]
+    seconds: float
+
+
 class SystemStatusResponse(BaseModel):
     """System status response model."""
     status: str
@@ -72,28 +82,41 @@ async def get_knowledge_base_info(
     pass
 
 
-@router.post("/knowledge-base/update", response_model=KnowledgeBaseResponse)
+@router.post("/knowledge-base/update", response_model=KnowledgeBaseReloadResponse)
 async def update_knowledge_base(
-    update_request: KnowledgeBaseUpdateRequest
+    update_request: Optional[KnowledgeBaseUpdateRequest] = None
 ):
     """
-    Update knowledge base (admin only).
+    Reload the knowledge base (admin only).
+    
+    Edit the KB JSON files (or food KB tables), then call this endpoint. The
+    changed KB is detected by checksum, rebuilt off the request path and
+    swapped in as a new version; plan generations already running finish on
+    the version they started with.
     
     Args:
-        update_request: Knowledge base update request
+        update_request: Reload options
         
     Returns:
-        Updated knowledge base information
+        Active KB version, whether a new version was swapped in and the
+        changed KB sources
         
     Raises:
-        HTTPException: If update fails
+        HTTPException: 422 if the changed KB could not be loaded (the
+            previous version stays active)
         
     Note:
-        Delegates to knowledge base service. No business logic here.
-        Knowledge base updates trigger re-evaluation of affected plans.
+        Reloads this worker only; other workers pick up the change on their
+        next KB_RELOAD_INTERVAL_SECONDS check.
     """
-    # Placeholder - delegate to service
-    pass
+    force = update_request.force if update_request is not None else False
+    result = await run_in_threadpool(get_kb_manager().reload, force)
+    if result["failed"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Knowledge base could not be loaded", **result},
+        )
+    return KnowledgeBaseReloadResponse(**result)
 
 
 @router.get("/decision-logs", response_model=List[Dict[str, Any]])
@@ -3,9 +3,9 @@ Platform Assessments API Routes.
 Assessment and intake endpoints for the platform.
 """
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Generator, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 from sqlalchemy.orm import Session
 
@@ -21,15 +21,17 @@ from app.platform.data.repositories.platform_exchange_allocation_repository impo
 from app.platform.data.repositories.platform_ayurveda_profile_repository import PlatformAyurvedaProfileRepository
 from app.platform.data.repositories.platform_diet_plan_repository import PlatformDietPlanRepository
 from app.platform.core.context import AssessmentContext, DiagnosisContext, MNTContext, TargetContext, MealStructureContext, ExchangeContext, AyurvedaContext, InterventionContext, RecipeContext
-from app.platform.engines.diagnosis_engine.diagnosis_engine import DiagnosisEngine
-from app.platform.engines.mnt_engine.mnt_engine import MNTEngine
-from app.platform.engines.target_engine.target_engine import TargetEngine
-from app.platform.engines.meal_structure_engine.meal_structure_engine import MealStructureEngine
-from app.platform.engines.exchange_system_engine.exchange_system_engine import ExchangeSystemEngine
-from app.platform.engines.ayurveda_engine.ayurveda_engine import AyurvedaEngine
-from app.platform.engines.food_engine.food_engine import FoodEngine
-from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
-from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+from app.platform.core.orchestration.engine_pool import get_engine
+from app.platform.core.orchestration.meal_plan_store import MealPlanStore
+from app.platform.core.orchestration.plan_stream import (
+    ALLOCATION_EVENT,
+    RECIPE_EVENT,
+    SUMMARY_EVENT,
+    PlanStreamEvent,
+    run_to_completion,
+)
+from app.platform.api.static_responses import static_responses
+from app.platform.api.streaming import STREAM_FORMAT_PATTERN, session_events, stream_response
 from app.platform.data.repositories.platform_food_allocation_approval_repository import PlatformFoodAllocationApprovalRepository
 
 router = APIRouter(prefix="/assessments", tags=["Platform Assessments"])
@@ -501,6 +503,33 @@ class TargetResponse(BaseModel):
     calculation_source: str
 
 
+# Upper bound on scenarios per what-if sweep request
+MAX_TARGET_SWEEP_SCENARIOS = 1000
+
+
+class TargetSweepRequest(BaseModel):
+    """Target what-if sweep request model."""
+    assessment_id: UUID
+    activity_level: Optional[str] = Field(
+        default="moderately_active",
+        description="Activity level when not varied by the grid"
+    )
+    grid: Dict[str, List[Any]] = Field(
+        default_factory=lambda: {"activity_level": ["sedentary", "moderately_active", "very_active"]},
+        description="Client profile field -> values to try, e.g. {\"activity_level\": [...], \"height_cm\": [...]}"
+    )
+
+
+class TargetScenarioResponse(TargetResponse):
+    """Targets for one sweep scenario."""
+    scenario: Dict[str, Any]
+
+
+class TargetSweepResponse(BaseModel):
+    """Target what-if sweep response model."""
+    scenarios: List[TargetScenarioResponse]
+
+
 class AyurvedaRequest(BaseModel):
     """Ayurveda processing request model."""
     assessment_id: UUID
@@ -1053,7 +1082,7 @@ async def process_diagnosis(
         )
         
         # Process assessment using Diagnosis Engine
-        diagnosis_engine = DiagnosisEngine()
+        diagnosis_engine = get_engine("diagnosis_engine")
         diagnosis_context = diagnosis_engine.process_assessment(assessment_context)
         
         # Validate that we got a diagnosis context
@@ -1239,7 +1268,7 @@ async def process_mnt(
         )
         
         # Process diagnoses using MNT Engine
-        mnt_engine = MNTEngine()
+        mnt_engine = get_engine("mnt_engine")
         mnt_context = mnt_engine.process_diagnoses(diagnosis_context)
         
         # Store MNT constraints in database (one merged record per assessment)
@@ -1392,7 +1421,7 @@ async def process_ayurveda(
     }
 
     try:
-        ayurveda_engine = AyurvedaEngine()
+        ayurveda_engine = get_engine("ayurveda_engine")
         ayurveda_context = ayurveda_engine.process_ayurveda_assessment(
             client_profile=client_profile,
             mnt_context=mnt_context,
@@ -1433,52 +1462,29 @@ async def process_ayurveda(
         )
 
 
-@router.post("/targets", response_model=TargetResponse)
-async def process_targets(
-    target_request: TargetRequest,
-    db: Session = Depends(get_db)
-):
+def _load_target_inputs(db: Session, assessment_id: UUID, activity_level: Optional[str]):
     """
-    Calculate nutrition targets for an assessment.
-
-    This endpoint executes the Target stage of the NCP pipeline.
-    It uses the Target Engine to compute calories, macros, and key micros,
-    respecting all MNT constraints (mandatory).
+    Load the assessment, merged MNT constraints and client profile for target calculation.
 
-    Args:
-        target_request: Target request with assessment ID and optional activity level
-        db: Database session
-        
-    Returns:
-        Target results with:
-        - calories_target: Calculated calorie target
-        - macros: Macro ranges in grams
-        - key_micros: Key micronutrient targets
-        - calculation_source: Source of calorie calculation (bmr | tdee | custom)
-        
     Raises:
-        HTTPException:
-            - 404 if assessment not found
-            - 404 if MNT constraints not found (must run MNT first)
-            - 400 for processing errors
-            - 500 for database errors
+        HTTPException: 404 if the assessment or its MNT constraints are missing
     """
     # Validate assessment exists
     assessment_repository = PlatformAssessmentRepository(db)
-    assessment = assessment_repository.get_by_id(target_request.assessment_id)
+    assessment = assessment_repository.get_by_id(assessment_id)
     if assessment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Assessment with id {target_request.assessment_id} not found"
+            detail=f"Assessment with id {assessment_id} not found"
         )
 
     # Get MNT constraints (must exist)
     mnt_repository = PlatformMNTConstraintRepository(db)
-    mnt_constraints = mnt_repository.get_by_assessment_id(target_request.assessment_id)
+    mnt_constraints = mnt_repository.get_by_assessment_id(assessment_id)
     if not mnt_constraints:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No MNT constraints found for assessment {target_request.assessment_id}. Please run MNT first."
+            detail=f"No MNT constraints found for assessment {assessment_id}. Please run MNT first."
         )
 
     # Use the first (merged) constraint
@@ -1489,7 +1495,7 @@ async def process_targets(
     if mnt_record.rule_id:
         rule_ids_used = [r for r in mnt_record.rule_id.split(",") if r]
     mnt_context = MNTContext(
-        assessment_id=target_request.assessment_id,
+        assessment_id=assessment_id,
         macro_constraints=mnt_record.macro_constraints or {},
         micro_constraints=mnt_record.micro_constraints or {},
         food_exclusions=mnt_record.food_exclusions or [],
@@ -1507,12 +1513,48 @@ async def process_targets(
         "gender": client_context.get("gender") or snapshot.get("gender"),
         "height_cm": client_context.get("height_cm") or anthropometry.get("height_cm"),
         "weight_kg": client_context.get("weight_kg") or anthropometry.get("weight_kg"),
-        "activity_level": target_request.activity_level,
+        "activity_level": activity_level,
     }
+    return assessment, mnt_context, client_profile
+
+
+@router.post("/targets", response_model=TargetResponse)
+async def process_targets(
+    target_request: TargetRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Calculate nutrition targets for an assessment.
+
+    This endpoint executes the Target stage of the NCP pipeline.
+    It uses the Target Engine to compute calories, macros, and key micros,
+    respecting all MNT constraints (mandatory).
+
+    Args:
+        target_request: Target request with assessment ID and optional activity level
+        db: Database session
+        
+    Returns:
+        Target results with:
+        - calories_target: Calculated calorie target
+        - macros: Macro ranges in grams
+        - key_micros: Key micronutrient targets
+        - calculation_source: Source of calorie calculation (bmr | tdee | custom)
+        
+    Raises:
+        HTTPException:
+            - 404 if assessment not found
+            - 404 if MNT constraints not found (must run MNT first)
+            - 400 for processing errors
+            - 500 for database errors
+    """
+    assessment, mnt_context, client_profile = _load_target_inputs(
+        db, target_request.assessment_id, target_request.activity_level
+    )
 
     try:
         # Calculate targets using Target Engine
-        target_engine = TargetEngine()
+        target_engine = get_engine("target_engine")
         target_context = target_engine.calculate_targets(
             client_profile=client_profile,
             mnt_context=mnt_context,
@@ -1557,6 +1599,65 @@ async def process_targets(
         )
 
 
+@router.post("/targets/sweep", response_model=TargetSweepResponse)
+async def sweep_targets(
+    sweep_request: TargetSweepRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    What-if sweep of nutrition targets for an assessment.
+
+    Calculates targets for every combination of the profile overrides in
+    the grid (e.g. activity levels × heights) in one batch. Nothing is
+    persisted; use POST /targets to store the chosen targets.
+
+    Args:
+        sweep_request: Assessment ID and scenario grid
+        db: Database session
+
+    Returns:
+        Targets per scenario, in grid order
+
+    Raises:
+        HTTPException:
+            - 404 if assessment or MNT constraints not found
+            - 400 if the grid is too large or invalid
+    """
+    scenario_count = 1
+    for values in sweep_request.grid.values():
+        scenario_count *= len(values)
+    if scenario_count > MAX_TARGET_SWEEP_SCENARIOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sweep has {scenario_count} scenarios; the maximum is {MAX_TARGET_SWEEP_SCENARIOS}"
+        )
+
+    _, mnt_context, client_profile = _load_target_inputs(db, sweep_request.assessment_id, None)
+    client_profile["activity_level"] = sweep_request.activity_level
+
+    try:
+        target_engine = get_engine("target_engine")
+        results = target_engine.sweep_targets(client_profile, mnt_context, sweep_request.grid)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid data for target sweep: {str(e)}"
+        )
+
+    return TargetSweepResponse(
+        scenarios=[
+            TargetScenarioResponse(
+                scenario=result["scenario"],
+                calories_target=result["targets"].calories_target or 0,
+                macros=result["targets"].macros or {},
+                key_micros=result["targets"].key_micros or {},
+                calculation_source=result["targets"].calculation_source or "custom",
+            )
+            for result in results
+        ]
+    )
+
+
 @router.post("/meal-structure", response_model=MealStructureResponse)
 async def process_meal_structure(
     meal_structure_request: MealStructureRequest,
@@ -1646,7 +1747,7 @@ async def process_meal_structure(
 
     try:
         # Generate meal structure using Meal Structure Engine
-        meal_structure_engine = MealStructureEngine()
+        meal_structure_engine = get_engine("meal_structure_engine")
         meal_structure_context = meal_structure_engine.generate_structure(
             target_context=target_context,
             assessment_snapshot=assessment_snapshot,
@@ -2180,12 +2281,14 @@ async def process_food_allocation(
         )
 
         # Build intervention context from plan
+        plan_store = MealPlanStore(db, plan_repo=plan_repo)
+        stored_meal_plan = plan_store.load_meal_plan(plan_record) or {}
         intervention_context = InterventionContext(
             assessment_id=allocation_request.assessment_id,
             client_id=assessment.client_id,
             plan_id=plan_record.id,
             plan_version=plan_record.plan_version or 1,
-            meal_plan=plan_record.meal_plan or {},
+            meal_plan=stored_meal_plan,
             explanations=plan_record.explanations or {},
             constraints_snapshot=plan_record.constraints_snapshot or {}
         )
@@ -2201,13 +2304,11 @@ async def process_food_allocation(
 
         # Store meal allocation in plan record
         updated_meal_plan = {
-            **(plan_record.meal_plan or {}),
+            **stored_meal_plan,
             "meal_allocation": meal_allocation_result
         }
         
-        plan_repo.update(plan_record.id, {
-            "meal_plan": updated_meal_plan
-        })
+        plan_store.save_meal_plan(plan_record.id, updated_meal_plan)
 
         return FoodAllocationResponse(
             assessment_id=str(allocation_request.assessment_id),
@@ -2352,7 +2453,7 @@ async def get_food_allocation(
         )
     
     plan_record = max(plans, key=lambda p: p.plan_version or 1)
-    meal_plan = plan_record.meal_plan or {}
+    meal_plan = MealPlanStore(db, plan_repo=plan_repo).load_meal_plan(plan_record, include_days=False) or {}
     meal_allocation = meal_plan.get("meal_allocation")
     
     if not meal_allocation:
@@ -2413,6 +2514,7 @@ async def get_food_allocation_approvals(
 @router.post("/recipe-generation", response_model=RecipeResponse)
 async def process_recipe_generation(
     recipe_request: RecipeRequest,
+    stream: Optional[str] = Query(None, pattern=STREAM_FORMAT_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
@@ -2424,6 +2526,8 @@ async def process_recipe_generation(
     
     Args:
         recipe_request: Recipe generation request with assessment ID and optional preferences
+        stream: "ndjson" or "sse" to stream each day's allocation and recipes
+            as they are generated, ending with a summary event
         db: Database session
         
     Returns:
@@ -2447,6 +2551,19 @@ async def process_recipe_generation(
         Recipe generation must run after food intervention.
         It requires intervention (plan), exchange allocation, and meal structure.
     """
+    if stream:
+        return stream_response(
+            session_events(lambda stream_db: _recipe_generation_events(recipe_request, stream_db)),
+            stream
+        )
+    return run_to_completion(_recipe_generation_events(recipe_request, db))
+
+
+def _recipe_generation_events(
+    recipe_request: RecipeRequest,
+    db: Session
+) -> Generator[PlanStreamEvent, None, RecipeResponse]:
+    """Run recipe generation, yielding each day as it completes; returns the response."""
     # Validate assessment exists
     assessment_repository = PlatformAssessmentRepository(db)
     assessment = assessment_repository.get_by_id(recipe_request.assessment_id)
@@ -2544,7 +2661,7 @@ async def process_recipe_generation(
         approval_status_map = approval_repo.get_approval_status_map(recipe_request.assessment_id)
         
         # Get meal allocation from plan
-        meal_plan = plan_record.meal_plan or {}
+        meal_plan = MealPlanStore(db, plan_repo=plan_repo).load_meal_plan(plan_record) or {}
         meal_allocation = meal_plan.get("meal_allocation")
         
         if not meal_allocation:
@@ -2567,13 +2684,16 @@ async def process_recipe_generation(
             constraints_snapshot=plan_record.constraints_snapshot or {}
         )
 
-        # Execute Phase 2: Recipe Generation (only for approved meals)
-        recipe_result = orchestrator.recipe_generation_engine.generate_recipes_for_meal_plan(
-            meal_plan=filtered_meal_allocation,
-            mnt_context=mnt_context,
-            ayurveda_context=ayurveda_context,
-            num_days=7
-        )
+        # Execute Phase 2: Recipe Generation (only for approved meals), day by day
+        recipe_engine = orchestrator.recipe_generation_engine
+        recipe_constraints = recipe_engine.build_recipe_constraints(mnt_context, ayurveda_context)
+        allocated_days = filtered_meal_allocation.get("days", {})
+        recipe_days = {}
+        for day_key in sorted(allocated_days.keys()):
+            yield ALLOCATION_EVENT, {"day_key": day_key, "day": allocated_days[day_key]}
+            recipe_days[day_key] = recipe_engine.generate_recipes_for_day(allocated_days[day_key], recipe_constraints)
+            yield RECIPE_EVENT, {"day_key": day_key, "day": recipe_days[day_key]}
+        recipe_result = recipe_engine.build_recipe_result(filtered_meal_allocation, recipe_days)
         
         # Merge with original meal allocation to preserve all data
         final_result = {
@@ -2612,14 +2732,22 @@ async def process_recipe_generation(
             "approved_meals_only": True
         }
         
-        plan_repo.update(plan_record.id, {
-            "meal_plan": updated_meal_plan,
-            "explanations": explanations
-        })
+        MealPlanStore(db, plan_repo=plan_repo).save_meal_plan(
+            plan_record.id,
+            updated_meal_plan,
+            extra_fields={"explanations": explanations}
+        )
 
         seven_day_plan = recipe_context.meals_with_recipes or {}
         variety_metrics = seven_day_plan.get("variety_metrics", {})
 
+        yield SUMMARY_EVENT, {
+            "assessment_id": str(recipe_context.assessment_id),
+            "plan_id": str(recipe_context.plan_id) if recipe_context.plan_id else None,
+            "plan_version": recipe_context.plan_version,
+            "summary": seven_day_plan.get("summary"),
+            "variety_metrics": variety_metrics,
+        }
         return RecipeResponse(
             assessment_id=str(recipe_context.assessment_id),
             plan_id=str(recipe_context.plan_id) if recipe_context.plan_id else None,
@@ -2898,8 +3026,28 @@ async def get_meal_structure(
     )
 
 
+def _build_exchange_categories(core_config: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Build the exchange category list from the core food groups config."""
+    if not core_config:
+        return []
+    
+    # Return simple list with only exchange_category_id and display_name
+    categories = []
+    for group in core_config.get("core_food_groups", []):
+        category_id = group.get("exchange_category_id")
+        display_name = group.get("display_name")
+        
+        if category_id and display_name:
+            categories.append({
+                "exchange_category_id": category_id,
+                "display_name": display_name
+            })
+    return categories
+
+
 @router.get("/exchange-categories")
 async def get_exchange_categories(
+    request: Request,
     assessment_id: Optional[str] = Query(default=None, description="Optional assessment ID (ignored, kept for backward compatibility)")
 ):
     """
@@ -2907,6 +3055,8 @@ async def get_exchange_categories(
     
     Returns a simple list of all available exchange categories with their
     category IDs and display names from the core food groups configuration.
+    The list is encoded once per loaded KB config and served with an ETag
+    (If-None-Match with the current ETag returns 304 Not Modified).
     
     Args:
         assessment_id: Optional assessment ID (ignored, kept for backward compatibility)
@@ -2920,33 +3070,21 @@ async def get_exchange_categories(
     logger = logging.getLogger(__name__)
     
     try:
-        logger.info(f"get_exchange_categories called with assessment_id={assessment_id}")
         from app.platform.engines.exchange_system_engine.kb_exchange_system import get_core_food_groups
         
         core_config = get_core_food_groups()
-        logger.info(f"Core config loaded: {core_config is not None}")
-        
         if not core_config:
             logger.warning("No core config found, returning empty list")
-            return []
         
-        core_groups = core_config.get("core_food_groups", [])
-        logger.info(f"Found {len(core_groups)} core food groups")
-        
-        # Return simple list with only exchange_category_id and display_name
-        categories = []
-        for group in core_groups:
-            category_id = group.get("exchange_category_id")
-            display_name = group.get("display_name")
-            
-            if category_id and display_name:
-                categories.append({
-                    "exchange_category_id": category_id,
-                    "display_name": display_name
-                })
-        
-        logger.info(f"Returning {len(categories)} categories")
-        return categories
+        # Building the list is cheap; keying on its content re-encodes the
+        # response only when a reloaded KB config changes the categories
+        categories = _build_exchange_categories(core_config)
+        return static_responses.respond(
+            request,
+            "assessments.exchange_categories",
+            lambda: categories,
+            version=tuple((c["exchange_category_id"], c["display_name"]) for c in categories),
+        )
     except Exception as e:
         logger.error(f"Error in get_exchange_categories: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -3124,7 +3262,7 @@ async def get_intervention(
         assessment_id=str(plan_record.assessment_id),
         plan_id=str(plan_record.id),
         plan_version=plan_record.plan_version,
-        meal_plan=plan_record.meal_plan or {},
+        meal_plan=MealPlanStore(db, plan_repo=plan_repository).load_meal_plan(plan_record) or {},
         explanations=plan_record.explanations or {},
         constraints_snapshot=plan_record.constraints_snapshot or {}
     )
@@ -3182,7 +3320,7 @@ async def get_recipe_generation(
     plan_record = max(plans, key=lambda p: p.plan_version or 1)
     
     # Check if recipe generation has been done (has seven_day_plan in meal_plan)
-    meal_plan = plan_record.meal_plan or {}
+    meal_plan = MealPlanStore(db, plan_repo=plan_repository).load_meal_plan(plan_record) or {}
     seven_day_plan = meal_plan.get("seven_day_plan")
     
     if not seven_day_plan:
@@ -3265,7 +3403,9 @@ async def get_ncp_status(
     has_recipe_generation = False
     if has_plan:
         latest_plan = max(plans, key=lambda p: p.plan_version or 1)
-        meal_plan = latest_plan.meal_plan or {}
+        meal_plan = MealPlanStore(db, plan_repo=plan_repository).load_meal_plan(
+            latest_plan, include_days=False
+        ) or {}
         has_intervention = bool(meal_plan)  # Plan exists = intervention done
         has_food_allocation = bool(meal_plan.get("meal_allocation"))  # Has food allocation = Phase 1 done
         has_recipe_generation = bool(meal_plan.get("seven_day_plan"))  # Has recipes = recipe generation done
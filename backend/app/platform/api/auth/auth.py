@@ -2,7 +2,9 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.database import get_db
 from app.config import settings
@@ -10,12 +12,20 @@ from app.platform.data.models.platform_user import PlatformUser
 from app.platform.data.repositories.platform_user_repository import PlatformUserRepository
 from app.platform.schemas.auth import Token
 from app.platform.schemas.user import User
-from app.platform.utils.security import verify_password, create_access_token, verify_token
+from app.platform.infra.cache.principal_cache import principal_cache
+from app.platform.utils.security import verify_password_async, create_access_token, verify_token
 
 router = APIRouter(prefix="/auth", tags=["Platform Auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/platform/auth/login")
 
+_USER_COLUMNS = tuple(attr.key for attr in inspect(PlatformUser).column_attrs)
+
+
+def _user_snapshot(user: PlatformUser) -> dict:
+    """Column values of a user, for the principal cache."""
+    return {key: getattr(user, key) for key in _USER_COLUMNS}
+
 
 def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -24,6 +34,11 @@ def get_current_user(
     """
     Get current authenticated user.
     
+    Users are cached per token (see principal_cache), so repeated requests
+    with the same token skip the user lookup. On a cache hit the returned
+    PlatformUser is a detached copy built from the cached columns; use it
+    for reads only and re-query it if it needs to be modified.
+    
     Args:
         token: JWT token from Authorization header
         db: Database session
@@ -48,11 +63,24 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
+    cache_key = principal_cache.token_key(payload)
+    snapshot = principal_cache.get(cache_key)
+    if snapshot is not None:
+        return PlatformUser(**snapshot)
+    
+    generation = principal_cache.generation(username)
     user_repo = PlatformUserRepository(db)
     user = user_repo.get_by_username(username)
     if user is None:
         raise credentials_exception
     
+    principal_cache.set(
+        cache_key,
+        username,
+        _user_snapshot(user),
+        token_expires_at=payload.get("exp"),
+        generation=generation
+    )
     return user
 
 
@@ -95,9 +123,10 @@ async def login(
         HTTPException: If credentials are invalid or user is inactive
     """
     user_repo = PlatformUserRepository(db)
-    user = user_repo.get_by_username(form_data.username)
+    user = await run_in_threadpool(user_repo.get_by_username, form_data.username)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # bcrypt runs on a bounded pool so concurrent logins don't block the event loop
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -2,7 +2,7 @@
 Platform Plans API Routes.
 Diet plan generation and retrieval endpoints.
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Generator, List
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
@@ -17,7 +17,15 @@ from app.platform.data.repositories.platform_mnt_constraint_repository import Pl
 from app.platform.data.repositories.platform_nutrition_target_repository import PlatformNutritionTargetRepository
 from app.platform.data.repositories.platform_ayurveda_profile_repository import PlatformAyurvedaProfileRepository
 from app.platform.core.orchestration.ncp_orchestrator import NCPOrchestrator
+from app.platform.core.orchestration.meal_plan_store import PLAN_DAYS_KEY, MealPlanStore
+from app.platform.core.orchestration.plan_stream import SUMMARY_EVENT, PlanStreamEvent, run_to_completion
+from app.platform.api.streaming import STREAM_FORMAT_PATTERN, session_events, stream_response
+from app.platform.data.models.platform_diet_plan import PlatformDietPlan
 from app.platform.core.context import InterventionContext, MNTContext, TargetContext, AyurvedaContext
+from app.platform.engines.food_engine.kb_food_adapter import extract_medical_conditions
+from app.platform.engines.food_engine.substitution_index import get_substitution_index
+from app.platform.engines.food_engine.nutrient_matrix import get_nutrient_matrix
+from app.platform.engines.plan_analysis_engine.plan_analysis_engine import PlanAnalysisEngine
 
 router = APIRouter(prefix="/plans", tags=["Platform Plans"])
 
@@ -51,9 +59,54 @@ class PlanUpdateRequest(BaseModel):
     explanations: Optional[Dict[str, Any]]
 
 
+class PlanAnalysisRequest(BaseModel):
+    """Plan nutrition analysis request model (e.g. a plan being edited)."""
+    assessment_id: Optional[UUID] = None  # Targets and MNT constraints to check against
+    meal_plan: Dict[str, Any]
+    include_contributions: bool = False
+
+
+class FoodSubstituteResponse(BaseModel):
+    """Food substitute response model."""
+    food_id: str
+    display_name: str
+    exchange_category: str
+    distance: float
+
+
+class FoodSubstitutesResponse(BaseModel):
+    """Food substitutes response model."""
+    food_id: str
+    exchange_category: str
+    backend: str  # faiss | numpy
+    substitutes: List[FoodSubstituteResponse]
+
+
+def _plan_response(
+    plan: PlatformDietPlan,
+    store: MealPlanStore,
+    day_from: Optional[int] = None,
+    day_to: Optional[int] = None,
+    include_days: bool = True
+) -> PlanResponse:
+    """Build a PlanResponse, reading only the requested plan days."""
+    return PlanResponse(
+        id=plan.id,
+        client_id=plan.client_id,
+        assessment_id=plan.assessment_id,
+        plan_version=plan.plan_version,
+        status=plan.status,
+        meal_plan=store.load_meal_plan(plan, day_from=day_from, day_to=day_to, include_days=include_days),
+        explanations=plan.explanations,
+        constraints_snapshot=plan.constraints_snapshot,
+        created_at=str(plan.created_at),
+    )
+
+
 @router.post("/generate", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
 async def generate_plan(
     plan_request: PlanGenerateRequest,
+    stream: Optional[str] = Query(None, pattern=STREAM_FORMAT_PATTERN),
     db: Session = Depends(get_db)
 ):
     """
@@ -61,6 +114,8 @@ async def generate_plan(
     
     Args:
         plan_request: Plan generation request with client and assessment IDs
+        stream: "ndjson" or "sse" to stream stage results and each day as it
+            is generated, ending with a summary event
         
     Returns:
         Generated diet plan
@@ -70,6 +125,21 @@ async def generate_plan(
         Intake → Assessment → Diagnosis → MNT → Target → Ayurveda → Intervention
         This endpoint triggers the full plan generation process.
     """
+    if stream:
+        return stream_response(
+            session_events(lambda stream_db: _generate_plan_events(plan_request, stream_db)),
+            stream
+        )
+
+    plan_record = run_to_completion(_generate_plan_events(plan_request, db))
+    return _plan_response(plan_record, MealPlanStore(db))
+
+
+def _generate_plan_events(
+    plan_request: PlanGenerateRequest,
+    db: Session
+) -> Generator[PlanStreamEvent, None, PlatformDietPlan]:
+    """Run plan generation, yielding pipeline events; returns the plan record."""
     client_repo = PlatformClientRepository(db)
     client = client_repo.get_by_id(plan_request.client_id)
     if client is None:
@@ -87,7 +157,7 @@ async def generate_plan(
         )
 
     orchestrator = NCPOrchestrator(db=db, client_id=plan_request.client_id, enable_ayurveda=bool(plan_request.enable_ayurveda))
-    pipeline = orchestrator.execute_full_pipeline(
+    pipeline = yield from orchestrator.stream_full_pipeline(
         assessment_id=plan_request.assessment_id,
         client_preferences=plan_request.client_preferences,
         enable_ayurveda=plan_request.enable_ayurveda
@@ -104,17 +174,16 @@ async def generate_plan(
     if plan_record is None:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Plan generation failed to persist plan record")
 
-    return PlanResponse(
-        id=plan_record.id,
-        client_id=plan_record.client_id,
-        assessment_id=plan_record.assessment_id,
-        plan_version=plan_record.plan_version,
-        status=plan_record.status,
-        meal_plan=plan_record.meal_plan,
-        explanations=plan_record.explanations,
-        constraints_snapshot=plan_record.constraints_snapshot,
-        created_at=str(plan_record.created_at),
-    )
+    seven_day_plan = pipeline["recipe"].meals_with_recipes or {}
+    yield SUMMARY_EVENT, {
+        "plan_id": plan_record.id,
+        "plan_version": plan_record.plan_version,
+        "status": plan_record.status,
+        "summary": seven_day_plan.get("summary"),
+        "variety_metrics": seven_day_plan.get("variety_metrics"),
+        "nutrition_summary": seven_day_plan.get("nutrition_summary"),
+    }
+    return plan_record
 
 
 @router.post("/generate-intervention", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
@@ -250,22 +319,184 @@ async def generate_intervention_only(
             detail="Plan generation failed to persist plan record"
         )
 
-    return PlanResponse(
-        id=plan_record.id,
-        client_id=plan_record.client_id,
-        assessment_id=plan_record.assessment_id,
-        plan_version=plan_record.plan_version,
-        status=plan_record.status,
-        meal_plan=plan_record.meal_plan,
-        explanations=plan_record.explanations,
-        constraints_snapshot=plan_record.constraints_snapshot,
-        created_at=str(plan_record.created_at),
+    return _plan_response(plan_record, MealPlanStore(db, plan_repo=plan_repo))
+
+
+def _plan_with_days(meal_plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the part of a meal_plan that holds its days.
+
+    Stored plans keep the days under seven_day_plan (with recipes) or, before
+    recipe generation, under meal_allocation. Plans with top-level days (e.g.
+    MealAllocationEngine output) are returned as they are.
+    """
+    if meal_plan.get("days"):
+        return meal_plan
+    for key in (PLAN_DAYS_KEY, "meal_allocation"):
+        nested = meal_plan.get(key)
+        if isinstance(nested, dict) and nested.get("days"):
+            return nested
+    return meal_plan
+
+
+def _analyze_meal_plan(
+    db: Session,
+    meal_plan: Dict[str, Any],
+    assessment_id: Optional[UUID],
+    include_contributions: bool
+) -> Dict[str, Any]:
+    """Run PlanAnalysisEngine with the assessment's targets and MNT constraints (if any)."""
+    target_context = None
+    mnt_context = None
+    weight_kg = None
+    if assessment_id is not None:
+        target = PlatformNutritionTargetRepository(db).get_by_assessment_id(assessment_id)
+        if target:
+            target_context = TargetContext(
+                assessment_id=assessment_id,
+                calories_target=float(target.calories_target) if target.calories_target is not None else None,
+                macros=target.macros,
+                key_micros=target.key_micros,
+                calculation_source=target.calculation_source
+            )
+        mnt_constraints = PlatformMNTConstraintRepository(db).get_by_assessment_id(assessment_id)
+        if mnt_constraints:
+            mnt_record = mnt_constraints[0]  # Use the first (merged) constraint
+            mnt_context = MNTContext(
+                assessment_id=assessment_id,
+                macro_constraints=mnt_record.macro_constraints or {},
+                micro_constraints=mnt_record.micro_constraints or {},
+                food_exclusions=mnt_record.food_exclusions or [],
+            )
+        assessment = PlatformAssessmentRepository(db).get_by_id(assessment_id)
+        snapshot = (assessment.assessment_snapshot or {}) if assessment else {}
+        anthropometry = snapshot.get("clinical_data", {}).get("anthropometry", {})
+        weight_kg = snapshot.get("client_context", {}).get("weight_kg") or anthropometry.get("weight_kg")
+
+    return PlanAnalysisEngine().analyze(
+        _plan_with_days(meal_plan or {}),
+        get_nutrient_matrix(db),
+        target_context=target_context,
+        mnt_context=mnt_context,
+        weight_kg=weight_kg,
+        include_contributions=include_contributions,
+    )
+
+
+@router.post("/analysis")
+async def analyze_meal_plan(
+    analysis_request: PlanAnalysisRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze the nutrition of a meal plan without saving it.
+    
+    For plans being edited: returns per-meal/day/plan totals, target
+    deviations and MNT constraint violations for the submitted meal_plan.
+    
+    Args:
+        analysis_request: Meal plan, optional assessment and contribution toggle
+        
+    Returns:
+        PlanAnalysisEngine analysis
+    """
+    return _analyze_meal_plan(
+        db,
+        analysis_request.meal_plan,
+        analysis_request.assessment_id,
+        analysis_request.include_contributions
+    )
+
+
+@router.get("/{plan_id}/analysis")
+async def get_plan_analysis(
+    plan_id: UUID,
+    include_contributions: bool = Query(False, description="Include per-food nutrient contributions"),
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze the nutrition of a stored diet plan.
+    
+    Args:
+        plan_id: Plan UUID
+        include_contributions: Include per-food nutrient contributions
+        
+    Returns:
+        PlanAnalysisEngine analysis against the plan's assessment targets and MNT constraints
+        
+    Raises:
+        HTTPException: If plan not found
+    """
+    plan_repo = PlatformDietPlanRepository(db)
+    plan = plan_repo.get_by_id(plan_id)
+    if plan is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+    meal_plan = MealPlanStore(db, plan_repo=plan_repo).load_meal_plan(plan) or {}
+    return _analyze_meal_plan(db, meal_plan, plan.assessment_id, include_contributions)
+
+
+@router.get("/foods/{food_id}/substitutes", response_model=FoodSubstitutesResponse)
+async def get_food_substitutes(
+    food_id: str,
+    k: int = Query(5, ge=1, le=50, description="Number of substitutes"),
+    assessment_id: Optional[UUID] = Query(None, description="Apply this assessment's MNT exclusions"),
+    exclude_food_ids: Optional[List[str]] = Query(None, description="Food IDs to leave out (e.g. foods already in the meal)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get exchange-equivalent substitutes for a food.
+    
+    Args:
+        food_id: Food to substitute
+        k: Number of substitutes
+        assessment_id: Optional assessment whose MNT food exclusions and
+            medical conditions filter the substitutes
+        exclude_food_ids: Additional food IDs to leave out
+        
+    Returns:
+        Nearest foods of the same exchange category by per-exchange nutrients
+        
+    Raises:
+        HTTPException: If the food or the assessment's MNT constraints are not found
+    """
+    index = get_substitution_index(db)
+    food = index.get_food(food_id)
+    if food is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Food {food_id} not found")
+
+    excluded = set(exclude_food_ids or [])
+    medical_conditions: List[str] = []
+    if assessment_id is not None:
+        mnt_constraints = PlatformMNTConstraintRepository(db).get_by_assessment_id(assessment_id)
+        if not mnt_constraints:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No MNT constraints found for assessment {assessment_id}"
+            )
+        mnt_context = MNTContext(
+            assessment_id=assessment_id,
+            food_exclusions=mnt_constraints[0].food_exclusions or [],
+        )
+        excluded.update(str(ex) for ex in mnt_context.food_exclusions)
+        medical_conditions = extract_medical_conditions(mnt_context)
+
+    substitutes = index.substitutes(
+        food_id, k=k, exclude_food_ids=excluded, medical_conditions=medical_conditions
+    )
+    return FoodSubstitutesResponse(
+        food_id=food_id,
+        exchange_category=food["exchange_category"],
+        backend=index.backend,
+        substitutes=[FoodSubstituteResponse(**vars(sub)) for sub in substitutes],
     )
 
 
 @router.get("/{plan_id}", response_model=PlanResponse)
 async def get_plan(
     plan_id: UUID,
+    day_from: Optional[int] = Query(None, ge=1, description="First plan day to include"),
+    day_to: Optional[int] = Query(None, ge=1, description="Last plan day to include"),
+    include_days: bool = Query(True, description="Set false to omit plan days"),
     db: Session = Depends(get_db)
 ):
     """
@@ -273,6 +504,9 @@ async def get_plan(
     
     Args:
         plan_id: Plan UUID
+        day_from: First plan day to include (default: first day)
+        day_to: Last plan day to include (default: last day)
+        include_days: Whether to include plan days at all
         
     Returns:
         Diet plan information
@@ -287,23 +521,16 @@ async def get_plan(
     plan = plan_repo.get_by_id(plan_id)
     if plan is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
-    return PlanResponse(
-        id=plan.id,
-        client_id=plan.client_id,
-        assessment_id=plan.assessment_id,
-        plan_version=plan.plan_version,
-        status=plan.status,
-        meal_plan=plan.meal_plan,
-        explanations=plan.explanations,
-        constraints_snapshot=plan.constraints_snapshot,
-        created_at=str(plan.created_at),
-    )
+    return _plan_response(plan, MealPlanStore(db, plan_repo=plan_repo), day_from, day_to, include_days)
 
 
 @router.get("/client/{client_id}", response_model=List[PlanResponse])
 async def get_client_plans(
     client_id: UUID,
     status_filter: Optional[str] = Query(None, description="Filter by status: active | archived | draft"),
+    day_from: Optional[int] = Query(None, ge=1, description="First plan day to include"),
+    day_to: Optional[int] = Query(None, ge=1, description="Last plan day to include"),
+    include_days: bool = Query(True, description="Set false to omit plan days"),
     db: Session = Depends(get_db)
 ):
     """
@@ -312,6 +539,9 @@ async def get_client_plans(
     Args:
         client_id: Client UUID
         status_filter: Optional status filter
+        day_from: First plan day to include (default: first day)
+        day_to: Last plan day to include (default: last day)
+        include_days: Whether to include plan days at all
         
     Returns:
         List of diet plans
@@ -328,25 +558,16 @@ async def get_client_plans(
     if status_filter:
         plans = [p for p in plans if p.status == status_filter]
 
-    return [
-        PlanResponse(
-            id=p.id,
-            client_id=p.client_id,
-            assessment_id=p.assessment_id,
-            plan_version=p.plan_version,
-            status=p.status,
-            meal_plan=p.meal_plan,
-            explanations=p.explanations,
-            constraints_snapshot=p.constraints_snapshot,
-            created_at=str(p.created_at),
-        )
-        for p in plans
-    ]
+    store = MealPlanStore(db, plan_repo=plan_repo)
+    return [_plan_response(p, store, day_from, day_to, include_days) for p in plans]
 
 
 @router.get("/client/{client_id}/active", response_model=Optional[PlanResponse])
 async def get_active_plan(
     client_id: UUID,
+    day_from: Optional[int] = Query(None, ge=1, description="First plan day to include"),
+    day_to: Optional[int] = Query(None, ge=1, description="Last plan day to include"),
+    include_days: bool = Query(True, description="Set false to omit plan days"),
     db: Session = Depends(get_db)
 ):
     """
@@ -354,6 +575,9 @@ async def get_active_plan(
     
     Args:
         client_id: Client UUID
+        day_from: First plan day to include (default: first day)
+        day_to: Last plan day to include (default: last day)
+        include_days: Whether to include plan days at all
         
     Returns:
         Active diet plan or None
@@ -372,17 +596,7 @@ async def get_active_plan(
         return None
     # pick latest by version
     plan = sorted(active_plans, key=lambda p: p.plan_version or 1, reverse=True)[0]
-    return PlanResponse(
-        id=plan.id,
-        client_id=plan.client_id,
-        assessment_id=plan.assessment_id,
-        plan_version=plan.plan_version,
-        status=plan.status,
-        meal_plan=plan.meal_plan,
-        explanations=plan.explanations,
-        constraints_snapshot=plan.constraints_snapshot,
-        created_at=str(plan.created_at),
-    )
+    return _plan_response(plan, MealPlanStore(db, plan_repo=plan_repo), day_from, day_to, include_days)
 
 
 @router.put("/{plan_id}", response_model=PlanResponse)
@@ -415,23 +629,15 @@ async def update_plan(
     update_payload = {}
     if plan_data.status is not None:
         update_payload["status"] = plan_data.status
-    if plan_data.meal_plan is not None:
-        update_payload["meal_plan"] = plan_data.meal_plan
     if plan_data.explanations is not None:
         update_payload["explanations"] = plan_data.explanations
 
-    updated = plan_repo.update(plan_id, update_payload)
-    return PlanResponse(
-        id=updated.id,
-        client_id=updated.client_id,
-        assessment_id=updated.assessment_id,
-        plan_version=updated.plan_version,
-        status=updated.status,
-        meal_plan=updated.meal_plan,
-        explanations=updated.explanations,
-        constraints_snapshot=updated.constraints_snapshot,
-        created_at=str(updated.created_at),
-    )
+    store = MealPlanStore(db, plan_repo=plan_repo)
+    if plan_data.meal_plan is not None:
+        updated = store.save_meal_plan(plan_id, plan_data.meal_plan, extra_fields=update_payload)
+    else:
+        updated = plan_repo.update(plan_id, update_payload)
+    return _plan_response(updated, store)
 
 
 @router.delete("/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -452,7 +658,8 @@ async def delete_plan(
         Delegates to plan service. No business logic here.
     """
     plan_repo = PlatformDietPlanRepository(db)
-    deleted = plan_repo.delete(plan_id)
+    # Versions stored as deltas against this plan are materialized first
+    deleted = MealPlanStore(db, plan_repo=plan_repo).delete_plan(plan_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
     return
@@ -483,15 +690,5 @@ async def archive_plan(
     if existing is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
     updated = plan_repo.update(plan_id, {"status": "archived"})
-    return PlanResponse(
-        id=updated.id,
-        client_id=updated.client_id,
-        assessment_id=updated.assessment_id,
-        plan_version=updated.plan_version,
-        status=updated.status,
-        meal_plan=updated.meal_plan,
-        explanations=updated.explanations,
-        constraints_snapshot=updated.constraints_snapshot,
-        created_at=str(updated.created_at),
-    )
+    return _plan_response(updated, MealPlanStore(db, plan_repo=plan_repo))
 
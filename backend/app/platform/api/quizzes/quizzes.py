@@ -3,9 +3,11 @@ Platform Quiz Questions API Routes.
 Read-only endpoints for quiz questions used by frontend.
 """
 from typing import List, Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from app.platform.api.static_responses import static_responses
+
 router = APIRouter(prefix="/quizzes", tags=["Platform Quizzes"])
 
 
@@ -614,17 +616,8 @@ def _map_question_to_schema(question_data: dict) -> QuizQuestion:
     )
 
 
-@router.get("/ayurveda-assessment/questions", response_model=AyurvedaAssessmentQuestionsResponse)
-async def get_ayurveda_assessment_questions():
-    """
-    Get comprehensive Ayurveda assessment questionnaire.
-    
-    This questionnaire collects structured inputs for Prakriti, Vikriti, Agni, and Ama assessment.
-    Note: Demographics (age, gender, height, weight) are collected in the intake step.
-    
-    Returns:
-        Structured questionnaire with sections and questions for Ayurvedic assessment.
-    """
+def _build_ayurveda_assessment_questions() -> AyurvedaAssessmentQuestionsResponse:
+    """Build the Ayurveda questionnaire response from AYURVEDA_ASSESSMENT_QUESTIONS."""
     sections = []
     for section_key, section_data in AYURVEDA_ASSESSMENT_QUESTIONS.items():
         questions = [_map_question_to_schema(q) for q in section_data["questions"]]
@@ -637,14 +630,42 @@ async def get_ayurveda_assessment_questions():
     return AyurvedaAssessmentQuestionsResponse(sections=sections)
 
 
+def _build_gut_health_quiz_questions() -> GutHealthQuizQuestionsResponse:
+    """Build the gut health quiz response from GUT_HEALTH_QUIZ_QUESTIONS."""
+    questions = [_map_question_to_schema(q) for q in GUT_HEALTH_QUIZ_QUESTIONS]
+    return GutHealthQuizQuestionsResponse(questions=questions)
+
+
+@router.get("/ayurveda-assessment/questions", response_model=AyurvedaAssessmentQuestionsResponse)
+async def get_ayurveda_assessment_questions(request: Request):
+    """
+    Get comprehensive Ayurveda assessment questionnaire.
+    
+    This questionnaire collects structured inputs for Prakriti, Vikriti, Agni, and Ama assessment.
+    Note: Demographics (age, gender, height, weight) are collected in the intake step.
+    
+    The response is encoded once and served with an ETag; clients sending
+    If-None-Match with the current ETag get 304 Not Modified.
+    
+    Returns:
+        Structured questionnaire with sections and questions for Ayurvedic assessment.
+    """
+    return static_responses.respond(
+        request, "quizzes.ayurveda_assessment", _build_ayurveda_assessment_questions
+    )
+
+
 @router.get("/gut-health/questions", response_model=GutHealthQuizQuestionsResponse)
-async def get_gut_health_quiz_questions():
+async def get_gut_health_quiz_questions(request: Request):
     """
     Get all gut health quiz questions.
     
+    Served from the static response cache (ETag / 304, see above).
+    
     Returns:
         List of gut health quiz questions with state mapping for each option.
     """
-    questions = [_map_question_to_schema(q) for q in GUT_HEALTH_QUIZ_QUESTIONS]
-    return GutHealthQuizQuestionsResponse(questions=questions)
+    return static_responses.respond(
+        request, "quizzes.gut_health", _build_gut_health_quiz_questions
+    )
 
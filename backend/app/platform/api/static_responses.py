@@ -0,0 +1,191 @@
+"""
+Platform Static Responses.
+Pre-encoded, ETag-cached responses for read-only KB and quiz endpoints.
+
+Payloads that only change with the knowledge base (quiz questionnaires,
+exchange categories) are serialized once per KB version to JSON bytes, and
+optionally pre-compressed. They are then served with a strong ETag and
+Cache-Control. A matching If-None-Match gets 304 Not Modified with no body.
+"""
+from typing import Any, Callable, Dict, Hashable, Optional
+from dataclasses import dataclass
+import gzip
+import hashlib
+import json
+import threading
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+@dataclass(frozen=True)
+class StaticPayload:
+    """Encoded payload and its representations."""
+    version: Hashable
+    etag: str  # Strong ETag of the identity body, quoted
+    body: bytes
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}."""
+    encodings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding.strip().lower()] = q
+    return encodings
+
+
+def _etag_matches(if_none_match: str, etags: set) -> bool:
+    """Weak comparison of If-None-Match against the representation ETags."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+class StaticResponseCache:
+    """
+    Per-process cache of pre-encoded JSON responses.
+
+    Each entry is keyed by name and rebuilt when the caller passes a new
+    version (e.g. after a KB reload). Building runs at most once per version.
+    """
+
+    def __init__(
+        self,
+        max_age_seconds: int = 3600,
+        compress: bool = True,
+        compress_min_bytes: int = 512
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_age_seconds: Cache-Control max-age sent to clients
+            compress: Pre-compress bodies (gzip, plus brotli if installed)
+            compress_min_bytes: Smaller bodies are only served uncompressed
+        """
+        self.max_age_seconds = max_age_seconds
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self._payloads: Dict[str, StaticPayload] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, build: Callable[[], Any], version: Hashable = None) -> StaticPayload:
+        """
+        Get encoded payload, building it on first use or version change.
+
+        Args:
+            name: Payload name (unique per endpoint)
+            build: Returns the response content (Pydantic model, dict or list)
+            version: KB version the content is derived from
+
+        Returns:
+            StaticPayload
+        """
+        payload = self._payloads.get(name)
+        if payload is not None and payload.version == version:
+            return payload
+        with self._lock:
+            payload = self._payloads.get(name)
+            if payload is None or payload.version != version:
+                payload = self._encode(build(), version)
+                self._payloads[name] = payload
+            return payload
+
+    def respond(
+        self,
+        request: Request,
+        name: str,
+        build: Callable[[], Any],
+        version: Hashable = None
+    ) -> Response:
+        """
+        Serve a cached payload, honouring If-None-Match and Accept-Encoding.
+
+        Args:
+            request: Incoming request
+            name: Payload name
+            build: Content builder (see get)
+            version: KB version
+
+        Returns:
+            200 response with the encoded body, or 304 if the client copy is current
+        """
+        payload = self.get(name, build, version)
+        encodings = _accepted_encodings(request.headers.get("accept-encoding", ""))
+
+        body, etag, content_encoding = payload.body, payload.etag, None
+        if payload.br_body is not None and encodings.get("br", 0) > 0:
+            body, etag, content_encoding = payload.br_body, payload.etag[:-1] + '-br"', "br"
+        elif payload.gzip_body is not None and encodings.get("gzip", 0) > 0:
+            body, etag, content_encoding = payload.gzip_body, payload.etag[:-1] + '-gzip"', "gzip"
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age_seconds}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(
+            if_none_match, {payload.etag, payload.etag[:-1] + '-gzip"', payload.etag[:-1] + '-br"'}
+        ):
+            return Response(status_code=304, headers=headers)
+
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        """Drop all payloads (rebuilt on next request)."""
+        with self._lock:
+            self._payloads.clear()
+
+    def _encode(self, content: Any, version: Hashable) -> StaticPayload:
+        # Same encoding as FastAPI's JSONResponse
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        gzip_body = br_body = None
+        if self.compress and len(body) >= self.compress_min_bytes:
+            gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                br_body = brotli.compress(body)
+        return StaticPayload(version=version, etag=etag, body=body, gzip_body=gzip_body, br_body=br_body)
+
+
+# Process-wide cache shared by the static KB/quiz endpoints
+static_responses = StaticResponseCache(
+    max_age_seconds=settings.STATIC_RESPONSE_MAX_AGE_SECONDS,
+    compress=settings.STATIC_RESPONSE_COMPRESSION,
+)
@@ -0,0 +1,117 @@
+"""
+Platform Streaming Responses.
+NDJSON and Server-Sent Events output for long-running generation endpoints.
+
+Endpoints accept ?stream=ndjson or ?stream=sse and return the events of a
+plan event generator (see core.orchestration.plan_stream) as they are
+produced, instead of one JSON body at the end:
+- ndjson: one {"event": ..., "data": ...} JSON object per line
+- sse: "event: <event>" and "data: <json>" lines per event
+
+The generator is advanced once before the response starts, so request
+validation errors (404, 400) raised before the first event are still
+returned as normal HTTP errors. Errors after that are sent as an "error"
+event, since the status line has already been sent.
+
+FastAPI closes the request's get_db session before a streaming body is
+sent, so streamed generators run on their own session (session_events).
+"""
+from typing import Any, Callable, Generator, Iterator, Optional
+import json
+import logging
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.platform.core.orchestration.plan_stream import ERROR_EVENT, PlanStreamEvent
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+# Query parameter pattern for endpoints that support streaming
+STREAM_FORMAT_PATTERN = "^(ndjson|sse)$"
+
+
+def encode_event(event: str, data: Any, stream_format: str) -> bytes:
+    """
+    Encode one event as an NDJSON line or an SSE message.
+
+    Args:
+        event: Event name
+        data: Event payload (contexts and UUIDs are JSON-encoded)
+        stream_format: "ndjson" or "sse"
+
+    Returns:
+        Encoded event bytes
+    """
+    if stream_format == "sse":
+        payload = json.dumps(jsonable_encoder(data), separators=(",", ":"))
+        return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+    payload = json.dumps({"event": event, "data": jsonable_encoder(data)}, separators=(",", ":"))
+    return f"{payload}\n".encode("utf-8")
+
+
+def session_events(
+    events_factory: Callable[[Session], Generator[PlanStreamEvent, None, Any]]
+) -> Generator[PlanStreamEvent, None, Any]:
+    """
+    Run an event generator on its own database session.
+
+    Args:
+        events_factory: Called with the session to create the event generator
+
+    Yields:
+        Events of the generator; the session is closed when it finishes
+    """
+    db = SessionLocal()
+    try:
+        return (yield from events_factory(db))
+    finally:
+        db.close()
+
+
+def stream_response(events: Generator[PlanStreamEvent, None, Any], stream_format: str) -> StreamingResponse:
+    """
+    Stream plan events as NDJSON or SSE.
+
+    Args:
+        events: Plan event generator
+        stream_format: "ndjson" or "sse"
+
+    Returns:
+        StreamingResponse sending each event as it is produced
+
+    Raises:
+        HTTPException: If the generator fails before its first event
+    """
+    # Validation runs up to the first event; its errors are normal HTTP errors
+    first: Optional[PlanStreamEvent] = next(events, None)
+
+    def body() -> Iterator[bytes]:
+        if first is None:
+            return
+        try:
+            yield encode_event(*first, stream_format)
+            for event, data in events:
+                yield encode_event(event, data, stream_format)
+        except HTTPException as e:
+            yield encode_event(ERROR_EVENT, {"status_code": e.status_code, "detail": e.detail}, stream_format)
+        except Exception as e:
+            logger.exception("Streaming generation failed")
+            yield encode_event(ERROR_EVENT, {"status_code": 500, "detail": str(e)}, stream_format)
+        finally:
+            # Runs the generator's cleanup (e.g. its session) on client disconnect
+            events.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,10 +2,30 @@
 Contract Validator.
 
 Validates engine inputs/outputs against defined contracts.
+
+Each contract dataclass is compiled once into a cached plan of
+(field name, required, type predicate) entries, so a validation call is a
+loop over precomputed predicates instead of walking dataclass fields and
+typing origins/args.
+
+Validation mode:
+- "full": validate every call (default, development)
+- "sampled": validate a fraction of calls (production)
+- "off": skip validation (batch jobs)
+
+The process-wide mode comes from settings (CONTRACT_VALIDATION_MODE,
+CONTRACT_VALIDATION_SAMPLE_RATE) or set_validation_mode(); a request or job
+can override it with the contract_validation_mode() context manager.
 """
-from typing import Dict, Any, Type, Optional, get_origin, get_args
+from typing import Dict, Any, Type, Optional, Callable, Iterator, Tuple, get_origin, get_args, get_type_hints
 from dataclasses import dataclass, fields, MISSING
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from uuid import UUID
 import logging
+import random
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +35,111 @@ class ContractValidationError(Exception):
     pass
 
 
+class ValidationMode(str, Enum):
+    """Contract validation modes."""
+    FULL = "full"
+    SAMPLED = "sampled"
+    OFF = "off"
+
+
+@dataclass(frozen=True)
+class _FieldPlan:
+    """Compiled check for one contract field."""
+    name: str
+    required: bool
+    check: Callable[[Any], bool]
+    expected: str
+
+
+_plans: Dict[Type, Tuple[_FieldPlan, ...]] = {}
+_plans_lock = threading.Lock()
+
+_default_mode: Optional[ValidationMode] = None
+_default_sample_rate: float = 0.1
+_mode_override: ContextVar[Optional[Tuple[ValidationMode, float]]] = ContextVar(
+    "contract_validation_mode", default=None
+)
+
+
+def set_validation_mode(mode: str, sample_rate: Optional[float] = None):
+    """
+    Set process-wide validation mode.
+    
+    Args:
+        mode: "full", "sampled" or "off"
+        sample_rate: Fraction of calls validated in sampled mode (0.0 - 1.0)
+    """
+    global _default_mode, _default_sample_rate
+    _default_mode = ValidationMode(mode)
+    if sample_rate is not None:
+        _default_sample_rate = sample_rate
+
+
+def get_validation_mode() -> Tuple[ValidationMode, float]:
+    """
+    Get effective validation mode and sample rate.
+    
+    Returns:
+        (mode, sample_rate), honoring any contract_validation_mode() override
+    """
+    override = _mode_override.get()
+    if override is not None:
+        return override
+    if _default_mode is None:
+        _load_mode_from_settings()
+    return _default_mode, _default_sample_rate
+
+
+def _load_mode_from_settings():
+    global _default_mode, _default_sample_rate
+    try:
+        from app.config import settings
+        mode = getattr(settings, "CONTRACT_VALIDATION_MODE", ValidationMode.FULL.value)
+        sample_rate = getattr(settings, "CONTRACT_VALIDATION_SAMPLE_RATE", _default_sample_rate)
+    except Exception:
+        mode, sample_rate = ValidationMode.FULL.value, _default_sample_rate
+    try:
+        _default_mode = ValidationMode(mode)
+    except ValueError:
+        logger.warning(f"Unknown CONTRACT_VALIDATION_MODE '{mode}', using 'full'")
+        _default_mode = ValidationMode.FULL
+    _default_sample_rate = sample_rate
+
+
+@contextmanager
+def contract_validation_mode(mode: str, sample_rate: Optional[float] = None) -> Iterator[None]:
+    """
+    Override validation mode for the current request/job (context-local).
+    
+    Args:
+        mode: "full", "sampled" or "off"
+        sample_rate: Fraction of calls validated in sampled mode (defaults
+            to the process-wide rate, e.g. CONTRACT_VALIDATION_SAMPLE_RATE)
+    """
+    mode = ValidationMode(mode)
+    if sample_rate is None:
+        if mode is ValidationMode.SAMPLED:
+            if _default_mode is None:
+                _load_mode_from_settings()
+            sample_rate = _default_sample_rate
+        else:
+            sample_rate = 1.0
+    token = _mode_override.set((mode, sample_rate))
+    try:
+        yield
+    finally:
+        _mode_override.reset(token)
+
+
+def _should_validate() -> bool:
+    mode, sample_rate = get_validation_mode()
+    if mode is ValidationMode.FULL:
+        return True
+    if mode is ValidationMode.OFF:
+        return False
+    return random.random() < sample_rate
+
+
 class EngineContractValidator:
     """Validates engine contracts."""
     
@@ -34,27 +159,23 @@ class EngineContractValidator:
         Raises:
             ContractValidationError: If validation fails
         """
+        if not _should_validate():
+            return True
+        
         missing_fields = []
         invalid_fields = []
         
-        # Get required fields from contract
-        contract_fields = {f.name: f for f in fields(contract_class)}
-        
-        for field_name, field_info in contract_fields.items():
+        for field_plan in EngineContractValidator.compile_contract(contract_class):
             # Check if field is present
-            if field_name not in data:
-                if field_info.default == MISSING:
-                    missing_fields.append(field_name)
+            if field_plan.name not in data:
+                if field_plan.required:
+                    missing_fields.append(field_plan.name)
             else:
-                # Validate type if possible
-                expected_type = field_info.type
-                actual_value = data[field_name]
-                
-                # Basic type checking
-                if not EngineContractValidator._check_type(actual_value, expected_type):
+                actual_value = data[field_plan.name]
+                if not field_plan.check(actual_value):
                     invalid_fields.append({
-                        "field": field_name,
-                        "expected": str(expected_type),
+                        "field": field_plan.name,
+                        "expected": field_plan.expected,
                         "actual": type(actual_value).__name__
                     })
         
@@ -90,6 +211,94 @@ class EngineContractValidator:
         """
         return EngineContractValidator.validate_input(contract_class, data, engine_name)
     
+    @staticmethod
+    def compile_contract(contract_class: Type) -> Tuple[_FieldPlan, ...]:
+        """
+        Compile (and cache) the validation plan for a contract dataclass.
+        
+        Args:
+            contract_class: Contract dataclass class
+            
+        Returns:
+            Tuple of field plans
+        """
+        plan = _plans.get(contract_class)
+        if plan is not None:
+            return plan
+        
+        contract_fields = fields(contract_class)
+        type_hints: Dict[str, Any] = {}
+        if any(isinstance(f.type, str) for f in contract_fields):
+            # Postponed annotations: resolve once here instead of per call
+            try:
+                type_hints = get_type_hints(contract_class)
+            except Exception:
+                pass
+        
+        plan = tuple(
+            _FieldPlan(
+                name=f.name,
+                required=f.default is MISSING,
+                check=EngineContractValidator._compile_type(type_hints.get(f.name, f.type)),
+                expected=str(f.type),
+            )
+            for f in contract_fields
+        )
+        with _plans_lock:
+            _plans.setdefault(contract_class, plan)
+        return plan
+    
+    @staticmethod
+    def _compile_type(expected_type: Type) -> Callable[[Any], bool]:
+        """
+        Build a predicate equivalent to _check_type(value, expected_type).
+        
+        Args:
+            expected_type: Expected type
+            
+        Returns:
+            Predicate taking the value to check
+        """
+        origin = get_origin(expected_type)
+        args = get_args(expected_type) if origin is not None else ()
+        none_ok = type(None) in args
+        
+        if origin is not None:
+            non_none_types = [t for t in args if t is not type(None)]
+            if none_ok and non_none_types:
+                # Optional[X] / Union[X, ..., None]
+                inner_checks = tuple(EngineContractValidator._compile_type(t) for t in non_none_types)
+                if len(inner_checks) == 1:
+                    inner = inner_checks[0]
+                    return lambda value: value is None or inner(value)
+                return lambda value: value is None or any(check(value) for check in inner_checks)
+            
+            if origin is list:
+                if args:
+                    item_check = EngineContractValidator._compile_type(args[0])
+                    return lambda value: (
+                        value is not None and isinstance(value, list)
+                        and all(item_check(item) for item in value)
+                    )
+                return lambda value: value is not None and isinstance(value, list)
+            
+            if origin is dict:
+                return lambda value: value is not None and isinstance(value, dict)
+            
+            # Other generic forms: defer to the generic checker
+            return lambda value: EngineContractValidator._check_type(value, expected_type)
+        
+        if expected_type is Any:
+            return lambda value: value is not None
+        
+        if getattr(expected_type, "__name__", None) == 'UUID':
+            return lambda value: isinstance(value, UUID)
+        
+        if isinstance(expected_type, type):
+            return lambda value: value is not None and isinstance(value, expected_type)
+        
+        return lambda value: EngineContractValidator._check_type(value, expected_type)
+    
     @staticmethod
     def _check_type(value: Any, expected_type: Type) -> bool:
         """
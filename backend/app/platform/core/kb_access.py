@@ -8,6 +8,8 @@ from typing import Dict, Any, List, Optional
 import json
 import logging
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,8 +40,7 @@ class KBLoader:
             raise FileNotFoundError(f"KB file not found: {full_path}")
         
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_kb_json(full_path)
             logger.debug(f"Loaded KB file: {kb_path}")
             return data
         except json.JSONDecodeError as e:
@@ -3,8 +3,33 @@ Platform Orchestration Module.
 NCP pipeline orchestration and control.
 """
 
+from .engine_pool import EnginePool, engine_pool, get_engine
+from .pipeline_cache import PipelineResultCache, pipeline_cache
+from .meal_plan_store import MealPlanStore
+from .plan_stream import PlanStreamEvent, run_to_completion
+from .kb_preload import prefork_preload, report_process_memory
+from .kb_manager import KBManager, get_kb_manager, kb_version
 from .ncp_orchestrator import NCPOrchestrator
 
 __all__ = [
     "NCPOrchestrator",
+    # Engine pool
+    "EnginePool",
+    "engine_pool",
+    "get_engine",
+    # Pipeline result cache
+    "PipelineResultCache",
+    "pipeline_cache",
+    # Chunked meal plan storage
+    "MealPlanStore",
+    # Plan generation streaming
+    "PlanStreamEvent",
+    "run_to_completion",
+    # Pre-fork KB preload
+    "prefork_preload",
+    "report_process_memory",
+    # KB hot reload
+    "KBManager",
+    "get_kb_manager",
+    "kb_version",
 ]
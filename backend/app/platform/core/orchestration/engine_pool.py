@@ -0,0 +1,181 @@
+"""
+Platform Engine Pool.
+Process-wide registry of shared, stateless NCP engines.
+
+Engines are built once per process on first use (or at startup via warm())
+and shared by every NCPOrchestrator. This keeps constructor work such as
+loading the medical KB, reading prompt templates and creating the LLM HTTP
+client off the request path, and lets that client reuse connections.
+
+Only engines without per-request state belong here. Per-run state (e.g.
+VarietyTracker) is created inside the engine call that needs it.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+import threading
+
+from app.platform.engines.diagnosis_engine.diagnosis_engine import DiagnosisEngine
+from app.platform.engines.mnt_engine.mnt_engine import MNTEngine
+from app.platform.engines.target_engine.target_engine import TargetEngine
+from app.platform.engines.meal_structure_engine.meal_structure_engine import MealStructureEngine
+from app.platform.engines.exchange_system_engine.exchange_system_engine import ExchangeSystemEngine
+from app.platform.engines.ayurveda_engine.ayurveda_engine import AyurvedaEngine
+from app.platform.engines.food_engine.food_engine import FoodEngine
+from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
+from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+
+logger = logging.getLogger(__name__)
+
+
+# Engine name -> factory. Names match the NCPOrchestrator attributes.
+DEFAULT_ENGINE_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "diagnosis_engine": DiagnosisEngine,
+    "mnt_engine": MNTEngine,
+    "target_engine": TargetEngine,
+    "meal_structure_engine": MealStructureEngine,
+    "exchange_engine": ExchangeSystemEngine,
+    "ayurveda_engine": AyurvedaEngine,
+    "food_engine": FoodEngine,
+    "meal_allocation_engine": MealAllocationEngine,
+    "recipe_generation_engine": RecipeGenerationEngine,
+}
+
+
+class EnginePool:
+    """
+    Thread-safe, lazily populated engine registry.
+
+    Each engine is constructed at most once. A factory that raises (e.g.
+    RecipeGenerationEngine without an API key) is not cached, so the error
+    surfaces to the caller that needs the engine and construction is retried
+    on the next request.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Any]]] = None):
+        """
+        Initialize pool.
+
+        Args:
+            factories: Engine name -> zero-argument factory (defaults to DEFAULT_ENGINE_FACTORIES)
+        """
+        self._factories: Dict[str, Callable[[], Any]] = dict(
+            DEFAULT_ENGINE_FACTORIES if factories is None else factories
+        )
+        self._engines: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Get shared engine, constructing it on first use.
+
+        Args:
+            name: Engine name
+
+        Returns:
+            Engine instance
+
+        Raises:
+            KeyError: If no factory is registered under name
+        """
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                factory = self._factories[name]
+                engine = factory()
+                self._engines[name] = engine
+                logger.debug(f"Engine pool: constructed {name}")
+            return engine
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """
+        Register (or replace) an engine factory. Drops any built instance.
+
+        Args:
+            name: Engine name
+            factory: Zero-argument factory
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._engines.pop(name, None)
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Construct engines ahead of the first request.
+
+        Failures are logged and skipped so a missing optional dependency
+        (e.g. LLM API key) does not block startup.
+
+        Args:
+            names: Engines to build (defaults to all registered)
+
+        Returns:
+            Names of engines that are available after warming
+        """
+        ready = []
+        for name in list(names if names is not None else self._factories):
+            try:
+                self.get(name)
+                ready.append(name)
+            except Exception as e:
+                logger.warning(f"Engine pool: could not construct {name} at startup: {e}")
+        return ready
+
+    def build(self, name: str) -> Any:
+        """
+        Construct a new engine instance without adding it to the pool.
+
+        Args:
+            name: Engine name
+
+        Returns:
+            Engine instance (install it with swap())
+
+        Raises:
+            KeyError: If no factory is registered under name
+        """
+        return self._factories[name]()
+
+    def swap(self, engines: Dict[str, Any], drop: Iterable[str] = ()):
+        """
+        Atomically install prebuilt engines and drop others.
+
+        Callers that already hold an engine keep using it.
+
+        Args:
+            engines: Engine name -> prebuilt instance
+            drop: Engines to drop (rebuilt on next use)
+        """
+        drop = set(drop)
+        with self._lock:
+            built = {name: engine for name, engine in self._engines.items() if name not in drop}
+            built.update(engines)
+            self._engines = built
+
+    def is_built(self, name: str) -> bool:
+        """Return True if the engine has already been constructed."""
+        return name in self._engines
+
+    def reset(self):
+        """Drop all built engines (they are rebuilt on next use)."""
+        with self._lock:
+            self._engines.clear()
+
+
+# Process-wide pool shared by all orchestrators
+engine_pool = EnginePool()
+
+
+def get_engine(name: str) -> Any:
+    """
+    Get a shared engine from the process-wide pool.
+
+    Args:
+        name: Engine name (e.g. "diagnosis_engine")
+
+    Returns:
+        Engine instance
+    """
+    return engine_pool.get(name)
@@ -0,0 +1,473 @@
+"""
+KB Hot Reload.
+Versioned knowledge base with background rebuild and atomic swap.
+
+KBManager detects KB changes by checksum (sha256 of every JSON file under
+knowledge_base/, the KB artifact if configured, and optionally a row
+count/last update fingerprint of the food KB tables). On a change it builds
+the next KB version next to the live one, then swaps it in:
+
+1. Build (requests keep running on the current version):
+   - every _load_*() of KB_MODULES runs against empty caches in a copy of
+     its module namespace, so the live module caches are not touched
+   - engines that load KB data at construction (KB_ENGINES) and the recipe
+     template matcher are built
+   A loader or build error rejects the new version; the current one stays.
+2. Swap: the module caches, the current KBSnapshot, the pooled engines and
+   the matcher are replaced together and the version number goes up by one.
+3. Derived data that is built lazily is invalidated: the pipeline cache KB
+   version vector, cached platform cache rules and, if food KB files or
+   tables changed, the nutrient matrix and substitution index (rebuilt right
+   away if the manager has a database session factory).
+
+In-flight requests keep the version they started with: the NCP orchestrator
+takes current() at construction and pins it around each stage (see
+knowledge_base.kb_snapshot), and engines it already resolved stay in use.
+kb_version() is the version of the pinned (or current) snapshot, for caches
+to key on.
+
+Each process has its own manager and version numbers. Reloads run on
+POST /admin/knowledge-base/update (in the worker serving the request) and,
+if KB_RELOAD_INTERVAL_SECONDS is set, from a polling thread in every worker.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from types import FunctionType, ModuleType
+import hashlib
+import inspect
+import logging
+import re
+import threading
+import time
+
+from app.config import settings
+from app.platform.core.orchestration.engine_pool import EnginePool, engine_pool as default_engine_pool
+from app.platform.core.orchestration.kb_preload import KB_MODULES
+from app.platform.core.orchestration.pipeline_cache import KB_BASE_PATH, invalidate_kb_versions
+from app.platform.knowledge_base.kb_artifact import reset_kb_artifact
+from app.platform.knowledge_base.kb_snapshot import (
+    KBSnapshot,
+    get_pinned_kb_snapshot,
+    kb_loader_key,
+    use_kb_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Engines that load KB data in their constructor (rebuilt for each version)
+KB_ENGINES = ("diagnosis_engine",)
+
+# Engines holding the shared recipe template matcher (rebuilt on next use)
+MATCHER_ENGINES = ("recipe_generation_engine",)
+
+# Module globals that cache a KB (e.g. _MNT_RULES_CACHE)
+_CACHE_NAME = re.compile(r"_[A-Z0-9_]+_CACHE")
+
+# Checksum keys of the food KB (foods/ JSON files and tables)
+_FOOD_KEYS = ("foods/", "table:")
+
+
+def _food_kb_tables() -> Tuple[Any, ...]:
+    # Imported here: the models import the database engine
+    from app.platform.data.models.kb_food_master import KBFoodMaster
+    from app.platform.data.models.kb_food_nutrition_base import KBFoodNutritionBase
+    from app.platform.data.models.kb_food_exchange_profile import KBFoodExchangeProfile
+    from app.platform.data.models.kb_food_mnt_profile import KBFoodMNTProfile
+    from app.platform.data.models.kb_food_condition_compatibility import KBFoodConditionCompatibility
+
+    return (KBFoodMaster, KBFoodNutritionBase, KBFoodExchangeProfile, KBFoodMNTProfile, KBFoodConditionCompatibility)
+
+
+def _module_loaders(module: ModuleType) -> List[Tuple[str, Callable[[], Any]]]:
+    """Module-level _load_*() functions of a KB module, as (name, function)."""
+    return [
+        (name, func)
+        for name, func in inspect.getmembers(module, inspect.isfunction)
+        if name.startswith("_load_") and func.__module__ == module.__name__
+    ]
+
+
+def _shadow_load(module: ModuleType) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, str]]:
+    """
+    Run a KB module's loaders against empty caches without touching the module.
+
+    The module's functions are re-created over a copy of its namespace, so
+    their `global` statements and calls to each other use the copy.
+
+    Args:
+        module: KB module
+
+    Returns:
+        (cache global -> value, loader key -> result, loader key -> error)
+    """
+    namespace = dict(vars(module))
+    cache_names = [name for name in namespace if _CACHE_NAME.fullmatch(name)]
+    for name in cache_names:
+        namespace[name] = None
+    for name, value in vars(module).items():
+        if inspect.isfunction(value) and value.__module__ == module.__name__:
+            func = inspect.unwrap(value)
+            shadow = FunctionType(func.__code__, namespace, func.__name__, func.__defaults__, func.__closure__)
+            shadow.__kwdefaults__ = func.__kwdefaults__
+            namespace[name] = shadow
+
+    loaded: Dict[str, Any] = {}
+    failed: Dict[str, str] = {}
+    for name, func in _module_loaders(module):
+        try:
+            loaded[kb_loader_key(func)] = namespace[name]()
+        except Exception as e:
+            failed[kb_loader_key(func)] = str(e)
+    return {name: namespace[name] for name in cache_names}, loaded, failed
+
+
+class KBManager:
+    """
+    Versioned KB with checksum change detection and atomic swap.
+
+    Thread-safe; reloads are serialized. One instance is shared per process
+    (get_kb_manager).
+    """
+
+    def __init__(
+        self,
+        base_path: Optional[Path] = None,
+        modules: Optional[Iterable[ModuleType]] = None,
+        engine_pool: Optional[EnginePool] = None,
+        session_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize manager (the first snapshot is taken on first use).
+
+        Args:
+            base_path: KB directory to checksum (defaults to knowledge_base/)
+            modules: KB modules with cached loaders (defaults to KB_MODULES)
+            engine_pool: Pool whose KB_ENGINES are rebuilt (defaults to the shared pool)
+            session_factory: Returns a new database session; enables food KB
+                table change detection and index rebuilds (None = files only)
+        """
+        self.base_path = Path(base_path) if base_path is not None else KB_BASE_PATH
+        self.modules = tuple(modules) if modules is not None else KB_MODULES
+        self.engine_pool = engine_pool or default_engine_pool
+        self._session_factory = session_factory
+
+        self._current: Optional[KBSnapshot] = None
+        self._init_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        # path -> (size, mtime_ns, digest): unchanged files are not hashed again
+        self._file_digests: Dict[str, Tuple[int, int, str]] = {}
+        # Checksums and errors of the last rejected version (not retried until the KB changes again)
+        self._rejected: Optional[Tuple[Dict[str, str], Dict[str, str]]] = None
+        self._listeners: List[Callable[[KBSnapshot], None]] = []
+        self._poll_stop = threading.Event()
+        self._poll_thread: Optional[threading.Thread] = None
+
+    # Snapshots
+
+    def current(self) -> KBSnapshot:
+        """
+        Get the current KB snapshot (version 1 is taken from the live caches on first use).
+
+        Returns:
+            Current KBSnapshot
+        """
+        snapshot = self._current
+        if snapshot is not None:
+            return snapshot
+        with self._init_lock:
+            if self._current is None:
+                self._current = self._initial_snapshot()
+            return self._current
+
+    @property
+    def version(self) -> int:
+        """Current KB version number."""
+        return self.current().version
+
+    def _initial_snapshot(self) -> KBSnapshot:
+        loaded: Dict[str, Any] = {}
+        for module in self.modules:
+            for _, func in _module_loaders(module):
+                try:
+                    # Unwrapped: fill and capture the live caches even inside a pinned block
+                    loaded[kb_loader_key(func)] = inspect.unwrap(func)()
+                except Exception as e:
+                    logger.warning(f"KB version 1: could not load {kb_loader_key(func)}: {e}")
+        return KBSnapshot(1, self.compute_checksums(), loaded)
+
+    # Change detection
+
+    def compute_checksums(self) -> Dict[str, str]:
+        """
+        Checksum every KB source.
+
+        Returns:
+            {source: digest}; sources are JSON paths relative to the KB
+            directory, "artifact" and "table:<name>"
+        """
+        checksums: Dict[str, str] = {}
+        for path in sorted(self.base_path.rglob("*.json")):
+            checksums[path.relative_to(self.base_path).as_posix()] = self._digest(path)
+        if settings.KB_ARTIFACT_PATH and Path(settings.KB_ARTIFACT_PATH).exists():
+            checksums["artifact"] = self._digest(Path(settings.KB_ARTIFACT_PATH))
+        if self._session_factory is not None:
+            checksums.update(self._table_checksums())
+        return checksums
+
+    def _digest(self, path: Path) -> str:
+        stat = path.stat()
+        cached = self._file_digests.get(str(path))
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        content = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                content.update(chunk)
+        digest = content.hexdigest()[:16]
+        self._file_digests[str(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def _table_checksums(self) -> Dict[str, str]:
+        from sqlalchemy import func
+
+        checksums: Dict[str, str] = {}
+        db = self._session_factory()
+        try:
+            for model in _food_kb_tables():
+                count, last_update = db.query(func.count(), func.max(model.updated_at)).select_from(model).one()
+                checksums[f"table:{model.__tablename__}"] = hashlib.sha256(
+                    f"{count}:{last_update}".encode("utf-8")
+                ).hexdigest()[:16]
+        finally:
+            db.close()
+        return checksums
+
+    def check(self) -> List[str]:
+        """
+        List KB sources that changed since the current version.
+
+        Returns:
+            Changed, added and removed source keys
+        """
+        return _changed(self.current().checksums, self.compute_checksums())
+
+    # Reload
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Build and swap in a new KB version if the KB changed.
+
+        Runs in the calling thread; requests on other threads continue on the
+        current version meanwhile.
+
+        Args:
+            force: Build a new version even if no checksum changed
+
+        Returns:
+            {"version": int, "reloaded": bool, "changed": [sources],
+             "failed": {loader or step: error}, "seconds": float}
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            current = self.current()
+            checksums = self.compute_checksums()
+            changed = _changed(current.checksums, checksums)
+            result: Dict[str, Any] = {"version": current.version, "reloaded": False, "changed": changed, "failed": {}}
+
+            if not changed and not force:
+                result["seconds"] = round(time.perf_counter() - started, 3)
+                return result
+            if not force and self._rejected is not None and self._rejected[0] == checksums:
+                result["failed"] = dict(self._rejected[1])
+                result["seconds"] = round(time.perf_counter() - started, 3)
+                return result
+
+            if "artifact" in changed:
+                # JSON KBs are read through the artifact; map the new file for the build
+                reset_kb_artifact()
+            snapshot, caches, engines, matcher, failed = self._build(current.version + 1, checksums)
+            if failed:
+                self._rejected = (checksums, failed)
+                logger.error(f"KB version {current.version + 1} rejected, staying on {current.version}: {failed}")
+                result["failed"] = failed
+            else:
+                self._rejected = None
+                self._swap(snapshot, caches, engines, matcher)
+                self._after_swap(snapshot, changed, force)
+                result["version"] = snapshot.version
+                result["reloaded"] = True
+                logger.info(
+                    f"KB version {snapshot.version} active ({snapshot.digest}); "
+                    f"changed: {', '.join(changed) or 'none (forced)'}"
+                )
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+    def _build(
+        self,
+        version: int,
+        checksums: Dict[str, str]
+    ) -> Tuple[KBSnapshot, Dict[ModuleType, Dict[str, Any]], Dict[str, Any], Any, Dict[str, str]]:
+        """Build the next version without touching the live one."""
+        # Imported here: the recipe engine imports core.orchestration modules lazily
+        from app.platform.engines.recipe_engine.recipe_template_matcher import RecipeTemplateMatcher
+
+        caches: Dict[ModuleType, Dict[str, Any]] = {}
+        loaded: Dict[str, Any] = {}
+        failed: Dict[str, str] = {}
+        for module in self.modules:
+            caches[module], module_loaded, module_failed = _shadow_load(module)
+            loaded.update(module_loaded)
+            failed.update(module_failed)
+        snapshot = KBSnapshot(version, checksums, loaded)
+
+        engines: Dict[str, Any] = {}
+        matcher = None
+        with use_kb_snapshot(snapshot):
+            for name in KB_ENGINES:
+                if not self.engine_pool.is_built(name):
+                    continue
+                try:
+                    engines[name] = self.engine_pool.build(name)
+                except Exception as e:
+                    failed[name] = str(e)
+            try:
+                matcher = RecipeTemplateMatcher.from_kb()
+            except Exception as e:
+                failed["recipe_templates"] = str(e)
+        return snapshot, caches, engines, matcher, failed
+
+    def _swap(
+        self,
+        snapshot: KBSnapshot,
+        caches: Dict[ModuleType, Dict[str, Any]],
+        engines: Dict[str, Any],
+        matcher: Any
+    ):
+        """Make a built version current."""
+        from app.platform.engines.recipe_engine.recipe_template_matcher import replace_recipe_template_matcher
+
+        with self._init_lock:
+            for module, values in caches.items():
+                for name, value in values.items():
+                    setattr(module, name, value)
+            self._current = snapshot
+            self.engine_pool.swap(
+                engines,
+                drop=[name for name in KB_ENGINES if name not in engines] + list(MATCHER_ENGINES),
+            )
+            replace_recipe_template_matcher(matcher)
+
+    def _after_swap(self, snapshot: KBSnapshot, changed: List[str], force: bool):
+        """Invalidate data derived from the KB and notify listeners."""
+        # Imported here: the food engine and infra packages import core.orchestration modules lazily
+        from app.platform.engines.food_engine.nutrient_matrix import get_nutrient_matrix, invalidate_nutrient_matrix
+        from app.platform.engines.food_engine.substitution_index import (
+            get_substitution_index,
+            invalidate_substitution_index,
+        )
+        from app.platform.infra.cache.cache import get_platform_cache
+
+        invalidate_kb_versions()
+        get_platform_cache().clear(pattern="rule:*")
+
+        if force or any(key.startswith(_FOOD_KEYS) or key == "artifact" for key in changed):
+            invalidate_nutrient_matrix()
+            invalidate_substitution_index()
+            if self._session_factory is not None:
+                db = self._session_factory()
+                try:
+                    get_nutrient_matrix(db)
+                    get_substitution_index(db)
+                except Exception as e:
+                    logger.warning(f"KB version {snapshot.version}: food indexes are rebuilt on next use: {e}")
+                finally:
+                    db.close()
+
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"KB version {snapshot.version}: listener {listener!r} failed: {e}")
+
+    def add_listener(self, listener: Callable[[KBSnapshot], None]):
+        """
+        Call listener(snapshot) after each swap (from the reloading thread).
+
+        Args:
+            listener: Callback, e.g. to drop cache entries of the old version
+        """
+        self._listeners.append(listener)
+
+    # Polling
+
+    def start_polling(self, interval: float) -> threading.Thread:
+        """
+        Check for KB changes every interval seconds in a daemon thread.
+
+        Args:
+            interval: Seconds between checks
+
+        Returns:
+            Polling thread
+        """
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return self._poll_thread
+        self._poll_stop.clear()
+        self._poll_thread = threading.Thread(target=self._poll, args=(interval,), name="kb-reload", daemon=True)
+        self._poll_thread.start()
+        return self._poll_thread
+
+    def stop_polling(self, timeout: float = 5.0):
+        """Stop the polling thread, if running."""
+        self._poll_stop.set()
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout)
+            self._poll_thread = None
+
+    def _poll(self, interval: float):
+        while not self._poll_stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.warning(f"KB reload check failed: {e}")
+
+
+def _changed(old: Dict[str, str], new: Dict[str, str]) -> List[str]:
+    return sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+
+
+_manager: Optional[KBManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_kb_manager() -> KBManager:
+    """
+    Get the shared KB manager (created on first use).
+
+    Returns:
+        Shared KBManager
+    """
+    global _manager
+    manager = _manager
+    if manager is not None:
+        return manager
+    with _manager_lock:
+        if _manager is None:
+            session_factory = None
+            if settings.KB_RELOAD_CHECK_TABLES:
+                from app.database import SessionLocal
+                session_factory = SessionLocal
+            _manager = KBManager(session_factory=session_factory)
+        return _manager
+
+
+def kb_version() -> int:
+    """
+    KB version of this request (the pinned snapshot) or else the current one.
+
+    Returns:
+        Version number (per process; use KBSnapshot.digest across processes)
+    """
+    snapshot = get_pinned_kb_snapshot()
+    return snapshot.version if snapshot is not None else get_kb_manager().version
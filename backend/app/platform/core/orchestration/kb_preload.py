@@ -0,0 +1,204 @@
+"""
+Pre-fork KB Preload.
+
+Loads all knowledge base data and builds the shared engines in the server
+master process, before workers are forked, so workers share those pages
+copy-on-write instead of each loading its own copy.
+
+Loaded here:
+- the memory-mapped KB artifact, if settings.KB_ARTIFACT_PATH is set
+  (mapped pages are shared by all workers without copy-on-write)
+- JSON rule KBs (MNT rules, meal structure, Ayurveda, exchange system,
+  target formulas): every module-level _load_*() of the KB modules
+- shared engines (engine_pool.warm()), e.g. the DiagnosisEngine medical KB
+- the recipe KB template matcher
+- with a database session: the food KB NutrientMatrix and
+  FoodSubstitutionIndex (NumPy arrays)
+
+After loading, freeze_shared_memory() runs gc.freeze(): objects that exist
+at fork time are moved to the permanent generation, so the cyclic garbage
+collector in the workers never touches (and dirties) their pages. Reference
+counting still writes to objects a worker reads, which is why the food KB
+is held in NumPy arrays: one object header per array instead of one per
+value.
+
+Workers report their memory (RSS, shared and private pages) at startup via
+report_process_memory(). gunicorn.conf.py wires this up for
+`gunicorn -c gunicorn.conf.py app.main:app` (uvicorn --workers spawns fresh
+interpreters, which share nothing).
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import gc
+import inspect
+import logging
+import os
+import resource
+import time
+
+from app.config import settings
+from app.platform.core.orchestration.engine_pool import engine_pool
+from app.platform.engines.ayurveda_engine import kb_ayurveda
+from app.platform.engines.exchange_system_engine import kb_exchange_system
+from app.platform.engines.meal_structure_engine import kb_meal_structure
+from app.platform.engines.mnt_engine import kb_mnt_rules
+from app.platform.engines.target_engine import kb_target_formulas
+from app.platform.knowledge_base.kb_artifact import get_kb_artifact
+
+logger = logging.getLogger(__name__)
+
+# Modules whose module-level _load_*() functions cache a JSON KB
+KB_MODULES = (kb_mnt_rules, kb_meal_structure, kb_ayurveda, kb_exchange_system, kb_target_formulas)
+
+
+def _kb_loaders() -> List[Tuple[str, Callable[[], Any]]]:
+    """Zero-argument _load_*() functions of KB_MODULES, as (qualified name, function)."""
+    loaders = []
+    for module in KB_MODULES:
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith("_load_") and func.__module__ == module.__name__:
+                loaders.append((f"{module.__name__.rsplit('.', 1)[-1]}.{name}", func))
+    return loaders
+
+
+def _map_kb_artifact():
+    if get_kb_artifact() is None:
+        raise ValueError(f"KB artifact {settings.KB_ARTIFACT_PATH} could not be mapped")
+
+
+def preload_kb(db: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Load all KB data into this process's caches.
+
+    Failures are logged and skipped; the affected data is then loaded lazily
+    by each worker, as without preloading.
+
+    Args:
+        db: Database session for the food KB arrays (skipped if None)
+
+    Returns:
+        {"loaded": [names], "failed": {name: error}, "seconds": float}
+    """
+    # Imported here: the recipe and food engines import core.orchestration modules lazily
+    from app.platform.engines.recipe_engine.recipe_template_matcher import get_recipe_template_matcher
+    from app.platform.engines.food_engine.nutrient_matrix import get_nutrient_matrix
+    from app.platform.engines.food_engine.substitution_index import get_substitution_index
+
+    steps: List[Tuple[str, Callable[[], Any]]] = []
+    if settings.KB_ARTIFACT_PATH:
+        steps.append(("kb_artifact", _map_kb_artifact))
+    steps.extend(_kb_loaders())
+    steps.append(("engine_pool", engine_pool.warm))
+    steps.append(("recipe_templates", get_recipe_template_matcher))
+    if db is not None:
+        steps.append(("nutrient_matrix", lambda: get_nutrient_matrix(db)))
+        steps.append(("substitution_index", lambda: get_substitution_index(db)))
+
+    started = time.perf_counter()
+    loaded: List[str] = []
+    failed: Dict[str, str] = {}
+    for name, load in steps:
+        try:
+            load()
+            loaded.append(name)
+        except Exception as e:
+            logger.warning(f"KB preload: could not load {name}: {e}")
+            failed[name] = str(e)
+
+    seconds = round(time.perf_counter() - started, 3)
+    logger.info(f"KB preload: {len(loaded)} loaded, {len(failed)} failed in {seconds}s")
+    return {"loaded": loaded, "failed": failed, "seconds": seconds}
+
+
+def freeze_shared_memory() -> int:
+    """
+    Collect garbage, then move all tracked objects to the permanent generation.
+
+    Call in the master right before forking workers.
+
+    Returns:
+        Number of frozen objects
+    """
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def get_process_memory() -> Dict[str, float]:
+    """
+    Memory of this process in MB.
+
+    On Linux: rss, pss (proportional share of shared pages), shared and
+    private (from /proc/self/smaps_rollup). Elsewhere only max_rss (peak).
+
+    Returns:
+        {metric: MB}
+    """
+    fields = {
+        "Rss": "rss",
+        "Pss": "pss",
+        "Shared_Clean": "shared",
+        "Shared_Dirty": "shared",
+        "Private_Clean": "private",
+        "Private_Dirty": "private",
+    }
+    memory: Dict[str, float] = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    kb = int(value.split()[0])
+                    memory[fields[key]] = memory.get(fields[key], 0.0) + kb / 1024.0
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024.0 * 1024.0 if os.uname().sysname == "Darwin" else 1024.0
+        memory = {"max_rss": max_rss / divisor}
+    return {key: round(value, 1) for key, value in memory.items()}
+
+
+def report_process_memory(label: str) -> Dict[str, float]:
+    """
+    Log this process's memory (see get_process_memory).
+
+    Args:
+        label: Process role for the log line (e.g. "master", "worker")
+
+    Returns:
+        {metric: MB}
+    """
+    memory = get_process_memory()
+    details = ", ".join(f"{key}={value}MB" for key, value in memory.items())
+    logger.info(f"Memory ({label}, pid {os.getpid()}): {details}, frozen objects={gc.get_freeze_count()}")
+    return memory
+
+
+def prefork_preload() -> Dict[str, Any]:
+    """
+    Preload all KB data and freeze it (server master, before forking).
+
+    Opens a database session for the food KB arrays; if the database is not
+    reachable they are built lazily per worker instead. The master's
+    connection pool is disposed afterwards so no connection is shared with
+    the workers.
+
+    Returns:
+        preload_kb() result with "frozen_objects" and "memory"
+    """
+    from app.database import SessionLocal, engine
+
+    db = None
+    try:
+        db = SessionLocal()
+    except Exception as e:
+        logger.warning(f"KB preload: no database session, food KB arrays load per worker: {e}")
+    try:
+        result = preload_kb(db)
+    finally:
+        if db is not None:
+            db.close()
+        engine.dispose()
+
+    result["frozen_objects"] = freeze_shared_memory()
+    result["memory"] = report_process_memory("master")
+    return result
@@ -0,0 +1,567 @@
+"""
+Platform Meal Plan Store.
+Chunked storage for diet plan meal_plan JSON.
+
+The multi-day plan (meal_plan["seven_day_plan"]["days"]) is stored as one
+platform_diet_plan_days row per day instead of inside the plan's meal_plan
+JSONB. platform_diet_plans.meal_plan keeps the header:
+- category_wise_foods, the plan's snapshot of ranked KB foods
+- the seven_day_plan summaries and metrics
+- other keys such as meal_allocation
+
+Allocated foods in day rows reference the snapshot by food_id. Their
+display_name and ranking metadata are copies of the snapshot entry, so they
+are dropped on write and restored from the snapshot on read. Foods missing
+from the snapshot, or whose copies differ from it, are stored inline.
+
+Readers fetch only the days they need. Plans saved before chunking (days
+inline in meal_plan) are still read as they are.
+
+Versions: a new plan version of an assessment is stored as a delta against
+the nearest earlier full version (its base). The delta holds changed header
+keys and changed days and meals only. Every delta is taken against a full
+base, so a version is rebuilt by one load and one patch. A version is stored
+in full instead (re-basing the chain) when it is more than
+DIET_PLAN_DELTA_REBASE_INTERVAL versions after its base or the delta is not
+much smaller than the full plan. Before a base is rewritten or deleted, its
+dependent versions are stored in full.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import json
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.platform.data.models.platform_diet_plan import PlatformDietPlan
+from app.platform.data.repositories.platform_diet_plan_repository import PlatformDietPlanRepository
+from app.platform.data.repositories.platform_diet_plan_day_repository import PlatformDietPlanDayRepository
+
+logger = logging.getLogger(__name__)
+
+# Header marker for plans whose days live in platform_diet_plan_days
+STORAGE_FORMAT_KEY = "storage_format"
+CHUNKED_FORMAT = "chunked_v1"
+# Marker for plans stored as a delta against platform_diet_plans.base_plan_id
+DELTA_FORMAT = "delta_v1"
+
+PLAN_DAYS_KEY = "seven_day_plan"
+
+# Set on allocated foods whose snapshot fields were dropped
+SNAPSHOT_REF_KEY = "snapshot_ref"
+
+
+def build_food_snapshot(meal_plan: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Index the plan's category_wise_foods by food_id.
+
+    Args:
+        meal_plan: Meal plan or stored header
+
+    Returns:
+        {food_id: food dict}
+    """
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    for foods in (meal_plan.get("category_wise_foods") or {}).values():
+        for food in foods or []:
+            if isinstance(food, dict) and food.get("food_id") is not None:
+                snapshot.setdefault(food["food_id"], food)
+    return snapshot
+
+
+def _snapshot_fields(food: Dict[str, Any]) -> Dict[str, Any]:
+    # Same defaults MealAllocator uses when copying a ranked food
+    return {
+        "display_name": food.get("display_name", food["food_id"]),
+        "ranking": food.get("ranking", {}),
+    }
+
+
+def compact_food(food: Dict[str, Any], snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replace snapshot copies in an allocated food with a reference.
+
+    Args:
+        food: Allocated food dict
+        snapshot: Index from build_food_snapshot
+
+    Returns:
+        Compact food dict, or the food unchanged if it can't be referenced
+    """
+    if not isinstance(food, dict) or SNAPSHOT_REF_KEY in food:
+        return food
+    snapshot_food = snapshot.get(food.get("food_id"))
+    if snapshot_food is None:
+        return food
+    expected = _snapshot_fields(snapshot_food)
+    if any(name not in food or food[name] != value for name, value in expected.items()):
+        return food
+    compact = {key: value for key, value in food.items() if key not in expected}
+    compact[SNAPSHOT_REF_KEY] = True
+    return compact
+
+
+def hydrate_food(food: Dict[str, Any], snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Restore snapshot fields of a compact allocated food (inverse of compact_food).
+
+    Args:
+        food: Stored food dict
+        snapshot: Index from build_food_snapshot
+
+    Returns:
+        Allocated food dict
+    """
+    if not isinstance(food, dict) or not food.get(SNAPSHOT_REF_KEY):
+        return food
+    food_id = food.get("food_id")
+    snapshot_food = snapshot.get(food_id)
+    if snapshot_food is None:
+        # Snapshot edited after the days were written
+        logger.warning(f"Food {food_id} missing from plan snapshot")
+        fields = {"display_name": food_id, "ranking": {}}
+    else:
+        fields = _snapshot_fields(snapshot_food)
+    hydrated = {"food_id": food_id, "display_name": fields["display_name"]}
+    for key, value in food.items():
+        if key not in ("food_id", SNAPSHOT_REF_KEY):
+            hydrated[key] = value
+    hydrated["ranking"] = fields["ranking"]
+    return hydrated
+
+
+def _map_allocated_foods(day: Dict[str, Any], transform: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    meals = day.get("meals")
+    if not isinstance(meals, dict):
+        return day
+    mapped_meals = {}
+    for meal_name, meal in meals.items():
+        if isinstance(meal, dict) and isinstance(meal.get("allocated_foods"), list):
+            meal = {**meal, "allocated_foods": [transform(food) for food in meal["allocated_foods"]]}
+        mapped_meals[meal_name] = meal
+    return {**day, "meals": mapped_meals}
+
+
+def day_number_of(day_key: str, position: int) -> int:
+    """
+    Day number for a days-dict key ("day_3" -> 3).
+
+    Args:
+        day_key: Key in seven_day_plan["days"]
+        position: 1-based position, used if the key has no number
+
+    Returns:
+        Day number
+    """
+    try:
+        return int(str(day_key).rsplit("_", 1)[-1])
+    except ValueError:
+        return position
+
+
+def is_chunked(meal_plan: Optional[Dict[str, Any]]) -> bool:
+    """Whether the meal_plan is a header whose days are stored as rows."""
+    if not meal_plan or meal_plan.get(STORAGE_FORMAT_KEY) != CHUNKED_FORMAT:
+        return False
+    return "days" not in (meal_plan.get(PLAN_DAYS_KEY) or {})
+
+
+def split_meal_plan(meal_plan: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+    """
+    Split a meal plan into the stored header and day rows.
+
+    Args:
+        meal_plan: Full meal plan
+
+    Returns:
+        (header, day rows). Day rows are None when the plan has no days.
+    """
+    header, days = _detach_days(meal_plan)
+    if days is None:
+        return meal_plan, None
+
+    snapshot = build_food_snapshot(meal_plan)
+    rows = []
+    for position, (day_key, day) in enumerate(days.items(), start=1):
+        rows.append({
+            "day_number": day_number_of(day_key, position),
+            "day_key": day_key,
+            "payload": _map_allocated_foods(day, lambda food: compact_food(food, snapshot)),
+        })
+
+    header[STORAGE_FORMAT_KEY] = CHUNKED_FORMAT
+    return header, rows
+
+
+def assemble_meal_plan(header: Dict[str, Any], days: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Rebuild a meal plan from its header and day payloads (inverse of split_meal_plan).
+
+    Args:
+        header: Stored header
+        days: (day_key, payload) pairs in day order
+
+    Returns:
+        Meal plan with the given days
+    """
+    snapshot = build_food_snapshot(header)
+    return _attach_days(
+        {key: value for key, value in header.items() if key != STORAGE_FORMAT_KEY},
+        {
+            day_key: _map_allocated_foods(payload, lambda food: hydrate_food(food, snapshot))
+            for day_key, payload in days
+        }
+    )
+
+
+def _detach_days(meal_plan: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    # (meal_plan without seven_day_plan["days"], days or None)
+    seven_day_plan = meal_plan.get(PLAN_DAYS_KEY)
+    if not isinstance(seven_day_plan, dict) or not isinstance(seven_day_plan.get("days"), dict):
+        return dict(meal_plan), None
+    header = dict(meal_plan)
+    header[PLAN_DAYS_KEY] = {key: value for key, value in seven_day_plan.items() if key != "days"}
+    return header, seven_day_plan["days"]
+
+
+def _attach_days(header: Dict[str, Any], days: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if days is None:
+        return header
+    meal_plan = dict(header)
+    meal_plan[PLAN_DAYS_KEY] = {"days": days, **(header.get(PLAN_DAYS_KEY) or {})}
+    return meal_plan
+
+
+def _in_day_range(day_key: str, position: int, day_from: Optional[int], day_to: Optional[int]) -> bool:
+    day_number = day_number_of(day_key, position)
+    return (day_from is None or day_number >= day_from) and (day_to is None or day_number <= day_to)
+
+
+# --- Version deltas ------------------------------------------------------------
+
+def _diff_dicts(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {}
+    changed = {key: value for key, value in target.items() if key not in base or base[key] != value}
+    removed = [key for key in base if key not in target]
+    if changed:
+        patch["set"] = changed
+    if removed:
+        patch["unset"] = removed
+    return patch
+
+
+def _apply_dict_patch(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    unset = set(patch.get("unset", ()))
+    result = {key: value for key, value in base.items() if key not in unset}
+    result.update(patch.get("set", {}))
+    return result
+
+
+def _diff_day(base_day: Dict[str, Any], day: Dict[str, Any]) -> Dict[str, Any]:
+    base_meals, meals = base_day.get("meals"), day.get("meals")
+    if not (isinstance(base_meals, dict) and isinstance(meals, dict)):
+        return _diff_dicts(base_day, day)
+
+    patch = _diff_dicts(
+        {key: value for key, value in base_day.items() if key != "meals"},
+        {key: value for key, value in day.items() if key != "meals"}
+    )
+    changed = {name: meal for name, meal in meals.items() if name not in base_meals or base_meals[name] != meal}
+    removed = [name for name in base_meals if name not in meals]
+    if changed:
+        patch["meals"] = changed
+    if removed:
+        patch["removed_meals"] = removed
+    return patch
+
+
+def _apply_day_patch(base_day: Optional[Dict[str, Any]], patch: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if "replace" in patch:
+        return patch["replace"]
+    if base_day is None:
+        return None
+    day = _apply_dict_patch(base_day, patch)
+    if "meals" in patch or "removed_meals" in patch:
+        removed = set(patch.get("removed_meals", ()))
+        meals = {name: meal for name, meal in (base_day.get("meals") or {}).items() if name not in removed}
+        meals.update(patch.get("meals", {}))
+        day["meals"] = meals
+    return day
+
+
+def _map_patch_foods(patch: Dict[str, Any], transform: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    if "replace" in patch:
+        replace = patch["replace"]
+        return {"replace": _map_allocated_foods(replace, transform) if isinstance(replace, dict) else replace}
+    if "meals" in patch:
+        return {**patch, "meals": _map_allocated_foods({"meals": patch["meals"]}, transform)["meals"]}
+    return patch
+
+
+def diff_meal_plans(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Structural diff of two meal plans (changed header keys, days and meals).
+
+    Args:
+        base: Full base meal plan
+        target: Full meal plan to encode
+
+    Returns:
+        Delta for apply_meal_plan_delta. Allocated foods are compacted
+        against the target's category_wise_foods snapshot.
+    """
+    base_header, base_days = _detach_days(base)
+    header, days = _detach_days(target)
+    delta = _diff_dicts(base_header, header)
+    if days is None:
+        delta["days"] = None
+        return delta
+
+    snapshot = build_food_snapshot(target)
+    base_days = base_days or {}
+    day_patches = {}
+    for day_key, day in days.items():
+        base_day = base_days.get(day_key)
+        if not isinstance(base_day, dict) or not isinstance(day, dict):
+            patch = {"replace": day}
+        elif base_day != day:
+            patch = _diff_day(base_day, day)
+        else:
+            continue
+        day_patches[day_key] = _map_patch_foods(patch, lambda food: compact_food(food, snapshot))
+    delta["days"] = day_patches
+    removed = [day_key for day_key in base_days if day_key not in days]
+    if removed:
+        delta["removed_days"] = removed
+    return delta
+
+
+def apply_meal_plan_delta(
+    base: Dict[str, Any],
+    delta: Dict[str, Any],
+    day_from: Optional[int] = None,
+    day_to: Optional[int] = None,
+    include_days: bool = True
+) -> Dict[str, Any]:
+    """
+    Rebuild a meal plan from its base and delta (inverse of diff_meal_plans).
+
+    Args:
+        base: Base meal plan, already limited to the requested days
+        delta: Delta from diff_meal_plans
+        day_from: First day number to include (inclusive)
+        day_to: Last day number to include (inclusive)
+        include_days: False to apply header changes only
+
+    Returns:
+        Meal plan with the requested days
+    """
+    base_header, base_days = _detach_days(base)
+    header = _apply_dict_patch(base_header, delta)
+    if delta.get("days") is None:
+        return header
+
+    snapshot = build_food_snapshot(header)
+    removed = set(delta.get("removed_days", ()))
+    days = {day_key: day for day_key, day in (base_days or {}).items() if day_key not in removed}
+    if include_days:
+        for position, (day_key, patch) in enumerate(delta["days"].items(), start=1):
+            if not _in_day_range(day_key, position, day_from, day_to):
+                continue
+            day = _apply_day_patch(days.get(day_key), _map_patch_foods(patch, lambda food: hydrate_food(food, snapshot)))
+            if day is None:
+                logger.warning(f"Plan delta patches {day_key}, which is missing from its base")
+                continue
+            days[day_key] = day
+    ordered = sorted(enumerate(days.items(), start=1), key=lambda item: day_number_of(item[1][0], item[0]))
+    return _attach_days(header, {day_key: day for _, (day_key, day) in ordered})
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def _filter_inline_days(
+    meal_plan: Dict[str, Any],
+    day_from: Optional[int],
+    day_to: Optional[int],
+    include_days: bool
+) -> Dict[str, Any]:
+    seven_day_plan = meal_plan.get(PLAN_DAYS_KEY)
+    if not isinstance(seven_day_plan, dict) or not isinstance(seven_day_plan.get("days"), dict):
+        return meal_plan
+    if include_days and day_from is None and day_to is None:
+        return meal_plan
+    days = {}
+    if include_days:
+        for position, (day_key, day) in enumerate(seven_day_plan["days"].items(), start=1):
+            if _in_day_range(day_key, position, day_from, day_to):
+                days[day_key] = day
+    return {**meal_plan, PLAN_DAYS_KEY: {**seven_day_plan, "days": days}}
+
+
+class MealPlanStore:
+    """
+    Reads and writes diet plan meal_plan JSON in chunked and delta form.
+
+    Use save_meal_plan() wherever a meal_plan is written, load_meal_plan()
+    wherever it is read, and delete_plan() to delete a plan.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        plan_repo: Optional[PlatformDietPlanRepository] = None,
+        day_repo: Optional[PlatformDietPlanDayRepository] = None
+    ):
+        """
+        Initialize store.
+
+        Args:
+            db: SQLAlchemy database session
+            plan_repo: Plan repository (defaults to one on db)
+            day_repo: Plan day repository (defaults to one on db)
+        """
+        self.plan_repo = plan_repo or PlatformDietPlanRepository(db)
+        self.day_repo = day_repo or PlatformDietPlanDayRepository(db)
+
+    def save_meal_plan(
+        self,
+        plan_id: UUID,
+        meal_plan: Dict[str, Any],
+        extra_fields: Optional[Dict[str, Any]] = None
+    ) -> Optional[PlatformDietPlan]:
+        """
+        Store a plan's meal_plan as a delta or as a full chunked plan.
+
+        Args:
+            plan_id: Plan UUID
+            meal_plan: Full meal plan
+            extra_fields: Other plan columns to update (e.g. explanations)
+
+        Returns:
+            Updated PlatformDietPlan instance or None if not found
+        """
+        plan = self.plan_repo.get_by_id(plan_id)
+        if plan is None:
+            return None
+        self._materialize_dependents(plan)
+        if meal_plan and STORAGE_FORMAT_KEY in meal_plan and not is_chunked(meal_plan):
+            # Full plan built from a stored header; the marker is set again on write
+            meal_plan = {key: value for key, value in meal_plan.items() if key != STORAGE_FORMAT_KEY}
+
+        encoded = self._encode_delta(plan, meal_plan) if settings.DIET_PLAN_DELTA_VERSIONS else None
+        if encoded is not None:
+            base, delta = encoded
+            self.day_repo.delete_by_plan_id(plan_id)
+            return self.plan_repo.update(plan_id, {
+                "meal_plan": {STORAGE_FORMAT_KEY: DELTA_FORMAT, "delta": delta},
+                "base_plan_id": base.id,
+                **(extra_fields or {}),
+            })
+        return self._save_full(plan_id, meal_plan, extra_fields)
+
+    def load_meal_plan(
+        self,
+        plan: PlatformDietPlan,
+        day_from: Optional[int] = None,
+        day_to: Optional[int] = None,
+        include_days: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a plan's meal_plan with the requested days.
+
+        Args:
+            plan: Plan record
+            day_from: First day number to include (inclusive)
+            day_to: Last day number to include (inclusive)
+            include_days: False to return only the header (no day rows are read)
+
+        Returns:
+            Meal plan in the inline layout
+        """
+        meal_plan = plan.meal_plan
+        if meal_plan and meal_plan.get(STORAGE_FORMAT_KEY) == DELTA_FORMAT:
+            base = self.plan_repo.get_by_id(plan.base_plan_id) if plan.base_plan_id else None
+            base_meal_plan = self.load_meal_plan(base, day_from, day_to, include_days) if base else None
+            if base_meal_plan is None:
+                logger.error(f"Base plan {plan.base_plan_id} of plan {plan.id} is missing")
+                return None
+            return apply_meal_plan_delta(base_meal_plan, meal_plan["delta"], day_from, day_to, include_days)
+
+        if not is_chunked(meal_plan):
+            return _filter_inline_days(meal_plan, day_from, day_to, include_days) if meal_plan else meal_plan
+
+        rows = self.day_repo.get_by_plan_id(plan.id, day_from=day_from, day_to=day_to) if include_days else []
+        return assemble_meal_plan(meal_plan, ((row.day_key, row.payload) for row in rows))
+
+    def delete_plan(self, plan_id: UUID) -> bool:
+        """
+        Delete a plan, storing versions that use it as a base in full first.
+
+        Args:
+            plan_id: Plan UUID
+
+        Returns:
+            True if deleted, False if not found
+        """
+        plan = self.plan_repo.get_by_id(plan_id)
+        if plan is None:
+            return False
+        self._materialize_dependents(plan)
+        return self.plan_repo.delete(plan_id)
+
+    def _save_full(
+        self,
+        plan_id: UUID,
+        meal_plan: Dict[str, Any],
+        extra_fields: Optional[Dict[str, Any]] = None
+    ) -> Optional[PlatformDietPlan]:
+        header, rows = meal_plan, None
+        if settings.DIET_PLAN_CHUNKED_STORAGE and meal_plan:
+            header, rows = split_meal_plan(meal_plan)
+
+        if rows is not None:
+            self.day_repo.replace_for_plan(plan_id, rows)
+        elif not is_chunked(header):
+            # Days are inline (or absent); drop rows from an earlier save
+            self.day_repo.delete_by_plan_id(plan_id)
+
+        return self.plan_repo.update(plan_id, {"meal_plan": header, "base_plan_id": None, **(extra_fields or {})})
+
+    def _encode_delta(
+        self,
+        plan: PlatformDietPlan,
+        meal_plan: Dict[str, Any]
+    ) -> Optional[Tuple[PlatformDietPlan, Dict[str, Any]]]:
+        # (base, delta), or None when the plan should be stored in full
+        if not meal_plan or is_chunked(meal_plan) or not plan.plan_version:
+            return None
+        previous = self.plan_repo.get_previous_version(plan.assessment_id, plan.plan_version)
+        if previous is None:
+            return None
+        base = self.plan_repo.get_by_id(previous.base_plan_id) if previous.base_plan_id else previous
+        if base is None or base.base_plan_id is not None or base.id == plan.id:
+            return None
+        if plan.plan_version - (base.plan_version or 0) > settings.DIET_PLAN_DELTA_REBASE_INTERVAL:
+            return None
+        base_meal_plan = self.load_meal_plan(base)
+        if not base_meal_plan:
+            return None
+
+        delta = diff_meal_plans(base_meal_plan, meal_plan)
+        header, rows = split_meal_plan(meal_plan)
+        full_size = _json_size(header) + sum(_json_size(row["payload"]) for row in rows or [])
+        if _json_size(delta) > settings.DIET_PLAN_DELTA_MAX_RATIO * full_size:
+            return None
+        return base, delta
+
+    def _materialize_dependents(self, plan: PlatformDietPlan):
+        # Deltas against this plan would change meaning if it is rewritten or deleted
+        for dependent in self.plan_repo.get_by_base_plan_id(plan.id):
+            if dependent.id == plan.id:
+                continue
+            meal_plan = self.load_meal_plan(dependent)
+            if meal_plan is not None:
+                self._save_full(dependent.id, meal_plan)
@@ -2,8 +2,11 @@
 Platform NCP Orchestrator.
 Controls Nutrition Care Process pipeline execution.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Generator
 from uuid import UUID
+from datetime import datetime
+import functools
+import inspect
 import logging
 
 from fastapi import HTTPException
@@ -37,7 +40,7 @@ from app.platform.core.contracts import (
     FoodEngineInput,
     FoodEngineOutput,
 )
-from app.platform.core.contracts.validator import ContractValidationError
+from app.platform.core.contracts.validator import ContractValidationError, contract_validation_mode
 from app.platform.core.contracts.engine_validator import validate_engine_input, validate_engine_output
 from app.platform.data.repositories.platform_assessment_repository import PlatformAssessmentRepository
 from app.platform.data.repositories.platform_diagnosis_repository import PlatformDiagnosisRepository
@@ -47,19 +50,74 @@ from app.platform.data.repositories.platform_meal_structure_repository import Pl
 from app.platform.data.repositories.platform_exchange_allocation_repository import PlatformExchangeAllocationRepository
 from app.platform.data.repositories.platform_ayurveda_profile_repository import PlatformAyurvedaProfileRepository
 from app.platform.data.repositories.platform_diet_plan_repository import PlatformDietPlanRepository
-from app.platform.engines.diagnosis_engine.diagnosis_engine import DiagnosisEngine
-from app.platform.engines.mnt_engine.mnt_engine import MNTEngine
-from app.platform.engines.target_engine.target_engine import TargetEngine
-from app.platform.engines.meal_structure_engine.meal_structure_engine import MealStructureEngine
-from app.platform.engines.exchange_system_engine.exchange_system_engine import ExchangeSystemEngine
-from app.platform.engines.ayurveda_engine.ayurveda_engine import AyurvedaEngine
-from app.platform.engines.food_engine.food_engine import FoodEngine
-from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
-from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+from app.platform.core.orchestration.engine_pool import EnginePool, engine_pool as default_engine_pool
+from app.platform.core.orchestration.pipeline_cache import (
+    PipelineResultCache,
+    bind_to_assessment,
+    compute_pipeline_cache_key,
+    pipeline_cache as default_pipeline_cache,
+)
+from app.platform.core.orchestration.kb_manager import get_kb_manager
+from app.platform.core.orchestration.meal_plan_store import MealPlanStore
+from app.platform.core.orchestration.plan_stream import (
+    ALLOCATION_EVENT,
+    RECIPE_EVENT,
+    STAGE_EVENT,
+    PlanStreamEvent,
+    run_to_completion,
+)
+from app.platform.knowledge_base.kb_snapshot import use_kb_snapshot
 
 logger = logging.getLogger(__name__)
 
 
+class _PooledEngine:
+    """
+    Lazily resolved orchestrator engine attribute.
+
+    Looks the engine up in the orchestrator's EnginePool on first access and
+    caches it on the instance. Assigning the attribute overrides the pooled
+    engine for that orchestrator only.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        engine = instance._engine_pool.get(self.name)
+        instance.__dict__[self.name] = engine
+        return engine
+
+
+def _pins_kb(method: Callable) -> Callable:
+    """
+    Run an orchestrator stage on the KB version the orchestrator started with.
+
+    For generator methods the snapshot is pinned while each event is
+    produced, not while the consumer handles it.
+    """
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def stream(self, *args, **kwargs):
+            events = method(self, *args, **kwargs)
+            while True:
+                with use_kb_snapshot(self.kb_snapshot):
+                    try:
+                        event = next(events)
+                    except StopIteration as done:
+                        return done.value
+                yield event
+        return stream
+
+    @functools.wraps(method)
+    def stage(self, *args, **kwargs):
+        with use_kb_snapshot(self.kb_snapshot):
+            return method(self, *args, **kwargs)
+    return stage
+
+
 class NCPOrchestrator:
     """
     NCP Pipeline Orchestrator.
@@ -68,7 +126,27 @@ class NCPOrchestrator:
     Assessment → Diagnosis → MNT → Targets → Meal Structure → Exchange System → Ayurveda (advisory) → Food/Plan → Recipe Generation.
     """
     
-    def __init__(self, db: Session, client_id: UUID, enable_ayurveda: bool = True):
+    # Engines (shared, resolved from the engine pool on first use)
+    diagnosis_engine = _PooledEngine()
+    mnt_engine = _PooledEngine()
+    target_engine = _PooledEngine()
+    meal_structure_engine = _PooledEngine()
+    exchange_engine = _PooledEngine()
+    ayurveda_engine = _PooledEngine()
+    food_engine = _PooledEngine()
+    # Phase 1: Meal Allocation Engine (deterministic food allocation)
+    meal_allocation_engine = _PooledEngine()
+    # Phase 2: Recipe Generation Engine (LLM-based recipe generation)
+    recipe_generation_engine = _PooledEngine()
+
+    def __init__(
+        self,
+        db: Session,
+        client_id: UUID,
+        enable_ayurveda: bool = True,
+        engine_pool: Optional[EnginePool] = None,
+        pipeline_cache: Optional[PipelineResultCache] = None
+    ):
         self.db = db
         self.client_id = client_id
         self.enable_ayurveda = enable_ayurveda
@@ -84,18 +162,14 @@ class NCPOrchestrator:
         self.ayurveda_repo = PlatformAyurvedaProfileRepository(db)
         self.plan_repo = PlatformDietPlanRepository(db)
 
-        # Engines
-        self.diagnosis_engine = DiagnosisEngine()
-        self.mnt_engine = MNTEngine()
-        self.target_engine = TargetEngine()
-        self.meal_structure_engine = MealStructureEngine()
-        self.exchange_engine = ExchangeSystemEngine()
-        self.ayurveda_engine = AyurvedaEngine()
-        self.food_engine = FoodEngine()
-        # Phase 1: Meal Allocation Engine (deterministic food allocation)
-        self.meal_allocation_engine = MealAllocationEngine()
-        # Phase 2: Recipe Generation Engine (LLM-based recipe generation)
-        self.recipe_generation_engine = RecipeGenerationEngine()
+        # Engines are not constructed here; see the class attributes above
+        self._engine_pool = engine_pool or default_engine_pool
+
+        # Deterministic stage results for identical snapshots (None = always run engines)
+        self.pipeline_cache = pipeline_cache if pipeline_cache is not None else default_pipeline_cache
+
+        # KB version for the whole run, even if a newer one is swapped in meanwhile
+        self.kb_snapshot = get_kb_manager().current()
 
         # Cached assessment snapshot for downstream
         self._assessment_snapshot: Dict[str, Any] = {}
@@ -187,6 +261,7 @@ class NCPOrchestrator:
         
         return snapshot
 
+    @_pins_kb
     def execute_diagnosis_stage(self, assessment_context: AssessmentContext) -> DiagnosisContext:
         # State enforcement
         self.state_machine.transition_to(ClientState.INTAKE_COMPLETED)
@@ -216,10 +291,15 @@ class NCPOrchestrator:
             logger.error(f"Diagnosis engine output validation failed: {e}")
             raise HTTPException(status_code=500, detail=f"Invalid output from diagnosis engine: {str(e)}")
 
-        # Persist diagnoses
+        self._persist_diagnoses(diagnosis_context)
+
+        self.state_machine.transition_to(ClientState.DIAGNOSED)
+        return diagnosis_context
+
+    def _persist_diagnoses(self, diagnosis_context: DiagnosisContext):
         for diag in diagnosis_context.medical_conditions:
             self.diagnosis_repo.create({
-                "assessment_id": assessment_context.assessment_id,
+                "assessment_id": diagnosis_context.assessment_id,
                 "diagnosis_type": "medical",
                 "diagnosis_id": diag["diagnosis_id"],
                 "severity_score": diag.get("severity_score"),
@@ -227,16 +307,14 @@ class NCPOrchestrator:
             })
         for diag in diagnosis_context.nutrition_diagnoses:
             self.diagnosis_repo.create({
-                "assessment_id": assessment_context.assessment_id,
+                "assessment_id": diagnosis_context.assessment_id,
                 "diagnosis_type": "nutrition",
                 "diagnosis_id": diag["diagnosis_id"],
                 "severity_score": diag.get("severity_score"),
                 "evidence": diag.get("evidence"),
             })
 
-        self.state_machine.transition_to(ClientState.DIAGNOSED)
-        return diagnosis_context
-
+    @_pins_kb
     def execute_mnt_stage(self, diagnosis_context: DiagnosisContext) -> MNTContext:
         if self.state_machine.get_current_state() != ClientState.DIAGNOSED:
             raise HTTPException(status_code=400, detail="Cannot run MNT before diagnosis.")
@@ -269,9 +347,14 @@ class NCPOrchestrator:
             logger.error(f"MNT engine output validation failed: {e}")
             raise HTTPException(status_code=500, detail=f"Invalid output from MNT engine: {str(e)}")
 
+        self._persist_mnt_constraints(mnt_context)
+
+        return mnt_context
+
+    def _persist_mnt_constraints(self, mnt_context: MNTContext):
         # Persist merged constraint (single record)
         self.mnt_repo.create({
-            "assessment_id": diagnosis_context.assessment_id,
+            "assessment_id": mnt_context.assessment_id,
             "rule_id": ",".join(mnt_context.rule_ids_used) if mnt_context.rule_ids_used else None,
             "priority": 3,
             "macro_constraints": mnt_context.macro_constraints,
@@ -279,8 +362,7 @@ class NCPOrchestrator:
             "food_exclusions": mnt_context.food_exclusions,
         })
 
-        return mnt_context
-
+    @_pins_kb
     def execute_target_stage(self, mnt_context: MNTContext, diagnosis_context: Optional[DiagnosisContext] = None) -> TargetContext:
         # Build client_profile from assessment snapshot
         client_context = self._assessment_snapshot.get("client_context", {}) if self._assessment_snapshot else {}
@@ -329,10 +411,15 @@ class NCPOrchestrator:
             logger.error(f"Target engine output validation failed: {e}")
             raise HTTPException(status_code=500, detail=f"Invalid output from target engine: {str(e)}")
 
+        self._persist_targets(target_context)
+
+        return target_context
+
+    def _persist_targets(self, target_context: TargetContext):
         # Persist targets (upsert)
-        existing = self.target_repo.get_by_assessment_id(mnt_context.assessment_id)
+        existing = self.target_repo.get_by_assessment_id(target_context.assessment_id)
         payload = {
-            "assessment_id": mnt_context.assessment_id,
+            "assessment_id": target_context.assessment_id,
             "calories_target": target_context.calories_target,
             "macros": target_context.macros,
             "key_micros": target_context.key_micros,
@@ -343,8 +430,7 @@ class NCPOrchestrator:
         else:
             self.target_repo.create(payload)
 
-        return target_context
-
+    @_pins_kb
     def execute_meal_structure_stage(
         self,
         target_context: TargetContext,
@@ -362,10 +448,16 @@ class NCPOrchestrator:
             client_preferences=client_preferences
         )
         
+        self._persist_meal_structure(meal_structure_context)
+        
+        return meal_structure_context
+
+    def _persist_meal_structure(self, meal_structure_context: MealStructureContext):
         # Store meal structure in database
-        existing = self.meal_structure_repo.get_by_assessment_id(target_context.assessment_id)
+        assessment_id = meal_structure_context.assessment_id
+        existing = self.meal_structure_repo.get_by_assessment_id(assessment_id)
         structure_data = {
-            "assessment_id": target_context.assessment_id,
+            "assessment_id": assessment_id,
             "meal_count": meal_structure_context.meal_count,
             "meals": meal_structure_context.meals,
             "timing_windows": meal_structure_context.timing_windows,
@@ -378,12 +470,11 @@ class NCPOrchestrator:
         }
         
         if existing:
-            self.meal_structure_repo.update_by_assessment_id(target_context.assessment_id, structure_data)
+            self.meal_structure_repo.update_by_assessment_id(assessment_id, structure_data)
         else:
             self.meal_structure_repo.create(structure_data)
-        
-        return meal_structure_context
 
+    @_pins_kb
     def execute_exchange_stage(
         self,
         meal_structure: MealStructureContext,
@@ -479,22 +570,27 @@ class NCPOrchestrator:
         exchange_context.per_meal_nutrition = per_meal_nutrition
         exchange_context.daily_nutrition = daily_nutrition
         
+        self._persist_exchange_allocation(exchange_context)
+        
+        return exchange_context
+
+    def _persist_exchange_allocation(self, exchange_context: ExchangeContext):
         # Store exchange allocation in database
-        existing = self.exchange_repo.get_by_assessment_id(meal_structure.assessment_id)
+        assessment_id = exchange_context.assessment_id
+        existing = self.exchange_repo.get_by_assessment_id(assessment_id)
         allocation_data = {
-            "assessment_id": meal_structure.assessment_id,
-            "exchanges_per_meal": per_meal_allocation,  # Store per_meal_allocation as exchanges_per_meal for backward compatibility
-            "daily_exchange_allocation": daily_exchange_allocation,  # Store daily exchange totals
-            "notes": exchange_result.get("notes"),  # Store notes from engine
+            "assessment_id": assessment_id,
+            "exchanges_per_meal": exchange_context.exchanges_per_meal,  # per_meal_allocation, stored as exchanges_per_meal for backward compatibility
+            "daily_exchange_allocation": exchange_context.daily_exchange_allocation,  # Store daily exchange totals
+            "notes": exchange_context.notes,  # Store notes from engine
         }
         
         if existing:
-            self.exchange_repo.update_by_assessment_id(meal_structure.assessment_id, allocation_data)
+            self.exchange_repo.update_by_assessment_id(assessment_id, allocation_data)
         else:
             self.exchange_repo.create(allocation_data)
-        
-        return exchange_context
 
+    @_pins_kb
     def execute_ayurveda_stage(self, target_context: TargetContext, mnt_context: MNTContext) -> AyurvedaContext:
         if not self.enable_ayurveda:
             return AyurvedaContext(assessment_id=target_context.assessment_id)
@@ -525,9 +621,14 @@ class NCPOrchestrator:
             target_context=target_context
         )
 
-        existing = self.ayurveda_repo.get_by_assessment_id(target_context.assessment_id)
+        self._persist_ayurveda_profile(ayu_context)
+
+        return ayu_context
+
+    def _persist_ayurveda_profile(self, ayu_context: AyurvedaContext):
+        existing = self.ayurveda_repo.get_by_assessment_id(ayu_context.assessment_id)
         payload = {
-            "assessment_id": target_context.assessment_id,
+            "assessment_id": ayu_context.assessment_id,
             "dosha_primary": ayu_context.dosha_primary,
             "dosha_secondary": ayu_context.dosha_secondary,
             "vikriti_notes": ayu_context.vikriti_notes,
@@ -538,8 +639,7 @@ class NCPOrchestrator:
         else:
             self.ayurveda_repo.create(payload)
 
-        return ayu_context
-
+    @_pins_kb
     def execute_intervention_stage(
         self,
         mnt_context: MNTContext,
@@ -559,21 +659,22 @@ class NCPOrchestrator:
             db=self.db
         )
 
-        # Persist plan with version increment
-        existing = self.plan_repo.get_by_assessment_id(mnt_context.assessment_id)
-        version = 1
-        if existing:
-            version = max([p.plan_version or 1 for p in existing]) + 1
+        # Persist plan with version increment (per-assessment sequence)
+        version = self.plan_repo.next_plan_version(mnt_context.assessment_id)
 
         plan_record = self.plan_repo.create({
             "client_id": self.client_id,
             "assessment_id": mnt_context.assessment_id,
             "plan_version": version,
             "status": "active",
-            "meal_plan": intervention.meal_plan,
+            "meal_plan": None,
             "explanations": intervention.explanations,
             "constraints_snapshot": intervention.constraints_snapshot,
         })
+        # Stored as a delta against the previous full version where possible
+        plan_record = MealPlanStore(self.db, plan_repo=self.plan_repo).save_meal_plan(
+            plan_record.id, intervention.meal_plan
+        )
 
         # Update context with plan info
         if intervention.explanations is None:
@@ -585,6 +686,7 @@ class NCPOrchestrator:
         intervention.assessment_id = mnt_context.assessment_id
         return intervention
 
+    @_pins_kb
     def execute_recipe_stage(
         self,
         intervention_context: InterventionContext,
@@ -602,32 +704,63 @@ class NCPOrchestrator:
         2. Phase 2 (RecipeGenerationEngine): Generate recipes and cooking instructions using LLM
         
         Uses FoodEngine output (category_wise_foods) and exchange allocations to create
-        finalized meals with recipes.
+        finalized meals with recipes. See stream_recipe_stage() for the per-day events.
+        """
+        return run_to_completion(self.stream_recipe_stage(
+            intervention_context, exchange_context, meal_structure_context,
+            mnt_context, ayurveda_context, client_preferences
+        ))
+
+    @_pins_kb
+    def stream_recipe_stage(
+        self,
+        intervention_context: InterventionContext,
+        exchange_context: ExchangeContext,
+        meal_structure_context: MealStructureContext,
+        mnt_context: MNTContext,
+        ayurveda_context: AyurvedaContext,
+        client_preferences: Optional[Dict[str, Any]] = None
+    ) -> Generator[PlanStreamEvent, None, RecipeContext]:
+        """
+        Execute the recipe stage day by day, yielding each day as it completes.
+        
+        Each day is allocated (Phase 1) and then gets its recipes (Phase 2)
+        before the next day is allocated, so the first day is available after
+        one day of LLM calls instead of the whole plan.
+        
+        Yields:
+            ("allocation", {"day_key", "day"}) and ("recipe", {"day_key", "day"}) per day
+            
+        Returns:
+            RecipeContext (same as execute_recipe_stage)
         """
         # Get meal plan from intervention context (FoodEngine output)
         # FoodEngine output contains: category_wise_foods (ranked food lists per exchange category)
         food_engine_output = intervention_context.meal_plan or {}
+        start_date = datetime.now()
+        
+        # Constraint summaries are shared by every meal's recipe prompt
+        recipe_constraints = self.recipe_generation_engine.build_recipe_constraints(mnt_context, ayurveda_context)
         
-        # Phase 1: Allocate foods to meals (deterministic)
-        # This creates meal plans with allocated foods and quantities
-        logger.info("Phase 1: Allocating foods to meals...")
-        meal_allocation_result = self.meal_allocation_engine.allocate_meal_plan(
+        # Phase 1 (deterministic allocation) and Phase 2 (LLM recipes), one day at a time
+        logger.info("Allocating foods and generating recipes day by day...")
+        allocated_days = {}
+        recipe_days = {}
+        for day_key, day_plan in self.meal_allocation_engine.iter_day_allocations(
             exchange_context=exchange_context,
             meal_structure=meal_structure_context,
             food_engine_output=food_engine_output,
             num_days=7,
-            start_date=None  # Will default to today
-        )
+            start_date=start_date
+        ):
+            allocated_days[day_key] = day_plan
+            yield ALLOCATION_EVENT, {"day_key": day_key, "day": day_plan}
+            
+            recipe_days[day_key] = self.recipe_generation_engine.generate_recipes_for_day(day_plan, recipe_constraints)
+            yield RECIPE_EVENT, {"day_key": day_key, "day": recipe_days[day_key]}
         
-        # Phase 2: Generate recipes from allocated meals (LLM-based)
-        # This adds recipe names, cooking steps, and serving instructions
-        logger.info("Phase 2: Generating recipes with LLM...")
-        final_result = self.recipe_generation_engine.generate_recipes_for_meal_plan(
-            meal_plan=meal_allocation_result,
-            mnt_context=mnt_context,
-            ayurveda_context=ayurveda_context,
-            num_days=7
-        )
+        meal_allocation_result = self.meal_allocation_engine.build_meal_plan(allocated_days, start_date)
+        final_result = self.recipe_generation_engine.build_recipe_result(meal_allocation_result, recipe_days)
         
         # Merge variety_metrics from Phase 1 into final result if not present
         if "variety_metrics" not in final_result and "variety_metrics" in meal_allocation_result:
@@ -658,10 +791,6 @@ class NCPOrchestrator:
                     "seven_day_plan": final_result,
                 }
                 
-                update_data = {
-                    "meal_plan": updated_meal_plan,
-                }
-                
                 # Add recipe generation info to explanations
                 if plan_record.explanations:
                     explanations = plan_record.explanations.copy()
@@ -679,41 +808,151 @@ class NCPOrchestrator:
                     "validation_failures": summary.get("validation_failures", 0),
                 }
                 
-                update_data["explanations"] = explanations
-                self.plan_repo.update(plan_record.id, update_data)
+                # Days are written as per-day rows; meal_plan keeps the header
+                MealPlanStore(self.db, plan_repo=self.plan_repo).save_meal_plan(
+                    plan_record.id,
+                    updated_meal_plan,
+                    extra_fields={"explanations": explanations}
+                )
         
         return recipe_context
 
+    def _replay_cached_stages(
+        self,
+        assessment_context: AssessmentContext,
+        cached: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Apply cached diagnosis → exchange results to the current assessment.
+
+        Engines are skipped, but state transitions and per-assessment
+        persistence rows are the same as for a full run.
+
+        Args:
+            assessment_context: Current assessment
+            cached: Stage contexts from the pipeline cache
+
+        Returns:
+            Stage contexts bound to the current assessment
+        """
+        stages = bind_to_assessment(cached, assessment_context.assessment_id)
+
+        self.state_machine.transition_to(ClientState.INTAKE_COMPLETED)
+        self._persist_diagnoses(stages["diagnosis"])
+        self.state_machine.transition_to(ClientState.DIAGNOSED)
+        self._persist_mnt_constraints(stages["mnt"])
+        self._persist_targets(stages["target"])
+        self._persist_meal_structure(stages["meal_structure"])
+        if self.enable_ayurveda:
+            self._persist_ayurveda_profile(stages["ayurveda"])
+        self._persist_exchange_allocation(stages["exchange"])
+        return stages
+
     # --- Pipeline ---------------------------------------------------------------
     def execute_full_pipeline(
         self,
         assessment_id: UUID,
         client_preferences: Optional[Dict[str, Any]] = None,
-        enable_ayurveda: Optional[bool] = None
+        enable_ayurveda: Optional[bool] = None,
+        validation_mode: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute full pipeline from assessment through plan generation.
+        
+        Args:
+            assessment_id: Assessment UUID
+            client_preferences: Optional client preferences
+            enable_ayurveda: Override Ayurveda stage toggle
+            validation_mode: Contract validation mode for this run
+                ("full", "sampled", "off"); defaults to the configured mode
+        """
+        if validation_mode is not None:
+            with contract_validation_mode(validation_mode):
+                return self.execute_full_pipeline(assessment_id, client_preferences, enable_ayurveda)
+        
+        return run_to_completion(self.stream_full_pipeline(assessment_id, client_preferences, enable_ayurveda))
+
+    @_pins_kb
+    def stream_full_pipeline(
+        self,
+        assessment_id: UUID,
+        client_preferences: Optional[Dict[str, Any]] = None,
+        enable_ayurveda: Optional[bool] = None
+    ) -> Generator[PlanStreamEvent, None, Dict[str, Any]]:
+        """
+        Execute the full pipeline, yielding each stage result as it completes.
+        
+        Args:
+            assessment_id: Assessment UUID
+            client_preferences: Optional client preferences
+            enable_ayurveda: Override Ayurveda stage toggle
+            
+        Yields:
+            ("stage", {"stage", "result"}) per stage up to intervention, then
+            the per-day events of stream_recipe_stage()
+            
+        Returns:
+            Stage contexts by name (same as execute_full_pipeline)
         """
         if enable_ayurveda is not None:
             self.enable_ayurveda = enable_ayurveda
 
         assessment_context = self.execute_assessment_stage(assessment_id)
-        diagnosis_context = self.execute_diagnosis_stage(assessment_context)
-        mnt_context = self.execute_mnt_stage(diagnosis_context)
-        target_context = self.execute_target_stage(mnt_context, diagnosis_context)
-        meal_structure_context = self.execute_meal_structure_stage(target_context, client_preferences)
-        ayu_context = self.execute_ayurveda_stage(target_context, mnt_context)
-        exchange_context = self.execute_exchange_stage(
-            meal_structure_context, 
-            target_context, 
-            mnt_context, 
-            ayu_context,
-            client_preferences  # Pass client_preferences for user-mandated exchanges
-        )
+        yield STAGE_EVENT, {"stage": "assessment", "result": assessment_context}
+
+        # Deterministic stages (diagnosis → exchange) are reused for identical inputs
+        cache_key = None
+        cached = None
+        if self.pipeline_cache is not None:
+            cache_key = compute_pipeline_cache_key(
+                self._assessment_snapshot, client_preferences, self.enable_ayurveda
+            )
+            cached = self.pipeline_cache.get(cache_key)
+
+        if cached is not None:
+            logger.info(f"Pipeline cache hit for assessment {assessment_id}; skipping engines up to exchange")
+            stages = self._replay_cached_stages(assessment_context, cached)
+            diagnosis_context = stages["diagnosis"]
+            mnt_context = stages["mnt"]
+            target_context = stages["target"]
+            meal_structure_context = stages["meal_structure"]
+            ayu_context = stages["ayurveda"]
+            exchange_context = stages["exchange"]
+            for stage in ("diagnosis", "mnt", "target", "meal_structure", "ayurveda", "exchange"):
+                yield STAGE_EVENT, {"stage": stage, "result": stages[stage]}
+        else:
+            diagnosis_context = self.execute_diagnosis_stage(assessment_context)
+            yield STAGE_EVENT, {"stage": "diagnosis", "result": diagnosis_context}
+            mnt_context = self.execute_mnt_stage(diagnosis_context)
+            yield STAGE_EVENT, {"stage": "mnt", "result": mnt_context}
+            target_context = self.execute_target_stage(mnt_context, diagnosis_context)
+            yield STAGE_EVENT, {"stage": "target", "result": target_context}
+            meal_structure_context = self.execute_meal_structure_stage(target_context, client_preferences)
+            yield STAGE_EVENT, {"stage": "meal_structure", "result": meal_structure_context}
+            ayu_context = self.execute_ayurveda_stage(target_context, mnt_context)
+            yield STAGE_EVENT, {"stage": "ayurveda", "result": ayu_context}
+            exchange_context = self.execute_exchange_stage(
+                meal_structure_context, 
+                target_context, 
+                mnt_context, 
+                ayu_context,
+                client_preferences  # Pass client_preferences for user-mandated exchanges
+            )
+            if cache_key is not None:
+                self.pipeline_cache.set(cache_key, {
+                    "diagnosis": diagnosis_context,
+                    "mnt": mnt_context,
+                    "target": target_context,
+                    "meal_structure": meal_structure_context,
+                    "ayurveda": ayu_context,
+                    "exchange": exchange_context,
+                })
+            yield STAGE_EVENT, {"stage": "exchange", "result": exchange_context}
         intervention_context = self.execute_intervention_stage(
             mnt_context, target_context, exchange_context, ayu_context, diagnosis_context, client_preferences
         )
-        recipe_context = self.execute_recipe_stage(
+        yield STAGE_EVENT, {"stage": "intervention", "result": intervention_context}
+        recipe_context = yield from self.stream_recipe_stage(
             intervention_context, exchange_context, meal_structure_context, mnt_context, ayu_context, client_preferences
         )
 
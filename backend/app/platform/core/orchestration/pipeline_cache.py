@@ -0,0 +1,329 @@
+"""
+Platform Pipeline Result Cache.
+Content-addressed cache of deterministic NCP stage outputs.
+
+Diagnosis, MNT, target, meal-structure, Ayurveda and exchange outputs depend
+only on the normalized assessment snapshot, the client preferences, the
+Ayurveda toggle and the knowledge base. They do not depend on the assessment
+row itself. A canonical hash of those inputs plus the KB version vector is
+the cache key, so duplicate intakes and re-submissions can reuse a previous
+run's contexts.
+
+Tiers:
+- Memory: per-process LRU of pickled stage contexts.
+- SQLite (optional): a file shared by the workers on a host. It survives
+  restarts and has LRU eviction by last use.
+
+Entries are stored with the assessment id stripped. The caller rebinds the
+contexts to the current assessment and still writes its persistence rows.
+"""
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stages whose outputs are cached, in pipeline order
+CACHED_STAGES: Tuple[str, ...] = ("diagnosis", "mnt", "target", "meal_structure", "ayurveda", "exchange")
+
+# Bump when the cached context layout changes so old entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+KB_BASE_PATH = Path(__file__).resolve().parent.parent.parent / "knowledge_base"
+
+_kb_versions: Optional[Dict[str, str]] = None
+_kb_versions_lock = threading.Lock()
+
+
+def get_kb_version_vector() -> Dict[str, str]:
+    """
+    Get the knowledge base version vector.
+
+    Each KB directory (medical, mnt_rules, target_formulas, ...) gets a
+    digest of its JSON files' names, sizes and modification times. The
+    vector is computed once per process, because engines load their KB at
+    construction. Call invalidate_kb_versions() after reloading a KB.
+
+    Returns:
+        {kb_directory: digest}
+    """
+    global _kb_versions
+    versions = _kb_versions
+    if versions is not None:
+        return versions
+    with _kb_versions_lock:
+        if _kb_versions is None:
+            _kb_versions = _compute_kb_versions(KB_BASE_PATH)
+        return _kb_versions
+
+
+def invalidate_kb_versions():
+    """Recompute the KB version vector on next use."""
+    global _kb_versions
+    with _kb_versions_lock:
+        _kb_versions = None
+
+
+def _compute_kb_versions(base_path: Path) -> Dict[str, str]:
+    digests: Dict[str, Any] = {}
+    for path in sorted(base_path.rglob("*.json")):
+        relative = path.relative_to(base_path)
+        group = relative.parts[0] if len(relative.parts) > 1 else "."
+        stat = path.stat()
+        digests.setdefault(group, hashlib.sha256()).update(
+            f"{relative.as_posix()}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8")
+        )
+    return {group: digest.hexdigest()[:16] for group, digest in digests.items()}
+
+
+def compute_pipeline_cache_key(
+    assessment_snapshot: Dict[str, Any],
+    client_preferences: Optional[Dict[str, Any]] = None,
+    enable_ayurveda: bool = True,
+    kb_versions: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Canonical hash of the inputs the deterministic stages depend on.
+
+    Args:
+        assessment_snapshot: Normalized assessment snapshot
+        client_preferences: Client preferences passed to the pipeline
+        enable_ayurveda: Ayurveda stage toggle
+        kb_versions: KB version vector (defaults to get_kb_version_vector())
+
+    Returns:
+        Hex sha256 key
+    """
+    canonical = json.dumps(
+        {
+            "format": CACHE_FORMAT_VERSION,
+            "snapshot": assessment_snapshot or {},
+            "preferences": client_preferences or {},
+            "ayurveda": bool(enable_ayurveda),
+            "kb": kb_versions if kb_versions is not None else get_kb_version_vector(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SQLitePipelineStore:
+    """
+    SQLite tier for pipeline results.
+
+    Uses one connection per call with WAL journaling, so several worker
+    processes can share the file.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        """
+        Initialize store.
+
+        Args:
+            path: SQLite database file
+            max_entries: Least recently used rows beyond this are evicted
+        """
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pipeline_results ("
+                "cache_key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+                "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_pipeline_results_last_used "
+                "ON pipeline_results (last_used_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM pipeline_results WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE pipeline_results SET last_used_at = ? WHERE cache_key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def set(self, key: str, payload: bytes):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pipeline_results (cache_key, payload, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(payload), now, now),
+            )
+            conn.execute(
+                "DELETE FROM pipeline_results WHERE cache_key IN ("
+                "SELECT cache_key FROM pipeline_results ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pipeline_results")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pipeline_results").fetchone()[0]
+
+
+class PipelineResultCache:
+    """
+    Two-tier cache of deterministic stage contexts keyed by input hash.
+
+    Values are stored pickled, so every hit returns fresh context objects
+    that the caller may mutate.
+    """
+
+    def __init__(self, max_entries: int = 256, store: Optional[SQLitePipelineStore] = None):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Memory tier LRU capacity
+            store: Optional SQLite tier
+        """
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "store_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up stage contexts.
+
+        Args:
+            key: Key from compute_pipeline_cache_key
+
+        Returns:
+            {stage: context} with assessment_id unset, or None on miss
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+
+        if payload is None and self.store is not None:
+            try:
+                payload = self.store.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Pipeline cache store read failed: {e}")
+            if payload is not None:
+                self._remember(key, payload)
+                with self._lock:
+                    self.stats["store_hits"] += 1
+
+        if payload is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        return pickle.loads(payload)
+
+    def set(self, key: str, contexts: Dict[str, Any]):
+        """
+        Store stage contexts.
+
+        Args:
+            key: Key from compute_pipeline_cache_key
+            contexts: {stage: context} for every stage in CACHED_STAGES
+        """
+        try:
+            payload = pickle.dumps(_strip_assessment_ids(contexts), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f"Pipeline results not cacheable: {e}")
+            return
+
+        self._remember(key, payload)
+        if self.store is not None:
+            try:
+                self.store.set(key, payload)
+            except sqlite3.Error as e:
+                logger.warning(f"Pipeline cache store write failed: {e}")
+
+    def clear(self):
+        """Drop all entries from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def _remember(self, key: str, payload: bytes):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _strip_assessment_ids(contexts: Dict[str, Any]) -> Dict[str, Any]:
+    # Shallow-copy each context so the caller's objects keep their ids
+    stripped = {}
+    for stage, context in contexts.items():
+        clone = object.__new__(type(context))
+        clone.__dict__.update(context.__dict__)
+        clone.assessment_id = None
+        stripped[stage] = clone
+    return stripped
+
+
+def bind_to_assessment(contexts: Dict[str, Any], assessment_id: Any) -> Dict[str, Any]:
+    """
+    Set assessment_id on cached contexts.
+
+    Args:
+        contexts: Contexts returned by PipelineResultCache.get
+        assessment_id: Current assessment id
+
+    Returns:
+        The same contexts
+    """
+    for context in contexts.values():
+        context.assessment_id = assessment_id
+    return contexts
+
+
+def _build_default_cache() -> Optional[PipelineResultCache]:
+    if not settings.PIPELINE_CACHE_ENABLED:
+        return None
+    store = None
+    if settings.PIPELINE_CACHE_SQLITE_PATH:
+        try:
+            store = SQLitePipelineStore(
+                settings.PIPELINE_CACHE_SQLITE_PATH,
+                max_entries=settings.PIPELINE_CACHE_SQLITE_MAX_ENTRIES,
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Pipeline cache SQLite tier disabled: {e}")
+    return PipelineResultCache(max_entries=settings.PIPELINE_CACHE_MAX_ENTRIES, store=store)
+
+
+# Process-wide cache used by NCPOrchestrator.execute_full_pipeline (None when disabled)
+pipeline_cache = _build_default_cache()
@@ -0,0 +1,45 @@
+"""
+Platform Plan Stream.
+Incremental events for long-running plan and recipe generation.
+
+NCPOrchestrator.stream_full_pipeline() and stream_recipe_stage() are
+generators. They yield (event, data) tuples as results become available and
+return the same result as the non-streaming method. The API layer encodes the
+events as NDJSON or Server-Sent Events. The non-streaming methods drain the
+same generators with run_to_completion(), so both paths share one
+implementation.
+
+Events:
+- stage: a pipeline stage up to intervention finished;
+  data = {"stage": name, "result": context}
+- allocation: one day's foods were allocated; data = {"day_key", "day"}
+- recipe: one day's recipes were generated; data = {"day_key", "day"}
+- summary: generation finished; data = final result summary (API layer)
+- error: generation failed after the stream started (API layer)
+"""
+from typing import Any, Dict, Generator, Tuple
+
+STAGE_EVENT = "stage"
+ALLOCATION_EVENT = "allocation"
+RECIPE_EVENT = "recipe"
+SUMMARY_EVENT = "summary"
+ERROR_EVENT = "error"
+
+PlanStreamEvent = Tuple[str, Dict[str, Any]]
+
+
+def run_to_completion(events: Generator[PlanStreamEvent, None, Any]) -> Any:
+    """
+    Consume a plan event generator and return its return value.
+
+    Args:
+        events: Generator from a stream_* orchestrator method
+
+    Returns:
+        The generator's return value
+    """
+    while True:
+        try:
+            next(events)
+        except StopIteration as done:
+            return done.value
@@ -5,9 +5,10 @@ Master table for food identity and metadata.
 from datetime import datetime
 from sqlalchemy import Column, String, Numeric, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import uuid
 from app.database import Base
+from app.platform.utils.food_name_index import food_group_key
 
 
 class KBFoodMaster(Base):
@@ -31,6 +32,8 @@ class KBFoodMaster(Base):
     cooking_state = Column(String(50), nullable=True)
     common_serving_unit = Column(String(50), nullable=True)
     common_serving_size_g = Column(Numeric(10, 2), nullable=True)
+    # Variation group key (see food_group_key), derived from display_name on write
+    dedup_group_key = Column(String(250), nullable=True, index=True)
     version = Column(String(20), default='1.0')
     status = Column(String(20), default='active', index=True)
     source = Column(String(200), nullable=True)
@@ -52,6 +55,12 @@ class KBFoodMaster(Base):
         Index('idx_food_master_status', 'status'),
     )
     
+    @validates('display_name')
+    def _set_dedup_group_key(self, key, display_name):
+        """Keep dedup_group_key in sync with display_name."""
+        self.dedup_group_key = food_group_key(display_name)
+        return display_name
+    
     def __repr__(self):
         return f"<KBFoodMaster {self.food_id}>"
 
@@ -15,6 +15,7 @@ class PlatformDietPlan(Base):
     Platform diet plan model.
     
     Stores versioned diet plans with meal plans, explanations, and constraint snapshots.
+    Versions after the first may store meal_plan as a delta (see MealPlanStore).
     """
     
     __tablename__ = "platform_diet_plans"
@@ -23,6 +24,13 @@ class PlatformDietPlan(Base):
     client_id = Column(UUID(as_uuid=True), ForeignKey("platform_clients.id"), nullable=False)
     assessment_id = Column(UUID(as_uuid=True), ForeignKey("platform_assessments.id"), nullable=False)
     plan_version = Column(Integer, nullable=True)
+    # Set when meal_plan is stored as a delta against an earlier full version
+    base_plan_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("platform_diet_plans.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
     status = Column(String, nullable=True)  # active | archived | draft
     meal_plan = Column(JSONB, nullable=True)
     explanations = Column(JSONB, nullable=True)
@@ -0,0 +1,46 @@
+"""
+Platform Diet Plan Day ORM model.
+Stores one day of a chunked diet plan.
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship, backref
+import uuid
+from app.database import Base
+
+
+class PlatformDietPlanDay(Base):
+    """
+    Platform diet plan day model.
+
+    One row per day of a plan's seven_day_plan. The payload is the day dict
+    (meals, recipes, totals) with allocated foods stored as references to the
+    plan's category_wise_foods snapshot. See MealPlanStore.
+    """
+
+    __tablename__ = "platform_diet_plan_days"
+    __table_args__ = (
+        UniqueConstraint("plan_id", "day_number", name="uq_platform_diet_plan_days_plan_day"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    plan_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("platform_diet_plans.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    day_number = Column(Integer, nullable=False)
+    day_key = Column(String, nullable=False)  # "day_1", "day_2", etc.
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    plan = relationship(
+        "PlatformDietPlan",
+        backref=backref("days", cascade="all, delete-orphan", passive_deletes=True)
+    )
+
+    def __repr__(self):
+        return f"<PlatformDietPlanDay {self.plan_id} - {self.day_key}>"
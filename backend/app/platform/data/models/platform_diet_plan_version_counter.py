@@ -0,0 +1,25 @@
+"""
+Platform Diet Plan Version Counter ORM model.
+Per-assessment sequence for diet plan version numbers.
+"""
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+
+class PlatformDietPlanVersionCounter(Base):
+    """
+    Diet plan version counter.
+
+    Holds the last plan_version issued for an assessment. The next version
+    is taken with a single atomic upsert, so concurrent regenerations never
+    get the same number and prior plans are never loaded.
+    """
+
+    __tablename__ = "platform_diet_plan_version_counters"
+
+    assessment_id = Column(UUID(as_uuid=True), ForeignKey("platform_assessments.id"), primary_key=True)
+    last_version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlatformDietPlanVersionCounter {self.assessment_id}: {self.last_version}>"
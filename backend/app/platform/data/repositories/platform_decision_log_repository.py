@@ -4,6 +4,7 @@ CRUD operations for platform decision logs.
 """
 from typing import Optional, List
 from uuid import UUID
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.platform.data.models.platform_decision_log import PlatformDecisionLog
 
@@ -41,6 +42,22 @@ class PlatformDecisionLogRepository:
         self.db.refresh(log)
         return log
     
+    def bulk_create(self, logs_data: List[dict]) -> int:
+        """
+        Insert many platform decision logs in one statement and commit.
+        
+        Args:
+            logs_data: Dictionaries with log fields
+            
+        Returns:
+            Number of inserted logs
+        """
+        if not logs_data:
+            return 0
+        self.db.execute(insert(PlatformDecisionLog), logs_data)
+        self.db.commit()
+        return len(logs_data)
+    
     def get_by_id(self, log_id: UUID) -> Optional[PlatformDecisionLog]:
         """
         Get platform decision log by ID.
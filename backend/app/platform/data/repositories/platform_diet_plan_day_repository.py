@@ -0,0 +1,86 @@
+"""
+Platform Diet Plan Day Repository.
+Data access for per-day rows of chunked diet plans.
+"""
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.platform.data.models.platform_diet_plan_day import PlatformDietPlanDay
+
+
+class PlatformDietPlanDayRepository:
+    """
+    Repository for platform diet plan day operations.
+
+    No business logic - data access only. The day payload layout is owned
+    by MealPlanStore.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize repository with database session.
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    def get_by_plan_id(
+        self,
+        plan_id: UUID,
+        day_from: Optional[int] = None,
+        day_to: Optional[int] = None
+    ) -> List[PlatformDietPlanDay]:
+        """
+        Get day rows of a plan, optionally limited to a day range.
+
+        Args:
+            plan_id: Plan UUID
+            day_from: First day number (inclusive)
+            day_to: Last day number (inclusive)
+
+        Returns:
+            List of PlatformDietPlanDay instances ordered by day number
+        """
+        query = self.db.query(PlatformDietPlanDay).filter(
+            PlatformDietPlanDay.plan_id == plan_id
+        )
+        if day_from is not None:
+            query = query.filter(PlatformDietPlanDay.day_number >= day_from)
+        if day_to is not None:
+            query = query.filter(PlatformDietPlanDay.day_number <= day_to)
+        return query.order_by(PlatformDietPlanDay.day_number).all()
+
+    def replace_for_plan(self, plan_id: UUID, days: List[Dict[str, Any]]) -> int:
+        """
+        Replace all day rows of a plan.
+
+        Args:
+            plan_id: Plan UUID
+            days: Dictionaries with day_number, day_key and payload
+
+        Returns:
+            Number of rows written
+        """
+        self.db.query(PlatformDietPlanDay).filter(
+            PlatformDietPlanDay.plan_id == plan_id
+        ).delete(synchronize_session=False)
+        self.db.add_all([PlatformDietPlanDay(plan_id=plan_id, **day) for day in days])
+        self.db.commit()
+        return len(days)
+
+    def delete_by_plan_id(self, plan_id: UUID) -> int:
+        """
+        Delete all day rows of a plan.
+
+        Args:
+            plan_id: Plan UUID
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = self.db.query(PlatformDietPlanDay).filter(
+            PlatformDietPlanDay.plan_id == plan_id
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -5,7 +5,9 @@ CRUD operations for platform diet plans.
 from typing import Optional, List
 from uuid import UUID
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from app.platform.data.models.platform_diet_plan import PlatformDietPlan
+from app.platform.data.models.platform_diet_plan_version_counter import PlatformDietPlanVersionCounter
 
 
 class PlatformDietPlanRepository:
@@ -83,6 +85,59 @@ class PlatformDietPlanRepository:
             PlatformDietPlan.assessment_id == assessment_id
         ).all()
     
+    def get_previous_version(self, assessment_id: UUID, plan_version: int) -> Optional[PlatformDietPlan]:
+        """
+        Get the latest plan of an assessment below a version.
+        
+        Args:
+            assessment_id: Assessment UUID
+            plan_version: Version to look below
+            
+        Returns:
+            PlatformDietPlan instance or None
+        """
+        return self.db.query(PlatformDietPlan).filter(
+            PlatformDietPlan.assessment_id == assessment_id,
+            PlatformDietPlan.plan_version < plan_version
+        ).order_by(PlatformDietPlan.plan_version.desc()).first()
+    
+    def get_by_base_plan_id(self, base_plan_id: UUID) -> List[PlatformDietPlan]:
+        """
+        Get plans stored as deltas against a base plan.
+        
+        Args:
+            base_plan_id: Base plan UUID
+            
+        Returns:
+            List of PlatformDietPlan instances
+        """
+        return self.db.query(PlatformDietPlan).filter(
+            PlatformDietPlan.base_plan_id == base_plan_id
+        ).all()
+    
+    def next_plan_version(self, assessment_id: UUID) -> int:
+        """
+        Take the next plan version number for an assessment.
+        
+        Uses the per-assessment counter row (one atomic upsert) instead of
+        reading previous plans.
+        
+        Args:
+            assessment_id: Assessment UUID
+            
+        Returns:
+            Version number (1 for the first plan)
+        """
+        counter = PlatformDietPlanVersionCounter.__table__
+        stmt = insert(counter).values(assessment_id=assessment_id, last_version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[counter.c.assessment_id],
+            set_={"last_version": counter.c.last_version + 1}
+        ).returning(counter.c.last_version)
+        version = self.db.execute(stmt).scalar_one()
+        self.db.commit()
+        return version
+    
     def get_by_status(self, status: str) -> List[PlatformDietPlan]:
         """
         Get diet plans by status.
@@ -6,6 +6,7 @@ from typing import Optional, List
 from uuid import UUID
 from sqlalchemy.orm import Session
 from app.platform.data.models.platform_user import PlatformUser
+from app.platform.infra.cache.principal_cache import principal_cache
 
 
 class PlatformUserRepository:
@@ -98,6 +99,9 @@ class PlatformUserRepository:
         """
         Update platform user.
         
+        Drops the user's cached principals (deactivation, password or role
+        changes take effect on the next request).
+        
         Args:
             user_id: User UUID
             update_data: Dictionary with fields to update
@@ -107,10 +111,13 @@ class PlatformUserRepository:
         """
         user = self.get_by_id(user_id)
         if user:
+            previous_username = user.username
             for key, value in update_data.items():
                 setattr(user, key, value)
             self.db.commit()
             self.db.refresh(user)
+            principal_cache.invalidate_user(previous_username)
+            principal_cache.invalidate_user(user.username)
         return user
     
     def delete(self, user_id: UUID) -> bool:
@@ -125,8 +132,10 @@ class PlatformUserRepository:
         """
         user = self.get_by_id(user_id)
         if user:
+            username = user.username
             self.db.delete(user)
             self.db.commit()
+            principal_cache.invalidate_user(username)
             return True
         return False
 
@@ -12,6 +12,7 @@ Usage:
         --source pdf --file guidelines.pdf --kb medical_conditions \
         --llm openai --api-key YOUR_KEY
 """
+import os
 import sys
 import json
 import argparse
@@ -24,6 +25,7 @@ sys.path.insert(0, str(project_root))
 
 from app.database import SessionLocal
 from app.platform.data.scripts.import_kb_manual import import_data
+from app.platform.ai.gateway import get_llm_gateway
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -45,11 +47,8 @@ class LLMExtractor:
         self.api_key = api_key
         
         if provider == "openai":
-            try:
-                import openai
-                self.client = openai.OpenAI(api_key=api_key or None)
-            except ImportError:
-                raise ImportError("openai package not installed. Run: pip install openai")
+            # Shared pooled gateway pointed at api.openai.com
+            self.client = get_llm_gateway(api_key or os.environ.get("OPENAI_API_KEY"), base_url=None)
         elif provider == "anthropic":
             try:
                 import anthropic
@@ -123,15 +122,15 @@ Return only valid JSON array, no additional text.
     def _call_llm(self, prompt: str) -> str:
         """Call LLM API."""
         if self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+            response = self.client.complete(
                 messages=[
                     {"role": "system", "content": "You are a data extraction assistant. Extract structured data and return only valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
+                model="gpt-4-turbo-preview",
                 temperature=0.1
             )
-            return response.choices[0].message.content
+            return response.content
         elif self.provider == "anthropic":
             response = self.client.messages.create(
                 model="claude-3-opus-20240229",
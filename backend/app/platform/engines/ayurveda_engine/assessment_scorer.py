@@ -13,21 +13,17 @@ Uses knowledge base (KB) files for:
 - Vikriti severity thresholds
 - Ama level thresholds
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
 from enum import Enum
+
+import numpy as np
+
 from .kb_ayurveda import (
-    get_prakriti_scoring_rule,
-    get_all_prakriti_scoring_rules,
-    get_vikriti_scoring_rule,
-    get_all_vikriti_scoring_rules,
-    get_agni_classification_rule,
-    get_all_agni_classification_rules,
-    get_ama_indicator,
-    get_all_ama_indicators,
     get_dosha_determination_rule,
     get_vikriti_severity_rule,
     get_ama_level_rule,
 )
+from .compiled_scoring import DOSHAS, get_compiled_scoring, resolve_agni
 
 
 class Dosha(str, Enum):
@@ -57,7 +53,8 @@ class AmaLevel(str, Enum):
 # SCORING TABLES (now loaded from KB)
 # ============================================================================
 # All scoring tables have been moved to KB JSON files.
-# Use kb_ayurveda module functions to access them.
+# Use kb_ayurveda module functions to access them. Scoring functions use the
+# weight arrays compiled from those rules (see compiled_scoring).
 
 # ============================================================================
 # SCORING FUNCTIONS
@@ -78,45 +75,9 @@ def calculate_prakriti_scores(responses: Dict[str, Any]) -> Dict[str, int]:
     Returns:
         Dictionary with dosha scores: {"Vata": score, "Pitta": score, "Kapha": score}
     """
-    scores = {Dosha.VATA: 0, Dosha.PITTA: 0, Dosha.KAPHA: 0}
-    
-    # Load all Prakriti scoring rules from KB
-    prakriti_rules = get_all_prakriti_scoring_rules()
-    
-    for rule in prakriti_rules:
-        question_id = rule.get("question_id")
-        if not question_id:
-            continue
-        
-        answer = responses.get(question_id)
-        if answer is None or answer == "":
-            continue
-        
-        # Handle both string answers (A/B/C) and array answers (for checkboxes)
-        answer_value = None
-        if isinstance(answer, list):
-            # For checkbox questions, check if "Yes" is in the list
-            if "Yes" in answer:
-                answer_value = "Yes"
-            else:
-                continue
-        else:
-            answer_value = str(answer).strip()
-        
-        # Get answer options from KB
-        answer_options = rule.get("answer_options", {})
-        if answer_value and answer_value in answer_options:
-            dosha_weights = answer_options[answer_value].get("dosha_weights", {})
-            for dosha_name, weight in dosha_weights.items():
-                # Map dosha name to enum
-                if dosha_name == "Vata":
-                    scores[Dosha.VATA] += weight
-                elif dosha_name == "Pitta":
-                    scores[Dosha.PITTA] += weight
-                elif dosha_name == "Kapha":
-                    scores[Dosha.KAPHA] += weight
-    
-    return {dosha.value: score for dosha, score in scores.items()}
+    prakriti = get_compiled_scoring().prakriti
+    scores = prakriti.score(prakriti.encode(responses))
+    return dict(zip(DOSHAS, scores.tolist()))
 
 
 def calculate_vikriti_scores(responses: Dict[str, Any], prakriti_scores: Dict[str, int]) -> Dict[str, Any]:
@@ -139,97 +100,63 @@ def calculate_vikriti_scores(responses: Dict[str, Any], prakriti_scores: Dict[st
         - imbalanced_doshas: List of imbalanced dosha names
         - severity: "mild", "moderate", or "severe"
     """
-    vikriti_scores_dict = {Dosha.VATA: 0, Dosha.PITTA: 0, Dosha.KAPHA: 0}
+    vikriti = get_compiled_scoring().vikriti
+    vikriti_scores = dict(zip(DOSHAS, vikriti.score(vikriti.encode(responses)).tolist()))
     
-    # Load all Vikriti scoring rules from KB
-    vikriti_rules = get_all_vikriti_scoring_rules()
+    imbalanced, severity = _assess_vikriti(
+        prakriti=np.array([[prakriti_scores.get(d, 0) for d in DOSHAS]]),
+        prakriti_totals=np.array([sum(prakriti_scores.values())]),
+        vikriti=np.array([[vikriti_scores[d] for d in DOSHAS]]),
+    )
     
-    for rule in vikriti_rules:
-        question_id = rule.get("question_id")
-        if not question_id:
-            continue
-        
-        answer = responses.get(question_id)
-        if answer is None or answer == "":
-            continue
-        
-        # Handle both string answers (A/B/C) and array answers
-        answer_value = None
-        if isinstance(answer, list):
-            if "Yes" in answer:
-                answer_value = "Yes"
-            else:
-                continue
-        else:
-            answer_value = str(answer).strip()
-        
-        # Get answer options from KB
-        answer_options = rule.get("answer_options", {})
-        if answer_value and answer_value in answer_options:
-            dosha_weights = answer_options[answer_value].get("dosha_weights", {})
-            for dosha_name, weight in dosha_weights.items():
-                # Map dosha name to enum
-                if dosha_name == "Vata":
-                    vikriti_scores_dict[Dosha.VATA] += weight
-                elif dosha_name == "Pitta":
-                    vikriti_scores_dict[Dosha.PITTA] += weight
-                elif dosha_name == "Kapha":
-                    vikriti_scores_dict[Dosha.KAPHA] += weight
-    
-    vikriti_scores = {dosha.value: score for dosha, score in vikriti_scores_dict.items()}
-    
-    # Calculate total scores for comparison
-    total_prakriti = sum(prakriti_scores.values()) or 1
-    total_vikriti = sum(vikriti_scores.values()) or 1
+    return {
+        "scores": vikriti_scores,
+        "imbalanced_doshas": [d for d, flag in zip(DOSHAS, imbalanced[0]) if flag],
+        "severity": severity[0],
+    }
+
+
+def _assess_vikriti(
+    prakriti: np.ndarray,
+    prakriti_totals: np.ndarray,
+    vikriti: np.ndarray
+):
+    """
+    Compare Vikriti with Prakriti using KB severity thresholds.
     
+    Args:
+        prakriti: (N, 3) Prakriti scores in DOSHAS order
+        prakriti_totals: (N,) Prakriti score totals
+        vikriti: (N, 3) Vikriti scores in DOSHAS order
+        
+    Returns:
+        (imbalanced mask (N, 3), severity per row)
+    """
     # Normalize to percentages for comparison
-    prakriti_percentages = {
-        dosha: (score / total_prakriti) * 100 
-        for dosha, score in prakriti_scores.items()
-    }
-    vikriti_percentages = {
-        dosha: (score / total_vikriti) * 100 
-        for dosha, score in vikriti_scores.items()
-    }
+    prakriti_totals = np.where(prakriti_totals == 0, 1, prakriti_totals)
+    vikriti_totals = vikriti.sum(axis=1)
+    vikriti_totals = np.where(vikriti_totals == 0, 1, vikriti_totals)
+    prakriti_percentages = (prakriti / prakriti_totals[:, None]) * 100
+    vikriti_percentages = (vikriti / vikriti_totals[:, None]) * 100
     
     # Load Vikriti severity thresholds from KB
     severity_rule = get_vikriti_severity_rule()
     thresholds = severity_rule.get("thresholds", {}) if severity_rule else {}
-    
-    # Find imbalanced doshas (using KB thresholds)
-    imbalanced_doshas = []
-    max_excess = 0
-    
     mild_threshold = thresholds.get("mild", {}).get("min_excess", 15)
-    
-    for dosha in [Dosha.VATA, Dosha.PITTA, Dosha.KAPHA]:
-        dosha_str = dosha.value
-        prakriti_pct = prakriti_percentages.get(dosha_str, 0)
-        vikriti_pct = vikriti_percentages.get(dosha_str, 0)
-        
-        excess = vikriti_pct - prakriti_pct
-        if excess >= mild_threshold:
-            imbalanced_doshas.append(dosha_str)
-            max_excess = max(max_excess, excess)
-    
-    # Determine severity using KB thresholds
-    severe_threshold = thresholds.get("severe", {}).get("min_excess", 30)
     moderate_threshold = thresholds.get("moderate", {}).get("min_excess", 20)
+    severe_threshold = thresholds.get("severe", {}).get("min_excess", 30)
     
-    if max_excess >= severe_threshold:
-        severity = "severe"
-    elif max_excess >= moderate_threshold:
-        severity = "moderate"
-    elif max_excess >= mild_threshold:
-        severity = "mild"
-    else:
-        severity = "none"
-    
-    return {
-        "scores": vikriti_scores,
-        "imbalanced_doshas": imbalanced_doshas,
-        "severity": severity,
-    }
+    # Imbalanced doshas exceed their Prakriti share by the mild threshold
+    excess = vikriti_percentages - prakriti_percentages
+    imbalanced = excess >= mild_threshold
+    max_excess = np.where(imbalanced, excess, 0).max(axis=1, initial=0)
+    
+    severity = np.select(
+        [max_excess >= severe_threshold, max_excess >= moderate_threshold, max_excess >= mild_threshold],
+        ["severe", "moderate", "mild"],
+        default="none",
+    )
+    return imbalanced, severity.tolist()
 
 
 def determine_agni_type(responses: Dict[str, Any]) -> str:
@@ -248,58 +175,9 @@ def determine_agni_type(responses: Dict[str, Any]) -> str:
     Returns:
         Agni type string
     """
-    # Load all Agni classification rules from KB
-    agni_rules = get_all_agni_classification_rules()
-    
-    agni_votes = {
-        AgniType.VISHAMA: 0,
-        AgniType.TIKSHNA: 0,
-        AgniType.MANDA: 0,
-        AgniType.SAMA: 0,
-    }
-    
-    fallback_agni = AgniType.SAMA.value
-    
-    for rule in agni_rules:
-        question_id = rule.get("question_id")
-        if not question_id:
-            continue
-        
-        answer = responses.get(question_id)
-        if answer is None or answer == "":
-            continue
-        
-        # Get fallback Agni from rule
-        fallback_agni = rule.get("fallback_agni", AgniType.SAMA.value)
-        
-        # Get agni mapping from KB
-        agni_mapping = rule.get("agni_mapping", {})
-        answer_value = str(answer).strip()
-        
-        if answer_value in agni_mapping:
-            agni_info = agni_mapping[answer_value]
-            agni_type_str = agni_info.get("agni_type")
-            weight = agni_info.get("weight", 1)
-            
-            # Map agni type string to enum
-            if agni_type_str == "Vishama":
-                agni_votes[AgniType.VISHAMA] += weight
-            elif agni_type_str == "Tikshna":
-                agni_votes[AgniType.TIKSHNA] += weight
-            elif agni_type_str == "Manda":
-                agni_votes[AgniType.MANDA] += weight
-    
-    # If no strong indicators, default to Sama (or fallback from KB)
-    max_votes = max(agni_votes.values())
-    if max_votes == 0:
-        return fallback_agni
-    
-    # Return the Agni type with most votes
-    for agni_type, votes in agni_votes.items():
-        if votes == max_votes:
-            return agni_type.value
-    
-    return fallback_agni
+    agni = get_compiled_scoring().agni
+    codes = agni.encode(responses)
+    return resolve_agni(agni.score(codes), codes, get_compiled_scoring().agni_fallbacks)[0]
 
 
 def determine_ama_level(responses: Dict[str, Any]) -> str:
@@ -318,36 +196,21 @@ def determine_ama_level(responses: Dict[str, Any]) -> str:
     Returns:
         Ama level string
     """
-    ama_score = 0
-    
-    # Load all Ama indicators from KB
-    ama_indicators = get_all_ama_indicators()
+    ama = get_compiled_scoring().ama
+    # Score shape is (1,): the single "ama" output column
+    return _ama_levels(ama.score(ama.encode(responses)))[0]
+
+
+def _ama_levels(ama_scores: np.ndarray) -> List[str]:
+    """
+    Map Ama scores to levels using KB thresholds.
     
-    for indicator in ama_indicators:
-        indicator_id = indicator.get("indicator_id")
-        if not indicator_id:
-            continue
-        
-        answer = responses.get(indicator_id)
-        if answer is None or answer == "":
-            continue
-        
-        # Get scoring from KB
-        scoring = indicator.get("scoring", {})
-        
-        # Handle both string answers and array answers
-        answer_value = None
-        if isinstance(answer, list):
-            if "Yes" in answer:
-                answer_value = "Yes"
-            else:
-                continue
-        else:
-            answer_value = str(answer).strip()
+    Args:
+        ama_scores: (N,) Ama scores
         
-        if answer_value and answer_value in scoring:
-            ama_score += scoring[answer_value].get("ama_score", 0)
-    
+    Returns:
+        Ama level per score
+    """
     # Load Ama level thresholds from KB
     ama_rule = get_ama_level_rule()
     thresholds = ama_rule.get("thresholds", {}) if ama_rule else {}
@@ -357,14 +220,11 @@ def determine_ama_level(responses: Dict[str, Any]) -> str:
     moderate_threshold = thresholds.get("moderate", {}).get("min_score", 3)
     mild_threshold = thresholds.get("mild", {}).get("min_score", 1)
     
-    if ama_score >= high_threshold:
-        return AmaLevel.HIGH.value
-    elif ama_score >= moderate_threshold:
-        return AmaLevel.MODERATE.value
-    elif ama_score >= mild_threshold:
-        return AmaLevel.MILD.value
-    else:
-        return AmaLevel.NONE.value
+    return np.select(
+        [ama_scores >= high_threshold, ama_scores >= moderate_threshold, ama_scores >= mild_threshold],
+        [AmaLevel.HIGH.value, AmaLevel.MODERATE.value, AmaLevel.MILD.value],
+        default=AmaLevel.NONE.value,
+    ).tolist()
 
 
 def determine_dosha_primary_secondary(prakriti_scores: Dict[str, int]) -> Dict[str, Optional[str]]:
@@ -410,3 +270,53 @@ def determine_dosha_primary_secondary(prakriti_scores: Dict[str, int]) -> Dict[s
     
     return {"primary": primary, "secondary": secondary}
 
+
+
+def score_questionnaires_batch(responses_list: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score many questionnaires at once (e.g. re-analysis after KB tuning).
+    
+    Encodes all responses to answer-code matrices and scores each section
+    with one array operation. Results are identical to calling the single
+    response functions per questionnaire.
+    
+    Args:
+        responses_list: Questionnaire responses dictionaries
+        
+    Returns:
+        Per questionnaire:
+        {
+            "prakriti": {"primary", "secondary", "scores"},
+            "vikriti": {"scores", "imbalanced_doshas", "severity"},
+            "agni": str,
+            "ama": str,
+        }
+    """
+    if not responses_list:
+        return []
+    compiled = get_compiled_scoring()
+    
+    prakriti = compiled.prakriti.score(compiled.prakriti.encode_batch(responses_list))
+    vikriti = compiled.vikriti.score(compiled.vikriti.encode_batch(responses_list))
+    agni_codes = compiled.agni.encode_batch(responses_list)
+    agni_types = resolve_agni(compiled.agni.score(agni_codes), agni_codes, compiled.agni_fallbacks)
+    ama_levels = _ama_levels(compiled.ama.score(compiled.ama.encode_batch(responses_list))[:, 0])
+    imbalanced, severity = _assess_vikriti(prakriti, prakriti.sum(axis=1), vikriti)
+    
+    results = []
+    for n, (prakriti_row, vikriti_row) in enumerate(zip(prakriti.tolist(), vikriti.tolist())):
+        prakriti_scores = dict(zip(DOSHAS, prakriti_row))
+        results.append({
+            "prakriti": {
+                **determine_dosha_primary_secondary(prakriti_scores),
+                "scores": prakriti_scores,
+            },
+            "vikriti": {
+                "scores": dict(zip(DOSHAS, vikriti_row)),
+                "imbalanced_doshas": [d for d, flag in zip(DOSHAS, imbalanced[n]) if flag],
+                "severity": severity[n],
+            },
+            "agni": agni_types[n],
+            "ama": ama_levels[n],
+        })
+    return results
@@ -0,0 +1,274 @@
+"""
+Compiled Ayurvedic Questionnaire Scoring.
+
+Compiles the Prakriti/Vikriti/Agni/Ama scoring KB into dense weight arrays
+once per KB load, so that scoring becomes array arithmetic:
+
+- Each scoring rule becomes one row. Each answer value gets an integer code:
+  0 = unanswered, 1 = answered with a value the KB does not know, 2.. = KB options.
+- Dosha weights form a (questions x codes x doshas) tensor. Agni votes and
+  Ama scores form similar arrays. Rows for codes 0 and 1 are zero.
+- Scoring one response is a gather-and-sum over the question axis. Scoring
+  N responses stacks their codes into an (N x questions) matrix and does the
+  same gather in one NumPy operation.
+
+Answer normalization matches assessment_scorer. A checkbox answer (list)
+counts as "Yes" if it contains "Yes" and as unanswered otherwise; Agni rules
+compare str(answer).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+import threading
+
+import numpy as np
+
+from .kb_ayurveda import (
+    get_all_prakriti_scoring_rules,
+    get_all_vikriti_scoring_rules,
+    get_all_agni_classification_rules,
+    get_all_ama_indicators,
+)
+
+DOSHAS: Tuple[str, ...] = ("Vata", "Pitta", "Kapha")
+# Vote order matters: ties go to the first type, as in determine_agni_type
+AGNI_TYPES: Tuple[str, ...] = ("Vishama", "Tikshna", "Manda")
+
+UNANSWERED = 0
+UNKNOWN_ANSWER = 1
+_FIRST_OPTION = 2
+
+
+def _normalize_answer(answer: Any, checkbox_yes: bool) -> Optional[str]:
+    """Normalize a raw response value (None means unanswered)."""
+    if answer is None or answer == "":
+        return None
+    if checkbox_yes and isinstance(answer, list):
+        return "Yes" if "Yes" in answer else None
+    return str(answer).strip()
+
+
+@dataclass
+class CompiledQuestionSet:
+    """
+    Rules compiled to an integer answer encoding and a weight array.
+
+    weights has shape (questions, codes, outputs); rows for codes 0/1 are zero.
+    """
+    question_ids: List[str]
+    answer_codes: List[Dict[str, int]]
+    weights: np.ndarray
+    checkbox_yes: bool = True
+
+    def encode(self, responses: Dict[str, Any]) -> np.ndarray:
+        """
+        Encode one response dict as answer codes.
+
+        Args:
+            responses: Questionnaire responses
+
+        Returns:
+            int array of shape (questions,)
+        """
+        codes = np.zeros(len(self.question_ids), dtype=np.intp)
+        for i, question_id in enumerate(self.question_ids):
+            value = _normalize_answer(responses.get(question_id), self.checkbox_yes)
+            if value is not None:
+                codes[i] = self.answer_codes[i].get(value, UNKNOWN_ANSWER)
+        return codes
+
+    def encode_batch(self, responses_list: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Encode many responses.
+
+        Returns:
+            int array of shape (responses, questions)
+        """
+        codes = np.zeros((len(responses_list), len(self.question_ids)), dtype=np.intp)
+        for n, responses in enumerate(responses_list):
+            codes[n] = self.encode(responses)
+        return codes
+
+    def score(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Sum weights selected by answer codes.
+
+        Args:
+            codes: (questions,) or (responses, questions) answer codes
+
+        Returns:
+            (outputs,) or (responses, outputs) totals
+        """
+        rows = np.arange(len(self.question_ids))
+        return self.weights[rows, codes].sum(axis=-2)
+
+
+@dataclass
+class CompiledAyurvedaScoring:
+    """All questionnaire scoring tables compiled from one KB load."""
+    prakriti: CompiledQuestionSet
+    vikriti: CompiledQuestionSet
+    agni: CompiledQuestionSet
+    agni_fallbacks: List[str]
+    ama: CompiledQuestionSet
+    # The rule lists compiled from. Held (and compared with `is`) rather than
+    # their id()s: a freed list's address can be reused by a reloaded KB.
+    kb_sources: Tuple[List[Dict[str, Any]], ...] = field(repr=False)
+
+    def is_compiled_from(self, sources: Tuple[List[Dict[str, Any]], ...]) -> bool:
+        """Return True if compiled from exactly these rule lists."""
+        return len(sources) == len(self.kb_sources) and all(
+            compiled is current for compiled, current in zip(self.kb_sources, sources)
+        )
+
+
+def _compile_question_set(
+    rules: List[Dict[str, Any]],
+    id_field: str,
+    options_field: str,
+    outputs: Sequence[str],
+    option_weights,
+    checkbox_yes: bool = True
+) -> Tuple[CompiledQuestionSet, List[Dict[str, Any]]]:
+    """
+    Compile rules into a CompiledQuestionSet.
+
+    Args:
+        rules: KB rules
+        id_field: Field holding the question id
+        options_field: Field holding {answer_value: option}
+        outputs: Output axis labels
+        option_weights: Callable(option) -> {output_label: weight}
+        checkbox_yes: Apply the checkbox "Yes" normalization
+
+    Returns:
+        (compiled set, rules kept in row order)
+    """
+    kept = [rule for rule in rules if rule.get(id_field)]
+    answer_codes = [
+        {value: _FIRST_OPTION + j for j, value in enumerate((rule.get(options_field) or {}).keys())}
+        for rule in kept
+    ]
+    max_codes = _FIRST_OPTION + max((len(codes) for codes in answer_codes), default=0)
+    output_index = {label: k for k, label in enumerate(outputs)}
+
+    all_weights = [
+        option_weights(option)
+        for rule in kept
+        for option in (rule.get(options_field) or {}).values()
+    ]
+    is_int = all(isinstance(w, int) for weights in all_weights for w in weights.values())
+    weights = np.zeros((len(kept), max_codes, len(outputs)), dtype=np.int64 if is_int else np.float64)
+
+    for i, rule in enumerate(kept):
+        for value, option in (rule.get(options_field) or {}).items():
+            for label, weight in option_weights(option).items():
+                k = output_index.get(label)
+                if k is not None:
+                    weights[i, answer_codes[i][value], k] += weight
+
+    compiled = CompiledQuestionSet(
+        question_ids=[rule[id_field] for rule in kept],
+        answer_codes=answer_codes,
+        weights=weights,
+        checkbox_yes=checkbox_yes,
+    )
+    return compiled, kept
+
+
+def compile_scoring(
+    sources: Optional[Tuple[List[Dict[str, Any]], ...]] = None
+) -> CompiledAyurvedaScoring:
+    """
+    Compile the scoring KB.
+
+    Args:
+        sources: (Prakriti, Vikriti, Agni, Ama) rule lists (defaults to the loaded KB)
+
+    Returns:
+        CompiledAyurvedaScoring
+    """
+    sources = sources if sources is not None else _kb_sources()
+    prakriti_rules, vikriti_rules, agni_rules, ama_rules = sources
+
+    dosha_weights = lambda option: option.get("dosha_weights", {})
+    prakriti, _ = _compile_question_set(prakriti_rules, "question_id", "answer_options", DOSHAS, dosha_weights)
+    vikriti, _ = _compile_question_set(vikriti_rules, "question_id", "answer_options", DOSHAS, dosha_weights)
+    agni, agni_kept = _compile_question_set(
+        agni_rules, "question_id", "agni_mapping", AGNI_TYPES,
+        lambda option: {option.get("agni_type"): option.get("weight", 1)},
+        checkbox_yes=False,
+    )
+    ama, _ = _compile_question_set(
+        ama_rules, "indicator_id", "scoring", ("ama",),
+        lambda option: {"ama": option.get("ama_score", 0)},
+    )
+
+    return CompiledAyurvedaScoring(
+        prakriti=prakriti,
+        vikriti=vikriti,
+        agni=agni,
+        agni_fallbacks=[rule.get("fallback_agni", "Sama") for rule in agni_kept],
+        ama=ama,
+        kb_sources=tuple(sources),
+    )
+
+
+def _kb_sources() -> Tuple[List[Dict[str, Any]], ...]:
+    # The KB loader returns the same list objects until the KB is reloaded
+    return (
+        get_all_prakriti_scoring_rules(),
+        get_all_vikriti_scoring_rules(),
+        get_all_agni_classification_rules(),
+        get_all_ama_indicators(),
+    )
+
+
+_compiled: Optional[CompiledAyurvedaScoring] = None
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_scoring() -> CompiledAyurvedaScoring:
+    """
+    Get compiled scoring for the loaded KB (recompiled after a KB reload).
+
+    Returns:
+        CompiledAyurvedaScoring
+    """
+    global _compiled
+    sources = _kb_sources()
+    compiled = _compiled
+    if compiled is not None and compiled.is_compiled_from(sources):
+        return compiled
+    with _compiled_lock:
+        if _compiled is None or not _compiled.is_compiled_from(sources):
+            _compiled = compile_scoring(sources)
+        return _compiled
+
+
+def resolve_agni(votes: np.ndarray, answered_codes: np.ndarray, fallbacks: List[str]) -> List[str]:
+    """
+    Pick Agni types from vote totals.
+
+    Args:
+        votes: (responses, agni types) vote totals
+        answered_codes: (responses, agni questions) answer codes
+        fallbacks: Per-question fallback Agni type
+
+    Returns:
+        Agni type per response. The most-voted type wins, with ties going to
+        the first type in AGNI_TYPES. Responses with no votes get the fallback
+        of the last answered Agni question, or "Sama".
+    """
+    votes = np.atleast_2d(votes)
+    answered_codes = np.atleast_2d(answered_codes)
+    winners = votes.argmax(axis=1)
+    has_votes = votes.max(axis=1) > 0
+
+    results = []
+    for n in range(votes.shape[0]):
+        if has_votes[n]:
+            results.append(AGNI_TYPES[winners[n]])
+            continue
+        answered = np.flatnonzero(answered_codes[n] != UNANSWERED)
+        results.append(fallbacks[answered[-1]] if answered.size else "Sama")
+    return results
@@ -5,10 +5,12 @@ Loads Prakriti/Vikriti scoring rules, Agni/Ama assessment rules,
 dosha food qualities, meal timing, cooking methods, portion guidance,
 and Ayurveda profiles from JSON KB files.
 """
-import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
 # Cache for loaded KB data
 _PRAKRITI_SCORING_CACHE: Optional[List[Dict[str, Any]]] = None
 _VIKRITI_SCORING_CACHE: Optional[List[Dict[str, Any]]] = None
@@ -29,6 +31,7 @@ def _get_kb_path(filename: str) -> Path:
     return Path(__file__).parent.parent.parent / "knowledge_base" / "ayurveda" / filename
 
 
+@versioned_kb_loader
 def _load_prakriti_scoring() -> List[Dict[str, Any]]:
     """Load Prakriti scoring rules from KB."""
     global _PRAKRITI_SCORING_CACHE
@@ -36,13 +39,13 @@ def _load_prakriti_scoring() -> List[Dict[str, Any]]:
         return _PRAKRITI_SCORING_CACHE
     
     kb_path = _get_kb_path("prakriti_scoring_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _PRAKRITI_SCORING_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _PRAKRITI_SCORING_CACHE
 
 
+@versioned_kb_loader
 def _load_vikriti_scoring() -> List[Dict[str, Any]]:
     """Load Vikriti scoring rules from KB."""
     global _VIKRITI_SCORING_CACHE
@@ -50,13 +53,13 @@ def _load_vikriti_scoring() -> List[Dict[str, Any]]:
         return _VIKRITI_SCORING_CACHE
     
     kb_path = _get_kb_path("vikriti_scoring_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _VIKRITI_SCORING_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _VIKRITI_SCORING_CACHE
 
 
+@versioned_kb_loader
 def _load_agni_classification() -> List[Dict[str, Any]]:
     """Load Agni classification rules from KB."""
     global _AGNI_CLASSIFICATION_CACHE
@@ -64,13 +67,13 @@ def _load_agni_classification() -> List[Dict[str, Any]]:
         return _AGNI_CLASSIFICATION_CACHE
     
     kb_path = _get_kb_path("agni_classification_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _AGNI_CLASSIFICATION_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AGNI_CLASSIFICATION_CACHE
 
 
+@versioned_kb_loader
 def _load_ama_indicators() -> List[Dict[str, Any]]:
     """Load Ama indicators from KB."""
     global _AMA_INDICATORS_CACHE
@@ -78,13 +81,13 @@ def _load_ama_indicators() -> List[Dict[str, Any]]:
         return _AMA_INDICATORS_CACHE
     
     kb_path = _get_kb_path("ama_indicators_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _AMA_INDICATORS_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AMA_INDICATORS_CACHE
 
 
+@versioned_kb_loader
 def _load_dosha_food_qualities() -> List[Dict[str, Any]]:
     """Load dosha food qualities from KB."""
     global _DOSHA_FOOD_QUALITIES_CACHE
@@ -92,13 +95,13 @@ def _load_dosha_food_qualities() -> List[Dict[str, Any]]:
         return _DOSHA_FOOD_QUALITIES_CACHE
     
     kb_path = _get_kb_path("dosha_food_qualities_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _DOSHA_FOOD_QUALITIES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _DOSHA_FOOD_QUALITIES_CACHE
 
 
+@versioned_kb_loader
 def _load_agni_meal_timing() -> List[Dict[str, Any]]:
     """Load Agni meal timing rules from KB."""
     global _AGNI_MEAL_TIMING_CACHE
@@ -106,13 +109,13 @@ def _load_agni_meal_timing() -> List[Dict[str, Any]]:
         return _AGNI_MEAL_TIMING_CACHE
     
     kb_path = _get_kb_path("agni_meal_timing_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _AGNI_MEAL_TIMING_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AGNI_MEAL_TIMING_CACHE
 
 
+@versioned_kb_loader
 def _load_cooking_methods() -> List[Dict[str, Any]]:
     """Load cooking methods from KB."""
     global _COOKING_METHODS_CACHE
@@ -120,13 +123,13 @@ def _load_cooking_methods() -> List[Dict[str, Any]]:
         return _COOKING_METHODS_CACHE
     
     kb_path = _get_kb_path("cooking_methods_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _COOKING_METHODS_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _COOKING_METHODS_CACHE
 
 
+@versioned_kb_loader
 def _load_portion_guidance() -> List[Dict[str, Any]]:
     """Load portion guidance from KB."""
     global _PORTION_GUIDANCE_CACHE
@@ -134,13 +137,13 @@ def _load_portion_guidance() -> List[Dict[str, Any]]:
         return _PORTION_GUIDANCE_CACHE
     
     kb_path = _get_kb_path("portion_guidance_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _PORTION_GUIDANCE_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _PORTION_GUIDANCE_CACHE
 
 
+@versioned_kb_loader
 def _load_ayurveda_profiles() -> List[Dict[str, Any]]:
     """Load Ayurveda profiles from KB."""
     global _AYURVEDA_PROFILES_CACHE
@@ -148,13 +151,13 @@ def _load_ayurveda_profiles() -> List[Dict[str, Any]]:
         return _AYURVEDA_PROFILES_CACHE
     
     kb_path = _get_kb_path("ayurveda_profiles_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _AYURVEDA_PROFILES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AYURVEDA_PROFILES_CACHE
 
 
+@versioned_kb_loader
 def _load_dosha_determination_rules() -> List[Dict[str, Any]]:
     """Load dosha determination rules from KB."""
     global _DOSHA_DETERMINATION_RULES_CACHE
@@ -162,13 +165,13 @@ def _load_dosha_determination_rules() -> List[Dict[str, Any]]:
         return _DOSHA_DETERMINATION_RULES_CACHE
     
     kb_path = _get_kb_path("dosha_determination_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _DOSHA_DETERMINATION_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _DOSHA_DETERMINATION_RULES_CACHE
 
 
+@versioned_kb_loader
 def _load_vikriti_severity_rules() -> List[Dict[str, Any]]:
     """Load Vikriti severity rules from KB."""
     global _VIKRITI_SEVERITY_RULES_CACHE
@@ -176,13 +179,13 @@ def _load_vikriti_severity_rules() -> List[Dict[str, Any]]:
         return _VIKRITI_SEVERITY_RULES_CACHE
     
     kb_path = _get_kb_path("vikriti_severity_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _VIKRITI_SEVERITY_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _VIKRITI_SEVERITY_RULES_CACHE
 
 
+@versioned_kb_loader
 def _load_ama_level_rules() -> List[Dict[str, Any]]:
     """Load Ama level rules from KB."""
     global _AMA_LEVEL_RULES_CACHE
@@ -190,8 +193,7 @@ def _load_ama_level_rules() -> List[Dict[str, Any]]:
         return _AMA_LEVEL_RULES_CACHE
     
     kb_path = _get_kb_path("ama_level_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     _AMA_LEVEL_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AMA_LEVEL_RULES_CACHE
@@ -9,6 +9,7 @@ from typing import Dict, List, Any, Optional
 from uuid import UUID
 
 from app.platform.core.context import AssessmentContext, DiagnosisContext
+from app.platform.knowledge_base.kb_artifact import read_kb_json
 
 
 class DiagnosisEngine:
@@ -59,8 +60,7 @@ class DiagnosisEngine:
         kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "medical" / "medical_conditions_kb_complete.json"
         
         try:
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                kb_data = json.load(f)
+            kb_data = read_kb_json(kb_path)
             
             # Filter only active conditions
             active_conditions = [
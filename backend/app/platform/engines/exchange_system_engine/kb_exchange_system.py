@@ -4,10 +4,12 @@ Exchange System Knowledge Base Loader.
 Loads exchange category definitions, allocation rules, medical/Ayurveda modifiers,
 and exchange limits from JSON KB files.
 """
-import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
 # Cache for loaded KB data
 _EXCHANGE_CATEGORY_CACHE: Optional[List[Dict[str, Any]]] = None
 _EXCHANGE_ALLOCATION_RULES_CACHE: Optional[List[Dict[str, Any]]] = None
@@ -26,6 +28,7 @@ def _get_kb_path(filename: str) -> Path:
     return Path(__file__).parent.parent.parent / "knowledge_base" / "exchange_system" / filename
 
 
+@versioned_kb_loader
 def _load_exchange_categories() -> List[Dict[str, Any]]:
     """Load exchange category definitions from KB."""
     global _EXCHANGE_CATEGORY_CACHE
@@ -33,14 +36,14 @@ def _load_exchange_categories() -> List[Dict[str, Any]]:
         return _EXCHANGE_CATEGORY_CACHE
     
     kb_path = _get_kb_path("exchange_category_definitions_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     # Filter only active categories
     _EXCHANGE_CATEGORY_CACHE = [cat for cat in data if cat.get("status") == "active"]
     return _EXCHANGE_CATEGORY_CACHE
 
 
+@versioned_kb_loader
 def _load_exchange_allocation_rules() -> List[Dict[str, Any]]:
     """Load exchange allocation rules from KB."""
     global _EXCHANGE_ALLOCATION_RULES_CACHE
@@ -48,14 +51,14 @@ def _load_exchange_allocation_rules() -> List[Dict[str, Any]]:
         return _EXCHANGE_ALLOCATION_RULES_CACHE
     
     kb_path = _get_kb_path("exchange_allocation_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     # Filter only active rules
     _EXCHANGE_ALLOCATION_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _EXCHANGE_ALLOCATION_RULES_CACHE
 
 
+@versioned_kb_loader
 def _load_medical_modifier_rules() -> List[Dict[str, Any]]:
     """Load medical modifier rules from KB."""
     global _MEDICAL_MODIFIER_RULES_CACHE
@@ -63,14 +66,14 @@ def _load_medical_modifier_rules() -> List[Dict[str, Any]]:
         return _MEDICAL_MODIFIER_RULES_CACHE
     
     kb_path = _get_kb_path("medical_modifier_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     # Filter only active rules
     _MEDICAL_MODIFIER_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _MEDICAL_MODIFIER_RULES_CACHE
 
 
+@versioned_kb_loader
 def _load_ayurveda_modifier_rules() -> List[Dict[str, Any]]:
     """Load Ayurveda modifier rules from KB."""
     global _AYURVEDA_MODIFIER_RULES_CACHE
@@ -78,14 +81,14 @@ def _load_ayurveda_modifier_rules() -> List[Dict[str, Any]]:
         return _AYURVEDA_MODIFIER_RULES_CACHE
     
     kb_path = _get_kb_path("ayurveda_modifier_rules_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     # Filter only active rules
     _AYURVEDA_MODIFIER_RULES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     return _AYURVEDA_MODIFIER_RULES_CACHE
 
 
+@versioned_kb_loader
 def _load_exchange_limits() -> List[Dict[str, Any]]:
     """Load exchange limits from KB."""
     global _EXCHANGE_LIMITS_CACHE
@@ -93,8 +96,7 @@ def _load_exchange_limits() -> List[Dict[str, Any]]:
         return _EXCHANGE_LIMITS_CACHE
     
     kb_path = _get_kb_path("exchange_limits_kb.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = read_kb_json(kb_path)
     
     # Filter only active rules
     _EXCHANGE_LIMITS_CACHE = [rule for rule in data if rule.get("status") == "active"]
@@ -235,6 +237,7 @@ def get_medical_modifier_for_condition(condition: str) -> Optional[Dict[str, Any
     return None
 
 
+@versioned_kb_loader
 def _load_mandatory_presence_constraints() -> List[Dict[str, Any]]:
     """Load mandatory presence constraints from KB."""
     global _MANDATORY_PRESENCE_CONSTRAINTS_CACHE
@@ -243,8 +246,7 @@ def _load_mandatory_presence_constraints() -> List[Dict[str, Any]]:
     
     kb_path = _get_kb_path("mandatory_presence_constraints_kb.json")
     try:
-        with open(kb_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_kb_json(kb_path)
         _MANDATORY_PRESENCE_CONSTRAINTS_CACHE = [rule for rule in data if rule.get("status") == "active"]
     except FileNotFoundError:
         _MANDATORY_PRESENCE_CONSTRAINTS_CACHE = []
@@ -252,6 +254,7 @@ def _load_mandatory_presence_constraints() -> List[Dict[str, Any]]:
     return _MANDATORY_PRESENCE_CONSTRAINTS_CACHE
 
 
+@versioned_kb_loader
 def _load_nutrition_validation_tolerances() -> List[Dict[str, Any]]:
     """Load nutrition validation tolerances from KB."""
     global _NUTRITION_VALIDATION_TOLERANCES_CACHE
@@ -260,8 +263,7 @@ def _load_nutrition_validation_tolerances() -> List[Dict[str, Any]]:
     
     kb_path = _get_kb_path("nutrition_validation_tolerances_kb.json")
     try:
-        with open(kb_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_kb_json(kb_path)
         _NUTRITION_VALIDATION_TOLERANCES_CACHE = [rule for rule in data if rule.get("status") == "active"]
     except FileNotFoundError:
         _NUTRITION_VALIDATION_TOLERANCES_CACHE = []
@@ -430,6 +432,7 @@ def get_nutrition_validation_tolerances() -> Optional[Dict[str, Any]]:
     return rules[0] if rules else None
 
 
+@versioned_kb_loader
 def _load_core_food_groups() -> List[Dict[str, Any]]:
     """Load core food groups configuration from KB."""
     global _CORE_FOOD_GROUPS_CACHE
@@ -438,8 +441,7 @@ def _load_core_food_groups() -> List[Dict[str, Any]]:
     
     kb_path = _get_kb_path("core_food_groups_kb.json")
     try:
-        with open(kb_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_kb_json(kb_path)
         _CORE_FOOD_GROUPS_CACHE = [rule for rule in data if rule.get("status") == "active"]
     except FileNotFoundError:
         _CORE_FOOD_GROUPS_CACHE = []
@@ -465,6 +467,7 @@ def get_core_food_groups() -> Optional[Dict[str, Any]]:
     return rules[0] if rules else None
 
 
+@versioned_kb_loader
 def _load_exchange_exclusion_constraints() -> List[Dict[str, Any]]:
     """Load exchange exclusion constraints from KB."""
     global _EXCHANGE_EXCLUSION_CONSTRAINTS_CACHE
@@ -473,8 +476,7 @@ def _load_exchange_exclusion_constraints() -> List[Dict[str, Any]]:
     
     kb_path = _get_kb_path("exchange_exclusion_constraints_kb.json")
     try:
-        with open(kb_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_kb_json(kb_path)
         _EXCHANGE_EXCLUSION_CONSTRAINTS_CACHE = [rule for rule in data if rule.get("status") == "active"]
     except FileNotFoundError:
         _EXCHANGE_EXCLUSION_CONSTRAINTS_CACHE = []
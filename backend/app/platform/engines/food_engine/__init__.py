@@ -4,7 +4,16 @@ Food filtering and meal composition.
 """
 
 from .food_engine import FoodEngine
+from .food_candidate import FoodCandidate
+from .nutrient_matrix import NutrientMatrix, get_nutrient_matrix
+from .substitution_index import FoodSubstitute, FoodSubstitutionIndex, get_substitution_index
 
 __all__ = [
     "FoodEngine",
+    "FoodCandidate",
+    "NutrientMatrix",
+    "get_nutrient_matrix",
+    "FoodSubstitute",
+    "FoodSubstitutionIndex",
+    "get_substitution_index",
 ]
@@ -0,0 +1,287 @@
+"""
+Food Candidate.
+
+Compact representation of a candidate food inside the food pipeline
+(filter → deduplicate → rank → top-N).
+
+Each candidate is a __slots__ object instead of a nested dict. Nutrition is
+held as flat floats, and ranking results are plain attributes set in place
+rather than a copied, re-decorated dict per step. Dicts are only
+materialized with to_dict() where foods leave the engine (meal_plan JSON,
+API responses).
+
+For scoring code written against food dicts, candidates expose read access
+with the same keys: get(), "key" in candidate and candidate["key"].
+"""
+from typing import Any, Dict, List, Optional
+
+
+class FoodCandidate:
+    """Candidate food with the fields used for filtering, ranking and allocation."""
+
+    __slots__ = (
+        "food_id",
+        "display_name",
+        "category",
+        "exchange_category",
+        "food_exclusion_tags",
+        "dedup_group_key",
+        "serving_size_per_exchange_g",
+        # Nutrition per 100g (micros is None when the food has no nutrition record)
+        "calories",
+        "protein_g",
+        "carbs_g",
+        "fat_g",
+        "fiber_g",
+        "micros",
+        "calorie_density_kcal_per_g",
+        "protein_density_g_per_100kcal",
+        # MNT profile and condition compatibility (None = not available / not checked)
+        "mnt_profile",
+        "compatibility_checked",
+        "compatibility_levels",
+        "mnt_profile_info",
+        "food_type",
+        "cooking_state",
+        # Ranking (set by FoodRanker / FoodDeduplicator)
+        "total_score",
+        "tier_scores",
+        "ranking_factors",
+        "rank",
+        "deduplication",
+    )
+
+    def __init__(
+        self,
+        food_id: str,
+        display_name: Optional[str] = None,
+        category: Optional[str] = None,
+        exchange_category: Optional[str] = None,
+        food_exclusion_tags: Optional[List[str]] = None,
+        dedup_group_key: Optional[str] = None,
+        serving_size_per_exchange_g: Optional[float] = None,
+        food_type: Optional[str] = None,
+        cooking_state: Optional[str] = None
+    ):
+        self.food_id = food_id
+        self.display_name = display_name
+        self.category = category
+        self.exchange_category = exchange_category
+        self.food_exclusion_tags = food_exclusion_tags if food_exclusion_tags is not None else []
+        self.dedup_group_key = dedup_group_key
+        self.serving_size_per_exchange_g = serving_size_per_exchange_g
+        self.calories = None
+        self.protein_g = 0.0
+        self.carbs_g = 0.0
+        self.fat_g = 0.0
+        self.fiber_g = 0.0
+        self.micros = None
+        self.calorie_density_kcal_per_g = None
+        self.protein_density_g_per_100kcal = None
+        self.mnt_profile = None
+        self.compatibility_checked = False
+        self.compatibility_levels = None
+        self.mnt_profile_info = None
+        self.food_type = food_type
+        self.cooking_state = cooking_state
+        self.total_score = None
+        self.tier_scores = None
+        self.ranking_factors = None
+        self.rank = None
+        self.deduplication = None
+
+    # --- Pipeline updates ------------------------------------------------------
+    def set_nutrition(
+        self,
+        calories: Optional[float],
+        protein_g: float,
+        carbs_g: float,
+        fat_g: float,
+        fiber_g: float,
+        micros: Dict[str, Any],
+        calorie_density_kcal_per_g: Optional[float] = None,
+        protein_density_g_per_100kcal: Optional[float] = None
+    ):
+        """Set nutrition per 100g."""
+        self.calories = calories
+        self.protein_g = protein_g
+        self.carbs_g = carbs_g
+        self.fat_g = fat_g
+        self.fiber_g = fiber_g
+        self.micros = micros
+        self.calorie_density_kcal_per_g = calorie_density_kcal_per_g
+        self.protein_density_g_per_100kcal = protein_density_g_per_100kcal
+
+    def set_ranking(self, total_score: float, tier_scores: Dict[str, float], ranking_factors: Dict[str, Any]):
+        """Record ranking scores (replaces earlier ranking metadata, as for food dicts)."""
+        self.total_score = round(total_score, 2)
+        self.tier_scores = {k: round(v, 2) for k, v in tier_scores.items()}
+        self.ranking_factors = ranking_factors
+        self.rank = None
+        self.deduplication = None
+
+    @property
+    def has_nutrition(self) -> bool:
+        return self.micros is not None
+
+    # --- Dict views ------------------------------------------------------------
+    def nutrition_dict(self) -> Optional[Dict[str, Any]]:
+        """Nutrition in the food dict layout (None if not available)."""
+        if self.micros is None:
+            return None
+        return {
+            "calories": self.calories,
+            "macros": {
+                "protein_g": self.protein_g,
+                "carbs_g": self.carbs_g,
+                "fat_g": self.fat_g,
+                "fiber_g": self.fiber_g,
+            },
+            "micros": self.micros,
+            "calorie_density_kcal_per_g": self.calorie_density_kcal_per_g,
+            "protein_density_g_per_100kcal": self.protein_density_g_per_100kcal,
+        }
+
+    def ranking_dict(self) -> Optional[Dict[str, Any]]:
+        """Ranking metadata in the food dict layout (None if not ranked or deduplicated)."""
+        ranking: Dict[str, Any] = {}
+        if self.total_score is not None:
+            ranking["total_score"] = self.total_score
+            ranking["tier_scores"] = self.tier_scores
+            ranking["ranking_factors"] = self.ranking_factors
+            if self.rank is not None:
+                ranking["rank"] = self.rank
+        if self.deduplication is not None:
+            ranking["deduplication"] = self.deduplication
+        return ranking or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Materialize the food dict (same keys and order as the dict pipeline).
+
+        Returns:
+            Food dictionary
+        """
+        food = {
+            "food_id": self.food_id,
+            "display_name": self.display_name,
+            "category": self.category,
+            "exchange_category": self.exchange_category,
+            "food_exclusion_tags": self.food_exclusion_tags,
+            "dedup_group_key": self.dedup_group_key,
+            "serving_size_per_exchange_g": self.serving_size_per_exchange_g,
+        }
+        if self.micros is not None:
+            food["nutrition"] = self.nutrition_dict()
+        if self.mnt_profile is not None:
+            food["mnt_profile"] = self.mnt_profile
+        food["compatibility_checked"] = self.compatibility_checked
+        if self.compatibility_levels is not None:
+            food["compatibility_levels"] = self.compatibility_levels
+        if self.mnt_profile_info is not None:
+            food["mnt_profile_info"] = self.mnt_profile_info
+        food["food_type"] = self.food_type
+        food["cooking_state"] = self.cooking_state
+        ranking = self.ranking_dict()
+        if ranking is not None:
+            food["ranking"] = ranking
+        return food
+
+    @classmethod
+    def from_dict(cls, food: Dict[str, Any]) -> "FoodCandidate":
+        """
+        Build a candidate from a food dict (inverse of to_dict).
+
+        Args:
+            food: Food dictionary as produced by the food pipeline
+
+        Returns:
+            FoodCandidate
+        """
+        candidate = cls(
+            food_id=food["food_id"],
+            display_name=food.get("display_name"),
+            category=food.get("category"),
+            exchange_category=food.get("exchange_category"),
+            food_exclusion_tags=food.get("food_exclusion_tags"),
+            dedup_group_key=food.get("dedup_group_key"),
+            serving_size_per_exchange_g=food.get("serving_size_per_exchange_g"),
+            food_type=food.get("food_type"),
+            cooking_state=food.get("cooking_state"),
+        )
+        nutrition = food.get("nutrition")
+        if nutrition is not None:
+            macros = nutrition.get("macros") or {}
+            candidate.set_nutrition(
+                calories=nutrition.get("calories"),
+                protein_g=macros.get("protein_g", 0.0),
+                carbs_g=macros.get("carbs_g", 0.0),
+                fat_g=macros.get("fat_g", 0.0),
+                fiber_g=macros.get("fiber_g", 0.0),
+                micros=nutrition.get("micros") or {},
+                calorie_density_kcal_per_g=nutrition.get("calorie_density_kcal_per_g"),
+                protein_density_g_per_100kcal=nutrition.get("protein_density_g_per_100kcal"),
+            )
+        candidate.mnt_profile = food.get("mnt_profile")
+        candidate.compatibility_checked = food.get("compatibility_checked", False)
+        candidate.compatibility_levels = food.get("compatibility_levels")
+        candidate.mnt_profile_info = food.get("mnt_profile_info")
+        ranking = food.get("ranking") or {}
+        if "total_score" in ranking:
+            candidate.total_score = ranking["total_score"]
+            candidate.tier_scores = ranking.get("tier_scores")
+            candidate.ranking_factors = ranking.get("ranking_factors")
+            candidate.rank = ranking.get("rank")
+        candidate.deduplication = ranking.get("deduplication")
+        return candidate
+
+    # --- Read-only dict compatibility -------------------------------------------
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a field by its food dict key (default if the dict would not have it)."""
+        if key == "nutrition":
+            value = self.nutrition_dict()
+        elif key == "ranking":
+            value = self.ranking_dict()
+        elif key in ("mnt_profile", "compatibility_levels", "mnt_profile_info"):
+            value = getattr(self, key)
+        elif key in _DICT_KEYS:
+            return getattr(self, key)
+        else:
+            return default
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        if key in _DICT_KEYS:
+            return True
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __repr__(self) -> str:
+        return f"FoodCandidate({self.food_id!r}, rank={self.rank!r})"
+
+
+# Keys always present in the materialized dict
+_DICT_KEYS = frozenset({
+    "food_id",
+    "display_name",
+    "category",
+    "exchange_category",
+    "food_exclusion_tags",
+    "dedup_group_key",
+    "serving_size_per_exchange_g",
+    "compatibility_checked",
+    "food_type",
+    "cooking_state",
+})
+
+_MISSING = object()
+
+
+def materialize_foods(foods: List[Any]) -> List[Dict[str, Any]]:
+    """Convert candidates (or food dicts) to food dicts."""
+    return [food.to_dict() if isinstance(food, FoodCandidate) else food for food in foods]
@@ -3,10 +3,58 @@ Food Deduplication System.
 
 Deduplicates food variations (same food, different types/varieties) from food lists.
 Keeps only one food per variation group before ranking.
+
+Group keys are computed once per food when it is written to the KB
+(kb_food_master.dedup_group_key) and carried on the food dict. Keys are
+interned to integer group ids, so deduplication is a single group-by pass
+without per-request regex work.
 """
-import re
 from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from functools import lru_cache
+import threading
+
+from app.platform.utils.food_name_index import (
+    extract_scientific_name,
+    extract_base_food_name,
+    food_group_key,
+)
+from app.platform.engines.food_engine.food_candidate import FoodCandidate
+
+NO_RANK = 999999
+
+# Process-wide group key <-> integer id interning
+_group_ids: Dict[str, int] = {}
+_group_keys: List[str] = []
+_group_ids_lock = threading.Lock()
+
+
+def get_group_id(group_key: str) -> int:
+    """Intern a group key to a stable (per process) integer id."""
+    group_id = _group_ids.get(group_key)
+    if group_id is None:
+        with _group_ids_lock:
+            group_id = _group_ids.setdefault(group_key, len(_group_keys))
+            if group_id == len(_group_keys):
+                _group_keys.append(group_key)
+    return group_id
+
+
+@lru_cache(maxsize=8192)
+def _computed_group_key(
+    display_name: str,
+    match_scientific_name: bool,
+    match_base_name: bool
+) -> Optional[str]:
+    """Group key for foods without a precomputed key (memoized per name)."""
+    return food_group_key(display_name, match_scientific_name, match_base_name)
+
+
+def _rank(food: Dict[str, Any]) -> int:
+    if isinstance(food, FoodCandidate):
+        rank = food.rank
+    else:
+        rank = (food.get("ranking") or {}).get("rank")
+    return NO_RANK if rank is None else rank
 
 
 class FoodDeduplicator:
@@ -19,105 +67,167 @@ class FoodDeduplicator:
     ):
         self.enable_scientific_name_matching = enable_scientific_name_matching
         self.enable_base_name_matching = enable_base_name_matching
+        # Stored keys are computed with both matchers enabled
+        self._use_stored_keys = enable_scientific_name_matching and enable_base_name_matching
     
     def extract_scientific_name(self, display_name: str) -> Optional[str]:
         """Extract scientific name from parentheses."""
-        if not display_name:
-            return None
-        match = re.search(r'\(([^)]+)\)', display_name)
-        if match:
-            return match.group(1).strip().lower()
-        return None
+        return extract_scientific_name(display_name)
     
     def extract_base_food_name(self, display_name: str) -> Optional[str]:
         """Extract base food name (before first comma)."""
-        if not display_name:
-            return None
-        name_without_scientific = re.sub(r'\([^)]+\)', '', display_name).strip()
-        base_name = name_without_scientific.split(',')[0].strip()
-        return base_name.lower().strip() if base_name else None
+        return extract_base_food_name(display_name)
     
     def get_food_group_key(self, food: Dict[str, Any]) -> Optional[str]:
         """Get group key for a food to identify variations."""
+        if self._use_stored_keys and "dedup_group_key" in food:
+            return food["dedup_group_key"]
+        
         display_name = food.get("display_name", "")
         if not display_name:
             return None
         
-        if self.enable_scientific_name_matching:
-            scientific_name = self.extract_scientific_name(display_name)
-            if scientific_name:
-                return f"scientific:{scientific_name}"
+        return _computed_group_key(
+            display_name,
+            self.enable_scientific_name_matching,
+            self.enable_base_name_matching
+        )
+    
+    def get_food_group_id(self, food: Dict[str, Any]) -> Optional[int]:
+        """Get integer group id for a food (None if the food can't be grouped)."""
+        group_key = self.get_food_group_key(food)
+        return get_group_id(group_key) if group_key else None
+    
+    def _with_variations(
+        self,
+        best_food: Dict[str, Any],
+        group_id: int,
+        group_foods: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Kept food annotated with its group's variations.
+        
+        Food dicts are copied; FoodCandidates are annotated in place.
+        """
+        if len(group_foods) == 1:
+            return best_food
         
-        if self.enable_base_name_matching:
-            base_name = self.extract_base_food_name(display_name)
-            if base_name:
-                skip_words = {"other", "mixed", "various", "assorted", "combination"}
-                if base_name not in skip_words and len(base_name) > 2:
-                    return f"base:{base_name}"
+        deduplication = {
+            "group_key": _group_keys[group_id],
+            "variations_found": len(group_foods),
+            "variation_food_ids": [f.get("food_id") for f in group_foods[1:]],
+            "variation_display_names": [f.get("display_name") for f in group_foods[1:]]
+        }
+        if isinstance(best_food, FoodCandidate):
+            best_food.deduplication = deduplication
+            return best_food
         
-        return None
+        best_food = best_food.copy()
+        best_food["ranking"] = dict(best_food.get("ranking") or {})
+        best_food["ranking"]["deduplication"] = deduplication
+        return best_food
     
     def deduplicate_foods(
         self,
         foods: List[Dict[str, Any]],
         keep_best_ranked: bool = False
     ) -> List[Dict[str, Any]]:
-        """Deduplicate food variations, keeping only one food per group."""
+        """
+        Deduplicate food variations, keeping only one food per group.
+        
+        Args:
+            foods: Food dictionaries or FoodCandidates
+            keep_best_ranked: Keep the best-ranked food of each group
+                (otherwise the first one)
+        
+        Returns:
+            Grouped foods (first-seen group order) followed by ungrouped foods,
+            sorted by rank if the foods are ranked
+        """
         if not foods:
             return []
         
-        food_groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        if keep_best_ranked and self._is_rank_sorted(foods):
+            return self.deduplicate_ranked(foods)
+        
+        # Single pass: group by id, tracking the kept food per group
+        food_groups: Dict[int, List[Dict[str, Any]]] = {}
+        best_by_group: Dict[int, Dict[str, Any]] = {}
         ungrouped_foods: List[Dict[str, Any]] = []
+        has_ranking = False
         
         for food in foods:
-            group_key = self.get_food_group_key(food)
-            if group_key:
-                food_groups[group_key].append(food)
-            else:
+            rank = _rank(food)
+            if rank != NO_RANK:
+                has_ranking = True
+            group_id = self.get_food_group_id(food)
+            if group_id is None:
                 ungrouped_foods.append(food)
-        
-        deduplicated = []
-        
-        for group_key, group_foods in food_groups.items():
-            if len(group_foods) == 1:
-                deduplicated.append(group_foods[0])
+                continue
+            group_foods = food_groups.get(group_id)
+            if group_foods is None:
+                food_groups[group_id] = [food]
+                best_by_group[group_id] = food
             else:
-                if keep_best_ranked:
-                    has_ranking = any(
-                        f.get("ranking", {}).get("rank") is not None 
-                        for f in group_foods
-                    )
-                    if has_ranking:
-                        sorted_group = sorted(
-                            group_foods,
-                            key=lambda f: f.get("ranking", {}).get("rank", 999999)
-                        )
-                        best_food = sorted_group[0]
-                    else:
-                        best_food = group_foods[0]
-                else:
-                    best_food = group_foods[0]
-                
-                best_food = best_food.copy()
-                if "ranking" not in best_food:
-                    best_food["ranking"] = {}
-                
-                best_food["ranking"]["deduplication"] = {
-                    "group_key": group_key,
-                    "variations_found": len(group_foods),
-                    "variation_food_ids": [f.get("food_id") for f in group_foods[1:]],
-                    "variation_display_names": [f.get("display_name") for f in group_foods[1:]]
-                }
-                
-                deduplicated.append(best_food)
+                group_foods.append(food)
+                if keep_best_ranked and rank < _rank(best_by_group[group_id]):
+                    best_by_group[group_id] = food
         
+        deduplicated = [
+            self._with_variations(best_by_group[group_id], group_id, group_foods)
+            for group_id, group_foods in food_groups.items()
+        ]
         deduplicated.extend(ungrouped_foods)
         
-        has_ranking = any(
-            f.get("ranking", {}).get("rank") is not None 
-            for f in deduplicated
-        )
         if has_ranking:
-            deduplicated.sort(key=lambda f: f.get("ranking", {}).get("rank", 999999))
+            deduplicated.sort(key=_rank)
         
         return deduplicated
+    
+    def deduplicate_ranked(self, foods: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Deduplicate a rank-sorted food list, keeping the best-ranked food per group.
+        
+        Expects foods in rank order (as returned by FoodRanker.rank_foods), so
+        the first food seen in each group is its best-ranked one and the output
+        keeps rank order without re-sorting.
+        
+        Args:
+            foods: Food dictionaries sorted by ranking.rank
+        
+        Returns:
+            Deduplicated foods in rank order
+        """
+        deduplicated: List[Dict[str, Any]] = []
+        food_groups: Dict[int, List[Dict[str, Any]]] = {}
+        kept_position: Dict[int, int] = {}
+        
+        for food in foods:
+            group_id = self.get_food_group_id(food)
+            if group_id is None:
+                deduplicated.append(food)
+                continue
+            group_foods = food_groups.get(group_id)
+            if group_foods is None:
+                food_groups[group_id] = [food]
+                kept_position[group_id] = len(deduplicated)
+                deduplicated.append(food)
+            else:
+                group_foods.append(food)
+        
+        for group_id, group_foods in food_groups.items():
+            if len(group_foods) > 1:
+                position = kept_position[group_id]
+                deduplicated[position] = self._with_variations(
+                    deduplicated[position], group_id, group_foods
+                )
+        
+        return deduplicated
+    
+    @staticmethod
+    def _is_rank_sorted(foods: List[Dict[str, Any]]) -> bool:
+        """Check whether foods are ranked and already in rank order."""
+        ranks = [_rank(food) for food in foods]
+        if all(rank == NO_RANK for rank in ranks):
+            return False
+        return all(a <= b for a, b in zip(ranks, ranks[1:]))
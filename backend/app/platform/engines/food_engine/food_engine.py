@@ -46,6 +46,10 @@ from app.platform.engines.food_engine.food_ranker import (
     RankingTierConfig,
 )
 from app.platform.engines.food_engine.food_deduplicator import FoodDeduplicator
+from app.platform.engines.food_engine.food_candidate import FoodCandidate, materialize_foods
+from app.platform.engines.food_engine.kb_food_artifact import ArtifactFoodSource
+from app.platform.knowledge_base.kb_artifact import KBArtifact, get_kb_artifact
+from app.platform.utils.food_name_index import food_group_key
 
 # Import database models for simple query
 from app.platform.data.models.kb_food_master import KBFoodMaster
@@ -92,9 +96,39 @@ class FoodEngine:
     # Maximum foods to return per exchange category
     MAX_FOODS_PER_CATEGORY = 15
     
-    def __init__(self):
-        """Initialize food engine."""
-        pass
+    def __init__(self, kb_artifact: Optional[KBArtifact] = None):
+        """
+        Initialize food engine.
+
+        Args:
+            kb_artifact: KB artifact to read the food tables from instead of
+                the database. Without one, calls without a database session
+                use the artifact at settings.KB_ARTIFACT_PATH, if configured.
+        """
+        self.kb_artifact = kb_artifact
+
+    def _artifact_food_source(self, db: Optional[Session]) -> Optional[ArtifactFoodSource]:
+        """Artifact food tables to read instead of the database, if any."""
+        artifact = self.kb_artifact
+        if artifact is None and db is None:
+            artifact = get_kb_artifact()
+        return ArtifactFoodSource.for_artifact(artifact) if artifact is not None else None
+
+    @staticmethod
+    def _query_compatibilities(
+        db: Optional[Session],
+        source: Optional[ArtifactFoodSource],
+        food_id: str,
+        condition_ids: List[str]
+    ) -> List[Any]:
+        """Active compatibility records of a food for the given conditions."""
+        if source is not None:
+            return source.compatibilities(food_id, condition_ids)
+        return db.query(KBFoodConditionCompatibility).filter(
+            KBFoodConditionCompatibility.food_id == food_id,
+            KBFoodConditionCompatibility.condition_id.in_(condition_ids),
+            KBFoodConditionCompatibility.status == 'active'
+        ).all()
     
     def get_foods_by_category_simple(
         self,
@@ -104,6 +138,30 @@ class FoodEngine:
         medical_conditions: Optional[List[str]] = None,
         micro_constraints: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
+        """
+        Simple function to retrieve foods by category as food dictionaries.
+        
+        See get_food_candidates for the filtering rules.
+        
+        Returns:
+            List of food dictionaries with basic information, filtered by constraints
+        """
+        return materialize_foods(self.get_food_candidates(
+            db=db,
+            exchange_category=exchange_category,
+            food_exclusions=food_exclusions,
+            medical_conditions=medical_conditions,
+            micro_constraints=micro_constraints
+        ))
+    
+    def get_food_candidates(
+        self,
+        db: Session,
+        exchange_category: str,
+        food_exclusions: List[str],
+        medical_conditions: Optional[List[str]] = None,
+        micro_constraints: Optional[Dict[str, Any]] = None
+    ) -> List[FoodCandidate]:
         """
         Simple function to retrieve foods by category, filtering based on food_exclusions 
         and condition compatibility.
@@ -117,7 +175,7 @@ class FoodEngine:
         4. Extreme Value Safety Checks (excludes foods too dangerous even with portion control)
         
         Args:
-            db: Database session
+            db: Database session (may be None when the engine reads a KB artifact)
             exchange_category: Exchange category (e.g., "cereal", "pulse", "milk", etc.)
             food_exclusions: List of food exclusion tags (e.g., ["canned_foods", "fried_foods", ...])
             medical_conditions: Optional list of medical condition IDs (e.g., ["diabetes", "hypertension"])
@@ -126,7 +184,7 @@ class FoodEngine:
                               Used for extreme value safety checks.
             
         Returns:
-            List of food dictionaries with basic information, filtered by constraints
+            List of FoodCandidates, filtered by constraints
             
         Note:
             - Filters based on food_exclusion_tags matching food_exclusions
@@ -137,7 +195,8 @@ class FoodEngine:
             - NOTE: diabetic_safe flag is NOT checked here - diabetes is handled through condition_compatibility
                     like all other medical conditions. The diabetic_safe flag is for Recipe Engine prioritization.
         """
-        if not db:
+        source = self._artifact_food_source(db)
+        if source is None and not db:
             raise ValueError("Database session is required")
         
         if not exchange_category:
@@ -157,22 +216,22 @@ class FoodEngine:
         
         # Query foods by exchange category
         # Join with MNT profile and nutrition to access food_exclusion_tags and nutrition data
-        query = db.query(KBFoodMaster).join(
-            KBFoodExchangeProfile,
-            KBFoodMaster.food_id == KBFoodExchangeProfile.food_id
-        ).outerjoin(
-            KBFoodMNTProfile,
-            KBFoodMaster.food_id == KBFoodMNTProfile.food_id
-        ).outerjoin(
-            KBFoodNutritionBase,
-            KBFoodMaster.food_id == KBFoodNutritionBase.food_id
-        ).filter(
-            KBFoodMaster.status == 'active',
-            KBFoodExchangeProfile.exchange_category == exchange_category
-        )
-        
-        # Execute query
-        foods = query.all()
+        if source is not None:
+            foods = source.foods(exchange_category)
+        else:
+            foods = db.query(KBFoodMaster).join(
+                KBFoodExchangeProfile,
+                KBFoodMaster.food_id == KBFoodExchangeProfile.food_id
+            ).outerjoin(
+                KBFoodMNTProfile,
+                KBFoodMaster.food_id == KBFoodMNTProfile.food_id
+            ).outerjoin(
+                KBFoodNutritionBase,
+                KBFoodMaster.food_id == KBFoodNutritionBase.food_id
+            ).filter(
+                KBFoodMaster.status == 'active',
+                KBFoodExchangeProfile.exchange_category == exchange_category
+            ).all()
         
         # Filter foods based on constraints
         filtered_foods = []
@@ -225,11 +284,9 @@ class FoodEngine:
             # 2. Check condition compatibility (only if medical_conditions provided)
             if not should_exclude and medical_conditions_normalized:
                 # Query compatibility records for this food and conditions
-                compatibilities = db.query(KBFoodConditionCompatibility).filter(
-                    KBFoodConditionCompatibility.food_id == food.food_id,
-                    KBFoodConditionCompatibility.condition_id.in_(medical_conditions_normalized),
-                    KBFoodConditionCompatibility.status == 'active'
-                ).all()
+                compatibilities = self._query_compatibilities(
+                    db, source, food.food_id, medical_conditions_normalized
+                )
                 
                 # If compatibility records exist, check them
                 if compatibilities:
@@ -295,42 +352,41 @@ class FoodEngine:
             
             # Include food only if it should NOT be excluded
             if not should_exclude:
-                # Build simple food dictionary
-                food_dict = {
-                    "food_id": food.food_id,
-                    "display_name": food.display_name,
-                    "category": food.category,
-                    "exchange_category": food.exchange_profile.exchange_category,
-                    "food_exclusion_tags": food_exclusion_tags,  # Include for debugging
-                }
-                
-                # Add exchange profile info if available
-                if food.exchange_profile:
-                    food_dict["serving_size_per_exchange_g"] = (
-                        float(food.exchange_profile.serving_size_per_exchange_g) 
+                candidate = FoodCandidate(
+                    food_id=food.food_id,
+                    display_name=food.display_name,
+                    category=food.category,
+                    exchange_category=food.exchange_profile.exchange_category,
+                    food_exclusion_tags=food_exclusion_tags,  # Include for debugging
+                    # Precomputed variation group key (used by FoodDeduplicator)
+                    dedup_group_key=food.dedup_group_key or food_group_key(food.display_name),
+                    serving_size_per_exchange_g=(
+                        float(food.exchange_profile.serving_size_per_exchange_g)
                         if food.exchange_profile.serving_size_per_exchange_g else None
-                    )
+                    ),
+                    # Additional metadata for ranking
+                    food_type=food.food_type,
+                    cooking_state=food.cooking_state,
+                )
                 
                 # Add nutrition data for ranking
                 if food.nutrition:
                     macros = food.nutrition.macros or {}
                     micros = food.nutrition.micros or {}
-                    food_dict["nutrition"] = {
-                        "calories": float(food.nutrition.calories_kcal) if food.nutrition.calories_kcal else None,
-                        "macros": {
-                            "protein_g": float(macros.get("protein_g", 0)) if macros else 0.0,
-                            "carbs_g": float(macros.get("carbs_g", 0)) if macros else 0.0,
-                            "fat_g": float(macros.get("fat_g", 0)) if macros else 0.0,
-                            "fiber_g": float(macros.get("fiber_g", 0)) if macros else 0.0,
-                        },
-                        "micros": micros,
-                        "calorie_density_kcal_per_g": float(food.nutrition.calorie_density_kcal_per_g) if food.nutrition.calorie_density_kcal_per_g else None,
-                        "protein_density_g_per_100kcal": float(food.nutrition.protein_density_g_per_100kcal) if food.nutrition.protein_density_g_per_100kcal else None,
-                    }
+                    candidate.set_nutrition(
+                        calories=float(food.nutrition.calories_kcal) if food.nutrition.calories_kcal else None,
+                        protein_g=float(macros.get("protein_g", 0)) if macros else 0.0,
+                        carbs_g=float(macros.get("carbs_g", 0)) if macros else 0.0,
+                        fat_g=float(macros.get("fat_g", 0)) if macros else 0.0,
+                        fiber_g=float(macros.get("fiber_g", 0)) if macros else 0.0,
+                        micros=micros,
+                        calorie_density_kcal_per_g=float(food.nutrition.calorie_density_kcal_per_g) if food.nutrition.calorie_density_kcal_per_g else None,
+                        protein_density_g_per_100kcal=float(food.nutrition.protein_density_g_per_100kcal) if food.nutrition.protein_density_g_per_100kcal else None,
+                    )
                 
                 # Add MNT profile data for ranking
                 if food.mnt_profile:
-                    food_dict["mnt_profile"] = {
+                    candidate.mnt_profile = {
                         "macro_compliance": food.mnt_profile.macro_compliance or {},
                         "micro_compliance": food.mnt_profile.micro_compliance or {},
                         "medical_tags": food.mnt_profile.medical_tags or {},
@@ -342,34 +398,24 @@ class FoodEngine:
                 
                 # Add compatibility and MNT profile info if checked
                 if medical_conditions_normalized:
-                    food_dict["compatibility_checked"] = True
+                    candidate.compatibility_checked = True
                     # Query again to get compatibility levels for reporting
-                    compat_records = db.query(KBFoodConditionCompatibility).filter(
-                        KBFoodConditionCompatibility.food_id == food.food_id,
-                        KBFoodConditionCompatibility.condition_id.in_(medical_conditions_normalized),
-                        KBFoodConditionCompatibility.status == 'active'
-                    ).all()
-                    if compat_records:
-                        food_dict["compatibility_levels"] = {
-                            rec.condition_id: rec.compatibility 
-                            for rec in compat_records
-                        }
-                    else:
-                        food_dict["compatibility_levels"] = {}  # No records = assumed safe
+                    compat_records = self._query_compatibilities(
+                        db, source, food.food_id, medical_conditions_normalized
+                    )
+                    # No records = assumed safe
+                    candidate.compatibility_levels = {
+                        rec.condition_id: rec.compatibility 
+                        for rec in compat_records
+                    }
                     
-                    # Add MNT profile info for debugging (if not already added above)
-                    if food.mnt_profile and "mnt_profile_info" not in food_dict:
-                        food_dict["mnt_profile_info"] = {
+                    # Add MNT profile info for debugging
+                    if food.mnt_profile:
+                        candidate.mnt_profile_info = {
                             "contraindications": list(food.mnt_profile.contraindications) if food.mnt_profile.contraindications else [],
                         }
-                else:
-                    food_dict["compatibility_checked"] = False
-                
-                # Add additional metadata for ranking
-                food_dict["food_type"] = food.food_type
-                food_dict["cooking_state"] = food.cooking_state
                 
-                filtered_foods.append(food_dict)
+                filtered_foods.append(candidate)
             # Debug: Log excluded foods (optional - can be removed later)
             # else:
             #     print(f"Excluded {food.food_id}: {exclusion_reason}")
@@ -410,12 +456,37 @@ class FoodEngine:
             >>> print(result["cereal"])  # List of cereal foods (safe for diabetes, excluding canned/fried)
             >>> print(result["pulse"])   # List of pulse foods (safe for diabetes, excluding canned/fried)
         """
+        return {
+            category: materialize_foods(foods)
+            for category, foods in self.get_food_candidates_by_category(
+                db=db,
+                exchange_categories=exchange_categories,
+                food_exclusions=food_exclusions,
+                medical_conditions=medical_conditions,
+                micro_constraints=micro_constraints
+            ).items()
+        }
+    
+    def get_food_candidates_by_category(
+        self,
+        db: Session,
+        exchange_categories: List[str],
+        food_exclusions: List[str],
+        medical_conditions: Optional[List[str]] = None,
+        micro_constraints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[FoodCandidate]]:
+        """
+        Retrieve FoodCandidates for multiple categories (see get_food_candidates).
+        
+        Returns:
+            Dictionary: {exchange_category: [candidate1, candidate2, ...], ...}
+        """
         if not exchange_categories:
             return {}
         
         result = {}
         for category in exchange_categories:
-            result[category] = self.get_foods_by_category_simple(
+            result[category] = self.get_food_candidates(
                 db=db,
                 exchange_category=category,
                 food_exclusions=food_exclusions,
@@ -467,7 +538,7 @@ class FoodEngine:
             All foods must be from knowledge base - no hallucination.
             Food selection and recipe creation is handled by Recipe Engine.
         """
-        if db is None:
+        if db is None and self._artifact_food_source(db) is None:
             raise ValueError("Database session is required for food engine.")
         
         # Extract Ayurveda preferences
@@ -504,8 +575,8 @@ class FoodEngine:
             # Fallback: extract from MNT context (less accurate)
             medical_conditions = self._extract_medical_conditions_from_mnt(mnt_context)
         
-        # Use simplified food filtering function
-        foods_by_category = self.get_foods_by_category_simple_dict(
+        # Use simplified food filtering function (compact candidates until the output is built)
+        foods_by_category = self.get_food_candidates_by_category(
             db=db,
             exchange_categories=list(all_exchange_categories),
             food_exclusions=mnt_context.food_exclusions or [],
@@ -586,7 +657,7 @@ class FoodEngine:
                 if len(foods) > self.MAX_FOODS_PER_CATEGORY:
                     foods = foods[:self.MAX_FOODS_PER_CATEGORY]
                 
-                plan_level_category_wise_foods[exchange_category] = foods
+                plan_level_category_wise_foods[exchange_category] = materialize_foods(foods)
         
         # Build simplified meal plan structure - only category_wise_foods
         # Removed: meals (already in exchange allocation system)
@@ -21,6 +21,7 @@ from app.platform.core.context import (
     AyurvedaContext,
     DiagnosisContext,
 )
+from app.platform.engines.food_engine.food_candidate import FoodCandidate
 
 
 @dataclass
@@ -121,7 +122,8 @@ class FoodRanker:
         Rank foods using all enabled tiers.
         
         Args:
-            foods: List of food dictionaries to rank
+            foods: Food dictionaries or FoodCandidates to rank. Candidates are
+                updated in place; dictionaries are copied.
             medical_conditions: List of medical condition IDs
             mnt_context: MNT context with constraints
             target_context: Target context with nutrition targets
@@ -133,7 +135,7 @@ class FoodRanker:
             meal_name: Optional meal name for context
         
         Returns:
-            List of food dictionaries with ranking metadata, sorted by score (highest first)
+            Foods with ranking metadata, sorted by score (highest first)
         """
         if not foods:
             return []
@@ -199,6 +201,11 @@ class FoodRanker:
                 ranking_factors.update(factors)
             
             # Add ranking metadata to food
+            if isinstance(food, FoodCandidate):
+                food.set_ranking(total_score, tier_scores, ranking_factors)
+                ranked_foods.append((food, total_score))
+                continue
+            
             food_with_ranking = food.copy()
             food_with_ranking["ranking"] = {
                 "total_score": round(total_score, 2),
@@ -214,7 +221,10 @@ class FoodRanker:
         # Add rank position
         result = []
         for rank, (food, score) in enumerate(ranked_foods, start=1):
-            food["ranking"]["rank"] = rank
+            if isinstance(food, FoodCandidate):
+                food.rank = rank
+            else:
+                food["ranking"]["rank"] = rank
             result.append(food)
         
         return result
@@ -356,16 +366,27 @@ class FoodRanker:
         score = 0.0
         factors = {}
         
-        nutrition = food.get("nutrition", {})
-        if not nutrition:
-            return score, factors
-        
-        calories = nutrition.get("calories", 0) or 0.0
-        macros = nutrition.get("macros", {}) or {}
-        protein_g = macros.get("protein_g", 0) or 0.0
-        carbs_g = macros.get("carbs_g", 0) or 0.0
-        fiber_g = macros.get("fiber_g", 0) or 0.0
-        fat_g = macros.get("fat_g", 0) or 0.0
+        if isinstance(food, FoodCandidate):
+            if not food.has_nutrition:
+                return score, factors
+            calories = food.calories or 0.0
+            protein_g = food.protein_g or 0.0
+            carbs_g = food.carbs_g or 0.0
+            fiber_g = food.fiber_g or 0.0
+            fat_g = food.fat_g or 0.0
+            calorie_density = food.calorie_density_kcal_per_g or 0.0
+        else:
+            nutrition = food.get("nutrition", {})
+            if not nutrition:
+                return score, factors
+            
+            calories = nutrition.get("calories", 0) or 0.0
+            macros = nutrition.get("macros", {}) or {}
+            protein_g = macros.get("protein_g", 0) or 0.0
+            carbs_g = macros.get("carbs_g", 0) or 0.0
+            fiber_g = macros.get("fiber_g", 0) or 0.0
+            fat_g = macros.get("fat_g", 0) or 0.0
+            calorie_density = nutrition.get("calorie_density_kcal_per_g", 0) or 0.0
         
         # Use meal targets if available, otherwise daily targets
         targets = meal_targets if meal_targets else {}
@@ -422,7 +443,6 @@ class FoodRanker:
                     factors["protein_aligned"] = True
         
         # 2.4 Calorie Density (for weight management)
-        calorie_density = nutrition.get("calorie_density_kcal_per_g", 0) or 0.0
         if calorie_density > 0:
             # Lower density is better for weight management
             # Score inversely proportional to density
@@ -3,7 +3,8 @@ KB Food Adapter for Food Engine.
 Queries kb_food_* tables with all constraints applied.
 """
 from typing import Dict, Any, List, Optional, Set, Tuple
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from sqlalchemy.orm import Session, contains_eager
 from sqlalchemy import and_, or_, func
 
 from app.platform.data.models.kb_food_master import KBFoodMaster
@@ -684,3 +685,52 @@ def list_food_ids(db: Session, exchange_category: Optional[str] = None) -> List[
         )
     
     return [row[0] for row in query.all()]
+
+
+def get_substitution_foods(db: Session) -> List[Dict[str, Any]]:
+    """
+    Get all active foods with exchange and nutrition data, for the substitution index.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Food dictionaries (see _build_food_dict) with "contraindicated_conditions":
+        condition IDs that have an active "contraindicated" compatibility record
+    """
+    foods = db.query(KBFoodMaster).join(
+        KBFoodExchangeProfile,
+        KBFoodMaster.food_id == KBFoodExchangeProfile.food_id
+    ).join(
+        KBFoodNutritionBase,
+        KBFoodMaster.food_id == KBFoodNutritionBase.food_id
+    ).outerjoin(
+        KBFoodMNTProfile,
+        KBFoodMaster.food_id == KBFoodMNTProfile.food_id
+    ).options(
+        contains_eager(KBFoodMaster.exchange_profile),
+        contains_eager(KBFoodMaster.nutrition),
+        contains_eager(KBFoodMaster.mnt_profile),
+    ).filter(
+        KBFoodMaster.status == 'active'
+    ).all()
+    
+    # One query for all Tier 1 condition exclusions (see check_condition_compatibility)
+    contraindicated = defaultdict(list)
+    compatibilities = db.query(
+        KBFoodConditionCompatibility.food_id,
+        KBFoodConditionCompatibility.condition_id,
+        KBFoodConditionCompatibility.compatibility
+    ).filter(
+        KBFoodConditionCompatibility.status == 'active'
+    ).all()
+    for food_id, condition_id, compatibility in compatibilities:
+        if compatibility and compatibility.lower() == 'contraindicated':
+            contraindicated[food_id].append(condition_id)
+    
+    result = []
+    for food in foods:
+        food_dict = _build_food_dict(food, extract_nutrition(food.nutrition), extract_mnt_profile(food.mnt_profile))
+        food_dict["contraindicated_conditions"] = contraindicated.get(food.food_id, [])
+        result.append(food_dict)
+    return result
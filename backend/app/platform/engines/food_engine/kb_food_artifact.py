@@ -0,0 +1,229 @@
+"""
+Food KB Artifact Tables.
+
+Writes the food KB tables into a KB artifact (see knowledge_base/kb_artifact.py)
+and reads them back as rows for FoodEngine, so food filtering can run without
+a database (tests, benchmarks, batch jobs).
+
+Columns, one row per KBFoodMaster row (prefix "foods."):
+- string tables: master columns, exchange_category
+- float64 (NaN = NULL): serving_size_per_exchange_g and the numeric
+  nutrition columns
+- bool: has_nutrition, has_mnt_profile
+- JSON string tables: macros, micros and the MNT profile columns
+
+Condition compatibility rows are string tables with prefix "compat.".
+
+ArtifactFoodSource returns rows with the attributes FoodEngine reads from
+the ORM (food.nutrition.macros, food.mnt_profile.contraindications, ...).
+Rows are built once per exchange category and shared; treat them as
+read-only.
+"""
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import json
+import logging
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload
+
+from app.platform.data.models.kb_food_master import KBFoodMaster
+from app.platform.data.models.kb_food_condition_compatibility import KBFoodConditionCompatibility
+from app.platform.knowledge_base.kb_artifact import KBArtifact, KBArtifactWriter
+
+logger = logging.getLogger(__name__)
+
+FOOD_STRING_COLUMNS = (
+    "food_id", "display_name", "category", "food_type", "cooking_state", "dedup_group_key", "status",
+)
+EXCHANGE_STRING_COLUMNS = ("exchange_category",)
+EXCHANGE_FLOAT_COLUMNS = ("serving_size_per_exchange_g",)
+NUTRITION_FLOAT_COLUMNS = ("calories_kcal", "calorie_density_kcal_per_g", "protein_density_g_per_100kcal")
+NUTRITION_JSON_COLUMNS = ("macros", "micros")
+MNT_JSON_COLUMNS = (
+    "macro_compliance", "micro_compliance", "medical_tags", "food_exclusion_tags",
+    "food_inclusion_tags", "contraindications", "preferred_conditions",
+)
+COMPAT_STRING_COLUMNS = ("food_id", "condition_id", "compatibility", "status")
+
+
+def _float_or_nan(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _json_or_none(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(list(value) if isinstance(value, (tuple, set)) else value, sort_keys=True)
+
+
+def add_food_tables(writer: KBArtifactWriter, foods: Sequence[Any], compatibilities: Iterable[Any]) -> Dict[str, int]:
+    """
+    Add the food KB tables to an artifact.
+
+    Args:
+        writer: Artifact writer
+        foods: KBFoodMaster rows with nutrition, exchange_profile and
+            mnt_profile loaded
+        compatibilities: KBFoodConditionCompatibility rows
+
+    Returns:
+        {"foods": row count, "compatibilities": row count}
+    """
+    for column in FOOD_STRING_COLUMNS:
+        writer.add_strings(f"foods.{column}", [getattr(food, column) for food in foods])
+    for column in EXCHANGE_STRING_COLUMNS:
+        writer.add_strings(f"foods.{column}", [
+            getattr(food.exchange_profile, column) if food.exchange_profile else None for food in foods
+        ])
+    for column in EXCHANGE_FLOAT_COLUMNS:
+        writer.add_array(f"foods.{column}", np.array([
+            _float_or_nan(getattr(food.exchange_profile, column)) if food.exchange_profile else np.nan
+            for food in foods
+        ], dtype="<f8"))
+
+    writer.add_array("foods.has_nutrition", np.array([food.nutrition is not None for food in foods], dtype=bool))
+    for column in NUTRITION_FLOAT_COLUMNS:
+        writer.add_array(f"foods.{column}", np.array([
+            _float_or_nan(getattr(food.nutrition, column)) if food.nutrition else np.nan for food in foods
+        ], dtype="<f8"))
+    for column in NUTRITION_JSON_COLUMNS:
+        writer.add_strings(f"foods.{column}", [
+            _json_or_none(getattr(food.nutrition, column)) if food.nutrition else None for food in foods
+        ])
+
+    writer.add_array("foods.has_mnt_profile", np.array([food.mnt_profile is not None for food in foods], dtype=bool))
+    for column in MNT_JSON_COLUMNS:
+        writer.add_strings(f"foods.{column}", [
+            _json_or_none(getattr(food.mnt_profile, column)) if food.mnt_profile else None for food in foods
+        ])
+
+    compatibilities = list(compatibilities)
+    for column in COMPAT_STRING_COLUMNS:
+        writer.add_strings(f"compat.{column}", [getattr(record, column) for record in compatibilities])
+
+    return {"foods": len(foods), "compatibilities": len(compatibilities)}
+
+
+def add_food_tables_from_db(writer: KBArtifactWriter, db: Session) -> Dict[str, int]:
+    """
+    Add the food KB tables of the database to an artifact (all statuses).
+
+    Args:
+        writer: Artifact writer
+        db: Database session
+
+    Returns:
+        {"foods": row count, "compatibilities": row count}
+    """
+    foods = db.query(KBFoodMaster).options(
+        joinedload(KBFoodMaster.nutrition),
+        joinedload(KBFoodMaster.exchange_profile),
+        joinedload(KBFoodMaster.mnt_profile),
+    ).order_by(KBFoodMaster.food_id).all()
+    compatibilities = db.query(KBFoodConditionCompatibility).order_by(
+        KBFoodConditionCompatibility.food_id,
+        KBFoodConditionCompatibility.condition_id,
+    ).all()
+    return add_food_tables(writer, foods, compatibilities)
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def _loads(value: Optional[str]) -> Any:
+    return json.loads(value) if value is not None else None
+
+
+class ArtifactFoodSource:
+    """
+    Food KB rows from an artifact, in the shape FoodEngine reads from the ORM.
+
+    Use for_artifact() to share one source (and its row caches) per artifact.
+    """
+
+    def __init__(self, artifact: KBArtifact):
+        self.artifact = artifact
+        self._category_rows: Dict[str, List[int]] = {}
+        exchange_categories = artifact.strings("foods.exchange_category")
+        statuses = artifact.strings("foods.status")
+        for position in range(len(exchange_categories)):
+            category = exchange_categories[position]
+            if category is not None and statuses[position] == "active":
+                self._category_rows.setdefault(category, []).append(position)
+
+        self._compat_rows: Dict[str, List[int]] = {}
+        compat_food_ids = artifact.strings("compat.food_id")
+        for position in range(len(compat_food_ids)):
+            self._compat_rows.setdefault(compat_food_ids[position], []).append(position)
+
+        self._foods: Dict[str, List[SimpleNamespace]] = {}
+
+    @classmethod
+    def for_artifact(cls, artifact: KBArtifact) -> "ArtifactFoodSource":
+        """Shared source of an artifact (built on first use)."""
+        return artifact.memo("food_source", lambda: cls(artifact))
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._category_rows.values())
+
+    def foods(self, exchange_category: str) -> List[SimpleNamespace]:
+        """
+        Active foods with an exchange profile in the category.
+
+        Args:
+            exchange_category: Exchange category (e.g., "cereal")
+
+        Returns:
+            Rows with the KBFoodMaster attributes and nutrition,
+            exchange_profile and mnt_profile (None if absent)
+        """
+        rows = self._foods.get(exchange_category)
+        if rows is None:
+            rows = [self._build_row(position) for position in self._category_rows.get(exchange_category, ())]
+            self._foods[exchange_category] = rows
+        return rows
+
+    def compatibilities(self, food_id: str, condition_ids: Iterable[str]) -> List[SimpleNamespace]:
+        """
+        Active compatibility records of a food for the given conditions.
+
+        Args:
+            food_id: Food ID
+            condition_ids: Condition IDs
+
+        Returns:
+            Rows with the KBFoodConditionCompatibility columns
+        """
+        conditions = set(condition_ids)
+        records = []
+        for position in self._compat_rows.get(food_id, ()):
+            record = SimpleNamespace(**{
+                column: self.artifact.strings(f"compat.{column}")[position] for column in COMPAT_STRING_COLUMNS
+            })
+            if record.status == "active" and record.condition_id in conditions:
+                records.append(record)
+        return records
+
+    def _build_row(self, position: int) -> SimpleNamespace:
+        artifact = self.artifact
+        food = SimpleNamespace(**{
+            column: artifact.strings(f"foods.{column}")[position] for column in FOOD_STRING_COLUMNS
+        })
+        food.exchange_profile = SimpleNamespace(
+            exchange_category=artifact.strings("foods.exchange_category")[position],
+            serving_size_per_exchange_g=_nan_to_none(artifact.array("foods.serving_size_per_exchange_g")[position]),
+        )
+        food.nutrition = None
+        if artifact.array("foods.has_nutrition")[position]:
+            food.nutrition = SimpleNamespace(
+                **{column: _nan_to_none(artifact.array(f"foods.{column}")[position]) for column in NUTRITION_FLOAT_COLUMNS},
+                **{column: _loads(artifact.strings(f"foods.{column}")[position]) for column in NUTRITION_JSON_COLUMNS},
+            )
+        food.mnt_profile = None
+        if artifact.array("foods.has_mnt_profile")[position]:
+            food.mnt_profile = SimpleNamespace(**{
+                column: _loads(artifact.strings(f"foods.{column}")[position]) for column in MNT_JSON_COLUMNS
+            })
+        return food
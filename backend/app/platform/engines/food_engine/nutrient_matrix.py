@@ -0,0 +1,308 @@
+"""
+Nutrient Matrix.
+
+Float nutrient matrix (foods x nutrients) for portion and total nutrition.
+
+KBFoodNutritionBase stores calories as Numeric (decoded to Decimal) and
+macros/micros as JSONB, and food dicts carry the same nested layout. Instead
+of re-parsing the nested dicts and converting Decimal per food and per
+portion, the nutrition of a food set is decoded once into a float32 matrix
+with a fixed nutrient index (NutrientSchema): core nutrients, the other
+numeric macros (sugar_g, saturated_fat_g, ...) and the micros. Then:
+- a portion is a row scaled by quantity_g / 100
+- meal and day totals are one matrix-vector product (quantities @ rows)
+
+Portion and total nutrition use the layout and rounding of MealAllocator's
+dict path (core nutrients always, micros as "<name>_mg" only where the food
+has a numeric value, other macros not reported), so both paths are
+interchangeable. The other macros are for plan analysis (PlanAnalysisEngine).
+
+Matrices:
+- NutrientMatrix.from_foods(): from food dicts / FoodCandidates (e.g. the
+  ranked foods of one allocation run)
+- get_nutrient_matrix(): all active KB foods, rebuilt when the food tables
+  change
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.platform.data.models.kb_food_master import KBFoodMaster
+from app.platform.data.models.kb_food_nutrition_base import KBFoodNutritionBase
+
+logger = logging.getLogger(__name__)
+
+# Nutrients every food has a column for (per 100g), in index order
+CORE_NUTRIENTS = ("calories", "protein_g", "carbs_g", "fat_g", "fiber_g")
+
+
+class NutrientSchema:
+    """
+    Fixed nutrient index: core nutrients, other macros, then micros.
+
+    Macro and micro columns are the numeric keys of the food set the schema
+    was built for, in name order. output_keys are the portion nutrition keys
+    of each column; reported marks the columns portion nutrition includes.
+    """
+
+    __slots__ = ("macros", "micros", "names", "index", "output_keys", "reported")
+
+    def __init__(self, macros: Iterable[str] = (), micros: Iterable[str] = ()):
+        self.macros = tuple(sorted(set(macros) - set(CORE_NUTRIENTS)))
+        self.micros = tuple(sorted(set(micros)))
+        self.names = CORE_NUTRIENTS + self.macros + self.micros
+        self.index: Dict[str, int] = {}
+        for column, name in enumerate(self.names):
+            self.index.setdefault(name, column)  # A micro named like a macro keeps the macro
+        self.output_keys = CORE_NUTRIENTS + self.macros + tuple(f"{micro}_mg" for micro in self.micros)
+        self.reported = np.array(
+            [True] * len(CORE_NUTRIENTS) + [False] * len(self.macros) + [True] * len(self.micros),
+            dtype=bool
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def _is_number(value: Any) -> bool:
+    # Same test as the dict path (bool counts, as isinstance(True, int))
+    return isinstance(value, (int, float))
+
+
+def _core_values(nutrition: Dict[str, Any]) -> List[float]:
+    """Core nutrients per 100g of a nutrition dict, as read by MealAllocator."""
+    macros = nutrition.get("macros") or {}
+    return [
+        float(nutrition.get("calories") or 0.0),
+        float(macros.get("protein_g") or 0.0),
+        float(macros.get("carbs_g") or 0.0),
+        float(macros.get("fat_g") or 0.0),
+        float(macros.get("fiber_g") or 0.0),
+    ]
+
+
+class NutrientMatrix:
+    """
+    Per-100g nutrition of a food set as a float32 matrix.
+
+    Read-only after construction, so it can be shared across threads.
+    """
+
+    def __init__(self, food_ids: Sequence[str], nutritions: Sequence[Optional[Dict[str, Any]]]):
+        """
+        Build the matrix.
+
+        Args:
+            food_ids: Food IDs, one per row (first occurrence wins)
+            nutritions: Nutrition dict per food, in the food dict layout
+                (calories, macros, micros); None for foods without nutrition
+        """
+        self.food_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        decoded = []
+        for food_id, nutrition in zip(food_ids, nutritions):
+            if food_id in self.row_of:
+                continue
+            nutrition = nutrition or {}
+            macros = {
+                name: float(value)
+                for name, value in (nutrition.get("macros") or {}).items()
+                if _is_number(value) and name not in CORE_NUTRIENTS
+            }
+            micros = {
+                name: float(value)
+                for name, value in (nutrition.get("micros") or {}).items()
+                if _is_number(value)
+            }
+            self.row_of[food_id] = len(self.food_ids)
+            self.food_ids.append(food_id)
+            decoded.append((_core_values(nutrition), macros, micros))
+
+        self.schema = NutrientSchema(
+            macros=(name for _, macros, _ in decoded for name in macros),
+            micros=(name for _, _, micros in decoded for name in micros),
+        )
+        n_core = len(CORE_NUTRIENTS)
+        micro_start = n_core + len(self.schema.macros)
+        macro_column = {name: n_core + i for i, name in enumerate(self.schema.macros)}
+        micro_column = {name: micro_start + i for i, name in enumerate(self.schema.micros)}
+        self.values = np.zeros((len(decoded), len(self.schema)), dtype=np.float32)
+        # Core nutrients are always present; other columns only where the food has them
+        self.present = np.zeros((len(decoded), len(self.schema)), dtype=bool)
+        self.present[:, :n_core] = True
+        for row, (core, macros, micros) in enumerate(decoded):
+            self.values[row, :n_core] = core
+            for columns, values in ((macro_column, macros), (micro_column, micros)):
+                for name, value in values.items():
+                    column = columns[name]
+                    self.values[row, column] = value
+                    self.present[row, column] = True
+
+    @classmethod
+    def from_foods(cls, foods: Iterable[Any]) -> "NutrientMatrix":
+        """
+        Build a matrix from food dicts or FoodCandidates.
+
+        Args:
+            foods: Foods with "food_id" and per-100g "nutrition"
+
+        Returns:
+            NutrientMatrix
+        """
+        foods = list(foods)
+        return cls([food["food_id"] for food in foods], [food.get("nutrition") for food in foods])
+
+    @classmethod
+    def from_kb_rows(cls, rows: Iterable[Any]) -> "NutrientMatrix":
+        """
+        Build a matrix from KBFoodNutritionBase rows (Decimal/JSONB decoded once).
+
+        Args:
+            rows: KBFoodNutritionBase instances
+
+        Returns:
+            NutrientMatrix
+        """
+        rows = list(rows)
+        return cls(
+            [row.food_id for row in rows],
+            [
+                {
+                    "calories": float(row.calories_kcal) if row.calories_kcal is not None else 0.0,
+                    "macros": row.macros or {},
+                    "micros": row.micros or {},
+                }
+                for row in rows
+            ],
+        )
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    def __contains__(self, food_id: str) -> bool:
+        return food_id in self.row_of
+
+    def rows(self, food_ids: Iterable[str]) -> np.ndarray:
+        """Row indices of food IDs (all must be in the matrix)."""
+        return np.fromiter((self.row_of[food_id] for food_id in food_ids), dtype=np.intp)
+
+    def portion_vector(self, food_id: str, quantity_g: float) -> np.ndarray:
+        """Nutrient vector of quantity_g grams of a food."""
+        return self.values[self.row_of[food_id]].astype(np.float64) * (quantity_g / 100.0)
+
+    def totals(self, rows: np.ndarray, quantities_g: Sequence[float]) -> np.ndarray:
+        """Nutrient totals of portions: quantities_g / 100 @ values[rows]."""
+        scale = np.asarray(quantities_g, dtype=np.float64) / 100.0
+        return scale @ self.values[rows].astype(np.float64)
+
+    def to_nutrition(self, vector: np.ndarray, present: np.ndarray) -> Dict[str, float]:
+        """
+        Nutrition dict of a nutrient vector (MealAllocator layout, rounded to 0.1).
+
+        Args:
+            vector: Nutrient vector (schema order)
+            present: Columns with data (only reported columns are included)
+
+        Returns:
+            {nutrient key: value}
+        """
+        keys = self.schema.output_keys
+        return {
+            keys[column]: round(float(vector[column]), 1)
+            for column in np.flatnonzero(present & self.schema.reported)
+        }
+
+    def portion_nutrition(self, food_id: str, quantity_g: float) -> Dict[str, float]:
+        """
+        Nutrition of a portion (same result as MealAllocator._calculate_portion_nutrition).
+
+        Args:
+            food_id: Food in the matrix
+            quantity_g: Portion size in grams
+
+        Returns:
+            Nutrition dict for the portion
+        """
+        return self.to_nutrition(self.portion_vector(food_id, quantity_g), self.present[self.row_of[food_id]])
+
+    def total_nutrition(self, food_ids: Sequence[str], quantities_g: Sequence[float]) -> Dict[str, float]:
+        """
+        Total nutrition of several portions (e.g. a meal or a day).
+
+        Args:
+            food_ids: Foods in the matrix
+            quantities_g: Portion size in grams per food
+
+        Returns:
+            Nutrition dict with every nutrient any of the foods has
+        """
+        if not food_ids:
+            return {}
+        rows = self.rows(food_ids)
+        return self.to_nutrition(self.totals(rows, quantities_g), self.present[rows].any(axis=0))
+
+
+_kb_matrix: Optional[NutrientMatrix] = None
+_kb_matrix_version: Optional[Tuple[Any, ...]] = None
+_kb_matrix_lock = threading.Lock()
+
+
+def _food_tables_fingerprint(db: Session) -> Tuple[Any, ...]:
+    """Row count and last update of the tables the matrix is built from (as kb_manager's table checksums)."""
+    return tuple(
+        tuple(db.query(func.count(), func.max(model.updated_at)).select_from(model).one())
+        for model in (KBFoodMaster, KBFoodNutritionBase)
+    )
+
+
+def _load_kb_rows(db: Session) -> List[KBFoodNutritionBase]:
+    """Nutrition rows of all active KB foods, by food_id."""
+    return db.query(KBFoodNutritionBase).join(
+        KBFoodMaster,
+        KBFoodMaster.food_id == KBFoodNutritionBase.food_id
+    ).filter(
+        KBFoodMaster.status == 'active'
+    ).order_by(KBFoodNutritionBase.food_id).all()
+
+
+def get_nutrient_matrix(db: Session) -> NutrientMatrix:
+    """
+    Get the nutrient matrix of all active KB foods.
+
+    Built on first use and rebuilt when the row count or the last
+    updated_at of kb_food_master or kb_food_nutrition_base changes, so
+    edits to the food rows are picked up.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Shared NutrientMatrix
+    """
+    global _kb_matrix, _kb_matrix_version
+    version = _food_tables_fingerprint(db)
+
+    matrix = _kb_matrix
+    if matrix is not None and _kb_matrix_version == version:
+        return matrix
+    with _kb_matrix_lock:
+        if _kb_matrix is None or _kb_matrix_version != version:
+            _kb_matrix = NutrientMatrix.from_kb_rows(_load_kb_rows(db))
+            _kb_matrix_version = version
+            logger.info(
+                f"Built nutrient matrix: {len(_kb_matrix)} foods x {len(_kb_matrix.schema)} nutrients "
+                f"(food tables {version})"
+            )
+        return _kb_matrix
+
+
+def invalidate_nutrient_matrix():
+    """Drop the shared KB matrix; the next get_nutrient_matrix() rebuilds it."""
+    global _kb_matrix, _kb_matrix_version
+    with _kb_matrix_lock:
+        _kb_matrix = None
+        _kb_matrix_version = None
@@ -0,0 +1,307 @@
+"""
+Food Substitution Index.
+
+Nearest-neighbour search for exchange-equivalent food substitutions.
+
+Each active KB food is represented by its nutrients per exchange serving
+(serving_size_per_exchange_g): kcal, protein, carbs, fat, fiber, sodium,
+potassium and glycemic index. Vectors are standardized per exchange category
+(zero mean, unit variance; a missing value counts as the category mean), so
+the nearest foods give the most similar nutrition for the same number of
+exchanges.
+
+Each category has its own index: a faiss IndexFlatL2 when faiss is installed,
+otherwise a NumPy brute-force search. Categories hold at most a few hundred
+foods, so either answers a query in well under a millisecond.
+
+Client filtering applies the Tier 1 hard exclusions of kb_food_adapter:
+- direct food ID exclusions
+- contraindicated conditions (compatibility records and MNT contraindications)
+- diabetic_safe / prediabetic_safe flags set to False
+These are precomputed as boolean masks per category, so no query touches the
+database.
+
+Used by:
+- Food substitution API (swapping a food in an allocated meal)
+- MealAllocator.substitute_food()
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+try:
+    import faiss
+except ImportError:  # Optional: NumPy brute-force search
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Per-exchange nutrient features (glycemic index is a property of the food, not scaled)
+NUTRIENT_FEATURES = (
+    "calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "fiber_g",
+    "sodium_mg",
+    "potassium_mg",
+    "glycemic_index",
+)
+
+
+def exchange_serving_g(food: Dict[str, Any]) -> float:
+    """Grams per exchange, with the same fallback as MealAllocator."""
+    return food.get("serving_size_per_exchange_g") or food.get("common_serving_size_g") or 100.0
+
+
+def nutrient_vector(food: Dict[str, Any]) -> np.ndarray:
+    """
+    Nutrients per exchange serving, in NUTRIENT_FEATURES order.
+
+    Args:
+        food: Food dictionary with per-100g "nutrition" (see extract_nutrition)
+
+    Returns:
+        Float vector; missing values are NaN
+    """
+    nutrition = food.get("nutrition") or {}
+    micros = nutrition.get("micros") or {}
+    glycemic = nutrition.get("glycemic_properties") or {}
+    per_100g = [
+        nutrition.get("calories"),
+        nutrition.get("protein_g"),
+        nutrition.get("carbs_g"),
+        nutrition.get("fat_g"),
+        nutrition.get("fiber_g"),
+        nutrition.get("sodium_mg"),
+        micros.get("potassium_mg"),
+    ]
+    scale = exchange_serving_g(food) / 100.0
+    values = [float(v) * scale if isinstance(v, (int, float)) else np.nan for v in per_100g]
+    gi = glycemic.get("glycemic_index")
+    values.append(float(gi) if isinstance(gi, (int, float)) else np.nan)
+    return np.array(values, dtype=np.float64)
+
+
+@dataclass
+class FoodSubstitute:
+    """A substitute food and its distance to the original."""
+    food_id: str
+    display_name: str
+    exchange_category: str
+    distance: float  # Euclidean distance of standardized nutrient vectors
+
+
+class _CategoryIndex:
+    """Vectors, safety masks and search index of one exchange category."""
+
+    def __init__(self, foods: List[Dict[str, Any]], use_faiss: bool):
+        self.foods = foods
+        self.row_of = {food["food_id"]: row for row, food in enumerate(foods)}
+
+        raw = np.vstack([nutrient_vector(food) for food in foods])
+        present = ~np.isnan(raw)
+        counts = np.maximum(present.sum(axis=0), 1)
+        mean = np.where(present, raw, 0.0).sum(axis=0) / counts
+        std = np.sqrt((np.where(present, raw - mean, 0.0) ** 2).sum(axis=0) / counts)
+        std[std == 0] = 1.0
+        # Missing values become 0 (the category mean)
+        self.vectors = np.where(present, (raw - mean) / std, 0.0).astype(np.float32)
+
+        # Tier 1 masks: condition -> foods contraindicated for it
+        self.contraindicated: Dict[str, np.ndarray] = {}
+        self.diabetic_unsafe = np.zeros(len(foods), dtype=bool)
+        self.prediabetic_unsafe = np.zeros(len(foods), dtype=bool)
+        for row, food in enumerate(foods):
+            mnt_profile = food.get("mnt_profile") or {}
+            conditions = list(food.get("contraindicated_conditions") or []) + list(mnt_profile.get("contraindications") or [])
+            for condition in {str(c).lower() for c in conditions}:
+                mask = self.contraindicated.setdefault(condition, np.zeros(len(foods), dtype=bool))
+                mask[row] = True
+            medical_tags = mnt_profile.get("medical_tags") or {}
+            self.diabetic_unsafe[row] = medical_tags.get("diabetic_safe") is False
+            self.prediabetic_unsafe[row] = medical_tags.get("prediabetic_safe") is False
+
+        self.faiss_index = None
+        if use_faiss:
+            self.faiss_index = faiss.IndexFlatL2(self.vectors.shape[1])
+            self.faiss_index.add(self.vectors)
+
+    def allowed_mask(self, exclude_food_ids: Iterable[str], medical_conditions: Sequence[str]) -> np.ndarray:
+        """Foods passing the client's Tier 1 exclusions."""
+        allowed = np.ones(len(self.foods), dtype=bool)
+        for food_id in exclude_food_ids:
+            row = self.row_of.get(food_id)
+            if row is not None:
+                allowed[row] = False
+        conditions = [str(c).lower() for c in medical_conditions]
+        for condition in conditions:
+            mask = self.contraindicated.get(condition)
+            if mask is not None:
+                allowed &= ~mask
+        diabetes_conditions = [c for c in conditions if "diabetes" in c]
+        if diabetes_conditions:
+            allowed &= ~self.diabetic_unsafe
+            if "prediabetes" in diabetes_conditions:
+                allowed &= ~self.prediabetic_unsafe
+        return allowed
+
+    def nearest(self, row: int, k: int, allowed: np.ndarray) -> List[Tuple[int, float]]:
+        """(row, distance) of the k nearest allowed foods, nearest first."""
+        k = min(k, int(allowed.sum()))
+        if k <= 0:
+            return []
+        query = self.vectors[row:row + 1]
+
+        if self.faiss_index is not None:
+            # At most (n - allowed) disallowed foods can rank ahead of the k-th allowed one
+            fetch = min(len(self.foods), k + len(self.foods) - int(allowed.sum()))
+            distances, rows = self.faiss_index.search(query, fetch)
+            hits = [(int(r), float(d)) for r, d in zip(rows[0], distances[0]) if r >= 0 and allowed[r]]
+            return [(r, float(np.sqrt(d))) for r, d in hits[:k]]
+
+        distances = ((self.vectors - query) ** 2).sum(axis=1)
+        distances[~allowed] = np.inf
+        # k < len(distances): the query food itself is never allowed
+        candidates = np.argpartition(distances, k - 1)[:k]
+        # Ties resolve by row (food_id order) so results are deterministic
+        ordered = candidates[np.lexsort((candidates, distances[candidates]))]
+        return [(int(r), float(np.sqrt(distances[r]))) for r in ordered]
+
+
+class FoodSubstitutionIndex:
+    """
+    Nearest-neighbour index of KB foods by per-exchange nutrient vector.
+
+    Built once from the food KB (see get_substitution_index) and read-only
+    afterwards, so it can be shared across requests and threads.
+    """
+
+    def __init__(self, foods: Iterable[Dict[str, Any]], use_faiss: Optional[bool] = None):
+        """
+        Build the index.
+
+        Args:
+            foods: Food dictionaries (see kb_food_adapter.get_substitution_foods)
+            use_faiss: Use faiss (defaults to settings.FOOD_SUBSTITUTION_USE_FAISS
+                when faiss is installed)
+        """
+        if use_faiss is None:
+            use_faiss = settings.FOOD_SUBSTITUTION_USE_FAISS
+        self.use_faiss = bool(use_faiss and faiss is not None)
+
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for food in sorted(foods, key=lambda f: f["food_id"]):
+            category = food.get("exchange_category")
+            if category:
+                by_category.setdefault(category, []).append(food)
+
+        self._categories = {
+            category: _CategoryIndex(category_foods, self.use_faiss)
+            for category, category_foods in by_category.items()
+        }
+        self._category_of = {
+            food["food_id"]: category
+            for category, category_foods in by_category.items()
+            for food in category_foods
+        }
+
+    @property
+    def backend(self) -> str:
+        """Search backend in use: "faiss" or "numpy"."""
+        return "faiss" if self.use_faiss else "numpy"
+
+    def __len__(self) -> int:
+        return len(self._category_of)
+
+    def __contains__(self, food_id: str) -> bool:
+        return food_id in self._category_of
+
+    def get_food(self, food_id: str) -> Optional[Dict[str, Any]]:
+        """Food dictionary of an indexed food, or None."""
+        category = self._category_of.get(food_id)
+        if category is None:
+            return None
+        index = self._categories[category]
+        return index.foods[index.row_of[food_id]]
+
+    def substitutes(
+        self,
+        food_id: str,
+        k: int = 5,
+        exclude_food_ids: Optional[Iterable[str]] = None,
+        medical_conditions: Optional[Sequence[str]] = None
+    ) -> List[FoodSubstitute]:
+        """
+        Get the k most exchange-equivalent foods to a food.
+
+        Substitutes come from the food's exchange category and pass the
+        client's Tier 1 exclusions.
+
+        Args:
+            food_id: Food to substitute
+            k: Number of substitutes
+            exclude_food_ids: Food IDs the client must not get (e.g. MNT
+                food_exclusions, foods already in the meal)
+            medical_conditions: Client's medical condition IDs
+
+        Returns:
+            Substitutes, nearest first (empty if the food is not indexed)
+        """
+        category = self._category_of.get(food_id)
+        if category is None:
+            return []
+        index = self._categories[category]
+        row = index.row_of[food_id]
+
+        allowed = index.allowed_mask(exclude_food_ids or (), medical_conditions or ())
+        allowed[row] = False
+
+        return [
+            FoodSubstitute(
+                food_id=index.foods[r]["food_id"],
+                display_name=index.foods[r].get("display_name") or index.foods[r]["food_id"],
+                exchange_category=category,
+                distance=round(distance, 4),
+            )
+            for r, distance in index.nearest(row, k, allowed)
+        ]
+
+
+_index: Optional[FoodSubstitutionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_substitution_index(db: Session) -> FoodSubstitutionIndex:
+    """
+    Get the process-wide substitution index, building it on first use.
+
+    Args:
+        db: Database session (used only to build the index)
+
+    Returns:
+        Shared FoodSubstitutionIndex
+    """
+    global _index
+    index = _index
+    if index is not None:
+        return index
+    with _index_lock:
+        if _index is None:
+            from .kb_food_adapter import get_substitution_foods
+            _index = FoodSubstitutionIndex(get_substitution_foods(db))
+            logger.info(f"Built food substitution index: {len(_index)} foods ({_index.backend})")
+        return _index
+
+
+def invalidate_substitution_index():
+    """Drop the shared index; the next get_substitution_index() rebuilds it from the KB."""
+    global _index
+    with _index_lock:
+        _index = None
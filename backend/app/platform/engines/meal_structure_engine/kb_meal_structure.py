@@ -7,6 +7,9 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
 
 # Cache for loaded KB data
 _MEAL_COUNT_RULES_CACHE: Optional[List[Dict[str, Any]]] = None
@@ -17,6 +20,7 @@ _MACRO_GUARDRAILS_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
 _VALIDATION_THRESHOLDS_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
 
 
+@versioned_kb_loader
 def _load_meal_count_rules() -> List[Dict[str, Any]]:
     """Load meal count rules from JSON KB file."""
     global _MEAL_COUNT_RULES_CACHE
@@ -27,8 +31,7 @@ def _load_meal_count_rules() -> List[Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "meal_count_rules_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         active_rules = [r for r in kb_data if r.get("status") == "active"]
         _MEAL_COUNT_RULES_CACHE = active_rules
@@ -39,6 +42,7 @@ def _load_meal_count_rules() -> List[Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in meal count rules KB: {e}")
 
 
+@versioned_kb_loader
 def _load_meal_timing_rules() -> Dict[str, Dict[str, Any]]:
     """Load meal timing rules from JSON KB file."""
     global _MEAL_TIMING_RULES_CACHE
@@ -49,8 +53,7 @@ def _load_meal_timing_rules() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "meal_timing_rules_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         rules_dict = {}
         for rule in kb_data:
@@ -67,6 +70,7 @@ def _load_meal_timing_rules() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in meal timing rules KB: {e}")
 
 
+@versioned_kb_loader
 def _load_calorie_allocation() -> Dict[str, Dict[str, Any]]:
     """Load calorie allocation rules from JSON KB file."""
     global _CALORIE_ALLOCATION_CACHE
@@ -77,8 +81,7 @@ def _load_calorie_allocation() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "calorie_allocation_rules_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         rules_dict = {}
         for rule in kb_data:
@@ -95,6 +98,7 @@ def _load_calorie_allocation() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in calorie allocation rules KB: {e}")
 
 
+@versioned_kb_loader
 def _load_protein_distribution() -> Dict[str, Dict[str, Any]]:
     """Load protein distribution rules from JSON KB file."""
     global _PROTEIN_DISTRIBUTION_CACHE
@@ -105,8 +109,7 @@ def _load_protein_distribution() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "protein_distribution_rules_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         rules_dict = {}
         for rule in kb_data:
@@ -123,6 +126,7 @@ def _load_protein_distribution() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in protein distribution rules KB: {e}")
 
 
+@versioned_kb_loader
 def _load_macro_guardrails() -> Dict[str, Dict[str, Any]]:
     """Load macro guardrails from JSON KB file."""
     global _MACRO_GUARDRAILS_CACHE
@@ -133,8 +137,7 @@ def _load_macro_guardrails() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "macro_guardrails_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         rules_dict = {}
         for rule in kb_data:
@@ -151,6 +154,7 @@ def _load_macro_guardrails() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in macro guardrails KB: {e}")
 
 
+@versioned_kb_loader
 def _load_validation_thresholds() -> Dict[str, Dict[str, Any]]:
     """Load validation thresholds from JSON KB file."""
     global _VALIDATION_THRESHOLDS_CACHE
@@ -161,8 +165,7 @@ def _load_validation_thresholds() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "meal_structure" / "validation_thresholds_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         rules_dict = {}
         for rule in kb_data:
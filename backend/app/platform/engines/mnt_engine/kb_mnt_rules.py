@@ -7,11 +7,15 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
 
 # Cache for loaded MNT rules
 _MNT_RULES_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
 
 
+@versioned_kb_loader
 def _load_mnt_rules() -> Dict[str, Dict[str, Any]]:
     """
     Load MNT rules from JSON knowledge base file.
@@ -29,8 +33,7 @@ def _load_mnt_rules() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "mnt_rules" / "mnt_rules_kb_complete.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         # Convert list to dictionary keyed by rule_id
         # Filter only active rules
@@ -0,0 +1,10 @@
+"""
+Plan Analysis Engine Module.
+Vectorized plan nutrition analysis and MNT compliance.
+"""
+
+from .plan_analysis_engine import PlanAnalysisEngine
+
+__all__ = [
+    "PlanAnalysisEngine",
+]
@@ -0,0 +1,457 @@
+"""
+Plan Analysis Engine.
+
+Vectorized nutrition analysis and MNT compliance of an allocated meal plan.
+
+An allocated plan (days -> meals -> allocated_foods) is turned into a
+quantity tensor Q[day, meal, food] in grams. With the foods' per-100g rows
+V[food, nutrient] of a NutrientMatrix:
+- meal totals: Q @ V / 100 (days x meals x nutrients)
+- day totals: meal totals summed over meals
+- plan totals: day totals summed over days
+- per-food contributions: Q summed over days and meals, times V
+
+Target deviations (TargetContext calories and macros, optional per-meal
+targets) and MNT constraints (macro/micro min/max, including percent-of-
+calories constraints such as carbohydrates_percent) are evaluated for all
+days at once. The engine holds no state and is cheap enough to run on every
+plan edit.
+
+Inputs:
+- Meal plan with "days" (MealAllocationEngine / recipe stage layout)
+- NutrientMatrix covering the plan's foods (e.g. get_nutrient_matrix())
+- TargetContext, per-meal targets, MNTContext (all optional)
+
+Outputs:
+- Per-meal, per-day and plan totals, average daily nutrition
+- Target deviations
+- MNT compliance: per-constraint results and violations
+- Per-food contributions (optional)
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.platform.core.context import MNTContext, TargetContext
+from app.platform.engines.food_engine.nutrient_matrix import CORE_NUTRIENTS, NutrientMatrix
+
+logger = logging.getLogger(__name__)
+
+# Nutrients with daily targets in TargetContext.macros: nutrient -> macros key
+TARGET_MACROS = {
+    "protein_g": "proteins",
+    "carbs_g": "carbohydrates",
+    "fat_g": "fats",
+}
+
+# Percent-of-calories constraints: constraint key -> (nutrient, kcal per g)
+PERCENT_OF_CALORIES = {
+    "protein_percent": ("protein_g", 4.0),
+    "carbohydrates_percent": ("carbs_g", 4.0),
+    "fat_percent": ("fat_g", 9.0),
+    "saturated_fat_percent": ("saturated_fat_g", 9.0),
+    "monounsaturated_fat_percent": ("monounsaturated_fat_g", 9.0),
+    "added_sugars_percent": ("added_sugar_g", 4.0),
+}
+
+# Per-kg constraints: constraint key -> nutrient (needs the client's weight)
+PER_KG = {
+    "protein_g_per_kg": "protein_g",
+}
+
+
+def _round(values: np.ndarray) -> List[Any]:
+    return np.round(values, 1).tolist()
+
+
+class PlanAnalysisEngine:
+    """
+    Nutrition analysis and MNT compliance of allocated meal plans.
+
+    Responsibility:
+    - Total nutrition per meal, day and plan
+    - Deviations from calorie and macro targets
+    - MNT macro/micro constraint violations per day
+    - Per-food nutrient contributions
+
+    Does NOT:
+    - Change the plan
+    - Read the database (the caller supplies the nutrient matrix)
+    """
+
+    def analyze(
+        self,
+        meal_plan: Dict[str, Any],
+        nutrient_matrix: NutrientMatrix,
+        target_context: Optional[TargetContext] = None,
+        per_meal_targets: Optional[Dict[str, Dict[str, Any]]] = None,
+        mnt_context: Optional[MNTContext] = None,
+        weight_kg: Optional[float] = None,
+        include_contributions: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyze an allocated meal plan.
+
+        Args:
+            meal_plan: Meal plan with "days" -> meals -> "allocated_foods"
+                (food_id, quantity_g)
+            nutrient_matrix: Per-100g nutrition of the plan's foods
+            target_context: Daily calorie and macro targets
+            per_meal_targets: Per-meal targets ({meal: {calories, protein_g, ...}})
+            mnt_context: MNT constraints to check
+            weight_kg: Client weight, for per-kg constraints (protein_g_per_kg)
+            include_contributions: Add per-food nutrient contributions
+
+        Returns:
+            Analysis dictionary:
+            {
+                "num_days": 7,
+                "meals": ["breakfast", ...],
+                "nutrients": ["calories", ...],
+                "days": {"day_1": {"totals": {...}, "meals": {"breakfast": {...}}}},
+                "plan": {"totals": {...}, "average_daily": {...}},
+                "target_deviations": {...},  # With target_context / per_meal_targets
+                "compliance": {...},         # With mnt_context
+                "contributions": {...},      # With include_contributions
+                "missing_foods": [...]       # Food IDs not in the nutrient matrix
+            }
+        """
+        day_keys, meal_names, food_ids, quantities, missing_foods = self._build_quantity_tensor(
+            meal_plan, nutrient_matrix
+        )
+        rows = nutrient_matrix.rows(food_ids)
+        values = nutrient_matrix.values[rows].astype(np.float64)
+
+        # One pass: (days x meals x foods) @ (foods x nutrients)
+        meal_totals = np.einsum("dmf,fn->dmn", quantities, values) / 100.0
+        day_totals = meal_totals.sum(axis=1)
+        plan_totals = day_totals.sum(axis=0)
+        average_daily = plan_totals / len(day_keys) if day_keys else plan_totals
+
+        # Report core nutrients and those at least one of the plan's foods has data for
+        schema = nutrient_matrix.schema
+        present = nutrient_matrix.present[rows]
+        has_data = present.any(axis=0)
+        has_data[:len(CORE_NUTRIENTS)] = True
+        reported = np.flatnonzero(has_data)
+        nutrients = [schema.names[column] for column in reported]
+
+        def to_dict(vector: np.ndarray) -> Dict[str, float]:
+            return dict(zip(nutrients, _round(vector[reported])))
+
+        meal_values = _round(meal_totals[:, :, reported])
+        day_values = _round(day_totals[:, reported])
+        days = {}
+        for d, day_key in enumerate(day_keys):
+            days[day_key] = {
+                "totals": dict(zip(nutrients, day_values[d])),
+                "meals": {
+                    meal_name: dict(zip(nutrients, meal_values[d][m]))
+                    for m, meal_name in enumerate(meal_names)
+                    if quantities[d, m].any()
+                },
+            }
+
+        analysis = {
+            "num_days": len(day_keys),
+            "meals": meal_names,
+            "nutrients": nutrients,
+            "days": days,
+            "plan": {
+                "totals": to_dict(plan_totals),
+                "average_daily": to_dict(average_daily),
+            },
+            "missing_foods": missing_foods,
+        }
+
+        if target_context is not None or per_meal_targets:
+            analysis["target_deviations"] = self._target_deviations(
+                schema, day_keys, meal_names, meal_totals, day_totals, average_daily,
+                target_context, per_meal_targets
+            )
+
+        if mnt_context is not None:
+            analysis["compliance"] = self._check_compliance(
+                schema, day_keys, day_totals, present, mnt_context, weight_kg
+            )
+
+        if include_contributions:
+            analysis["contributions"] = self._contributions(
+                food_ids, quantities, values, present, plan_totals, reported, nutrients
+            )
+
+        return analysis
+
+    def _build_quantity_tensor(
+        self,
+        meal_plan: Dict[str, Any],
+        nutrient_matrix: NutrientMatrix
+    ) -> Tuple[List[str], List[str], List[str], np.ndarray, List[str]]:
+        """
+        Build the (days x meals x foods) quantity tensor in grams.
+
+        Returns:
+            (day_keys, meal_names, food_ids, quantities, missing_food_ids)
+        """
+        plan_days = (meal_plan or {}).get("days") or {}
+        day_keys = sorted(plan_days, key=lambda key: (plan_days[key].get("day_number") or 0, key))
+
+        meal_index: Dict[str, int] = {}
+        food_index: Dict[str, int] = {}
+        missing: Dict[str, None] = {}
+        entries = []  # (day, meal, food, quantity_g)
+        for d, day_key in enumerate(day_keys):
+            for meal_name, meal_data in (plan_days[day_key].get("meals") or {}).items():
+                m = meal_index.setdefault(meal_name, len(meal_index))
+                for food in (meal_data or {}).get("allocated_foods") or []:
+                    food_id = food.get("food_id")
+                    if food_id not in nutrient_matrix:
+                        missing[food_id] = None
+                        continue
+                    f = food_index.setdefault(food_id, len(food_index))
+                    entries.append((d, m, f, float(food.get("quantity_g") or 0.0)))
+
+        quantities = np.zeros((len(day_keys), len(meal_index), len(food_index)), dtype=np.float64)
+        if entries:
+            d, m, f, grams = (np.array(column) for column in zip(*entries))
+            # A food repeated within a meal adds up
+            np.add.at(quantities, (d.astype(np.intp), m.astype(np.intp), f.astype(np.intp)), grams)
+
+        if missing:
+            logger.warning(f"Plan analysis: {len(missing)} foods not in nutrient matrix: {list(missing)[:10]}")
+        return day_keys, list(meal_index), list(food_index), quantities, [food_id for food_id in missing if food_id]
+
+    def _daily_targets(self, target_context: Optional[TargetContext]) -> Dict[str, float]:
+        """Daily calorie and macro gram targets of a TargetContext."""
+        if target_context is None:
+            return {}
+        targets = {}
+        if target_context.calories_target:
+            targets["calories"] = float(target_context.calories_target)
+        macros = target_context.macros or {}
+        for nutrient, macro_key in TARGET_MACROS.items():
+            macro = macros.get(macro_key) or {}
+            # New format (fixed "g" value) first, then old format (min_g/max_g ranges)
+            grams = macro.get("g") or macro.get("max_g") or macro.get("min_g")
+            if grams:
+                targets[nutrient] = float(grams)
+        return targets
+
+    def _target_deviations(
+        self,
+        schema: Any,
+        day_keys: List[str],
+        meal_names: List[str],
+        meal_totals: np.ndarray,
+        day_totals: np.ndarray,
+        average_daily: np.ndarray,
+        target_context: Optional[TargetContext],
+        per_meal_targets: Optional[Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Deviations of day totals from daily targets and of meal totals from per-meal targets.
+
+        Returns:
+            {
+                "targets": {nutrient: target},
+                "average_daily": {nutrient: deviation},
+                "days": {day_key: {nutrient: deviation}},
+                "meals": {day_key: {meal: {nutrient: deviation}}}  # With per_meal_targets
+            }
+            where deviation = {"value", "target", "deviation", "deviation_percent"}
+        """
+        def deviations(actual: np.ndarray, target: np.ndarray) -> Tuple[List[Any], List[Any], List[Any]]:
+            difference = actual - target
+            percent = np.divide(difference * 100.0, target, out=np.zeros_like(difference), where=target != 0)
+            return _round(actual), _round(difference), _round(percent)
+
+        def entry(value, target, difference, percent) -> Dict[str, float]:
+            return {"value": value, "target": target, "deviation": difference, "deviation_percent": percent}
+
+        result: Dict[str, Any] = {}
+        daily_targets = self._daily_targets(target_context)
+        if daily_targets:
+            names = list(daily_targets)
+            columns = [schema.index[name] for name in names]
+            target = np.array([daily_targets[name] for name in names])
+            targets = _round(target)
+            result["targets"] = dict(zip(names, targets))
+
+            value, difference, percent = deviations(average_daily[columns], target)
+            result["average_daily"] = {
+                name: entry(value[i], targets[i], difference[i], percent[i]) for i, name in enumerate(names)
+            }
+            value, difference, percent = deviations(day_totals[:, columns], target)
+            result["days"] = {
+                day_key: {
+                    name: entry(value[d][i], targets[i], difference[d][i], percent[d][i])
+                    for i, name in enumerate(names)
+                }
+                for d, day_key in enumerate(day_keys)
+            }
+
+        if per_meal_targets:
+            names = ["calories", "protein_g", "carbs_g", "fat_g"]
+            columns = [schema.index[name] for name in names]
+            # Missing per-meal targets are NaN and left out
+            target = np.array([
+                [float((per_meal_targets.get(meal_name) or {}).get(name) or np.nan) for name in names]
+                for meal_name in meal_names
+            ]).reshape(len(meal_names), len(names))
+            actual = meal_totals[:, :, columns]
+            value, difference, percent = deviations(actual, np.broadcast_to(target, actual.shape))
+            targets = _round(target)
+            result["meals"] = {
+                day_key: {
+                    meal_name: {
+                        name: entry(value[d][m][i], targets[m][i], difference[d][m][i], percent[d][m][i])
+                        for i, name in enumerate(names)
+                        if not np.isnan(target[m, i])
+                    }
+                    for m, meal_name in enumerate(meal_names)
+                    if meal_name in per_meal_targets
+                }
+                for d, day_key in enumerate(day_keys)
+            }
+
+        return result
+
+    def _check_compliance(
+        self,
+        schema: Any,
+        day_keys: List[str],
+        day_totals: np.ndarray,
+        present: np.ndarray,
+        mnt_context: MNTContext,
+        weight_kg: Optional[float]
+    ) -> Dict[str, Any]:
+        """
+        Check MNT macro/micro constraints against every day's totals.
+
+        Constraints are daily bounds. Percent constraints are the share of the
+        day's calories from the nutrient; per-kg constraints need weight_kg.
+        Constraints without a min/max, or whose nutrient none of the plan's
+        foods has data for, are listed in "not_evaluated".
+
+        Returns:
+            {
+                "compliant": bool,
+                "constraints": {key: {"scope", "min", "max", "unit", "average",
+                                      "days_violated", "compliant"}},
+                "violations": [{"constraint", "scope", "day", "bound", "limit", "value"}],
+                "not_evaluated": {key: reason}
+            }
+        """
+        # Constraint keys differ in case from food KB keys (vitamin_B12_mcg / vitamin_b12_mcg)
+        column_of = {name.lower(): column for name, column in schema.index.items()}
+        has_data = present.any(axis=0)
+        calories = day_totals[:, schema.index["calories"]]
+
+        keys: List[Tuple[str, str, Dict[str, Any]]] = []
+        series: List[np.ndarray] = []
+        not_evaluated: Dict[str, str] = {}
+        for scope, constraints in (("macro", mnt_context.macro_constraints), ("micro", mnt_context.micro_constraints)):
+            for key, constraint in (constraints or {}).items():
+                if not isinstance(constraint, dict) or ("min" not in constraint and "max" not in constraint):
+                    not_evaluated[key] = "no_min_max"
+                    continue
+                if key in PERCENT_OF_CALORIES:
+                    nutrient, kcal_per_g = PERCENT_OF_CALORIES[key]
+                elif key in PER_KG:
+                    nutrient, kcal_per_g = PER_KG[key], None
+                    if not weight_kg:
+                        not_evaluated[key] = "weight_required"
+                        continue
+                else:
+                    nutrient, kcal_per_g = key, None
+                column = column_of.get(nutrient.lower())
+                if column is None or not has_data[column]:
+                    not_evaluated[key] = "no_nutrient_data"
+                    continue
+
+                amount = day_totals[:, column]
+                if key in PERCENT_OF_CALORIES:
+                    value = np.divide(amount * kcal_per_g * 100.0, calories, out=np.zeros_like(amount), where=calories > 0)
+                elif key in PER_KG:
+                    value = amount / float(weight_kg)
+                else:
+                    value = amount
+                keys.append((key, scope, constraint))
+                series.append(value)
+
+        constraint_results: Dict[str, Any] = {}
+        violations: List[Dict[str, Any]] = []
+        if keys:
+            # (days x constraints), bounds broadcast over days; NaN bounds never violate
+            values = np.stack(series, axis=1)
+            minimum = np.array([float(c["min"]) if c.get("min") is not None else np.nan for _, _, c in keys])
+            maximum = np.array([float(c["max"]) if c.get("max") is not None else np.nan for _, _, c in keys])
+            below = values < minimum
+            above = values > maximum
+            violated = below | above
+
+            rounded = _round(values)
+            averages = _round(values.mean(axis=0)) if len(day_keys) else [0.0] * len(keys)
+            for c, (key, scope, constraint) in enumerate(keys):
+                constraint_results[key] = {
+                    "scope": scope,
+                    "min": constraint.get("min"),
+                    "max": constraint.get("max"),
+                    "unit": constraint.get("unit"),
+                    "average": averages[c],
+                    "days_violated": [day_keys[d] for d in np.flatnonzero(violated[:, c])],
+                    "compliant": not violated[:, c].any(),
+                }
+            for d, c in zip(*np.nonzero(violated)):
+                key, scope, constraint = keys[c]
+                bound = "min" if below[d, c] else "max"
+                violations.append({
+                    "constraint": key,
+                    "scope": scope,
+                    "day": day_keys[d],
+                    "bound": bound,
+                    "limit": constraint[bound],
+                    "value": rounded[d][c],
+                })
+
+        return {
+            "compliant": not violations,
+            "constraints": constraint_results,
+            "violations": violations,
+            "not_evaluated": not_evaluated,
+        }
+
+    def _contributions(
+        self,
+        food_ids: List[str],
+        quantities: np.ndarray,
+        values: np.ndarray,
+        present: np.ndarray,
+        plan_totals: np.ndarray,
+        reported: np.ndarray,
+        nutrients: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Per-food plan totals and share of each nutrient.
+
+        Returns:
+            {food_id: {"quantity_g", "nutrients": {n: amount}, "share_percent": {n: percent}}}
+        """
+        food_grams = quantities.sum(axis=(0, 1))
+        amounts = (food_grams[:, None] * values / 100.0)[:, reported]
+        totals = plan_totals[reported]
+        shares = np.divide(amounts * 100.0, totals, out=np.zeros_like(amounts), where=totals != 0)
+
+        grams = _round(food_grams)
+        amount_values = _round(amounts)
+        share_values = _round(shares)
+        has_data = present[:, reported]
+        return {
+            food_id: {
+                "quantity_g": grams[f],
+                "nutrients": {n: amount_values[f][i] for i, n in enumerate(nutrients) if has_data[f, i]},
+                "share_percent": {n: share_values[f][i] for i, n in enumerate(nutrients) if has_data[f, i]},
+            }
+            for f, food_id in enumerate(food_ids)
+        }
@@ -9,9 +9,11 @@ Deterministic engine for allocating foods to meals based on:
 This engine does NOT generate recipes or use LLM.
 It only selects foods and allocates quantities.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from app.platform.core.context import (
     ExchangeContext,
     MealStructureContext,
@@ -19,6 +21,10 @@ from app.platform.core.context import (
 )
 from app.platform.engines.recipe_engine.variety_tracker import VarietyTracker
 from app.platform.engines.recipe_engine.meal_allocator import MealAllocator
+from app.platform.engines.food_engine.nutrient_matrix import NutrientMatrix
+
+# Nutrients reported in each day's daily_totals
+DAILY_TOTAL_NUTRIENTS = ("calories", "protein_g", "carbs_g", "fat_g")
 
 
 class MealAllocationEngine:
@@ -49,9 +55,14 @@ class MealAllocationEngine:
     """
     
     def __init__(self):
-        """Initialize Meal Allocation Engine."""
-        self.variety_tracker = VarietyTracker()
-        self.meal_allocator = MealAllocator(variety_tracker=self.variety_tracker)
+        """
+        Initialize Meal Allocation Engine.
+        
+        The engine holds no per-plan state and can be shared across requests;
+        each allocate_meal_plan() / iter_day_allocations() call gets its own
+        VarietyTracker.
+        """
+        pass
     
     def allocate_meal_plan(
         self,
@@ -102,16 +113,53 @@ class MealAllocationEngine:
         if start_date is None:
             start_date = datetime.now()
         
-        # Reset variety tracker for fresh start
-        self.variety_tracker.reset()
+        days = dict(self.iter_day_allocations(
+            exchange_context=exchange_context,
+            meal_structure=meal_structure,
+            food_engine_output=food_engine_output,
+            num_days=num_days,
+            start_date=start_date
+        ))
+        return self.build_meal_plan(days, start_date)
+    
+    def iter_day_allocations(
+        self,
+        exchange_context: ExchangeContext,
+        meal_structure: MealStructureContext,
+        food_engine_output: Dict[str, Any],
+        num_days: int,
+        start_date: datetime
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Allocate foods day by day, yielding each day as soon as it is allocated.
+        
+        Variety state is carried across the days of one iteration, so the days
+        are the same as those of allocate_meal_plan().
         
+        Args:
+            exchange_context: Exchange context with per-meal exchange targets
+            meal_structure: Meal structure context with meal list
+            food_engine_output: Food Engine output with ranked food lists
+            num_days: Number of days to generate
+            start_date: Date of day 1
+            
+        Yields:
+            (day_key, day plan) tuples, e.g. ("day_1", {...})
+        """
         # Extract inputs
         exchanges_per_meal = exchange_context.exchanges_per_meal
         ranked_foods = food_engine_output.get("category_wise_foods", {})
         meal_names = meal_structure.meals
         
+        # Fresh variety state per run; ranked food nutrition is decoded once
+        meal_allocator = MealAllocator(
+            variety_tracker=VarietyTracker(),
+            nutrient_matrix=NutrientMatrix.from_foods(
+                food for foods in ranked_foods.values() for food in foods
+            ),
+        )
+        
         # Generate plan for each day
-        days = {}
         for day_num in range(1, num_days + 1):
             day_date = start_date + timedelta(days=day_num - 1)
             
@@ -120,17 +168,29 @@ class MealAllocationEngine:
                 day_date=day_date,
                 meal_names=meal_names,
                 exchanges_per_meal=exchanges_per_meal,
-                ranked_foods=ranked_foods
+                ranked_foods=ranked_foods,
+                meal_allocator=meal_allocator
             )
             
-            days[f"day_{day_num}"] = day_plan
+            yield f"day_{day_num}", day_plan
+    
+    def build_meal_plan(self, days: Dict[str, Dict[str, Any]], start_date: datetime) -> Dict[str, Any]:
+        """
+        Build the meal plan (with variety and nutrition metrics) from allocated days.
         
+        Args:
+            days: Day plans from iter_day_allocations()
+            start_date: Date of day 1
+            
+        Returns:
+            Meal plan dictionary (see allocate_meal_plan)
+        """
         # Calculate metrics
         variety_metrics = self._calculate_variety_metrics(days)
         nutrition_summary = self._calculate_nutrition_summary(days)
         
         return {
-            "plan_duration_days": num_days,
+            "plan_duration_days": len(days),
             "start_date": start_date.isoformat(),
             "days": days,
             "variety_metrics": variety_metrics,
@@ -143,7 +203,8 @@ class MealAllocationEngine:
         day_date: datetime,
         meal_names: List[str],
         exchanges_per_meal: Dict[str, Dict[str, float]],
-        ranked_foods: Dict[str, List[Dict[str, Any]]]
+        ranked_foods: Dict[str, List[Dict[str, Any]]],
+        meal_allocator: MealAllocator
     ) -> Dict[str, Any]:
         """
         Allocate foods to all meals for a single day.
@@ -154,17 +215,12 @@ class MealAllocationEngine:
             meal_names: List of meal names
             exchanges_per_meal: Exchange targets per meal
             ranked_foods: Ranked food lists per exchange category
+            meal_allocator: Allocator bound to this run's VarietyTracker
             
         Returns:
             Day plan dictionary
         """
         day_meals = {}
-        daily_totals = {
-            "calories": 0.0,
-            "protein_g": 0.0,
-            "carbs_g": 0.0,
-            "fat_g": 0.0,
-        }
         
         # Track foods used today (for Rule A: Same-Day Variety)
         foods_used_today = set()
@@ -178,7 +234,7 @@ class MealAllocationEngine:
                 continue
             
             # Allocate foods to this meal
-            meal_result = self.meal_allocator.allocate_foods_to_meal(
+            meal_result = meal_allocator.allocate_foods_to_meal(
                 meal_name=meal_name,
                 exchange_targets=exchange_targets,
                 ranked_foods=ranked_foods,
@@ -187,20 +243,19 @@ class MealAllocationEngine:
             )
             
             day_meals[meal_name] = meal_result
-            
-            # Accumulate daily totals
-            total_nutrition = meal_result.get("total_nutrition", {})
-            daily_totals["calories"] += total_nutrition.get("calories", 0) or 0.0
-            daily_totals["protein_g"] += total_nutrition.get("protein_g", 0) or 0.0
-            daily_totals["carbs_g"] += total_nutrition.get("carbs_g", 0) or 0.0
-            daily_totals["fat_g"] += total_nutrition.get("fat_g", 0) or 0.0
+        
+        # Daily totals over all of the day's foods
+        total_nutrition = meal_allocator.calculate_total_nutrition([
+            food for meal_result in day_meals.values() for food in meal_result.get("allocated_foods", [])
+        ])
+        daily_totals = {key: total_nutrition.get(key, 0.0) for key in DAILY_TOTAL_NUTRIENTS}
         
         return {
             "day_number": day,
             "date": day_date.strftime("%Y-%m-%d"),
             "day_name": day_date.strftime("%A"),
             "meals": day_meals,
-            "daily_totals": {k: round(v, 1) for k, v in daily_totals.items()}
+            "daily_totals": daily_totals
         }
     
     def _calculate_variety_metrics(
@@ -312,32 +367,28 @@ class MealAllocationEngine:
         Returns:
             Nutrition summary dictionary
         """
-        daily_calories = []
-        daily_protein = []
-        daily_carbs = []
-        daily_fat = []
+        # (days x nutrients) matrix of daily totals
+        daily = np.array(
+            [
+                [(day_data.get("daily_totals", {}).get(key, 0) or 0.0) for key in DAILY_TOTAL_NUTRIENTS]
+                for day_data in days.values()
+            ],
+            dtype=np.float64
+        ).reshape(len(days), len(DAILY_TOTAL_NUTRIENTS))
         
-        for day_key, day_data in days.items():
-            daily_totals = day_data.get("daily_totals", {})
-            daily_calories.append(daily_totals.get("calories", 0) or 0.0)
-            daily_protein.append(daily_totals.get("protein_g", 0) or 0.0)
-            daily_carbs.append(daily_totals.get("carbs_g", 0) or 0.0)
-            daily_fat.append(daily_totals.get("fat_g", 0) or 0.0)
-        
-        def calculate_stats(values: List[float]) -> Dict[str, float]:
-            """Calculate min, max, avg, std for a list of values."""
-            if not values:
-                return {"min": 0, "max": 0, "avg": 0, "std": 0}
-            
-            avg = sum(values) / len(values)
-            variance = sum((x - avg) ** 2 for x in values) / len(values)
-            std = variance ** 0.5
-            
-            return {
-                "min": round(min(values), 1),
-                "max": round(max(values), 1),
-                "avg": round(avg, 1),
-                "std": round(std, 1)
+        if len(days):
+            average = np.round(daily.mean(axis=0), 1).tolist()
+            minimum = np.round(daily.min(axis=0), 1).tolist()
+            maximum = np.round(daily.max(axis=0), 1).tolist()
+            std = np.round(daily.std(axis=0), 1).tolist()  # Population std
+            daily_variation = {
+                key: {"min": minimum[i], "max": maximum[i], "avg": average[i], "std": std[i]}
+                for i, key in enumerate(DAILY_TOTAL_NUTRIENTS)
+            }
+        else:
+            average = [0] * len(DAILY_TOTAL_NUTRIENTS)
+            daily_variation = {
+                key: {"min": 0, "max": 0, "avg": 0, "std": 0} for key in DAILY_TOTAL_NUTRIENTS
             }
         
         # Check if all days are valid
@@ -353,17 +404,7 @@ class MealAllocationEngine:
                 break
         
         return {
-            "average_daily": {
-                "calories": round(sum(daily_calories) / len(daily_calories), 1) if daily_calories else 0,
-                "protein_g": round(sum(daily_protein) / len(daily_protein), 1) if daily_protein else 0,
-                "carbs_g": round(sum(daily_carbs) / len(daily_carbs), 1) if daily_carbs else 0,
-                "fat_g": round(sum(daily_fat) / len(daily_fat), 1) if daily_fat else 0,
-            },
-            "daily_variation": {
-                "calories": calculate_stats(daily_calories),
-                "protein_g": calculate_stats(daily_protein),
-                "carbs_g": calculate_stats(daily_carbs),
-                "fat_g": calculate_stats(daily_fat),
-            },
+            "average_daily": dict(zip(DAILY_TOTAL_NUTRIENTS, average)),
+            "daily_variation": daily_variation,
             "all_days_valid": all_days_valid
         }
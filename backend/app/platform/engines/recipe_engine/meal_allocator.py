@@ -22,14 +22,24 @@ class MealAllocator:
     Does NOT generate recipes or use LLM.
     """
     
-    def __init__(self, variety_tracker: Optional[Any] = None):
+    def __init__(
+        self,
+        variety_tracker: Optional[Any] = None,
+        substitution_index: Optional[Any] = None,
+        nutrient_matrix: Optional[Any] = None
+    ):
         """
         Initialize Meal Allocator.
         
         Args:
             variety_tracker: Optional VarietyTracker instance for enforcing variety rules
+            substitution_index: Optional FoodSubstitutionIndex for substitute_food()
+            nutrient_matrix: Optional NutrientMatrix of the ranked foods; portion and
+                total nutrition of foods in it are computed from the matrix
         """
         self.variety_tracker = variety_tracker
+        self.substitution_index = substitution_index
+        self.nutrient_matrix = nutrient_matrix
     
     def allocate_foods_to_meal(
         self,
@@ -116,40 +126,14 @@ class MealAllocator:
                 )
                 continue
             
-            # Calculate quantity based on exchange requirement
-            serving_size_per_exchange = selected_food.get(
-                "serving_size_per_exchange_g", 0
-            ) or 0.0
-            
-            if serving_size_per_exchange == 0:
-                # Fallback: use common serving size if available
-                serving_size_per_exchange = selected_food.get(
-                    "common_serving_size_g", 100.0
-                ) or 100.0
+            if not selected_food.get("serving_size_per_exchange_g"):
                 warnings.append(
                     f"Food '{selected_food.get('food_id')}' missing serving_size_per_exchange_g, "
-                    f"using fallback: {serving_size_per_exchange}g"
+                    f"using fallback: {self._serving_size_per_exchange(selected_food)}g"
                 )
             
-            quantity_g = serving_size_per_exchange * exchange_count
-            
-            # Calculate nutrition for allocated quantity
-            nutrition_per_100g = selected_food.get("nutrition", {})
-            portion_nutrition = self._calculate_portion_nutrition(
-                nutrition_per_100g=nutrition_per_100g,
-                quantity_g=quantity_g
-            )
-            
-            # Create allocated food entry
-            allocated_food = {
-                "food_id": selected_food["food_id"],
-                "display_name": selected_food.get("display_name", selected_food["food_id"]),
-                "exchange_category": exchange_category,
-                "exchanges": exchange_count,
-                "quantity_g": round(quantity_g, 1),
-                "nutrition": portion_nutrition,
-                "ranking": selected_food.get("ranking", {}),  # Preserve ranking metadata
-            }
+            # Quantity and nutrition for the exchange requirement
+            allocated_food = self._build_allocated_food(selected_food, exchange_category, exchange_count)
             
             allocated_foods.append(allocated_food)
             
@@ -189,7 +173,7 @@ class MealAllocator:
             )
         
         # Calculate total nutrition
-        total_nutrition = self._calculate_total_nutrition(allocated_foods)
+        total_nutrition = self.calculate_total_nutrition(allocated_foods)
         
         # Validation
         is_valid = len(allocated_foods) > 0 and len(warnings) == 0
@@ -205,6 +189,93 @@ class MealAllocator:
             }
         }
     
+    def substitute_food(
+        self,
+        allocated_food: Dict[str, Any],
+        k: int = 5,
+        exclude_food_ids: Optional[Set[str]] = None,
+        medical_conditions: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get exchange-equivalent alternatives for an allocated food.
+        
+        Each alternative is an allocated food entry for the same number of
+        exchanges, portioned with the substitute's own serving size.
+        
+        Args:
+            allocated_food: Entry from allocate_foods_to_meal()["allocated_foods"]
+            k: Number of alternatives
+            exclude_food_ids: Food IDs the client must not get (e.g. MNT food
+                exclusions, other foods of the meal)
+            medical_conditions: Client's medical condition IDs
+            
+        Returns:
+            Allocated food entries with "substitution_distance", nearest first
+            (empty without a substitution index)
+        """
+        if self.substitution_index is None:
+            return []
+        
+        exchange_count = allocated_food.get("exchanges", 1.0)
+        alternatives = []
+        for substitute in self.substitution_index.substitutes(
+            allocated_food["food_id"],
+            k=k,
+            exclude_food_ids=exclude_food_ids,
+            medical_conditions=medical_conditions
+        ):
+            food = self.substitution_index.get_food(substitute.food_id)
+            alternative = self._build_allocated_food(food, substitute.exchange_category, exchange_count)
+            alternative["substitution_distance"] = substitute.distance
+            alternatives.append(alternative)
+        return alternatives
+    
+    def _serving_size_per_exchange(self, food: Dict[str, Any]) -> float:
+        """Grams per exchange (common serving size, then 100g, as fallback)."""
+        return (
+            food.get("serving_size_per_exchange_g")
+            or food.get("common_serving_size_g")
+            or 100.0
+        )
+    
+    def _build_allocated_food(
+        self,
+        food: Dict[str, Any],
+        exchange_category: str,
+        exchange_count: float
+    ) -> Dict[str, Any]:
+        """
+        Build an allocated food entry for a number of exchanges.
+        
+        Args:
+            food: Ranked or KB food dictionary (per-100g nutrition)
+            exchange_category: Exchange category name
+            exchange_count: Exchange count
+            
+        Returns:
+            Allocated food entry with quantity and portion nutrition
+        """
+        quantity_g = self._serving_size_per_exchange(food) * exchange_count
+        
+        # Calculate nutrition for allocated quantity
+        if self.nutrient_matrix is not None and food["food_id"] in self.nutrient_matrix:
+            portion_nutrition = self.nutrient_matrix.portion_nutrition(food["food_id"], quantity_g)
+        else:
+            portion_nutrition = self._calculate_portion_nutrition(
+                nutrition_per_100g=food.get("nutrition", {}),
+                quantity_g=quantity_g
+            )
+        
+        return {
+            "food_id": food["food_id"],
+            "display_name": food.get("display_name", food["food_id"]),
+            "exchange_category": exchange_category,
+            "exchanges": exchange_count,
+            "quantity_g": round(quantity_g, 1),
+            "nutrition": portion_nutrition,
+            "ranking": food.get("ranking", {}),  # Preserve ranking metadata
+        }
+    
     def _select_food(
         self,
         category_foods: List[Dict[str, Any]],
@@ -293,12 +364,16 @@ class MealAllocator:
         # Round values
         return {k: round(v, 1) for k, v in portion_nutrition.items()}
     
-    def _calculate_total_nutrition(
+    def calculate_total_nutrition(
         self,
         allocated_foods: List[Dict[str, Any]]
     ) -> Dict[str, float]:
         """
-        Calculate total nutrition across all allocated foods in a meal.
+        Calculate total nutrition across allocated foods (a meal or a day).
+        
+        With a nutrient matrix holding all foods, the total is one
+        matrix-vector product over the allocated quantities; otherwise the
+        portion nutrition dicts are summed.
         
         Args:
             allocated_foods: List of allocated food dictionaries
@@ -306,6 +381,13 @@ class MealAllocator:
         Returns:
             Dictionary with total nutrition values
         """
+        matrix = self.nutrient_matrix
+        if matrix is not None and all(food["food_id"] in matrix for food in allocated_foods):
+            return matrix.total_nutrition(
+                [food["food_id"] for food in allocated_foods],
+                [food["quantity_g"] for food in allocated_foods]
+            )
+        
         total = defaultdict(float)
         
         for food in allocated_foods:
@@ -6,16 +6,49 @@ Takes finalized meals (foods + quantities) and produces client-ready recipes.
 
 This engine does NOT modify nutrition, food selection, or exchanges.
 It only generates recipe names, cooking steps, and serving instructions.
+
+Batched mode (settings.RECIPE_BATCH_MEALS != 1) requests the recipes of all
+meals of a day (or of N meals) in one call: a system message with the
+instructions and the client's constraints, identical for every call of a
+plan so providers can cache it, followed by a short user message with the
+day's meals. Only meals whose recipe fails validation are retried.
+
+Meals that match a recipe of the recipe KB (see RecipeTemplateMatcher) get
+that recipe, scaled to the allocated quantities, without an LLM call.
 """
 import json
 import os
+import re
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
-from openai import OpenAI
 from app.config import settings
+from app.platform.ai.gateway import LLMGateway, get_llm_gateway
 from app.utils.logger import logger
 from app.platform.core.context import MNTContext, AyurvedaContext
+from app.platform.engines.mnt_engine.kb_mnt_rules import get_mnt_rule
+from app.platform.engines.recipe_engine.recipe_template_matcher import (
+    RecipeMatch,
+    RecipeTemplateMatcher,
+    get_recipe_template_matcher,
+)
+
+# Fields every LLM recipe must have
+RECIPE_REQUIRED_FIELDS = (
+    "dish_name", "ingredients", "cooking_steps", "approx_cooking_time_minutes", "serving_instructions"
+)
+
+# Completion token limit per requested meal
+MAX_TOKENS_PER_MEAL = 2000
+
+# Serving temperature wording for KB food_temperature_preference values
+SERVING_TEMPERATURES = {
+    "hot_fresh": "hot and fresh",
+    "room_temperature": "at room temperature",
+}
+
+# Template cooking steps that use added fat
+FAT_STEP_PATTERN = re.compile(r"\b(oil|ghee|butter)\b", re.IGNORECASE)
 
 
 class RecipeGenerationEngine:
@@ -24,7 +57,8 @@ class RecipeGenerationEngine:
     
     Responsibility:
     - Generate Indian-style recipes from finalized meals
-    - Call LLM via OpenRouter (one call per meal)
+    - Use recipe KB templates for meals that match a known recipe
+    - Call LLM via OpenRouter (one call per day in batched mode, else per meal)
     - Validate LLM output to ensure food/quantity integrity
     - Produce client-ready recipe output
     
@@ -39,7 +73,10 @@ class RecipeGenerationEngine:
         self,
         api_key: Optional[str] = None,
         model: Optional[str] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        gateway: Optional[LLMGateway] = None,
+        batch_size: Optional[int] = None,
+        template_matcher: Optional[RecipeTemplateMatcher] = None
     ):
         """
         Initialize Recipe Generation Engine.
@@ -48,46 +85,47 @@ class RecipeGenerationEngine:
             api_key: OpenRouter API key (defaults to settings)
             model: LLM model to use (defaults to settings.DIET_PLAN_MODEL)
             temperature: Temperature for LLM (default: 0.7)
+            gateway: LLM gateway (defaults to the shared gateway for api_key)
+            batch_size: Meals per LLM call (0 = all meals of a day, 1 = one call
+                per meal; defaults to settings.RECIPE_BATCH_MEALS)
+            template_matcher: Recipe KB matcher (defaults to the shared matcher
+                if settings.RECIPE_TEMPLATE_MATCHING, else no template recipes)
         """
         self.api_key = api_key or settings.OPENROUTER_API_KEY
         self.model = model or settings.DIET_PLAN_MODEL
         self.temperature = temperature
+        self.batch_size = settings.RECIPE_BATCH_MEALS if batch_size is None else batch_size
+        if template_matcher is None and settings.RECIPE_TEMPLATE_MATCHING:
+            template_matcher = get_recipe_template_matcher()
+        self.template_matcher = template_matcher
         
-        if not self.api_key or self.api_key == "sk-or-v1-placeholder-get-from-openrouter-ai":
-            raise ValueError(
-                "OPENROUTER_API_KEY not configured. Set it in .env file or pass via api_key parameter"
-            )
-        
-        # Initialize OpenAI client for OpenRouter
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://openrouter.ai/api/v1",
-            default_headers={
-                "HTTP-Referer": "https://drassistent.com",
-                "X-Title": "DrAssistent Recipe Generation"
-            }
-        )
+        # Shared pooled client (raises ValueError if no API key is configured)
+        self.gateway = gateway or get_llm_gateway(self.api_key)
         
-        # Load prompt template
+        # Load prompt templates
         self.prompt_template = self._load_prompt_template()
+        self.batch_prompt_template = self._load_prompt_template("batchPrompt.txt")
         
         logger.info(f"Initialized Recipe Generation Engine with model: {self.model}")
     
-    def _load_prompt_template(self) -> str:
+    def _load_prompt_template(self, file_name: str = "samplePrompt.txt") -> str:
         """
         Load recipe prompt template from file.
         
+        Args:
+            file_name: Template file in the recipe_engine directory
+        
         Returns:
             Prompt template string
         """
         # Get the directory where this file is located
         current_dir = Path(__file__).parent
-        prompt_file = current_dir / "samplePrompt.txt"
+        prompt_file = current_dir / file_name
         
         if not prompt_file.exists():
             raise FileNotFoundError(
                 f"Prompt template file not found: {prompt_file}. "
-                "Please ensure samplePrompt.txt exists in recipe_engine directory."
+                f"Please ensure {file_name} exists in recipe_engine directory."
             )
         
         with open(prompt_file, "r", encoding="utf-8") as f:
@@ -130,6 +168,7 @@ class RecipeGenerationEngine:
                                     "serving_instructions": "..."
                                 },
                                 "allocated_foods": [...],  # Original foods preserved
+                                "recipe_source": "llm",  # or "template" (recipe KB)
                                 "validation": {...}
                             },
                             ...
@@ -142,62 +181,417 @@ class RecipeGenerationEngine:
                     "successful_recipes": 21,
                     "failed_recipes": 0,
                     "validation_failures": 0
+                },
+                "template_matching": {
+                    "meals": 21,  # Meals with allocated foods
+                    "template_recipes": 15,
+                    "hit_ratio": 0.714
                 }
             }
         """
         days = meal_plan.get("days", {})
         
-        # Generate constraint summaries once (shared across all meals)
-        mnt_summary = self._generate_mnt_summary(mnt_context)
-        ayurveda_summary = self._generate_ayurveda_summary(ayurveda_context)
-        oil_limit = self._extract_oil_limit(mnt_context)
+        # Constraint summaries are shared across all meals
+        constraints = self.build_recipe_constraints(mnt_context, ayurveda_context)
         
-        # Process each day
-        processed_days = {}
-        total_meals = 0
-        successful_recipes = 0
-        failed_recipes = 0
-        validation_failures = 0
+        processed_days = {
+            day_key: self.generate_recipes_for_day(days[day_key], constraints)
+            for day_key in sorted(days.keys())
+        }
+        return self.build_recipe_result(meal_plan, processed_days)
+    
+    def build_recipe_constraints(
+        self,
+        mnt_context: Optional[MNTContext] = None,
+        ayurveda_context: Optional[AyurvedaContext] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the constraint summaries shared by every meal of a plan.
         
-        for day_key in sorted(days.keys()):
-            day_data = days[day_key]
-            day_num = day_data.get("day_number", 0)
-            day_name = day_data.get("day_name", "")
-            date = day_data.get("date", "")
-            meals = day_data.get("meals", {})
+        Args:
+            mnt_context: Optional MNT context for constraints
+            ayurveda_context: Optional Ayurveda context for constraints
             
-            processed_meals = {}
+        Returns:
+            Dictionary with mnt_summary, ayurveda_summary and oil_limit, plus
+            conditions, food_exclusions and avoid_foods for template matching
+        """
+        return {
+            "mnt_summary": self._generate_mnt_summary(mnt_context),
+            "ayurveda_summary": self._generate_ayurveda_summary(ayurveda_context),
+            "oil_limit": self._extract_oil_limit(mnt_context),
+            "conditions": self._extract_conditions(mnt_context),
+            "food_exclusions": list((mnt_context.food_exclusions or []) if mnt_context else []),
+            "avoid_foods": self._extract_avoid_foods(ayurveda_context),
+        }
+    
+    def generate_recipes_for_day(
+        self,
+        day_data: Dict[str, Any],
+        constraints: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Generate recipes for all meals of one day.
+        
+        Used directly when streaming a plan day by day. Meals matching a
+        recipe KB template are resolved locally; in batched mode the other
+        meals are sent in one call (or in calls of batch_size meals).
+        
+        Args:
+            day_data: Day from MealAllocationEngine with allocated foods
+            constraints: Output of build_recipe_constraints()
             
-            for meal_name, meal_data in meals.items():
-                total_meals += 1
+        Returns:
+            Day dictionary with day_number, date, day_name and processed meals
+        """
+        day_name = day_data.get("day_name", "")
+        meals = day_data.get("meals", {})
+        
+        processed_meals = {}
+        llm_meals = {}
+        for meal_name, meal_data in meals.items():
+            template_result = self._generate_template_recipe(meal_name, meal_data, constraints)
+            if template_result is not None:
+                processed_meals[meal_name] = template_result
+            else:
+                llm_meals[meal_name] = meal_data
+        
+        if self.batch_size == 1:
+            for meal_name, meal_data in llm_meals.items():
+                processed_meals[meal_name] = self._generate_recipe_for_meal(meal_name, meal_data, day_name, constraints)
+        elif llm_meals:
+            processed_meals.update(self._generate_recipes_batched(llm_meals, day_name, constraints))
+        
+        return {
+            "day_number": day_data.get("day_number", 0),
+            "date": day_data.get("date", ""),
+            "day_name": day_name,
+            "meals": {meal_name: processed_meals[meal_name] for meal_name in meals}
+        }
+    
+    def _generate_template_recipe(
+        self,
+        meal_name: str,
+        meal_data: Dict[str, Any],
+        constraints: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Build a meal result from a matching recipe KB template.
+        
+        Templates that conflict with the client's conditions, MNT food
+        exclusions or Ayurveda avoid list are not used.
+        
+        Args:
+            meal_name: Meal name
+            meal_data: Meal data with allocated_foods
+            constraints: Output of build_recipe_constraints()
+            
+        Returns:
+            Meal result with recipe_source "template", or None if the meal has
+            no foods, no recipe matches or the template fails validation
+        """
+        allocated_foods = meal_data.get("allocated_foods", [])
+        if self.template_matcher is None or not allocated_foods:
+            return None
+        
+        match = self.template_matcher.match(
+            meal_name,
+            allocated_foods,
+            conditions=constraints.get("conditions", ()),
+            food_exclusions=constraints.get("food_exclusions", ()),
+            avoid_foods=constraints.get("avoid_foods", ())
+        )
+        if match is None:
+            return None
+        
+        recipe = self._build_template_recipe(meal_name, match, allocated_foods, constraints.get("oil_limit"))
+        validation_result = self._validate_recipe(recipe=recipe, allocated_foods=allocated_foods)
+        if not validation_result["is_valid"]:
+            logger.warning(
+                f"Template recipe {match.recipe_id} failed validation for {meal_name}: "
+                f"{validation_result['warnings']}. Using LLM..."
+            )
+            return None
+        
+        return self._build_meal_result(
+            meal_name=meal_name,
+            meal_data=meal_data,
+            recipe=recipe,
+            warnings=validation_result["warnings"],
+            validation_failed=False,
+            recipe_source="template"
+        )
+    
+    def _build_template_recipe(
+        self,
+        meal_name: str,
+        match: RecipeMatch,
+        allocated_foods: List[Dict[str, Any]],
+        oil_limit: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Build a recipe (LLM recipe layout) from a matched KB recipe.
+        
+        Ingredients and quantities are the allocated foods; name, steps and
+        timing come from the KB recipe. Steps using oil, ghee or butter are
+        left out if the meal has no fat allocated, and capped at oil_limit if
+        the allocated fat exceeds it.
+        
+        Args:
+            meal_name: Meal name
+            match: Matched KB recipe
+            allocated_foods: Allocated foods of the meal
+            oil_limit: Oil limit per meal in ml (None: no limit)
+            
+        Returns:
+            Recipe dictionary
+        """
+        kb_recipe = match.recipe
+        basic_info = kb_recipe.get("basic_info") or {}
+        instructions = kb_recipe.get("cooking_instructions") or {}
+        
+        ingredients = []
+        extra_names = []
+        for food in allocated_foods:
+            display_name = food.get("display_name", food.get("food_id", "Unknown"))
+            ingredients.append(f"{display_name} – {self._format_quantity(food.get('quantity_g', 0))}")
+            if food.get("food_id") in match.extra:
+                extra_names.append(display_name)
+        
+        temperature = (kb_recipe.get("ayurvedic_properties") or {}).get("food_temperature_preference") or ""
+        serving = f"Serve {SERVING_TEMPERATURES.get(temperature, temperature.replace('_', ' '))}".strip()
+        serving += f" for {meal_name.replace('_', ' ')}."
+        if extra_names:
+            serving += f" Serve {', '.join(extra_names)} on the side."
+        
+        # Recipe ingredients the meal does not have (optional or within tolerance)
+        matched_ids = {ingredient["food_id"] for ingredient in match.matched.values()}
+        omitted = [
+            ingredient.get("food_name", ingredient["food_id"])
+            for ingredient in kb_recipe.get("ingredients", [])
+            if ingredient["food_id"] not in matched_ids
+        ]
+        tips = list(instructions.get("tips") or [])
+        if omitted:
+            tips.insert(0, f"Skip {', '.join(omitted)} (not part of this meal)")
+        
+        # Fat only as allocated (1 g of oil or ghee ~ 1 ml)
+        fat_g = sum(
+            float(food.get("quantity_g") or 0.0)
+            for food in allocated_foods
+            if food.get("exchange_category") == "fat"
+        )
+        steps = []
+        for step in instructions.get("steps") or []:
+            if FAT_STEP_PATTERN.search(step):
+                if fat_g <= 0:
+                    continue
+                if oil_limit is not None and fat_g > oil_limit:
+                    step = f"{step} (use at most {oil_limit:g} ml of oil or ghee)"
+            steps.append(step)
+        if fat_g <= 0 and len(steps) < len(instructions.get("steps") or []):
+            tips.append("Cook without added oil or ghee (none allocated for this meal)")
+        
+        return {
+            "dish_name": kb_recipe.get("display_name", match.recipe_id),
+            "ingredients": ingredients,
+            "cooking_steps": steps,
+            "approx_cooking_time_minutes": (
+                (basic_info.get("cooking_time_minutes") or 0) + (basic_info.get("prep_time_minutes") or 0)
+            ),
+            "serving_instructions": serving,
+            "tips": tips,
+            "recipe_id": match.recipe_id,
+            "portion_scale": match.portion_scale,
+        }
+    
+    def _generate_recipe_for_meal(
+        self,
+        meal_name: str,
+        meal_data: Dict[str, Any],
+        day_name: str,
+        constraints: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Generate one meal's recipe with its own LLM call (see generate_recipe_for_meal)."""
+        return self.generate_recipe_for_meal(
+            meal_name=meal_name,
+            meal_data=meal_data,
+            day_name=day_name,
+            mnt_summary=constraints["mnt_summary"],
+            ayurveda_summary=constraints["ayurveda_summary"],
+            oil_limit=constraints["oil_limit"]
+        )
+    
+    def _generate_recipes_batched(
+        self,
+        meals: Dict[str, Dict[str, Any]],
+        day_name: str,
+        constraints: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate recipes for the meals of a day with one LLM call per batch.
+        
+        Each recipe is validated on its own. Meals that are missing from the
+        response or fail validation are retried together in one stricter
+        call; valid meals are kept. If a batched call fails outright (API
+        error, invalid JSON), its meals fall back to one call per meal.
+        
+        Args:
+            meals: Meals of the day, by meal name
+            day_name: Day name (e.g., "Monday")
+            constraints: Output of build_recipe_constraints()
+            
+        Returns:
+            Meal results by meal name (same layout as generate_recipe_for_meal)
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for meal_name, meal_data in meals.items():
+            if meal_data.get("allocated_foods"):
+                pending.append(meal_name)
+            else:
+                results[meal_name] = self._empty_meal_result(meal_name)
+        
+        # Same system message for every call of the plan (provider-side prompt cache)
+        system_prompt = self._build_batch_system_prompt(constraints)
+        batch_size = self.batch_size if self.batch_size > 0 else max(len(pending), 1)
+        
+        for start in range(0, len(pending), batch_size):
+            batch = {name: meals[name] for name in pending[start:start + batch_size]}
+            try:
+                recipes = self._call_llm_batch(
+                    system_prompt, self._build_batch_prompt(day_name, batch), len(batch)
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Batched recipe call failed for {', '.join(batch)} on {day_name}: {str(e)}. "
+                    "Falling back to one call per meal..."
+                )
+                for meal_name, meal_data in batch.items():
+                    results[meal_name] = self._generate_recipe_for_meal(meal_name, meal_data, day_name, constraints)
+                continue
+            
+            # Validate each meal on its own; collect the failed ones for the retry
+            failed_errors: Dict[str, List[str]] = {}
+            for meal_name, meal_data in batch.items():
+                recipe, errors = self._check_batch_recipe(recipes, meal_name, meal_data)
+                if errors:
+                    failed_errors[meal_name] = errors
+                results[meal_name] = {"recipe": recipe, "warnings": list(errors)}
+            
+            if failed_errors:
+                logger.warning(
+                    f"Recipe validation failed for {', '.join(failed_errors)} on {day_name}. "
+                    "Retrying failed meals with stricter prompt..."
+                )
+                retry_recipes: Optional[Dict[str, Any]] = None
+                try:
+                    retry_recipes = self._call_llm_batch(
+                        system_prompt,
+                        self._build_batch_prompt(
+                            day_name,
+                            {name: batch[name] for name in failed_errors},
+                            previous_errors=failed_errors
+                        ),
+                        len(failed_errors)
+                    )
+                except Exception as e:
+                    logger.error(f"Retry recipe call failed for {', '.join(failed_errors)}: {str(e)}")
+                    for meal_name in failed_errors:
+                        results[meal_name]["warnings"].append(f"LLM call failed: {str(e)}")
                 
-                # Generate recipe for this meal
-                recipe_result = self.generate_recipe_for_meal(
+                for meal_name in failed_errors:
+                    warnings = results[meal_name]["warnings"]
+                    if retry_recipes is not None:
+                        recipe, errors = self._check_batch_recipe(retry_recipes, meal_name, batch[meal_name])
+                        if recipe is not None:
+                            results[meal_name]["recipe"] = recipe
+                        if not errors:
+                            continue
+                        warnings.extend(f"Retry validation failed: {e}" for e in errors)
+                    warnings.append("Recipe flagged for manual review - validation failed after retry")
+            
+            for meal_name, meal_data in batch.items():
+                attempt = results[meal_name]
+                results[meal_name] = self._build_meal_result(
                     meal_name=meal_name,
                     meal_data=meal_data,
-                    day_name=day_name,
-                    mnt_summary=mnt_summary,
-                    ayurveda_summary=ayurveda_summary,
-                    oil_limit=oil_limit
+                    recipe=attempt["recipe"],
+                    warnings=attempt["warnings"],
+                    validation_failed=meal_name in failed_errors
                 )
-                
+        
+        # Keep the day's meal order
+        return {meal_name: results[meal_name] for meal_name in meals}
+    
+    def _check_batch_recipe(
+        self,
+        recipes: Dict[str, Any],
+        meal_name: str,
+        meal_data: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """
+        Check one meal's recipe from a batched response.
+        
+        Args:
+            recipes: Recipes by meal name from _call_llm_batch()
+            meal_name: Meal name
+            meal_data: Meal data with allocated_foods
+            
+        Returns:
+            (recipe or None, validation errors; empty if the recipe is valid)
+        """
+        recipe = recipes.get(meal_name)
+        if not isinstance(recipe, dict):
+            return None, ["Recipe missing from LLM response"]
+        
+        missing_fields = [field for field in RECIPE_REQUIRED_FIELDS if field not in recipe]
+        if missing_fields:
+            return None, [f"LLM response missing required fields: {missing_fields}"]
+        
+        validation_result = self._validate_recipe(
+            recipe=recipe,
+            allocated_foods=meal_data.get("allocated_foods", [])
+        )
+        if validation_result["is_valid"]:
+            return recipe, []
+        return recipe, validation_result["warnings"]
+    
+    def build_recipe_result(
+        self,
+        meal_plan: Dict[str, Any],
+        processed_days: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Build the recipe plan and its summary from processed days.
+        
+        Args:
+            meal_plan: Meal plan from MealAllocationEngine
+            processed_days: Days from generate_recipes_for_day(), by day key
+            
+        Returns:
+            Recipe plan dictionary (see generate_recipes_for_meal_plan)
+        """
+        total_meals = 0
+        successful_recipes = 0
+        failed_recipes = 0
+        validation_failures = 0
+        meals_with_foods = 0
+        template_recipes = 0
+        for day in processed_days.values():
+            for recipe_result in day["meals"].values():
+                total_meals += 1
+                if recipe_result.get("allocated_foods"):
+                    meals_with_foods += 1
+                if recipe_result.get("recipe_source") == "template":
+                    template_recipes += 1
                 if recipe_result["validation"]["is_valid"]:
                     successful_recipes += 1
                 else:
                     failed_recipes += 1
                     if recipe_result["validation"].get("validation_failed", False):
                         validation_failures += 1
-                
-                processed_meals[meal_name] = recipe_result
-            
-            processed_days[day_key] = {
-                "day_number": day_num,
-                "date": date,
-                "day_name": day_name,
-                "meals": processed_meals
-            }
         
-        # Preserve variety_metrics and nutrition_summary from Phase 1 (meal allocation)
         result = {
             "days": processed_days,
             "summary": {
@@ -205,8 +599,17 @@ class RecipeGenerationEngine:
                 "successful_recipes": successful_recipes,
                 "failed_recipes": failed_recipes,
                 "validation_failures": validation_failures
+            },
+            "template_matching": {
+                "meals": meals_with_foods,
+                "template_recipes": template_recipes,
+                "hit_ratio": round(template_recipes / meals_with_foods, 3) if meals_with_foods else 0.0
             }
         }
+        logger.info(
+            f"Recipes: {template_recipes}/{meals_with_foods} meals from recipe KB templates, "
+            f"{meals_with_foods - template_recipes} via LLM"
+        )
         
         # Preserve Phase 1 metrics if present
         if "variety_metrics" in meal_plan:
@@ -256,16 +659,7 @@ class RecipeGenerationEngine:
         allocated_foods = meal_data.get("allocated_foods", [])
         
         if not allocated_foods:
-            return {
-                "meal_name": meal_name,
-                "recipe": None,
-                "allocated_foods": [],
-                "validation": {
-                    "is_valid": False,
-                    "warnings": ["No foods allocated to this meal"],
-                    "validation_failed": False
-                }
-            }
+            return self._empty_meal_result(meal_name)
         
         # Build prompt
         prompt = self._build_prompt(
@@ -334,12 +728,57 @@ class RecipeGenerationEngine:
             warnings.append(f"LLM call failed: {str(e)}")
             recipe = None
         
+        return self._build_meal_result(
+            meal_name=meal_name,
+            meal_data=meal_data,
+            recipe=recipe,
+            warnings=warnings,
+            validation_failed=validation_failed
+        )
+    
+    def _empty_meal_result(self, meal_name: str) -> Dict[str, Any]:
+        """Result for a meal without allocated foods (no LLM call)."""
+        return {
+            "meal_name": meal_name,
+            "recipe": None,
+            "allocated_foods": [],
+            "validation": {
+                "is_valid": False,
+                "warnings": ["No foods allocated to this meal"],
+                "validation_failed": False
+            }
+        }
+    
+    def _build_meal_result(
+        self,
+        meal_name: str,
+        meal_data: Dict[str, Any],
+        recipe: Optional[Dict[str, Any]],
+        warnings: List[str],
+        validation_failed: bool,
+        recipe_source: str = "llm"
+    ) -> Dict[str, Any]:
+        """
+        Build a meal result (layout of generate_recipe_for_meal).
+        
+        Args:
+            meal_name: Meal name
+            meal_data: Meal data with allocated_foods
+            recipe: Final recipe (None if generation failed)
+            warnings: Validation and LLM warnings
+            validation_failed: Whether the first attempt failed validation
+            recipe_source: "llm" or "template"
+            
+        Returns:
+            Meal result dictionary
+        """
         return {
             "meal_name": meal_name,
             "recipe": recipe,
-            "allocated_foods": allocated_foods,  # Preserve original foods
+            "allocated_foods": meal_data.get("allocated_foods", []),  # Preserve original foods
             "total_nutrition": meal_data.get("total_nutrition", {}),
             "exchanges_used": meal_data.get("exchanges_used", {}),
+            "recipe_source": recipe_source,
             "validation": {
                 "is_valid": recipe is not None and not validation_failed,
                 "warnings": warnings,
@@ -370,38 +809,109 @@ class RecipeGenerationEngine:
         Returns:
             Complete prompt string
         """
+        food_list_str = self._format_food_list(allocated_foods)
+        
+        # Inject values into template
+        prompt = self.prompt_template
+        prompt = prompt.replace("{{DAY}}", day_name)
+        prompt = prompt.replace("{{MEAL_NAME}}", meal_name)
+        prompt = prompt.replace("{{FOOD_LIST_WITH_GRAMS}}", food_list_str)
+        prompt = prompt.replace("{{MEDICAL_CONSTRAINTS_SUMMARY}}", mnt_summary)
+        prompt = prompt.replace("{{AYURVEDA_CONSTRAINTS_SUMMARY}}", ayurveda_summary)
+        prompt = prompt.replace("{{OIL_LIMIT_ML}}", str(int(oil_limit)))
+        
+        return prompt
+    
+    def _format_food_list(self, allocated_foods: List[Dict[str, Any]]) -> str:
+        """
+        Format allocated foods as prompt lines ("- Food name: quantity (category)").
+        
+        Args:
+            allocated_foods: List of allocated food dictionaries
+            
+        Returns:
+            Food list string
+        """
         # Format food list with quantities (matching template format)
         food_list_lines = []
         for food in allocated_foods:
             display_name = food.get("display_name", food.get("food_id", "Unknown"))
-            quantity_g = food.get("quantity_g", 0)
+            quantity_str = self._format_quantity(food.get("quantity_g", 0))
             exchange_category = food.get("exchange_category", "")
             
-            # Format quantity appropriately (matching template expectations)
-            if quantity_g >= 1000:
-                quantity_str = f"{quantity_g / 1000:.1f} kg"
-            elif quantity_g >= 1:
-                quantity_str = f"{quantity_g:.1f} g"
-            else:
-                # For very small quantities (< 1g), assume ml for liquids
-                quantity_str = f"{quantity_g * 1000:.0f} ml"
-            
             # Format matches template: "- Food name: quantity (category)"
             food_list_lines.append(f"- {display_name}: {quantity_str} ({exchange_category})")
         
-        food_list_str = "\n".join(food_list_lines)
+        return "\n".join(food_list_lines)
+    
+    def _format_quantity(self, quantity_g: float) -> str:
+        """
+        Format a quantity for prompts and recipes (matching template expectations).
         
-        # Inject values into template
-        prompt = self.prompt_template
-        prompt = prompt.replace("{{DAY}}", day_name)
-        prompt = prompt.replace("{{MEAL_NAME}}", meal_name)
-        prompt = prompt.replace("{{FOOD_LIST_WITH_GRAMS}}", food_list_str)
-        prompt = prompt.replace("{{MEDICAL_CONSTRAINTS_SUMMARY}}", mnt_summary)
-        prompt = prompt.replace("{{AYURVEDA_CONSTRAINTS_SUMMARY}}", ayurveda_summary)
-        prompt = prompt.replace("{{OIL_LIMIT_ML}}", str(int(oil_limit)))
+        Args:
+            quantity_g: Quantity in grams
+            
+        Returns:
+            Quantity string (kg, g, or ml for very small quantities)
+        """
+        if quantity_g >= 1000:
+            return f"{quantity_g / 1000:.1f} kg"
+        if quantity_g >= 1:
+            return f"{quantity_g:.1f} g"
+        # For very small quantities (< 1g), assume ml for liquids
+        return f"{quantity_g * 1000:.0f} ml"
+    
+    def _build_batch_system_prompt(self, constraints: Dict[str, Any]) -> str:
+        """
+        Build the batched-mode system prompt (instructions and constraints).
+        
+        Depends only on the plan's constraints, so it is identical for every
+        call of a plan.
         
+        Args:
+            constraints: Output of build_recipe_constraints()
+            
+        Returns:
+            System prompt string
+        """
+        prompt = self.batch_prompt_template
+        prompt = prompt.replace("{{MEDICAL_CONSTRAINTS_SUMMARY}}", constraints["mnt_summary"])
+        prompt = prompt.replace("{{AYURVEDA_CONSTRAINTS_SUMMARY}}", constraints["ayurveda_summary"])
+        prompt = prompt.replace("{{OIL_LIMIT_ML}}", str(int(constraints["oil_limit"])))
         return prompt
     
+    def _build_batch_prompt(
+        self,
+        day_name: str,
+        meals: Dict[str, Dict[str, Any]],
+        previous_errors: Optional[Dict[str, List[str]]] = None
+    ) -> str:
+        """
+        Build the batched-mode user prompt (the day's meals and foods).
+        
+        Args:
+            day_name: Day name (e.g., "Monday")
+            meals: Meals to generate, by meal name (with allocated_foods)
+            previous_errors: Validation errors per meal from the previous attempt
+            
+        Returns:
+            User prompt string
+        """
+        lines = [f"Day: {day_name}", "", "Foods & Quantities per meal (exact, validated):"]
+        for meal_name, meal_data in meals.items():
+            lines.append(f"[{meal_name}]")
+            lines.append(self._format_food_list(meal_data.get("allocated_foods", [])))
+        
+        if previous_errors:
+            lines.extend(["", "CRITICAL: PREVIOUS ATTEMPT FAILED VALIDATION"])
+            for meal_name, errors in previous_errors.items():
+                lines.append(f"[{meal_name}]")
+                lines.extend(f"- {error}" for error in errors)
+            lines.append("You MUST fix these errors. DO NOT repeat the same mistakes.")
+        
+        lines.extend(["", f"GENERATE RECIPES FOR: {', '.join(meals)}"])
+        return "\n".join(lines)
+    
     def _build_stricter_prompt(
         self,
         day_name: str,
@@ -478,17 +988,17 @@ class RecipeGenerationEngine:
         """
         try:
             # Send entire prompt as user message (template includes system role instructions)
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self.gateway.complete(
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
+                model=self.model,
                 temperature=self.temperature,
-                max_tokens=2000,
+                max_tokens=MAX_TOKENS_PER_MEAL,
                 response_format={"type": "json_object"}  # Force JSON output
             )
             
-            content = response.choices[0].message.content
+            content = response.content
             
             if not content:
                 raise ValueError("LLM returned empty response")
@@ -503,8 +1013,7 @@ class RecipeGenerationEngine:
                 raise ValueError(f"LLM returned invalid JSON: {str(e)}")
             
             # Validate required fields exist
-            required_fields = ["dish_name", "ingredients", "cooking_steps", "approx_cooking_time_minutes", "serving_instructions"]
-            missing_fields = [field for field in required_fields if field not in recipe]
+            missing_fields = [field for field in RECIPE_REQUIRED_FIELDS if field not in recipe]
             if missing_fields:
                 raise ValueError(f"LLM response missing required fields: {missing_fields}")
             
@@ -517,6 +1026,62 @@ class RecipeGenerationEngine:
             logger.error(f"LLM call failed: {str(e)}")
             raise RuntimeError(f"LLM API call failed: {str(e)}") from e
     
+    def _call_llm_batch(self, system_prompt: str, prompt: str, num_meals: int) -> Dict[str, Any]:
+        """
+        Call LLM for several meals in one structured JSON response.
+        
+        The system message is marked cacheable (cache_control), for providers
+        that need an explicit breakpoint; others cache the prefix implicitly.
+        
+        Args:
+            system_prompt: Output of _build_batch_system_prompt()
+            prompt: Output of _build_batch_prompt()
+            num_meals: Number of meals requested (scales the token limit)
+            
+        Returns:
+            Recipes by meal name (unchecked; see _check_batch_recipe)
+        """
+        try:
+            response = self.gateway.complete(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": [
+                            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                        ]
+                    },
+                    {"role": "user", "content": prompt}
+                ],
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=MAX_TOKENS_PER_MEAL * num_meals,
+                response_format={"type": "json_object"}  # Force JSON output
+            )
+            
+            content = response.content
+            
+            if not content:
+                raise ValueError("LLM returned empty response")
+            
+            try:
+                parsed = json.loads(content)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse LLM JSON response: {str(e)}")
+                logger.error(f"Response content (first 500 chars): {content[:500]}")
+                raise ValueError(f"LLM returned invalid JSON: {str(e)}")
+            
+            recipes = parsed.get("recipes") if isinstance(parsed, dict) else None
+            if not isinstance(recipes, dict):
+                raise ValueError("LLM response missing recipes object")
+            
+            return recipes
+        
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"LLM call failed: {str(e)}")
+            raise RuntimeError(f"LLM API call failed: {str(e)}") from e
+    
     def _validate_recipe(
         self,
         recipe: Dict[str, Any],
@@ -742,6 +1307,45 @@ class RecipeGenerationEngine:
         
         return "\n".join(summary_parts)
     
+    def _extract_conditions(self, mnt_context: Optional[MNTContext]) -> List[str]:
+        """
+        Extract the client's conditions from the MNT rules applied.
+        
+        Args:
+            mnt_context: MNT context
+            
+        Returns:
+            Sorted diagnosis IDs the applied MNT rules are for
+        """
+        if not mnt_context:
+            return []
+        
+        conditions = set()
+        for rule_id in mnt_context.rule_ids_used or []:
+            rule = get_mnt_rule(rule_id) or {}
+            conditions.update(rule.get("applies_to_diagnoses", []))
+        return sorted(conditions)
+    
+    def _extract_avoid_foods(self, ayurveda_context: Optional[AyurvedaContext]) -> List[str]:
+        """
+        Extract the Ayurveda avoid list.
+        
+        Args:
+            ayurveda_context: Ayurveda context
+            
+        Returns:
+            Food IDs with preference_type "avoid"
+        """
+        if not ayurveda_context:
+            return []
+        
+        food_preferences = (ayurveda_context.vikriti_notes or {}).get("food_preferences", [])
+        return [
+            p.get("food_id")
+            for p in food_preferences
+            if p.get("preference_type") == "avoid" and p.get("food_id")
+        ]
+    
     def _extract_oil_limit(self, mnt_context: Optional[MNTContext]) -> float:
         """
         Extract oil limit from MNT context.
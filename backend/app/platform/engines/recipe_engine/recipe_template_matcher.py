@@ -0,0 +1,327 @@
+"""
+Recipe Template Matcher.
+
+Matches allocated meals to recipes of the recipe KB
+(knowledge_base/foods/recipe_kb_complete.json) so common dishes get a
+deterministic recipe without an LLM call.
+
+Recipes are indexed by ingredient food_id (including the ingredient's
+substitution_options). A meal matches a recipe when:
+- every allocated food that maps to an ingredient has that ingredient's
+  exchange category
+- at most max_missing required (non-optional) ingredients are not allocated
+- at most max_extra allocated foods are not ingredients (served alongside)
+- the meal name fits the recipe's meal types
+- the recipe is not contraindicated for, or tagged unsafe for, any of the
+  client's conditions, and does not use foods the client must avoid
+
+Best match: fewest missing + extra foods, then most matched foods, then
+recipe_id. Quantities always come from the allocation; the KB recipe is
+scaled to them (see RecipeMatch.portion_scale).
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+
+from app.config import settings
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+
+logger = logging.getLogger(__name__)
+
+# Recipe medical_tags (mnt_compatibility) -> conditions they are about.
+# A tag set to false makes the recipe unsafe for those conditions.
+MEDICAL_TAG_CONDITIONS: Dict[str, Tuple[str, ...]] = {
+    "diabetic_safe": ("type_1_diabetes", "type_2_diabetes", "prediabetes", "gestational_diabetes"),
+    "cardiac_safe": ("cardiovascular_disease", "dyslipidemia"),
+    "renal_safe_stage_1_2": ("ckd",),
+    "hypertension_safe": ("hypertension",),
+    "gerd_safe": ("gerd",),
+    "gastritis_safe": ("gastritis",),
+    "ibs_safe": ("ibs",),
+    "ibd_safe_remission": ("ibd",),
+    "anemia_safe": ("anemia", "iron_deficiency_anemia"),
+    "osteoporosis_safe": ("osteoporosis",),
+}
+
+# MNT food exclusion tags -> words in cooking steps that add such foods
+EXCLUSION_STEP_WORDS: Dict[str, Tuple[str, ...]] = {
+    "spicy_foods": ("chili", "chilli", "chilies", "chillies", "black pepper", "garam masala"),
+    "fried_foods": ("deep fry", "deep-fry", "fry until crisp"),
+}
+
+
+def _get_kb_path() -> Path:
+    """Get path to the recipe KB JSON file."""
+    return Path(__file__).parent.parent.parent / "knowledge_base" / "foods" / "recipe_kb_complete.json"
+
+
+@dataclass
+class RecipeMatch:
+    """A KB recipe matched to an allocated meal."""
+    recipe: Dict[str, Any]
+    matched: Dict[str, Dict[str, Any]]  # Allocated food_id -> recipe ingredient
+    missing: List[str]  # Recipe ingredient food_ids not allocated
+    extra: List[str]  # Allocated food_ids not in the recipe
+    portion_scale: float  # Allocated / recipe quantity of the matched ingredients
+
+    @property
+    def recipe_id(self) -> str:
+        return self.recipe["recipe_id"]
+
+
+@dataclass
+class _IndexedRecipe:
+    recipe: Dict[str, Any]
+    ingredients: Dict[str, Dict[str, Any]]  # food_id (incl. substitutes) -> ingredient
+    required: Set[str]  # food_ids of non-optional ingredients
+    meal_types: Tuple[str, ...]
+    categories: Dict[str, Set[str]] = field(default_factory=dict)  # food_id -> exchange categories
+    contraindications: Set[str] = field(default_factory=set)
+    unsafe_for: Set[str] = field(default_factory=set)  # Conditions from medical_tags set to false
+    exclusion_tags: Set[str] = field(default_factory=set)
+    steps_text: str = ""  # Lower-cased cooking steps
+
+
+class RecipeTemplateMatcher:
+    """
+    Index of KB recipes by ingredient food_id.
+
+    Read-only after construction apart from the hit counters, so one
+    instance is shared by all recipe engines of the process.
+    """
+
+    def __init__(
+        self,
+        recipes: List[Dict[str, Any]],
+        max_missing: Optional[int] = None,
+        max_extra: Optional[int] = None
+    ):
+        """
+        Build the index.
+
+        Args:
+            recipes: Recipe KB entries (only status "active" are indexed)
+            max_missing: Required recipe ingredients a meal may lack
+                (defaults to settings.RECIPE_TEMPLATE_MAX_MISSING)
+            max_extra: Allocated foods a meal may have beyond the recipe
+                (defaults to settings.RECIPE_TEMPLATE_MAX_EXTRA)
+        """
+        self.max_missing = settings.RECIPE_TEMPLATE_MAX_MISSING if max_missing is None else max_missing
+        self.max_extra = settings.RECIPE_TEMPLATE_MAX_EXTRA if max_extra is None else max_extra
+
+        self._recipes: List[_IndexedRecipe] = []
+        self._by_food: Dict[str, List[int]] = {}
+        for recipe in recipes:
+            if recipe.get("status", "active") != "active" or not recipe.get("ingredients"):
+                continue
+            indexed = _IndexedRecipe(
+                recipe=recipe,
+                ingredients={},
+                required=set(),
+                meal_types=tuple((recipe.get("basic_info") or {}).get("meal_type") or ()),
+            )
+            compatibility = recipe.get("mnt_compatibility") or {}
+            indexed.contraindications = set(compatibility.get("contraindications") or ())
+            for tag, safe in (compatibility.get("medical_tags") or {}).items():
+                if safe is False:
+                    indexed.unsafe_for.update(MEDICAL_TAG_CONDITIONS.get(tag, ()))
+            indexed.exclusion_tags = set(compatibility.get("food_exclusion_tags") or ())
+            indexed.steps_text = " ".join((recipe.get("cooking_instructions") or {}).get("steps") or ()).lower()
+            for ingredient in recipe["ingredients"]:
+                food_id = ingredient["food_id"]
+                if not ingredient.get("optional", False):
+                    indexed.required.add(food_id)
+                categories = set(ingredient.get("exchange_equivalents") or {})
+                substitutes = [option["food_id"] for option in ingredient.get("substitution_options") or []]
+                for candidate in [food_id] + substitutes:
+                    indexed.ingredients.setdefault(candidate, ingredient)
+                    indexed.categories.setdefault(candidate, categories)
+            position = len(self._recipes)
+            self._recipes.append(indexed)
+            for food_id in indexed.ingredients:
+                self._by_food.setdefault(food_id, []).append(position)
+
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+
+    @classmethod
+    def from_kb(cls, path: Optional[Path] = None, **kwargs) -> "RecipeTemplateMatcher":
+        """
+        Build a matcher from the recipe KB file.
+
+        Args:
+            path: Recipe KB JSON file (defaults to recipe_kb_complete.json)
+            **kwargs: Tolerances (see __init__)
+
+        Returns:
+            RecipeTemplateMatcher
+        """
+        kb_path = path or _get_kb_path()
+        recipes = read_kb_json(kb_path)
+        return cls(recipes, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    def match(
+        self,
+        meal_name: str,
+        allocated_foods: List[Dict[str, Any]],
+        conditions: Iterable[str] = (),
+        food_exclusions: Iterable[str] = (),
+        avoid_foods: Iterable[str] = ()
+    ) -> Optional[RecipeMatch]:
+        """
+        Find the best KB recipe for an allocated meal.
+
+        Args:
+            meal_name: Meal name (e.g., "lunch", "evening_snack")
+            allocated_foods: Allocated foods with food_id, exchange_category, quantity_g
+            conditions: Client's diagnosis IDs (e.g., "gerd", "ckd")
+            food_exclusions: MNT food exclusion tags (e.g., "spicy_foods")
+            avoid_foods: Food IDs the client must avoid (e.g., Ayurveda avoid list)
+
+        Returns:
+            RecipeMatch, or None if no recipe is within tolerance
+        """
+        conditions = set(conditions)
+        food_exclusions = set(food_exclusions)
+        avoid_foods = set(avoid_foods)
+        best: Optional[RecipeMatch] = None
+        best_key = None
+        food_ids = [food.get("food_id") for food in allocated_foods]
+        candidates = sorted({position for food_id in food_ids for position in self._by_food.get(food_id, ())})
+        for position in candidates:
+            indexed = self._recipes[position]
+            if indexed.meal_types and not any(meal_type in meal_name for meal_type in indexed.meal_types):
+                continue
+            if self._conflicts(indexed, conditions, food_exclusions, avoid_foods):
+                continue
+            result = self._match_recipe(indexed, allocated_foods)
+            if result is None:
+                continue
+            key = (len(result.missing) + len(result.extra), -len(result.matched), result.recipe_id)
+            if best_key is None or key < best_key:
+                best, best_key = result, key
+
+        with self._lock:
+            self._lookups += 1
+            if best is not None:
+                self._hits += 1
+        return best
+
+    @staticmethod
+    def _conflicts(
+        indexed: _IndexedRecipe,
+        conditions: Set[str],
+        food_exclusions: Set[str],
+        avoid_foods: Set[str]
+    ) -> bool:
+        """Return True if the recipe must not be served to the client."""
+        for condition in conditions:
+            if condition in indexed.unsafe_for:
+                return True
+            # "ckd" (stage unknown) conflicts with "ckd_stage_4_5"
+            if any(c == condition or c.startswith(condition + "_") for c in indexed.contraindications):
+                return True
+        if food_exclusions & indexed.exclusion_tags:
+            return True
+        for tag in food_exclusions:
+            if any(word in indexed.steps_text for word in EXCLUSION_STEP_WORDS.get(tag, ())):
+                return True
+        for food_id in avoid_foods:
+            if food_id in indexed.ingredients or food_id.replace("_", " ") in indexed.steps_text:
+                return True
+        return False
+
+    def _match_recipe(
+        self,
+        indexed: _IndexedRecipe,
+        allocated_foods: List[Dict[str, Any]]
+    ) -> Optional[RecipeMatch]:
+        matched: Dict[str, Dict[str, Any]] = {}
+        used_ingredients: Set[str] = set()
+        extra: List[str] = []
+        allocated_g = 0.0
+        recipe_g = 0.0
+        for food in allocated_foods:
+            food_id = food.get("food_id")
+            ingredient = indexed.ingredients.get(food_id)
+            # Each ingredient is used once (a food and its substitute are not both matched)
+            if ingredient is None or ingredient["food_id"] in used_ingredients or food_id in matched:
+                extra.append(food_id)
+                continue
+            category = food.get("exchange_category")
+            if category and indexed.categories[food_id] and category not in indexed.categories[food_id]:
+                return None
+            matched[food_id] = ingredient
+            used_ingredients.add(ingredient["food_id"])
+            allocated_g += float(food.get("quantity_g") or 0.0)
+            recipe_g += float(ingredient.get("quantity_g") or 0.0)
+
+        missing = sorted(indexed.required - used_ingredients)
+        if not matched or len(missing) > self.max_missing or len(extra) > self.max_extra:
+            return None
+        return RecipeMatch(
+            recipe=indexed.recipe,
+            matched=matched,
+            missing=missing,
+            extra=extra,
+            portion_scale=round(allocated_g / recipe_g, 2) if recipe_g else 1.0,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookups, hits and hit ratio since start (or the last reset)."""
+        with self._lock:
+            lookups, hits = self._lookups, self._hits
+        return {
+            "recipes": len(self._recipes),
+            "lookups": lookups,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        """Reset the hit counters."""
+        with self._lock:
+            self._lookups = 0
+            self._hits = 0
+
+
+_matcher: Optional[RecipeTemplateMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_recipe_template_matcher() -> RecipeTemplateMatcher:
+    """
+    Get the shared matcher over recipe_kb_complete.json (loaded on first use).
+
+    Returns:
+        Shared RecipeTemplateMatcher
+    """
+    global _matcher
+    matcher = _matcher
+    if matcher is not None:
+        return matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = RecipeTemplateMatcher.from_kb()
+            logger.info(f"Loaded recipe template matcher: {len(_matcher)} KB recipes")
+        return _matcher
+
+
+def replace_recipe_template_matcher(matcher: Optional[RecipeTemplateMatcher]):
+    """
+    Install a prebuilt shared matcher (e.g. after a KB reload).
+
+    Engines built with the previous matcher keep it.
+
+    Args:
+        matcher: New shared matcher (None: load again on next use)
+    """
+    global _matcher
+    with _matcher_lock:
+        _matcher = matcher
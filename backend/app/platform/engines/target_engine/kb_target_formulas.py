@@ -7,6 +7,9 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from app.platform.knowledge_base.kb_artifact import read_kb_json
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
 
 # Cache for loaded KB data
 _BMR_FORMULAS_CACHE: Optional[List[Dict[str, Any]]] = None
@@ -15,6 +18,7 @@ _MACRO_DISTRIBUTION_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
 _MICRO_TARGETS_CACHE: Optional[Dict[str, Dict[str, Any]]] = None
 
 
+@versioned_kb_loader
 def _load_bmr_formulas() -> List[Dict[str, Any]]:
     """
     Load BMR/TDEE formulas from JSON knowledge base file.
@@ -30,8 +34,7 @@ def _load_bmr_formulas() -> List[Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "target_formulas" / "bmr_tdee_formulas_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         # Filter only active formulas
         active_formulas = [f for f in kb_data if f.get("status") == "active"]
@@ -47,6 +50,7 @@ def _load_bmr_formulas() -> List[Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in BMR/TDEE formulas KB: {e}")
 
 
+@versioned_kb_loader
 def _load_activity_multipliers() -> Dict[str, Dict[str, Any]]:
     """
     Load activity multipliers from JSON knowledge base file.
@@ -62,8 +66,7 @@ def _load_activity_multipliers() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "target_formulas" / "activity_multipliers_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         # Convert list to dictionary keyed by multiplier_id
         # Filter only active multipliers
@@ -86,6 +89,7 @@ def _load_activity_multipliers() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in activity multipliers KB: {e}")
 
 
+@versioned_kb_loader
 def _load_macro_distribution() -> Dict[str, Dict[str, Any]]:
     """
     Load macro distribution rules from JSON knowledge base file.
@@ -101,8 +105,7 @@ def _load_macro_distribution() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "target_formulas" / "macro_distribution_rules_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         # Convert list to dictionary keyed by rule_id
         # Filter only active rules
@@ -125,6 +128,7 @@ def _load_macro_distribution() -> Dict[str, Dict[str, Any]]:
         raise ValueError(f"Invalid JSON in macro distribution rules KB: {e}")
 
 
+@versioned_kb_loader
 def _load_micro_targets() -> Dict[str, Dict[str, Any]]:
     """
     Load micro target standards from JSON knowledge base file.
@@ -140,8 +144,7 @@ def _load_micro_targets() -> Dict[str, Dict[str, Any]]:
     kb_path = Path(__file__).parent.parent.parent / "knowledge_base" / "target_formulas" / "micro_target_standards_kb.json"
     
     try:
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            kb_data = json.load(f)
+        kb_data = read_kb_json(kb_path)
         
         # Convert list to dictionary keyed by nutrient_id
         # Filter only active nutrients
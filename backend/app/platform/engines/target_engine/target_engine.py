@@ -2,10 +2,13 @@
 Target Engine.
 Calculates nutrition targets using IBW-based formulas (Case Study Method).
 """
+import itertools
 import logging
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence, Union
 from uuid import uuid4
 
+import numpy as np
+
 from app.platform.core.context import MNTContext, TargetContext
 from app.platform.engines.target_engine.kb_target_formulas import (
     get_micro_target,
@@ -53,10 +56,10 @@ class TargetEngine:
         gender_lower = (gender or "").lower()
         if gender_lower in ["female", "f"]:
             ibw = height_cm - 105.0
-            logger.info(f"[IBW] Female: {height_cm} - 105 = {ibw:.2f} kg")
+            logger.debug("[IBW] Female: %s - 105 = %.2f kg", height_cm, ibw)
         else:
             ibw = height_cm - 100.0
-            logger.info(f"[IBW] Male/Default: {height_cm} - 100 = {ibw:.2f} kg")
+            logger.debug("[IBW] Male/Default: %s - 100 = %.2f kg", height_cm, ibw)
         
         return ibw
 
@@ -89,7 +92,7 @@ class TargetEngine:
         else:
             factor = 22.5  # Default to sedentary
         
-        logger.info(f"[Activity Factor] {activity_level} → {factor} kcal/kg IBW")
+        logger.debug("[Activity Factor] %s → %s kcal/kg IBW", activity_level, factor)
         return factor
 
     def calculate_calories(
@@ -114,7 +117,7 @@ class TargetEngine:
             - calculation_source: "ibw_based"
             - ibw: Ideal body weight in kg
         """
-        logger.info("[Calorie Calculation] Starting IBW-based calculation")
+        logger.debug("[Calorie Calculation] Starting IBW-based calculation")
         
         height_cm = client_profile.get("height_cm")
         gender = client_profile.get("gender")
@@ -134,8 +137,10 @@ class TargetEngine:
         
         # Calculate energy: IBW × Activity Factor
         base_calories = ibw * activity_factor
-        logger.info(f"[Calorie Calculation] Energy = IBW × Activity Factor")
-        logger.info(f"  Energy = {ibw:.2f} kg × {activity_factor} kcal/kg IBW = {base_calories:.2f} kcal")
+        logger.debug(
+            "[Calorie Calculation] Energy = IBW × Activity Factor = %.2f kg × %s kcal/kg IBW = %.2f kcal",
+            ibw, activity_factor, base_calories
+        )
         
         calories_target = base_calories
         
@@ -148,12 +153,12 @@ class TargetEngine:
         max_cal = calorie_constraints.get("max")
         if min_cal is not None:
             calories_target = max(calories_target, min_cal)
-            logger.info(f"[Calorie Calculation] Applied min constraint: {min_cal} kcal")
+            logger.debug("[Calorie Calculation] Applied min constraint: %s kcal", min_cal)
         if max_cal is not None:
             calories_target = min(calories_target, max_cal)
-            logger.info(f"[Calorie Calculation] Applied max constraint: {max_cal} kcal")
+            logger.debug("[Calorie Calculation] Applied max constraint: %s kcal", max_cal)
         
-        logger.info(f"[Calorie Calculation] Final calories target: {calories_target:.2f} kcal")
+        logger.debug("[Calorie Calculation] Final calories target: %.2f kcal", calories_target)
         
         return {
             "calories_target": float(calories_target),
@@ -189,7 +194,7 @@ class TargetEngine:
         Returns:
             Dictionary containing macros with grams and percentages
         """
-        logger.info(f"[Macro Calculation] Starting macro calculation for {calories_target:.2f} kcal")
+        logger.debug("[Macro Calculation] Starting macro calculation for %s kcal", calories_target)
         
         if calories_target is None or calories_target <= 0:
             logger.warning("[Macro Calculation] Invalid calories target")
@@ -214,36 +219,28 @@ class TargetEngine:
         
         # Formula 1: Protein (g) = 0.8 × IBW
         protein_g = 0.8 * ibw
-        logger.info(f"[Macro Calculation] Protein (g) = 0.8 × {ibw:.2f} = {protein_g:.2f} g")
         
         # Formula 2: Protein kcal = Protein (g) × 4
         protein_kcal = protein_g * 4.0
-        logger.info(f"[Macro Calculation] Protein kcal = {protein_g:.2f} × 4 = {protein_kcal:.2f} kcal")
         
         # Formula 3: Protein % = (Protein kcal ÷ Energy) × 100
         protein_pct = (protein_kcal / calories_target) * 100.0
-        logger.info(f"[Macro Calculation] Protein % = ({protein_kcal:.2f} ÷ {calories_target:.2f}) × 100 = {protein_pct:.2f}%")
         
         # Formula 4: Fat kcal = 22.5% × Energy
         fat_pct = 22.5
         fat_kcal = calories_target * fat_pct / 100.0
-        logger.info(f"[Macro Calculation] Fat kcal = {fat_pct}% × {calories_target:.2f} = {fat_kcal:.2f} kcal")
         
         # Formula 5: Fat (g) = Fat kcal ÷ 9
         fat_g = fat_kcal / 9.0
-        logger.info(f"[Macro Calculation] Fat (g) = {fat_kcal:.2f} ÷ 9 = {fat_g:.2f} g")
         
         # Formula 6: Carb % = 100% - Protein% - Fat%
         carb_pct = 100.0 - protein_pct - fat_pct
-        logger.info(f"[Macro Calculation] Carb % = 100 - {protein_pct:.2f} - {fat_pct} = {carb_pct:.2f}%")
         
         # Formula 7: Carb kcal = Carb% × Energy
         carb_kcal = carb_pct * calories_target / 100.0
-        logger.info(f"[Macro Calculation] Carb kcal = {carb_pct:.2f}% × {calories_target:.2f} = {carb_kcal:.2f} kcal")
         
         # Formula 8: Carb (g) = Carb kcal ÷ 4
         carb_g = carb_kcal / 4.0
-        logger.info(f"[Macro Calculation] Carb (g) = {carb_kcal:.2f} ÷ 4 = {carb_g:.2f} g")
         
         # Apply MNT macro constraints if present
         macro_constraints = mnt_context.macro_constraints or {}
@@ -282,7 +279,10 @@ class TargetEngine:
                 carb_kcal = carb_pct * calories_target / 100.0
                 carb_g = carb_kcal / 4.0
         
-        logger.info(f"[Macro Calculation] Final - Protein: {protein_g:.2f}g ({protein_pct:.2f}%), Fat: {fat_g:.2f}g ({fat_pct:.2f}%), Carbs: {carb_g:.2f}g ({carb_pct:.2f}%)")
+        logger.debug(
+            "[Macro Calculation] Final - Protein: %.2fg (%.2f%%), Fat: %.2fg (%.2f%%), Carbs: %.2fg (%.2f%%)",
+            protein_g, protein_pct, fat_g, fat_pct, carb_g, carb_pct
+        )
         
         return {
             "carbohydrates": {
@@ -362,7 +362,7 @@ class TargetEngine:
         Returns:
             TargetContext with calculated calories, macros, and key micros
         """
-        logger.info(f"[Target Calculation] Starting target calculation")
+        logger.debug("[Target Calculation] Starting target calculation")
         
         # Calculate calories
         calories_info = self.calculate_calories(client_profile, mnt_context, activity_level)
@@ -375,7 +375,7 @@ class TargetEngine:
         # Calculate key micros
         key_micros = self.calculate_key_micros(client_profile, mnt_context)
         
-        logger.info(f"[Target Calculation] Complete - Calories: {calories_target:.2f} kcal, Source: {calculation_source}")
+        logger.debug("[Target Calculation] Complete - Calories: %s kcal, Source: %s", calories_target, calculation_source)
         
         return TargetContext(
             assessment_id=mnt_context.assessment_id,
@@ -384,3 +384,177 @@ class TargetEngine:
             key_micros=key_micros,
             calculation_source=calculation_source
         )
+
+    # --- Batch / what-if -------------------------------------------------------
+    def calculate_targets_batch(
+        self,
+        client_profiles: Sequence[Dict[str, Any]],
+        mnt_contexts: Union[MNTContext, Sequence[MNTContext]],
+        activity_levels: Optional[Sequence[Optional[str]]] = None
+    ) -> List[TargetContext]:
+        """
+        Calculate targets for many profiles in one vectorized pass.
+        
+        Applies the same formulas, in the same order, as calculate_targets,
+        so each result equals the scalar result for that profile.
+        
+        Args:
+            client_profiles: Client profiles (see calculate_targets)
+            mnt_contexts: One MNT context shared by all profiles, or one per profile
+            activity_levels: Activity level per profile (defaults to each profile's "activity_level")
+            
+        Returns:
+            TargetContext per profile, in input order
+        """
+        n = len(client_profiles)
+        if isinstance(mnt_contexts, MNTContext):
+            mnt_contexts = [mnt_contexts] * n
+        if len(mnt_contexts) != n:
+            raise ValueError("mnt_contexts must be a single MNTContext or one per client profile")
+        if activity_levels is None:
+            activity_levels = [profile.get("activity_level") for profile in client_profiles]
+        if n == 0:
+            return []
+        
+        def column(values) -> np.ndarray:
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        
+        def constraint(mnt_context: MNTContext, key: str, bound: str) -> Optional[float]:
+            return ((mnt_context.macro_constraints or {}).get(key) or {}).get(bound)
+        
+        # Energy: IBW × Activity Factor, clamped by MNT calorie limits
+        heights = column(profile.get("height_cm") for profile in client_profiles)
+        female = np.array([(profile.get("gender") or "").lower() in ["female", "f"] for profile in client_profiles])
+        ibw = np.where(female, heights - 105.0, heights - 100.0)
+        
+        factors = {}
+        for level in activity_levels:
+            if level not in factors:
+                factors[level] = self._get_activity_factor(level)
+        activity_factor = column(factors[level] for level in activity_levels)
+        
+        has_height = ~np.isnan(heights)
+        calories = ibw * activity_factor
+        calories = np.fmax(calories, column(constraint(m, "calories", "min") for m in mnt_contexts))
+        calories = np.fmin(calories, column(constraint(m, "calories", "max") for m in mnt_contexts))
+        
+        # Macros (comparisons with NaN are False, so absent MNT limits never apply)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            protein_g = 0.8 * ibw
+            protein_min_g = (calories * column(constraint(m, "protein_percent", "min") for m in mnt_contexts) / 100.0) / 4.0
+            protein_g = np.where(protein_min_g > protein_g, protein_min_g, protein_g)
+            protein_kcal = protein_g * 4.0
+            protein_pct = (protein_kcal / calories) * 100.0
+            
+            fat_pct = np.full(n, 22.5)
+            fat_max = column(constraint(m, "fat_percent", "max") for m in mnt_contexts)
+            fat_pct = np.where(fat_max < fat_pct, fat_max, fat_pct)
+            fat_kcal = calories * fat_pct / 100.0
+            fat_g = fat_kcal / 9.0
+            
+            carb_pct = 100.0 - protein_pct - fat_pct
+            carb_max = column(constraint(m, "carbohydrates_percent", "max") for m in mnt_contexts)
+            carb_pct = np.where(carb_max < carb_pct, carb_max, carb_pct)
+            carb_kcal = carb_pct * calories / 100.0
+            carb_g = carb_kcal / 4.0
+        
+        has_macros = has_height & (calories > 0) & (ibw > 0)
+        
+        # Micros depend only on gender, age and MNT micro constraints
+        micros_by_key: Dict[Any, Dict[str, Any]] = {}
+        results = []
+        for i, (profile, mnt_context) in enumerate(zip(client_profiles, mnt_contexts)):
+            micros_key = ((profile.get("gender") or "").lower(), profile.get("age"), id(mnt_context))
+            if micros_key not in micros_by_key:
+                micros_by_key[micros_key] = self.calculate_key_micros(profile, mnt_context)
+            
+            if has_macros[i]:
+                macros = {
+                    "carbohydrates": {"g": round(float(carb_g[i]), 2), "percent": round(float(carb_pct[i]), 2)},
+                    "proteins": {"g": round(float(protein_g[i]), 2), "percent": round(float(protein_pct[i]), 2)},
+                    "fats": {"g": round(float(fat_g[i]), 2), "percent": round(float(fat_pct[i]), 2)},
+                }
+            else:
+                macros = {
+                    "carbohydrates": {"g": 0, "percent": 0.0},
+                    "proteins": {"g": 0, "percent": 0.0},
+                    "fats": {"g": 0, "percent": 0.0},
+                }
+            
+            results.append(TargetContext(
+                assessment_id=mnt_context.assessment_id,
+                calories_target=float(calories[i]) if has_height[i] else None,
+                macros=macros,
+                key_micros={nutrient: dict(target) for nutrient, target in micros_by_key[micros_key].items()},
+                calculation_source="ibw_based" if has_height[i] else "error",
+            ))
+        
+        logger.debug("[Target Calculation] Batch complete - %d profiles", n)
+        return results
+
+    def sweep_targets(
+        self,
+        client_profile: Dict[str, Any],
+        mnt_context: MNTContext,
+        grid: Dict[str, Sequence[Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        What-if sweep: targets for every combination of profile overrides.
+        
+        Example grid: {"activity_level": ["sedentary", "moderately_active"],
+        "height_cm": [160, 165]} yields four scenarios. Any client_profile
+        field may be varied; the IBW formula reads height_cm, gender and
+        activity_level, and micros read gender and age.
+        
+        Args:
+            client_profile: Base client profile
+            mnt_context: MNT context
+            grid: Profile field -> values to try
+            
+        Returns:
+            List of {"scenario": overrides, "targets": TargetContext}, in grid order
+        """
+        return self.sweep_cohort_targets([client_profile], [mnt_context], grid)[0]
+
+    def sweep_cohort_targets(
+        self,
+        client_profiles: Sequence[Dict[str, Any]],
+        mnt_contexts: Sequence[MNTContext],
+        grid: Dict[str, Sequence[Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run the same what-if sweep for every client in a cohort.
+        
+        All profiles × scenarios are calculated in a single batch.
+        
+        Args:
+            client_profiles: Base client profiles
+            mnt_contexts: MNT context per profile
+            grid: Profile field -> values to try (see sweep_targets)
+            
+        Returns:
+            Per profile, the list of {"scenario", "targets"} results
+        """
+        if len(mnt_contexts) != len(client_profiles):
+            raise ValueError("mnt_contexts must have one MNT context per client profile")
+        
+        fields = list(grid.keys())
+        scenarios = [dict(zip(fields, values)) for values in itertools.product(*(grid[f] for f in fields))]
+        
+        profiles = []
+        contexts = []
+        for profile, mnt_context in zip(client_profiles, mnt_contexts):
+            for scenario in scenarios:
+                profiles.append({**profile, **scenario})
+                contexts.append(mnt_context)
+        
+        targets = self.calculate_targets_batch(profiles, contexts)
+        
+        per_client = len(scenarios)
+        return [
+            [
+                {"scenario": scenario, "targets": targets[c * per_client + k]}
+                for k, scenario in enumerate(scenarios)
+            ]
+            for c in range(len(client_profiles))
+        ]
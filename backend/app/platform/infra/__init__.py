@@ -4,7 +4,7 @@ Configuration, logging, and caching infrastructure.
 """
 
 from app.platform.infra.config import ConfigLoader, PlatformConfig
-from app.platform.infra.logging import DecisionLogger, PlatformLogger
+from app.platform.infra.logging import AsyncDecisionLogWriter, DecisionLogger, PlatformLogger
 from app.platform.infra.cache import CacheBackend, PlatformCache
 
 __all__ = [
@@ -12,6 +12,7 @@ __all__ = [
     "ConfigLoader",
     "PlatformConfig",
     # Logging
+    "AsyncDecisionLogWriter",
     "DecisionLogger",
     "PlatformLogger",
     # Cache
@@ -3,9 +3,25 @@ Platform Cache Module.
 Caching interfaces and implementations.
 """
 
-from .cache import CacheBackend, PlatformCache
+from .cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    TwoTierCacheBackend,
+    PlatformCache,
+    build_platform_cache,
+    get_platform_cache,
+)
+from .principal_cache import PrincipalCache, principal_cache
 
 __all__ = [
     "CacheBackend",
+    "MemoryCacheBackend",
+    "SQLiteCacheBackend",
+    "TwoTierCacheBackend",
     "PlatformCache",
+    "build_platform_cache",
+    "get_platform_cache",
+    "PrincipalCache",
+    "principal_cache",
 ]
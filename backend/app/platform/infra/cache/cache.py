@@ -1,197 +1,724 @@
 """
-Platform Cache Placeholders.
-Cache interface for session and rules caching.
+Platform Cache.
+Cache interface and backends for session, rules and engine caching.
+
+Backends:
+- MemoryCacheBackend: per-process, size-bounded LRU with per-key TTL
+- SQLiteCacheBackend: a file shared by the workers on a host (WAL, one
+  connection per call), with TTL and LRU eviction
+- TwoTierCacheBackend: read-through composition of a local and a shared
+  tier
+
+The interface follows Redis semantics (TTL in seconds, glob patterns in
+clear), so a Redis backend can replace the SQLite tier. Entries can carry
+tags; clear(tag=...) drops every entry with the tag.
+
+PlatformCache adds single-flight loading (get_or_set): concurrent misses for
+a key in one process run the loader once and share its result.
+
+Note: None is the miss value, so None results are not cached.
 """
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Callable, Dict, Iterable, List, Tuple
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 
 class CacheBackend(ABC):
     """
     Cache Backend Interface.
-    
+
     Responsibility:
     - Provide caching functionality for sessions and rules
     - Cache knowledge base data
     - Support cache invalidation
-    
+
     Rules:
     - No external service dependencies in interface
     - Implementation can use Redis or other backends
     """
-    
+
     @abstractmethod
     def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache.
-        
+
         Args:
             key: Cache key
-            
+
         Returns:
             Cached value or None if not found
         """
         pass
-    
+
     @abstractmethod
-    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None):
         """
         Set value in cache.
-        
+
         Args:
             key: Cache key
             value: Value to cache
             ttl: Optional time-to-live in seconds
+            tags: Optional tags for invalidation with clear(tag=...)
         """
         pass
-    
+
     @abstractmethod
     def delete(self, key: str):
         """
         Delete value from cache.
-        
+
         Args:
             key: Cache key
         """
         pass
-    
+
     @abstractmethod
     def exists(self, key: str) -> bool:
         """
         Check if key exists in cache.
-        
+
         Args:
             key: Cache key
-            
+
         Returns:
             True if key exists, False otherwise
         """
         pass
-    
+
     @abstractmethod
-    def clear(self, pattern: Optional[str] = None):
+    def clear(self, pattern: Optional[str] = None, tag: Optional[str] = None) -> int:
         """
         Clear cache entries.
-        
+
         Args:
-            pattern: Optional pattern to match keys
+            pattern: Optional glob pattern to match keys (e.g., "rule:*")
+            tag: Optional tag; only entries with this tag are cleared
+
+        Returns:
+            Number of cleared entries
         """
         pass
 
+    def get_with_tags(self, key: str) -> Tuple[Optional[Any], Tuple[str, ...]]:
+        """
+        Get value from cache with the tags it was set with.
+
+        Backends that store tags override this; the default returns no tags.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            (cached value or None if not found, tags)
+        """
+        return self.get(key), ()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Counters such as hits, misses and evictions
+        """
+        return {}
+
+
+def _ttl_deadline(ttl: Optional[float], now: float) -> Optional[float]:
+    return now + ttl if ttl is not None and ttl > 0 else None
+
+
+@dataclass
+class _MemoryEntry:
+    """Cached value with its expiry (monotonic time) and tags."""
+    value: Any
+    expires_at: Optional[float]
+    tags: Tuple[str, ...] = ()
+
+
+@dataclass
+class _Counters:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Thread-safe, size-bounded LRU cache with per-key TTL.
+
+    Values are stored by reference; callers must not mutate cached objects.
+    Expired entries are dropped when read or when they reach the LRU end.
+    """
+
+    def __init__(self, max_entries: int = 10000, default_ttl: Optional[float] = None):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum entries (least recently used evicted first)
+            default_ttl: TTL in seconds for set() without ttl (None = no expiry)
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_tags(key)[0]
+
+    def get_with_tags(self, key: str) -> Tuple[Optional[Any], Tuple[str, ...]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self._counters.expirations += 1
+                entry = None
+            if entry is None:
+                self._counters.misses += 1
+                return None, ()
+            self._entries.move_to_end(key)
+            self._counters.hits += 1
+            return entry.value, entry.tags
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None):
+        if value is None:
+            return
+        expires_at = _ttl_deadline(self.default_ttl if ttl is None else ttl, time.monotonic())
+        with self._lock:
+            self._entries[key] = _MemoryEntry(value, expires_at, tuple(tags or ()))
+            self._entries.move_to_end(key)
+            self._counters.sets += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry.expires_at is None or entry.expires_at > time.monotonic())
+
+    def clear(self, pattern: Optional[str] = None, tag: Optional[str] = None) -> int:
+        with self._lock:
+            if pattern is None and tag is None:
+                cleared = len(self._entries)
+                self._entries.clear()
+                return cleared
+            keys = [
+                key for key, entry in self._entries.items()
+                if (pattern is None or fnmatchcase(key, pattern)) and (tag is None or tag in entry.tags)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds until the key expires (None if missing or without expiry)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.expires_at is None:
+            return None
+        return max(0.0, entry.expires_at - time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._counters.as_dict()
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache in a SQLite file shared by the worker processes on a host.
+
+    Uses one connection per call with WAL journaling (as the pipeline result
+    store). Values are pickled; expiry uses wall-clock time so all processes
+    agree. Least recently used rows beyond max_entries are evicted on write.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, default_ttl: Optional[float] = None):
+        """
+        Initialize backend.
+
+        Args:
+            path: SQLite database file
+            max_entries: Least recently used rows beyond this are evicted
+            default_ttl: TTL in seconds for set() without ttl (None = no expiry)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "cache_key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+                "expires_at REAL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_last_used ON cache_entries (last_used_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                "tag TEXT NOT NULL, cache_key TEXT NOT NULL, PRIMARY KEY (tag, cache_key))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self._counters, counter, getattr(self._counters, counter) + amount)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._read(key, with_tags=False)[0]
+
+    def get_with_tags(self, key: str) -> Tuple[Optional[Any], Tuple[str, ...]]:
+        return self._read(key, with_tags=True)
+
+    def _read(self, key: str, with_tags: bool) -> Tuple[Optional[Any], Tuple[str, ...]]:
+        now = time.time()
+        tags: Tuple[str, ...] = ()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, expires_at FROM cache_entries WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._delete_keys(conn, [key])
+                self._count("expirations")
+                row = None
+            if row is None:
+                self._count("misses")
+                return None, ()
+            conn.execute("UPDATE cache_entries SET last_used_at = ? WHERE cache_key = ?", (now, key))
+            if with_tags:
+                tags = tuple(tag for (tag,) in conn.execute(
+                    "SELECT tag FROM cache_tags WHERE cache_key = ? ORDER BY tag", (key,)
+                ))
+        self._count("hits")
+        return pickle.loads(row[0]), tags
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None):
+        if value is None:
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        expires_at = _ttl_deadline(self.default_ttl if ttl is None else ttl, now)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache_key, payload, expires_at, last_used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(payload), expires_at, now),
+            )
+            conn.execute("DELETE FROM cache_tags WHERE cache_key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, cache_key) VALUES (?, ?)",
+                [(tag, key) for tag in tags or ()],
+            )
+            evicted = [row[0] for row in conn.execute(
+                "SELECT cache_key FROM cache_entries ORDER BY last_used_at DESC LIMIT -1 OFFSET ?",
+                (self.max_entries,),
+            )]
+            self._delete_keys(conn, evicted)
+        self._count("sets")
+        if evicted:
+            self._count("evictions", len(evicted))
+
+    @staticmethod
+    def _delete_keys(conn: sqlite3.Connection, keys: List[str]):
+        rows = [(key,) for key in keys]
+        conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", rows)
+        conn.executemany("DELETE FROM cache_tags WHERE cache_key = ?", rows)
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            self._delete_keys(conn, [key])
+
+    def exists(self, key: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM cache_entries WHERE cache_key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def clear(self, pattern: Optional[str] = None, tag: Optional[str] = None) -> int:
+        # SQLite GLOB has the same wildcards as Redis patterns (*, ?, [...])
+        query = "SELECT cache_key FROM cache_entries WHERE 1 = 1"
+        params: List[Any] = []
+        if pattern is not None:
+            query += " AND cache_key GLOB ?"
+            params.append(pattern)
+        if tag is not None:
+            query += " AND cache_key IN (SELECT cache_key FROM cache_tags WHERE tag = ?)"
+            params.append(tag)
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute(query, params)]
+            self._delete_keys(conn, keys)
+        return len(keys)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows (reads skip them anyway; this reclaims space)."""
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute(
+                "SELECT cache_key FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )]
+            self._delete_keys(conn, keys)
+        self._count("expirations", len(keys))
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._counters.as_dict()
+        stats["entries"] = len(self)
+        return stats
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class TwoTierCacheBackend(CacheBackend):
+    """
+    Read-through composition of a local (per-process) and a shared tier.
+
+    Reads try the local tier, then the shared tier (copying hits and their
+    tags into the local tier for at most local_ttl seconds). Writes and
+    invalidations go to both tiers. Invalidation reaches only this process's
+    local tier; other workers converge within local_ttl.
+    """
+
+    def __init__(self, local: CacheBackend, shared: CacheBackend, local_ttl: Optional[float] = 60.0):
+        """
+        Initialize composition.
+
+        Args:
+            local: Per-process tier (e.g., MemoryCacheBackend)
+            shared: Cross-process tier (e.g., SQLiteCacheBackend)
+            local_ttl: Maximum seconds a value stays in the local tier
+        """
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+    def _local_ttl(self, ttl: Optional[float]) -> Optional[float]:
+        if self.local_ttl is None:
+            return ttl
+        return self.local_ttl if ttl is None or ttl <= 0 else min(ttl, self.local_ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_tags(key)[0]
+
+    def get_with_tags(self, key: str) -> Tuple[Optional[Any], Tuple[str, ...]]:
+        value, tags = self.local.get_with_tags(key)
+        if value is not None:
+            return value, tags
+        try:
+            value, tags = self.shared.get_with_tags(key)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            return None, ()
+        if value is not None:
+            # With its tags, so clear(tag=...) also drops the local copy
+            self.local.set(key, value, ttl=self._local_ttl(None), tags=tags)
+        return value, tags
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None):
+        tags = tuple(tags or ())
+        self.local.set(key, value, ttl=self._local_ttl(ttl), tags=tags)
+        try:
+            self.shared.set(key, value, ttl=ttl, tags=tags)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {e}")
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def exists(self, key: str) -> bool:
+        return self.local.exists(key) or self.shared.exists(key)
+
+    def clear(self, pattern: Optional[str] = None, tag: Optional[str] = None) -> int:
+        self.local.clear(pattern, tag)
+        return self.shared.clear(pattern, tag)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"local": self.local.stats(), "shared": self.shared.stats()}
+
+
+@dataclass
+class _Flight:
+    """An in-progress load that other callers wait for."""
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
 
 class PlatformCache:
     """
     Platform Cache.
-    
+
     Provides caching functionality for the platform.
-    Supports session caching and rules caching.
+    Supports session caching, rules caching and single-flight loading.
     """
-    
+
     def __init__(self, cache_backend: Optional[CacheBackend] = None):
         """
         Initialize platform cache.
-        
+
         Args:
             cache_backend: Optional cache backend implementation
+                (defaults to an in-process MemoryCacheBackend)
         """
-        self.cache_backend = cache_backend
-        self._local_cache: Dict[str, Any] = {}
-    
+        self.cache_backend = cache_backend or MemoryCacheBackend()
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._coalesced = 0
+
     def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache.
-        
+
         Args:
             key: Cache key
-            
+
         Returns:
             Cached value or None
         """
-        if self.cache_backend:
-            return self.cache_backend.get(key)
-        return self._local_cache.get(key)
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        return self.cache_backend.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None):
         """
         Set value in cache.
-        
+
         Args:
             key: Cache key
             value: Value to cache
             ttl: Optional time-to-live
+            tags: Optional invalidation tags
         """
-        if self.cache_backend:
-            self.cache_backend.set(key, value, ttl)
-        else:
-            self._local_cache[key] = value
-    
+        self.cache_backend.set(key, value, ttl, tags)
+
     def delete(self, key: str):
         """
         Delete value from cache.
-        
+
         Args:
             key: Cache key
         """
-        if self.cache_backend:
-            self.cache_backend.delete(key)
-        else:
-            self._local_cache.pop(key, None)
-    
+        self.cache_backend.delete(key)
+
     def exists(self, key: str) -> bool:
         """
         Check if key exists in cache.
-        
+
         Args:
             key: Cache key
-            
+
         Returns:
             True if exists, False otherwise
         """
-        if self.cache_backend:
-            return self.cache_backend.exists(key)
-        return key in self._local_cache
-    
+        return self.cache_backend.exists(key)
+
+    def clear(self, pattern: Optional[str] = None, tag: Optional[str] = None) -> int:
+        """
+        Clear cache entries.
+
+        Args:
+            pattern: Optional glob pattern (e.g., "rule:*")
+            tag: Optional tag
+
+        Returns:
+            Number of cleared entries
+        """
+        return self.cache_backend.clear(pattern, tag)
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        Get value from cache, loading and caching it on a miss.
+
+        Concurrent misses for the same key in this process run loader once;
+        the other callers wait and get its result (or its exception).
+
+        Args:
+            key: Cache key
+            loader: Computes the value
+            ttl: Optional time-to-live
+            tags: Optional invalidation tags
+
+        Returns:
+            Cached or loaded value
+        """
+        value = self.cache_backend.get(key)
+        if value is not None:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # Another leader may have finished between our miss and taking the flight
+            value = self.cache_backend.get(key)
+            if value is None:
+                value = loader()
+                self.cache_backend.set(key, value, ttl, tags)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Backend counters plus "coalesced" (callers served by another's load)
+        """
+        stats = dict(self.cache_backend.stats())
+        stats["coalesced"] = self._coalesced
+        return stats
+
     def cache_session(self, session_id: str, session_data: Any):
         """
         Cache session data.
-        
+
         Args:
             session_id: Session identifier
             session_data: Session data to cache
         """
         self.set(f"session:{session_id}", session_data, ttl=3600)
-    
+
     def get_session(self, session_id: str) -> Optional[Any]:
         """
         Get cached session data.
-        
+
         Args:
             session_id: Session identifier
-            
+
         Returns:
             Cached session data or None
         """
         return self.get(f"session:{session_id}")
-    
+
     def cache_rule(self, rule_id: str, rule_data: Any):
         """
         Cache knowledge base rule.
-        
+
         Args:
             rule_id: Rule identifier
             rule_data: Rule data to cache
         """
         self.set(f"rule:{rule_id}", rule_data, ttl=86400)  # 24 hours
-    
+
     def get_rule(self, rule_id: str) -> Optional[Any]:
         """
         Get cached rule data.
-        
+
         Args:
             rule_id: Rule identifier
-            
+
         Returns:
             Cached rule data or None
         """
         return self.get(f"rule:{rule_id}")
 
+
+def build_platform_cache() -> PlatformCache:
+    """
+    Build a PlatformCache from settings.
+
+    Memory tier only, or memory + shared SQLite tier when
+    PLATFORM_CACHE_SQLITE_PATH is set (falls back to memory only if the
+    file cannot be opened).
+
+    Returns:
+        PlatformCache
+    """
+    local = MemoryCacheBackend(
+        max_entries=settings.PLATFORM_CACHE_MAX_ENTRIES,
+        default_ttl=settings.PLATFORM_CACHE_DEFAULT_TTL_SECONDS or None,
+    )
+    if not settings.PLATFORM_CACHE_SQLITE_PATH:
+        return PlatformCache(local)
+    try:
+        shared = SQLiteCacheBackend(
+            settings.PLATFORM_CACHE_SQLITE_PATH,
+            max_entries=settings.PLATFORM_CACHE_SQLITE_MAX_ENTRIES,
+            default_ttl=settings.PLATFORM_CACHE_DEFAULT_TTL_SECONDS or None,
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Shared platform cache disabled ({settings.PLATFORM_CACHE_SQLITE_PATH}): {e}")
+        return PlatformCache(local)
+    return PlatformCache(TwoTierCacheBackend(local, shared, local_ttl=settings.PLATFORM_CACHE_LOCAL_TTL_SECONDS))
+
+
+_platform_cache: Optional[PlatformCache] = None
+_platform_cache_lock = threading.Lock()
+
+
+def get_platform_cache() -> PlatformCache:
+    """
+    Get the shared platform cache (built from settings on first use).
+
+    Returns:
+        Shared PlatformCache
+    """
+    global _platform_cache
+    cache = _platform_cache
+    if cache is not None:
+        return cache
+    with _platform_cache_lock:
+        if _platform_cache is None:
+            _platform_cache = build_platform_cache()
+        return _platform_cache
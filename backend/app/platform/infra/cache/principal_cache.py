@@ -0,0 +1,179 @@
+"""
+Authenticated Principal Cache.
+Per-process cache of authenticated user snapshots, keyed by access token.
+
+Lets get_current_user skip the user SELECT for repeated requests with the
+same token. Entries live no longer than the token itself and a configured
+maximum TTL. They are dropped explicitly when a user is updated or deleted
+(deactivation, password change) through PlatformUserRepository.
+
+Note: the cache is per worker process. Invalidation reaches only the
+process that made the change; other workers converge within the max TTL.
+"""
+from typing import Optional, Any, Dict, Set
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+
+from app.config import settings
+
+
+@dataclass
+class _PrincipalEntry:
+    """Cached principal snapshot."""
+    username: str
+    snapshot: Dict[str, Any]
+    expires_at: float
+
+
+class PrincipalCache:
+    """
+    LRU cache of user snapshots keyed by token id.
+
+    Snapshots are plain dicts of column values; callers build a fresh
+    object from them per request, so cached state is never shared.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_ttl_seconds: float = 120.0):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum cached tokens (least recently used evicted first)
+            max_ttl_seconds: Upper bound on entry lifetime (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[str, _PrincipalEntry]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        # Bumped on invalidation so loads that started earlier aren't cached
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def token_key(payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Cache key for a decoded token.
+
+        Args:
+            payload: Decoded JWT payload
+
+        Returns:
+            "jti:<id>" if the token has a jti, else "sub:<sub>:<exp>" (None without sub)
+        """
+        if payload.get("jti"):
+            return f"jti:{payload['jti']}"
+        if payload.get("sub"):
+            return f"sub:{payload['sub']}:{payload.get('exp')}"
+        return None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached snapshot.
+
+        Args:
+            key: Token key (see token_key)
+
+        Returns:
+            Snapshot dict or None if missing/expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.snapshot
+
+    def generation(self, username: str) -> int:
+        """
+        Current invalidation generation of a user.
+
+        Read before loading the user from the database and pass it to set(),
+        so a load that raced with an invalidation is not cached.
+        """
+        with self._lock:
+            return self._generations.get(username, 0)
+
+    def set(
+        self,
+        key: str,
+        username: str,
+        snapshot: Dict[str, Any],
+        token_expires_at: Optional[float] = None,
+        generation: Optional[int] = None
+    ):
+        """
+        Cache a snapshot.
+
+        Args:
+            key: Token key (see token_key)
+            username: Username (for invalidation)
+            snapshot: User column values
+            token_expires_at: Token "exp" (epoch seconds); entry never outlives it
+            generation: Value of generation() read before the snapshot was loaded
+        """
+        if self.max_ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.max_ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, float(token_expires_at))
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(username, 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _PrincipalEntry(username, snapshot, expires_at)
+            self._keys_by_user.setdefault(username, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str):
+        """
+        Drop all cached tokens of a user.
+
+        Args:
+            username: Username
+        """
+        with self._lock:
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for key in list(self._keys_by_user.get(username, ())):
+                self._remove(key)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        """Remove entry (caller holds lock)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.username)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.username]
+
+
+# Process-wide instance used by auth and PlatformUserRepository
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    max_ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -4,8 +4,16 @@ Decision-level logging and audit trails.
 """
 
 from .logger import DecisionLogger, PlatformLogger
+from .decision_log_writer import (
+    AsyncDecisionLogWriter,
+    get_decision_log_writer,
+    close_decision_log_writer,
+)
 
 __all__ = [
     "DecisionLogger",
     "PlatformLogger",
+    "AsyncDecisionLogWriter",
+    "get_decision_log_writer",
+    "close_decision_log_writer",
 ]
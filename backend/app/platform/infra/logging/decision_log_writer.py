@@ -0,0 +1,371 @@
+"""
+Async Decision Log Writer.
+Batched DecisionLogger backed by platform_decision_logs.
+
+Callers only build a row and put it on a bounded in-memory queue. A
+background thread drains the queue and bulk-inserts the rows in one
+statement per batch: every DECISION_LOG_BATCH_SIZE rows, or when the oldest
+queued row has waited DECISION_LOG_FLUSH_INTERVAL_MS.
+
+Backpressure: when the queue is full, a caller waits at most
+DECISION_LOG_BLOCK_MS for space. Rows that still do not fit, and batches the
+database rejects, are appended to DECISION_LOG_SPILL_PATH as JSON lines (or
+dropped and counted if no spill file is configured). replay_spill() inserts
+spilled rows later.
+
+The thread starts on first use in each process (so a writer created before
+a fork works in the workers). close() flushes the queue; the shared writer
+is closed on application shutdown and at interpreter exit.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.config import settings
+from app.platform.infra.logging.logger import DecisionLogger
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between overflow warnings
+OVERFLOW_WARNING_INTERVAL = 60.0
+
+_STOP = object()
+
+
+def _to_uuid(value: Any) -> Optional[UUID]:
+    if value is None or isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+def _notes(notes: Optional[str], **details: Any) -> Optional[str]:
+    """Notes text plus "key: <json>" lines for the non-empty details."""
+    lines = [notes] if notes else []
+    lines.extend(f"{key}: {_json(value)}" for key, value in details.items() if value not in (None, {}, []))
+    return "\n".join(lines) or None
+
+
+class AsyncDecisionLogWriter(DecisionLogger):
+    """
+    DecisionLogger that queues rows and bulk-inserts them from a background thread.
+
+    Thread-safe; one instance is shared per process (get_decision_log_writer).
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        block_ms: Optional[int] = None,
+        spill_path: Optional[str] = None
+    ):
+        """
+        Initialize writer (the thread starts on the first logged row).
+
+        Args:
+            session_factory: Returns a new database session (defaults to SessionLocal)
+            batch_size: Rows per insert (defaults to settings.DECISION_LOG_BATCH_SIZE)
+            flush_interval_ms: Maximum queueing delay of a row
+                (defaults to settings.DECISION_LOG_FLUSH_INTERVAL_MS)
+            max_queue_size: Queue bound (defaults to settings.DECISION_LOG_QUEUE_SIZE)
+            block_ms: Wait for queue space before overflow (defaults to settings.DECISION_LOG_BLOCK_MS)
+            spill_path: JSON lines file for overflow (defaults to settings.DECISION_LOG_SPILL_PATH;
+                empty drops overflow)
+        """
+        self._session_factory = session_factory
+        self.batch_size = max(1, batch_size or settings.DECISION_LOG_BATCH_SIZE)
+        interval_ms = settings.DECISION_LOG_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        self.flush_interval = interval_ms / 1000.0
+        block = settings.DECISION_LOG_BLOCK_MS if block_ms is None else block_ms
+        self.block_timeout = block / 1000.0
+        path = settings.DECISION_LOG_SPILL_PATH if spill_path is None else spill_path
+        self.spill_path = Path(path) if path else None
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size or settings.DECISION_LOG_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+        self._last_overflow_warning = 0.0
+        self._counts = {"enqueued": 0, "written": 0, "spilled": 0, "dropped": 0, "failed_batches": 0}
+
+    # DecisionLogger
+
+    def log_decision(
+        self,
+        entity_type: str,
+        entity_id: str,
+        rule_ids_used: List[str],
+        notes: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ):
+        """Queue a decision row (see DecisionLogger.log_decision)."""
+        entity_uuid = _to_uuid(entity_id)
+        self._enqueue({
+            "entity_type": entity_type,
+            "entity_id": entity_uuid,
+            "rule_ids_used": list(rule_ids_used or []),
+            # entity_id column is a UUID; other identifiers are kept in the notes
+            "notes": _notes(notes, entity_ref=entity_id if entity_uuid is None else None, context=context),
+        })
+
+    def log_rule_application(
+        self,
+        rule_id: str,
+        context: Dict[str, Any],
+        result: Any
+    ):
+        """Queue a rule application row; entity from context "entity_type"/"entity_id" if present."""
+        context = context or {}
+        self.log_decision(
+            entity_type=context.get("entity_type", "rule_application"),
+            entity_id=context.get("entity_id"),
+            rule_ids_used=[rule_id],
+            notes=_notes(None, context=context, result=result),
+        )
+
+    def log_constraint_source(
+        self,
+        constraint_type: str,
+        constraint_value: Any,
+        source: str,
+        rule_ids: List[str]
+    ):
+        """Queue a constraint source row."""
+        self.log_decision(
+            entity_type="constraint",
+            entity_id=None,
+            rule_ids_used=rule_ids,
+            notes=f"{constraint_type} = {_json(constraint_value)} from {source}",
+        )
+
+    # Queue
+
+    def _enqueue(self, row: Dict[str, Any]):
+        row["created_at"] = datetime.utcnow()
+        if not self._closed:
+            self._ensure_thread()
+            try:
+                if self.block_timeout > 0:
+                    self._queue.put(row, timeout=self.block_timeout)
+                else:
+                    self._queue.put_nowait(row)
+                with self._lock:
+                    self._counts["enqueued"] += 1
+                return
+            except queue.Full:
+                pass
+        self._overflow([row], "queue full" if not self._closed else "writer closed")
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != pid or self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="decision-log-writer", daemon=True)
+                self._pid = pid
+                self._thread.start()
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        # Imported here: the repository imports the ORM models and database engine
+        from app.platform.data.repositories.platform_decision_log_repository import PlatformDecisionLogRepository
+
+        try:
+            if self._session_factory is None:
+                from app.database import SessionLocal
+                self._session_factory = SessionLocal
+            db = self._session_factory()
+            try:
+                PlatformDecisionLogRepository(db).bulk_create(rows)
+            finally:
+                db.close()
+            with self._lock:
+                self._counts["written"] += len(rows)
+        except Exception as e:
+            with self._lock:
+                self._counts["failed_batches"] += 1
+            self._overflow(rows, f"insert failed: {e}")
+
+    def _overflow(self, rows: List[Dict[str, Any]], reason: str):
+        """Spill rows to the spill file, or drop them if there is none."""
+        outcome = "dropped"
+        if self.spill_path is not None:
+            try:
+                lines = "".join(
+                    _json({**row, "entity_id": str(row["entity_id"]) if row["entity_id"] else None,
+                           "created_at": row["created_at"].isoformat()}) + "\n"
+                    for row in rows
+                )
+                with self._lock:
+                    self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.spill_path, "a", encoding="utf-8") as f:
+                        f.write(lines)
+                outcome = "spilled"
+            except OSError as e:
+                reason = f"{reason}; spill failed: {e}"
+
+        now = time.monotonic()
+        with self._lock:
+            self._counts[outcome] += len(rows)
+            warn = now - self._last_overflow_warning >= OVERFLOW_WARNING_INTERVAL
+            if warn:
+                self._last_overflow_warning = now
+            counts = dict(self._counts)
+        if warn:
+            logger.warning(
+                f"Decision log rows {outcome} ({reason}); "
+                f"spilled={counts['spilled']}, dropped={counts['dropped']} so far"
+            )
+
+    # Control
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Write all rows queued so far.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if the rows were written (or overflowed) within the timeout
+        """
+        if self._thread is None or self._pid != os.getpid() or self._closed:
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """
+        Flush the queue and stop the thread; later rows overflow.
+
+        Args:
+            timeout: Seconds to wait for the final flush
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning(f"Decision log writer: queue still full at shutdown, {self._queue.qsize()} rows lost")
+            return
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"Decision log writer: final flush did not finish within {timeout}s")
+
+    def replay_spill(self) -> int:
+        """
+        Insert rows from the spill file (failed rows are spilled again).
+
+        Returns:
+            Number of rows read from the spill file
+        """
+        if self.spill_path is None or not self.spill_path.exists():
+            return 0
+        replay_path = self.spill_path.with_name(f"{self.spill_path.name}.{os.getpid()}.replay")
+        with self._lock:
+            os.replace(self.spill_path, replay_path)
+
+        rows = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                row["entity_id"] = _to_uuid(row.get("entity_id"))
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+        replay_path.unlink()
+        logger.info(f"Decision log writer: replayed {len(rows)} spilled rows")
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """Row counters since start plus the current queue length."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["queued"] = self._queue.qsize()
+        return counts
+
+
+_writer: Optional[AsyncDecisionLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_decision_log_writer() -> AsyncDecisionLogWriter:
+    """
+    Get the shared decision log writer (created on first use, closed at exit).
+
+    Returns:
+        Shared AsyncDecisionLogWriter
+    """
+    global _writer
+    writer = _writer
+    if writer is not None:
+        return writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AsyncDecisionLogWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def close_decision_log_writer(timeout: float = 5.0):
+    """Flush and stop the shared writer, if it was created."""
+    if _writer is not None:
+        _writer.close(timeout)
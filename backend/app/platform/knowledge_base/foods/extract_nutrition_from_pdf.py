@@ -26,7 +26,6 @@ Usage:
 import sys
 import json
 import argparse
-import time
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from decimal import Decimal, InvalidOperation
@@ -38,6 +37,12 @@ if str(backend_dir) not in sys.path:
 
 from app.config import settings
 from app.utils.logger import logger
+from app.platform.ai.gateway import get_llm_gateway
+from app.platform.knowledge_base.foods.llm_extraction_runner import (
+    CheckpointJournal,
+    ExtractionRunner,
+    RateLimiter,
+)
 
 
 # Pydantic models for structured output
@@ -94,7 +99,8 @@ class PDFNutritionExtractor:
     ]
     
     def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None, 
-                 fallback_models: Optional[List[str]] = None):
+                 fallback_models: Optional[List[str]] = None,
+                 max_workers: int = 4, requests_per_minute: float = 30.0):
         """
         Initialize extractor.
         
@@ -102,25 +108,18 @@ class PDFNutritionExtractor:
             api_key: OpenRouter API key (defaults to settings)
             model: Model to use (defaults to FOOD_ENRICHMENT_MODEL)
             fallback_models: List of fallback models to try on rate limit errors
+            max_workers: Concurrent page batches sent to the LLM
+            requests_per_minute: Request budget shared across models
         """
-        try:
-            from openai import OpenAI
-        except ImportError:
-            raise ImportError("openai package not installed. Run: pip install openai")
-        
         self.api_key = api_key or settings.OPENROUTER_API_KEY
         self.model = model or settings.FOOD_ENRICHMENT_MODEL
         self.fallback_models = fallback_models or self.FALLBACK_MODELS
         self.current_model = self.model
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute=requests_per_minute)
         
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://openrouter.ai/api/v1",
-            default_headers={
-                "HTTP-Referer": "https://drassistent.com",
-                "X-Title": "DrAssistent Nutrition Extraction"
-            }
-        )
+        # Shared pooled client (connection reuse, retries, usage accounting)
+        self.gateway = get_llm_gateway(self.api_key)
         
         logger.info(f"Initialized extractor with model: {self.current_model}")
         logger.info(f"Fallback models available: {', '.join(self.fallback_models)}")
@@ -133,15 +132,22 @@ class PDFNutritionExtractor:
         """
         Extract nutrition data from PDF.
         
+        Page batches are sent to the LLM concurrently (up to max_workers at a
+        time, paced by the shared rate limiter). Each finished batch is appended
+        to the progress journal, so an interrupted run resumes where it stopped.
+        
         Args:
             pdf_path: Path to PDF file
             data_type: "vitamins" or "minerals"
             pages_per_batch: Number of pages to process per LLM call
             start_page: Starting page number (1-indexed)
             end_page: Ending page number (None = all pages)
+            debug: Save batch text to debug_file
+            debug_file: Debug output path
+            progress_file: Checkpoint journal path (JSONL, one line per finished batch)
         
         Returns:
-            List of extracted nutrition data dictionaries
+            List of extracted nutrition data dictionaries (in page order)
         """
         # Extract text from PDF pages
         pdf_text = self._extract_pdf_text_pages(pdf_path, start_page, end_page)
@@ -153,23 +159,19 @@ class PDFNutritionExtractor:
         total_pages = len(pdf_text)
         logger.info(f"Extracting {data_type} from {total_pages} pages...")
         
-        # Load existing progress if progress file exists
-        all_extracted = []
+        # Load existing progress from journal (keys are "pages:<first>-<last>")
+        journal = CheckpointJournal(progress_file)
+        extracted_by_page: Dict[int, List[Dict[str, Any]]] = {}
         processed_pages = set()
-        if progress_file and Path(progress_file).exists():
-            try:
-                with open(progress_file, 'r', encoding='utf-8') as f:
-                    progress_data = json.load(f)
-                    all_extracted = progress_data.get('extracted', [])
-                    processed_pages = set(progress_data.get('processed_pages', []))
-                    logger.info(f"Loaded {len(all_extracted)} existing records from progress file")
-                    logger.info(f"Resuming from page {max(processed_pages) + 1 if processed_pages else start_page}")
-            except Exception as e:
-                logger.warning(f"Could not load progress file: {e}. Starting fresh.")
-                all_extracted = []
-                processed_pages = set()
-        
-        # Process in batches
+        for key, records in journal.results().items():
+            first, last = (int(p) for p in key.split(":", 1)[1].split("-"))
+            extracted_by_page[first] = records or []
+            processed_pages.update(range(first, last + 1))
+        if processed_pages:
+            logger.info(f"Loaded {sum(len(r) for r in extracted_by_page.values())} existing records from progress journal")
+        
+        # Build page batches
+        batches = []
         for batch_start in range(0, total_pages, pages_per_batch):
             batch_end = min(batch_start + pages_per_batch, total_pages)
             current_page_start = start_page + batch_start
@@ -183,8 +185,6 @@ class PDFNutritionExtractor:
             
             batch_pages = pdf_text[batch_start:batch_end]
             
-            logger.info(f"Processing pages {current_page_start} to {current_page_end}...")
-            
             # Combine batch text
             batch_text = "\n\n---PAGE BREAK---\n\n".join([
                 f"=== PAGE {current_page_start + i} ===\n{p}"
@@ -195,77 +195,45 @@ class PDFNutritionExtractor:
             if debug and debug_file:
                 with open(debug_file, 'a', encoding='utf-8') as f:
                     f.write(f"\n{'='*80}\n")
-                    f.write(f"BATCH: Pages {start_page + batch_start} to {start_page + batch_end - 1}\n")
+                    f.write(f"BATCH: Pages {current_page_start} to {current_page_end}\n")
                     f.write(f"{'='*80}\n")
                     f.write(batch_text[:5000])  # First 5000 chars
                     f.write("\n... (truncated)\n")
             
-            # Extract using LLM with retry logic and exponential backoff
-            max_retries = 3
-            extracted = []
-            for attempt in range(max_retries):
-                try:
-                    extracted = self._extract_with_llm(batch_text, data_type)
-                    if extracted:
-                        break
-                    elif attempt < max_retries - 1:
-                        wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                        logger.warning(f"  No data extracted, retrying in {wait_time}s (attempt {attempt + 2}/{max_retries})...")
-                        time.sleep(wait_time)
-                except Exception as e:
-                    error_str = str(e)
-                    # Check if rate limit error
-                    if "429" in error_str or "rate" in error_str.lower():
-                        # Exponential backoff for rate limits
-                        wait_time = min(60, 5 * (2 ** attempt))  # 5s, 10s, 20s, max 60s
-                        logger.warning(f"  Rate limit error, waiting {wait_time}s before retry (attempt {attempt + 1}/{max_retries})...")
-                        if attempt < max_retries - 1:
-                            time.sleep(wait_time)
-                            continue  # Retry with backoff
-                        else:
-                            logger.error(f"  Rate limit persists after {max_retries} attempts. Consider:")
-                            logger.error(f"    1. Wait a few minutes and resume with --start-page {start_page + batch_start}")
-                            logger.error(f"    2. Use a different model with --model option")
-                            raise
-                    else:
-                        logger.error(f"  Error in extraction attempt {attempt + 1}: {e}")
-                        if attempt < max_retries - 1:
-                            wait_time = 2 ** attempt
-                            time.sleep(wait_time)
-                        else:
-                            extracted = []
-                            break
-            
+            batches.append((f"pages:{current_page_start}-{current_page_end}", batch_text))
+        
+        runner = ExtractionRunner(
+            models=[self.current_model] + self.fallback_models,
+            max_workers=self.max_workers,
+            rate_limiter=self.rate_limiter,
+            journal=journal,
+        )
+        
+        # Empty results are retried (possibly on another model), as before
+        for key, extracted, error in runner.run(
+            batches,
+            worker=lambda batch_text, model: self._extract_with_llm(batch_text, data_type, model=model),
+            accept=bool
+        ):
+            page_range = key.split(":", 1)[1]
             if extracted:
-                all_extracted.extend(extracted)
+                extracted_by_page[int(page_range.split("-")[0])] = extracted
                 records_with_values = sum(1 for r in extracted if any(v is not None for k, v in r.items() if k not in ['food_code', 'food_name']))
-                logger.info(f"  Extracted {len(extracted)} records ({records_with_values} with values) from this batch")
-                
-                # Save progress after each successful batch
-                if progress_file:
-                    current_pages = list(range(current_page_start, current_page_end + 1))
-                    processed_pages.update(current_pages)
-                    try:
-                        progress_data = {
-                            'extracted': all_extracted,
-                            'processed_pages': sorted(list(processed_pages)),
-                            'last_page': start_page + batch_end - 1,
-                            'total_extracted': len(all_extracted)
-                        }
-                        progress_path = Path(progress_file)
-                        progress_path.parent.mkdir(parents=True, exist_ok=True)
-                        with open(progress_path, 'w', encoding='utf-8') as f:
-                            json.dump(progress_data, f, indent=2, ensure_ascii=False)
-                        logger.debug(f"  Progress saved: {len(all_extracted)} records, pages up to {current_page_end}")
-                    except Exception as e:
-                        logger.warning(f"  Could not save progress: {e}")
+                logger.info(f"  Pages {page_range}: extracted {len(extracted)} records ({records_with_values} with values)")
             else:
-                logger.warning(f"  No records extracted from pages {current_page_start} to {current_page_end}")
-            
-            # Rate limiting
-            if batch_end < total_pages:
-                time.sleep(1.5)  # Slightly longer delay between batches
-        
+                logger.warning(f"  No records extracted from pages {page_range}: {error}")
+        
+        if runner.stats["failed"]:
+            logger.warning(
+                f"{runner.stats['failed']} batches failed; re-run to retry them "
+                f"(completed batches are kept in the progress journal)"
+            )
+        
+        all_extracted = [
+            record
+            for first_page in sorted(extracted_by_page)
+            for record in extracted_by_page[first_page]
+        ]
         logger.info(f"Total extracted: {len(all_extracted)} records")
         return all_extracted
     
@@ -358,8 +326,17 @@ class PDFNutritionExtractor:
         
         return "\n".join(text_parts)
     
-    def _extract_with_llm(self, text: str, data_type: str) -> List[Dict[str, Any]]:
-        """Extract structured data using LLM."""
+    def _extract_with_llm(self, text: str, data_type: str,
+                          model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Extract structured data using LLM.
+        
+        Args:
+            text: Page batch text
+            data_type: "vitamins" or "minerals"
+            model: Call only this model (used by the extraction runner, which
+                handles fallback itself); None tries current + fallback models
+        """
         
         # Build prompt
         if data_type == "minerals":
@@ -463,64 +440,32 @@ EXTRACT ALL visible food entries with their {data_type} values. Return ONLY a va
 Return ONLY the JSON array, nothing else.
 """
         
-        # Try with current model, fallback to alternatives on rate limit
-        models_to_try = [self.current_model] + self.fallback_models
-        last_error = None
-        response = None
-        
-        for model_attempt in models_to_try:
-            try:
-                # Use lower temperature for more consistent extraction
-                # Increase max_tokens to handle more records per batch
-                response = self.client.chat.completions.create(
-                    model=model_attempt,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """You are a precise data extraction assistant specializing in nutrition tables. 
+        # One model from the extraction runner (it owns retries); otherwise the
+        # gateway walks current + fallback models with its retry policy
+        response = self.gateway.complete(
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are a precise data extraction assistant specializing in nutrition tables. 
 Your task is to extract ALL food entries with their vitamin/mineral values from IFCT table data.
 CRITICAL: Extract actual numeric values from the table - do NOT return all nulls.
 Return only valid JSON arrays with complete data."""
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.0,  # Zero temperature for maximum consistency
-                    max_tokens=12000  # Increased for more records
-                )
-                
-                # Success - update current model if we switched
-                if model_attempt != self.current_model:
-                    logger.info(f"Successfully using fallback model: {model_attempt}")
-                    self.current_model = model_attempt
-                
-                break  # Success, exit loop
-                
-            except Exception as e:
-                error_str = str(e)
-                last_error = e
-                
-                # Check if it's a rate limit error
-                if "429" in error_str or "rate" in error_str.lower() or "rate limit" in error_str.lower():
-                    logger.warning(f"Rate limit error with {model_attempt}")
-                    if model_attempt != models_to_try[-1]:  # Not the last model
-                        next_model_idx = models_to_try.index(model_attempt) + 1
-                        logger.info(f"Trying fallback model: {models_to_try[next_model_idx]}")
-                        time.sleep(2)  # Brief pause before trying next model
-                        continue  # Try next model
-                    else:
-                        # All models rate limited - raise with retry info
-                        raise Exception(f"All models rate limited. Last error: {error_str}")
-                else:
-                    # Non-rate-limit error - raise immediately
-                    raise
+                },
+                {"role": "user", "content": prompt}
+            ],
+            model=model or self.current_model,
+            fallback_models=None if model else self.fallback_models,
+            max_retries=0 if model else None,
+            temperature=0.0,  # Zero temperature for maximum consistency
+            max_tokens=12000  # Increased for more records
+        )
         
-        if not response:
-            if last_error:
-                raise last_error
-            else:
-                raise Exception("Failed to get response from any model")
+        # Update current model if the gateway fell back
+        if not model and response.model != self.current_model and response.model in self.fallback_models:
+            logger.info(f"Successfully using fallback model: {response.model}")
+            self.current_model = response.model
         
-        content = response.choices[0].message.content
+        content = response.content
         
         # Parse JSON - handle various formats
         try:
@@ -806,6 +751,18 @@ def main():
         nargs='+',
         help='Fallback models to try on rate limit errors (default: claude-3.5-sonnet, llama-3.1-70b, etc.)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Page batches processed concurrently (default: 4)'
+    )
+    parser.add_argument(
+        '--requests-per-minute',
+        type=float,
+        default=30.0,
+        help='LLM request budget shared across models (default: 30)'
+    )
     
     args = parser.parse_args()
     
@@ -822,9 +779,10 @@ def main():
     logger.info(f"Type: {args.type}")
     logger.info(f"Output: {args.output}")
     logger.info(f"Pages per batch: {args.pages_per_batch}")
+    logger.info(f"Workers: {args.workers} ({args.requests_per_minute} requests/min)")
     
     # Set up progress file (auto-save/auto-resume)
-    progress_file = str(Path(args.output).with_suffix('.progress.json'))
+    progress_file = str(Path(args.output).with_suffix('.progress.jsonl'))
     logger.info(f"Progress file: {progress_file}")
     
     # Auto-resume: Check if output or progress file exists
@@ -836,7 +794,12 @@ def main():
     logger.info("=" * 70)
     
     # Initialize extractor
-    extractor = PDFNutritionExtractor(api_key=args.api_key, model=args.model)
+    extractor = PDFNutritionExtractor(
+        api_key=args.api_key,
+        model=args.model,
+        max_workers=args.workers,
+        requests_per_minute=args.requests_per_minute
+    )
     if args.fallback_models:
         extractor.fallback_models = args.fallback_models
     
@@ -7,17 +7,19 @@ Populates:
 3. kb_food_master.common_serving_size_g (grams for common serving)
 
 Uses batch processing (5-10 foods per API call) for cost efficiency.
+Batches run concurrently through the shared extraction runner; raw LLM results
+are journaled so an interrupted run resumes without repeating API calls.
 
 Usage:
     python -m app.platform.knowledge_base.foods.import_missing_values_llm
     python -m app.platform.knowledge_base.foods.import_missing_values_llm --dry-run
     python -m app.platform.knowledge_base.foods.import_missing_values_llm --batch-size 10 --model qwen/qwen-2.5-7b-instruct
     python -m app.platform.knowledge_base.foods.import_missing_values_llm --resume-from 50
+    python -m app.platform.knowledge_base.foods.import_missing_values_llm --workers 8 --requests-per-minute 120
 """
 
 import sys
 import json
-import time
 import argparse
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -32,14 +34,16 @@ from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.platform.data.models.kb_food_master import KBFoodMaster
 from app.platform.data.models.kb_food_nutrition_base import KBFoodNutritionBase
+from app.platform.knowledge_base.foods.llm_extraction_runner import (
+    CheckpointJournal,
+    ExtractionFailed,
+    ExtractionRunner,
+    RateLimiter,
+)
+from app.platform.ai.gateway import get_llm_gateway
 from app.utils.logger import logger
 from app.config import settings
 
-try:
-    from openai import OpenAI
-except ImportError:
-    raise ImportError("openai package not installed. Run: pip install openai")
-
 
 class LLMFoodValueExtractor:
     """Extract missing food values using LLM with batch processing."""
@@ -51,7 +55,13 @@ class LLMFoodValueExtractor:
         "google/gemini-pro-1.5",
     ]
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        max_workers: int = 4,
+        requests_per_minute: float = 60.0
+    ):
         self.api_key = api_key or settings.OPENROUTER_API_KEY
         self.model = model or "anthropic/claude-3.5-sonnet"  # Better accuracy for GI values
         self.current_model = self.model
@@ -59,13 +69,14 @@ class LLMFoodValueExtractor:
         if not self.api_key or self.api_key == "sk-or-v1-placeholder-get-from-openrouter-ai":
             raise ValueError("OPENROUTER_API_KEY not configured. Set it in .env file or pass via --api-key")
         
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://openrouter.ai/api/v1",
-            default_headers={
-                "HTTP-Referer": "https://drassistent.com",
-                "X-Title": "DrAssistent Food Value Extraction"
-            }
+        # Shared pooled client; retries and model fallback stay with the runner
+        self.gateway = get_llm_gateway(self.api_key)
+        
+        # Shared by all batches: bounded concurrency + token-bucket pacing across models
+        self.runner = ExtractionRunner(
+            models=[self.model] + self.FALLBACK_MODELS,
+            max_workers=max_workers,
+            rate_limiter=RateLimiter(requests_per_minute=requests_per_minute),
         )
         
         logger.info(f"Initialized LLM extractor with model: {self.current_model}")
@@ -82,57 +93,47 @@ class LLMFoodValueExtractor:
         Args:
             foods: List of food dictionaries with food_id, display_name, category, macros
             batch_size: Number of foods per API call (not used here, batch is pre-split)
-            max_retries: Maximum retry attempts
+            max_retries: Not used; retries and model fallback are handled by the extraction runner
         
         Returns:
             List of result dictionaries with food_id, glycemic_index, common_serving_unit, common_serving_size_g
         """
-        models_to_try = [self.current_model] + self.FALLBACK_MODELS
+        try:
+            return self.runner.call_with_fallback(
+                lambda model: self.extract_batch_with_model(foods, model),
+                accept=bool
+            )
+        except ExtractionFailed as e:
+            logger.error(f"Failed to extract values for batch: {e}")
+            return [
+                {
+                    "food_id": food["food_id"],
+                    "glycemic_index": None,
+                    "common_serving_unit": None,
+                    "common_serving_size_g": None
+                }
+                for food in foods
+            ]
+    
+    def extract_batch_with_model(
+        self,
+        foods: List[Dict[str, Any]],
+        model: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Single extraction attempt with one model (extraction runner worker).
         
-        for attempt in range(max_retries):
-            for model_attempt in models_to_try:
-                try:
-                    result = self._call_llm_batch(foods, model_attempt)
-                    if result:
-                        self.current_model = model_attempt  # Update to working model
-                        return result
-                except Exception as e:
-                    error_str = str(e)
-                    if "429" in error_str or "rate" in error_str.lower():
-                        if model_attempt != models_to_try[-1]:
-                            logger.warning(f"Rate limit on {model_attempt}, trying next model...")
-                            time.sleep(2)
-                            continue
-                        else:
-                            wait_time = (2 ** attempt) * 5
-                            logger.warning(f"All models rate limited. Waiting {wait_time}s...")
-                            time.sleep(wait_time)
-                            continue
-                    else:
-                        logger.error(f"Error with {model_attempt}: {e}")
-                        if model_attempt == models_to_try[-1] and attempt == max_retries - 1:
-                            # Last attempt failed, return None results
-                            logger.error(f"Failed to extract values for batch after {max_retries} attempts")
-                            return [
-                                {
-                                    "food_id": food["food_id"],
-                                    "glycemic_index": None,
-                                    "common_serving_unit": None,
-                                    "common_serving_size_g": None
-                                }
-                                for food in foods
-                            ]
-        
-        # If all retries failed
-        return [
-            {
-                "food_id": food["food_id"],
-                "glycemic_index": None,
-                "common_serving_unit": None,
-                "common_serving_size_g": None
-            }
-            for food in foods
-        ]
+        Args:
+            foods: Batch of food dictionaries
+            model: Model to call
+        
+        Returns:
+            Parsed results (empty list if the model returned nothing usable)
+        """
+        result = self._call_llm_batch(foods, model)
+        if result:
+            self.current_model = model  # Update to working model
+        return result
     
     def _call_llm_batch(
         self,
@@ -144,8 +145,7 @@ class LLMFoodValueExtractor:
         
         # Try with tools first (for models that support it)
         try:
-            response = self.client.chat.completions.create(
-                model=model,
+            response = self.gateway.complete(
                 messages=[
                     {
                         "role": "system",
@@ -153,6 +153,8 @@ class LLMFoodValueExtractor:
                     },
                     {"role": "user", "content": prompt}
                 ],
+                model=model,
+                max_retries=0,
                 temperature=0.1,
                 # Don't use response_format with tools (conflicts)
                 tools=[{
@@ -194,16 +196,15 @@ class LLMFoodValueExtractor:
             )
             
             # Parse response
-            message = response.choices[0].message
-            if message.tool_calls:
+            if response.tool_calls:
                 # New format: tool_calls
-                tool_call = message.tool_calls[0]
-                if tool_call.function.name == "get_food_missing_values":
-                    args = json.loads(tool_call.function.arguments)
+                tool_call = response.tool_calls[0]
+                if tool_call.name == "get_food_missing_values":
+                    args = json.loads(tool_call.arguments)
                     return args.get("foods", [])
             else:
                 # Fallback: try to parse as JSON directly from content
-                content = message.content
+                content = response.content
                 if content:
                     try:
                         data = json.loads(content)
@@ -235,8 +236,9 @@ class LLMFoodValueExtractor:
         prompt = self._build_batch_prompt_json(foods)
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.gateway.complete(
                 model=model,
+                max_retries=0,
                 messages=[
                         {
                             "role": "system",
@@ -249,7 +251,7 @@ class LLMFoodValueExtractor:
             )
             
             # Parse JSON response
-            content = response.choices[0].message.content
+            content = response.content
             if content:
                 # Remove markdown code blocks if present
                 if "```json" in content:
@@ -274,8 +276,9 @@ class LLMFoodValueExtractor:
             if "response_format" in str(e).lower():
                 logger.info(f"Model {model} doesn't support response_format, trying without it")
                 try:
-                    response = self.client.chat.completions.create(
+                    response = self.gateway.complete(
                         model=model,
+                        max_retries=0,
                         messages=[
                             {
                                 "role": "system",
@@ -286,7 +289,7 @@ class LLMFoodValueExtractor:
                         temperature=0.1
                     )
                     
-                    content = response.choices[0].message.content
+                    content = response.content
                     if content:
                         # Remove markdown code blocks if present
                         if "```json" in content:
@@ -421,8 +424,9 @@ Return ONLY a JSON object with this exact format:
 Do NOT return null for glycemic_index. Provide a number."""
         
         try:
+            self.runner.rate_limiter.acquire(self.current_model)
             # Use JSON mode for retry
-            response = self.client.chat.completions.create(
+            response = self.gateway.complete(
                 model=self.current_model,
                 messages=[
                     {
@@ -435,7 +439,7 @@ Do NOT return null for glycemic_index. Provide a number."""
                 response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content
+            content = response.content
             if content:
                 # Remove markdown if present
                 if "```json" in content:
@@ -495,14 +499,140 @@ def classify_gi(gi: Optional[int]) -> str:
         return "high_gi"
 
 
+def _apply_result(
+    db: Session,
+    extractor: LLMFoodValueExtractor,
+    result: Dict[str, Any],
+    dry_run: bool,
+    stats: Dict[str, int]
+):
+    """Apply one food's LLM result to the session (caller commits)."""
+    food_id = result.get("food_id")
+    if not food_id:
+        return
+    
+    food = db.query(KBFoodMaster).filter(
+        KBFoodMaster.food_id == food_id
+    ).first()
+    
+    if not food:
+        logger.warning(f"Food not found: {food_id}")
+        return
+    
+    nutrition = food.nutrition
+    if not nutrition:
+        return
+    
+    # Update glycemic properties
+    gi = result.get("glycemic_index")
+    if gi is not None:
+        macros = nutrition.macros or {}
+        carbs_g = safe_float(macros.get("carbs_g", 0))
+        fiber_g = safe_float(macros.get("fiber_g", 0))
+
+        gl = calculate_glycemic_load(gi, carbs_g, fiber_g)
+        classification = classify_gi(gi)
+
+        glycemic_props = {
+            "glycemic_index": gi,
+            "glycemic_load_per_100g": gl,
+            "glycemic_classification": classification
+        }
+
+        if dry_run:
+            logger.info(f"  [DRY RUN] Would update GI for {food.food_id}: GI={gi}, GL={gl}, Class={classification}")
+        else:
+            nutrition.glycemic_properties = glycemic_props
+            db.add(nutrition)
+
+        stats["glycemic_updated"] += 1
+    elif gi is None:
+        macros = nutrition.macros or {}
+        carbs_g = safe_float(macros.get("carbs_g", 0))
+        if carbs_g > 0:
+            # LLM returned null but food has carbs - retry with explicit prompt
+            logger.warning(f"  ⚠️  LLM returned null GI for {food_id} ({food.display_name}) but food has {carbs_g}g carbs. Retrying...")
+            retry_result = extractor._retry_food_gi(food, carbs_g, dry_run)
+            if retry_result and retry_result.get("glycemic_index") is not None:
+                gi = retry_result.get("glycemic_index")
+                gl = calculate_glycemic_load(gi, carbs_g, safe_float(macros.get("fiber_g", 0)))
+                classification = classify_gi(gi)
+                glycemic_props = {
+                    "glycemic_index": gi,
+                    "glycemic_load_per_100g": gl,
+                    "glycemic_classification": classification
+                }
+                if dry_run:
+                    logger.info(f"  ✓ Retry successful: GI={gi}, GL={gl}, Class={classification}")
+                else:
+                    nutrition.glycemic_properties = glycemic_props
+                    db.add(nutrition)
+                stats["glycemic_updated"] += 1
+            else:
+                logger.error(f"  ✗ Retry failed for {food_id}. Still null GI.")
+                stats["errors"] += 1
+
+    # Update serving unit and size
+    serving_unit = result.get("common_serving_unit")
+    serving_size_g = result.get("common_serving_size_g")
+
+    if serving_unit and serving_size_g:
+        if dry_run:
+            logger.info(f"  [DRY RUN] Would update serving for {food.food_id}: {serving_unit} = {serving_size_g}g")
+        else:
+            food.common_serving_unit = serving_unit
+            food.common_serving_size_g = Decimal(str(serving_size_g))
+            db.add(food)
+
+        stats["serving_unit_updated"] += 1
+        stats["serving_size_updated"] += 1
+    elif serving_unit or serving_size_g:
+        # Partial update
+        if serving_unit:
+            if dry_run:
+                logger.info(f"  [DRY RUN] Would update serving unit for {food.food_id}: {serving_unit}")
+            else:
+                food.common_serving_unit = serving_unit
+                db.add(food)
+            stats["serving_unit_updated"] += 1
+        if serving_size_g:
+            if dry_run:
+                logger.info(f"  [DRY RUN] Would update serving size for {food.food_id}: {serving_size_g}g")
+            else:
+                food.common_serving_size_g = Decimal(str(serving_size_g))
+                db.add(food)
+            stats["serving_size_updated"] += 1
+
+    stats["processed"] += 1
+
+
 def update_missing_values(
     db: Session,
     extractor: LLMFoodValueExtractor,
     batch_size: int = 10,
     resume_from: int = 0,
-    dry_run: bool = False
+    dry_run: bool = False,
+    journal_path: Optional[str] = None
 ) -> Dict[str, int]:
-    """Update missing values for all foods."""
+    """
+    Update missing values for all foods.
+    
+    LLM batches run concurrently through the extractor's runner. Results are
+    applied and committed on this thread as each batch completes, so the
+    session is never shared across workers.
+    
+    Args:
+        db: Database session
+        extractor: LLM extractor
+        batch_size: Foods per API call
+        resume_from: Food index to start from
+        dry_run: Don't update database
+        journal_path: Checkpoint journal (JSONL) of raw LLM results; foods with
+            journaled results are applied without calling the LLM again
+    
+    Returns:
+        Statistics dictionary
+    """
     stats = {
         "total_foods": 0,
         "needs_update": 0,
@@ -522,6 +652,15 @@ def update_missing_values(
     logger.info(f"Found {len(foods)} foods with nutrition data")
     logger.info(f"Resuming from index {resume_from}")
     
+    journal = CheckpointJournal(journal_path)
+    journaled_results = {
+        result["food_id"]: result
+        for batch_results in journal.results().values()
+        for result in (batch_results or [])
+        if isinstance(result, dict) and result.get("food_id")
+    }
+    replay_results = []
+    
     # Prepare food data for batch processing
     food_batches = []
     current_batch = []
@@ -547,6 +686,10 @@ def update_missing_values(
         
         stats["needs_update"] += 1
         
+        if food.food_id in journaled_results:
+            replay_results.append(journaled_results[food.food_id])
+            continue
+        
         # Only send food_id and display_name to LLM - simpler is better
         food_data = {
             "food_id": food.food_id,
@@ -569,143 +712,65 @@ def update_missing_values(
     logger.info(f"Created {len(food_batches)} batches of up to {batch_size} foods each")
     logger.info(f"Skipped {stats['skipped_already_complete']} foods that already have all values")
     
+    if replay_results:
+        logger.info(f"Applying {len(replay_results)} results from journal {journal_path}")
+        try:
+            for result in replay_results:
+                _apply_result(db, extractor, result, dry_run, stats)
+            if not dry_run:
+                db.commit()
+        except Exception as e:
+            logger.error(f"Error applying journaled results: {e}", exc_info=True)
+            stats["errors"] += len(replay_results)
+            if not dry_run:
+                db.rollback()
+    
     if len(food_batches) == 0:
-        logger.info("No foods need updates. Exiting.")
+        logger.info("No foods need LLM extraction. Exiting.")
         return stats
     
-    # Process batches
-    for batch_idx, batch in enumerate(food_batches):
+    # Process batches concurrently; apply each one as soon as it completes
+    batches_by_key = {
+        ",".join(food["food_id"] for food in batch): batch
+        for batch in food_batches
+    }
+    completed = 0
+    for batch_key, results, error in extractor.runner.run(
+        batches_by_key.items(),
+        worker=extractor.extract_batch_with_model,
+        accept=bool,
+        journal=journal
+    ):
+        batch = batches_by_key[batch_key]
+        completed += 1
+        logger.info(f"\n{'='*70}")
+        logger.info(f"Completed batch {completed}/{len(food_batches)} ({len(batch)} foods)")
+        logger.info(f"Foods: {', '.join([f['food_id'] for f in batch])}")
+        
+        if error or not results:
+            logger.warning(f"No results returned for batch: {error}")
+            stats["errors"] += len(batch)
+            continue
+        
         try:
-            logger.info(f"\n{'='*70}")
-            logger.info(f"Processing batch {batch_idx + 1}/{len(food_batches)} ({len(batch)} foods)...")
-            logger.info(f"Foods: {', '.join([f['food_id'] for f in batch])}")
-            
-            # Extract values using LLM
-            results = extractor.extract_batch(batch, batch_size=len(batch))
-            
-            if not results:
-                logger.warning(f"No results returned for batch {batch_idx + 1}")
-                stats["errors"] += len(batch)
-                continue
-            
-            # Update database
             for result in results:
-                food_id = result.get("food_id")
-                if not food_id:
-                    continue
-                
-                food = db.query(KBFoodMaster).filter(
-                    KBFoodMaster.food_id == food_id
-                ).first()
-                
-                if not food:
-                    logger.warning(f"Food not found: {food_id}")
-                    continue
-                
-                nutrition = food.nutrition
-                if not nutrition:
-                    continue
-                
-                # Update glycemic properties
-                gi = result.get("glycemic_index")
-                if gi is not None:
-                    macros = nutrition.macros or {}
-                    carbs_g = safe_float(macros.get("carbs_g", 0))
-                    fiber_g = safe_float(macros.get("fiber_g", 0))
-                    
-                    gl = calculate_glycemic_load(gi, carbs_g, fiber_g)
-                    classification = classify_gi(gi)
-                    
-                    glycemic_props = {
-                        "glycemic_index": gi,
-                        "glycemic_load_per_100g": gl,
-                        "glycemic_classification": classification
-                    }
-                    
-                    if dry_run:
-                        logger.info(f"  [DRY RUN] Would update GI for {food.food_id}: GI={gi}, GL={gl}, Class={classification}")
-                    else:
-                        nutrition.glycemic_properties = glycemic_props
-                        db.add(nutrition)
-                    
-                    stats["glycemic_updated"] += 1
-                elif gi is None:
-                    macros = nutrition.macros or {}
-                    carbs_g = safe_float(macros.get("carbs_g", 0))
-                    if carbs_g > 0:
-                        # LLM returned null but food has carbs - retry with explicit prompt
-                        logger.warning(f"  ⚠️  LLM returned null GI for {food_id} ({food.display_name}) but food has {carbs_g}g carbs. Retrying...")
-                        retry_result = extractor._retry_food_gi(food, carbs_g, dry_run)
-                        if retry_result and retry_result.get("glycemic_index") is not None:
-                            gi = retry_result.get("glycemic_index")
-                            gl = calculate_glycemic_load(gi, carbs_g, safe_float(macros.get("fiber_g", 0)))
-                            classification = classify_gi(gi)
-                            glycemic_props = {
-                                "glycemic_index": gi,
-                                "glycemic_load_per_100g": gl,
-                                "glycemic_classification": classification
-                            }
-                            if dry_run:
-                                logger.info(f"  ✓ Retry successful: GI={gi}, GL={gl}, Class={classification}")
-                            else:
-                                nutrition.glycemic_properties = glycemic_props
-                                db.add(nutrition)
-                            stats["glycemic_updated"] += 1
-                        else:
-                            logger.error(f"  ✗ Retry failed for {food_id}. Still null GI.")
-                            stats["errors"] += 1
-                
-                # Update serving unit and size
-                serving_unit = result.get("common_serving_unit")
-                serving_size_g = result.get("common_serving_size_g")
-                
-                if serving_unit and serving_size_g:
-                    if dry_run:
-                        logger.info(f"  [DRY RUN] Would update serving for {food.food_id}: {serving_unit} = {serving_size_g}g")
-                    else:
-                        food.common_serving_unit = serving_unit
-                        food.common_serving_size_g = Decimal(str(serving_size_g))
-                        db.add(food)
-                    
-                    stats["serving_unit_updated"] += 1
-                    stats["serving_size_updated"] += 1
-                elif serving_unit or serving_size_g:
-                    # Partial update
-                    if serving_unit:
-                        if dry_run:
-                            logger.info(f"  [DRY RUN] Would update serving unit for {food.food_id}: {serving_unit}")
-                        else:
-                            food.common_serving_unit = serving_unit
-                            db.add(food)
-                        stats["serving_unit_updated"] += 1
-                    if serving_size_g:
-                        if dry_run:
-                            logger.info(f"  [DRY RUN] Would update serving size for {food.food_id}: {serving_size_g}g")
-                        else:
-                            food.common_serving_size_g = Decimal(str(serving_size_g))
-                            db.add(food)
-                        stats["serving_size_updated"] += 1
-                
-                stats["processed"] += 1
+                _apply_result(db, extractor, result, dry_run, stats)
             
             # Commit batch
             if not dry_run:
                 db.commit()
-                logger.info(f"✓ Committed batch {batch_idx + 1}")
+                logger.info(f"✓ Committed batch {completed}")
             else:
-                logger.info(f"✓ [DRY RUN] Would commit batch {batch_idx + 1}")
-            
-            # Rate limiting delay between batches
-            if batch_idx + 1 < len(food_batches):
-                time.sleep(2)  # 2 second delay between batches
+                logger.info(f"✓ [DRY RUN] Would commit batch {completed}")
         
         except Exception as e:
-            logger.error(f"Error processing batch {batch_idx + 1}: {e}", exc_info=True)
+            logger.error(f"Error processing batch {completed}: {e}", exc_info=True)
             stats["errors"] += len(batch)
             if not dry_run:
                 db.rollback()
             continue
     
+    logger.info(f"Runner stats: {extractor.runner.stats}")
     return stats
 
 
@@ -722,11 +787,23 @@ def main():
                        help="LLM model to use (default: anthropic/claude-3.5-sonnet for better GI accuracy)")
     parser.add_argument("--api-key", type=str, 
                        help="OpenRouter API key (defaults to OPENROUTER_API_KEY env var)")
+    parser.add_argument("--workers", type=int, default=4,
+                       help="Concurrent LLM requests (default: 4)")
+    parser.add_argument("--requests-per-minute", type=float, default=60.0,
+                       help="Request budget shared across models (default: 60)")
+    parser.add_argument("--journal", type=str,
+                       default="import_missing_values_llm.journal.jsonl",
+                       help="Checkpoint journal for resuming (ignored in dry run)")
     
     args = parser.parse_args()
     
     try:
-        extractor = LLMFoodValueExtractor(api_key=args.api_key, model=args.model)
+        extractor = LLMFoodValueExtractor(
+            api_key=args.api_key,
+            model=args.model,
+            max_workers=args.workers,
+            requests_per_minute=args.requests_per_minute
+        )
     except ValueError as e:
         logger.error(str(e))
         return
@@ -735,7 +812,8 @@ def main():
     
     try:
         stats = update_missing_values(
-            db, extractor, args.batch_size, args.resume_from, args.dry_run
+            db, extractor, args.batch_size, args.resume_from, args.dry_run,
+            journal_path=None if args.dry_run else args.journal
         )
         
         logger.info("\n" + "=" * 70)
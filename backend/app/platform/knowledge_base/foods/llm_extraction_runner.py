@@ -0,0 +1,385 @@
+"""
+Concurrent, resumable runner for LLM-based KB enrichment scripts.
+
+Shared by the food KB enrichment scripts (import_missing_values_llm,
+extract_nutrition_from_pdf) so they no longer process one batch at a time
+with inline sleeps.
+
+Provides:
+- TokenBucket / RateLimiter: request pacing shared by all workers, with a
+  global bucket plus optional per-model buckets and per-model cooldowns
+  after rate-limit (429) errors
+- CheckpointJournal: append-only JSONL journal of finished work items,
+  used to resume a run and to stream results to disk as they complete
+- ExtractionRunner: bounded worker pool that calls the LLM with model
+  fallback and backoff, yielding results to the caller as they finish
+
+DB writes stay on the caller's thread: ExtractionRunner.run() is a
+generator, so scripts keep a single SQLAlchemy session.
+"""
+from typing import Dict, Any, Optional, List, Callable, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+import json
+import logging
+import threading
+import time
+
+# Same rate-limit classification as the LLM gateway the workers call through
+from app.platform.ai.gateway.llm_gateway import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available.
+
+        Returns:
+            0.0 if acquired, otherwise seconds until enough tokens are available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available."""
+        while True:
+            wait_time = self.try_acquire(tokens)
+            if wait_time <= 0:
+                return
+            time.sleep(wait_time)
+
+
+class RateLimiter:
+    """
+    Request pacing across models.
+
+    Every request takes a token from the global bucket and, if configured,
+    from the model's own bucket. Models that return 429 are put on cooldown
+    so workers move to another model instead of sleeping.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60.0,
+        per_model_requests_per_minute: Optional[Dict[str, float]] = None,
+        burst: Optional[float] = None
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            requests_per_minute: Global request budget
+            per_model_requests_per_minute: Optional per-model budgets
+            burst: Optional global burst size
+        """
+        self.global_bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.model_buckets: Dict[str, TokenBucket] = {
+            model: TokenBucket(rpm / 60.0)
+            for model, rpm in (per_model_requests_per_minute or {}).items()
+        }
+        self._cooldown_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model: str):
+        """Block until a request to `model` is allowed."""
+        self.global_bucket.acquire()
+        bucket = self.model_buckets.get(model)
+        if bucket:
+            bucket.acquire()
+
+    def cooldown(self, model: str, seconds: float):
+        """Mark model as rate limited for `seconds`."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._cooldown_until[model] = max(self._cooldown_until.get(model, 0.0), until)
+
+    def cooldown_remaining(self, model: str) -> float:
+        """Seconds until model may be used again (0.0 if available)."""
+        with self._lock:
+            return max(0.0, self._cooldown_until.get(model, 0.0) - time.monotonic())
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of completed work items.
+
+    Each line is {"key": ..., "status": "done" | "failed", "result": ...}.
+    Later lines for the same key win, so failed items are retried on the
+    next run and re-recorded when they succeed.
+    """
+
+    def __init__(self, path: Optional[str]):
+        """
+        Open (or create) journal.
+
+        Args:
+            path: Journal file path. None disables persistence (in-memory only).
+        """
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial last line from an interrupted run
+                    logger.warning(f"Ignoring corrupt journal line {line_no} in {self.path}")
+                    continue
+                self._entries[str(entry.get("key"))] = entry
+        logger.info(
+            f"Loaded journal {self.path}: {len(self.completed_keys())} completed, "
+            f"{len(self._entries) - len(self.completed_keys())} failed"
+        )
+
+    def is_done(self, key: str) -> bool:
+        """Check whether a work item completed in this or a previous run."""
+        entry = self._entries.get(str(key))
+        return bool(entry) and entry.get("status") == "done"
+
+    def completed_keys(self) -> List[str]:
+        """Keys of completed work items."""
+        return [k for k, e in self._entries.items() if e.get("status") == "done"]
+
+    def results(self) -> Dict[str, Any]:
+        """Results of completed work items, by key."""
+        return {k: e.get("result") for k, e in self._entries.items() if e.get("status") == "done"}
+
+    def record(self, key: str, result: Any = None, status: str = "done", error: Optional[str] = None):
+        """
+        Append an entry and flush it to disk.
+
+        Args:
+            key: Work item key
+            result: JSON-serializable result
+            status: "done" or "failed"
+            error: Optional error message for failed items
+        """
+        entry = {"key": str(key), "status": status, "result": result, "ts": time.time()}
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self._entries[str(key)] = entry
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                    f.flush()
+
+
+class ExtractionFailed(Exception):
+    """Raised when a work item fails on all models and retries."""
+    pass
+
+
+class ExtractionRunner:
+    """
+    Bounded concurrent runner for LLM extraction work items.
+
+    Work items are (key, payload) pairs. The worker function is called as
+    worker(payload, model) and must return a JSON-serializable result.
+    Rate limiting, model fallback and retries are handled here, so
+    workers contain only the prompt/parse logic.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        max_workers: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        journal: Optional[CheckpointJournal] = None,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 2.0,
+        rate_limit_cooldown_seconds: float = 20.0
+    ):
+        """
+        Initialize runner.
+
+        Args:
+            models: Models in preference order (primary first, then fallbacks)
+            max_workers: Maximum concurrent LLM requests
+            rate_limiter: Shared rate limiter (default: 60 requests/minute)
+            journal: Checkpoint journal (default: in-memory only)
+            max_retries: Attempts per work item across all models
+            backoff_base_seconds: Base for exponential backoff on non-rate-limit errors
+            rate_limit_cooldown_seconds: Cooldown applied to a model after a 429
+        """
+        if not models:
+            raise ValueError("At least one model is required")
+        self.models = list(dict.fromkeys(models))
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.journal = journal or CheckpointJournal(None)
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+        self.stats = {"submitted": 0, "skipped": 0, "succeeded": 0, "failed": 0, "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+
+    def _bump(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _next_model(self) -> str:
+        """Pick the first model not on cooldown, waiting for the earliest one if all are."""
+        while True:
+            remaining = [(self.rate_limiter.cooldown_remaining(m), m) for m in self.models]
+            for wait_time, model in remaining:
+                if wait_time <= 0:
+                    return model
+            time.sleep(min(wait_time for wait_time, _ in remaining))
+
+    def call_with_fallback(
+        self,
+        worker: Callable[[str], Any],
+        accept: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Call worker(model) with rate limiting, model fallback and retries.
+
+        Args:
+            worker: Function taking a model name and returning a result
+            accept: Optional predicate; rejected results are retried
+
+        Returns:
+            First accepted result
+
+        Raises:
+            ExtractionFailed: If all attempts fail
+        """
+        last_error: Optional[Exception] = None
+        attempt = 0
+        rate_limit_hits = 0
+        max_rate_limit_hits = self.max_retries * len(self.models) * 2
+        while attempt < self.max_retries and rate_limit_hits < max_rate_limit_hits:
+            model = self._next_model()
+            self.rate_limiter.acquire(model)
+            try:
+                result = worker(model)
+            except Exception as e:
+                last_error = e
+                if is_rate_limit_error(e):
+                    # Rate limits don't consume an attempt: cool the model down and move on
+                    self._bump("rate_limited")
+                    rate_limit_hits += 1
+                    logger.warning(f"Rate limit on {model}, cooling down {self.rate_limit_cooldown_seconds}s")
+                    self.rate_limiter.cooldown(model, self.rate_limit_cooldown_seconds)
+                    continue
+                logger.error(f"Error with {model} (attempt {attempt + 1}/{self.max_retries}): {e}")
+                attempt += 1
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff_base_seconds * (2 ** (attempt - 1)))
+                continue
+
+            if accept is None or accept(result):
+                return result
+            last_error = None
+            attempt += 1
+            logger.warning(f"Rejected result from {model} (attempt {attempt}/{self.max_retries})")
+
+        raise ExtractionFailed(str(last_error) if last_error else "No acceptable result")
+
+    def run(
+        self,
+        items: Iterable[Tuple[str, Any]],
+        worker: Callable[[Any, str], Any],
+        accept: Optional[Callable[[Any], bool]] = None,
+        journal: Optional[CheckpointJournal] = None
+    ) -> Iterator[Tuple[str, Any, Optional[Exception]]]:
+        """
+        Process work items concurrently.
+
+        Items already completed in the journal are skipped. Each finished
+        item is journaled before it is yielded.
+
+        Args:
+            items: (key, payload) pairs
+            worker: Function called as worker(payload, model)
+            accept: Optional result predicate (see call_with_fallback)
+            journal: Journal for this run (defaults to the runner's journal)
+
+        Yields:
+            (key, result, error) in completion order; error is None on success
+        """
+        journal = journal or self.journal
+        pending: Dict[Future, str] = {}
+        item_iter = iter(items)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit_next() -> bool:
+                for key, payload in item_iter:
+                    key = str(key)
+                    if journal.is_done(key):
+                        self._bump("skipped")
+                        continue
+                    future = executor.submit(
+                        self.call_with_fallback,
+                        lambda model, payload=payload: worker(payload, model),
+                        accept,
+                    )
+                    pending[future] = key
+                    self._bump("submitted")
+                    return True
+                return False
+
+            # Keep at most 2x workers in flight so huge inputs are consumed lazily
+            while len(pending) < self.max_workers * 2 and submit_next():
+                pass
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self._bump("failed")
+                        journal.record(key, status="failed", error=str(e))
+                        yield key, None, e
+                    else:
+                        self._bump("succeeded")
+                        journal.record(key, result)
+                        yield key, result, None
+                    submit_next()
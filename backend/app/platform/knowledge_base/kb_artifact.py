@@ -0,0 +1,390 @@
+"""
+Knowledge Base Artifact.
+
+A single versioned binary file holding the knowledge base in a
+memory-mappable layout, built by scripts/build_kb_artifact.py:
+- the JSON rule KBs (medical, MNT rules, exchange system, ...), by path
+  relative to the knowledge_base directory
+- the food KB tables (master, nutrition, MNT, exchange and condition
+  compatibility; see food_engine/kb_food_artifact.py) as NumPy columns and
+  string tables
+
+The file is opened with mmap: arrays are read-only views of the mapped pages
+(no parsing, no copy), so opening is near-instant and every process that
+maps the file shares the same physical pages.
+
+Layout (little-endian):
+- 8 bytes magic, 8 bytes header length (uint64)
+- header: JSON with format version, creation time, KB version vector,
+  metadata and the array table {name: {offset, dtype, shape}}
+- arrays, each at a 64-byte aligned offset from the start of the data
+  section (which itself starts 64-byte aligned)
+
+A string table of n values is three arrays: "<name>.offsets" (int64, n+1),
+"<name>.data" (uint8, UTF-8 bytes) and "<name>.nulls" (bool, n). A JSON KB
+file is one uint8 array "json:<relative path>" of its UTF-8 text.
+
+With settings.KB_ARTIFACT_PATH set, read_kb_json() serves the JSON KB
+loaders from the artifact and FoodEngine can run without a database.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AAHARKB\x00"
+
+# Bump when the layout changes; older artifacts are rejected
+FORMAT_VERSION = 1
+
+ALIGNMENT = 64
+
+KB_BASE_PATH = Path(__file__).resolve().parent
+
+_JSON_PREFIX = "json:"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class StringTable(Sequence):
+    """Read-only sequence of Optional[str] over offsets/data/nulls arrays."""
+
+    __slots__ = ("offsets", "data", "nulls", "_index")
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, nulls: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+        self.nulls = nulls
+        self._index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if self.nulls[position]:
+            return None
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def index_of(self, value: str) -> Optional[int]:
+        """Position of the first occurrence of value (index built on first use)."""
+        if self._index is None:
+            index: Dict[str, int] = {}
+            for position, item in enumerate(self):
+                if item is not None:
+                    index.setdefault(item, position)
+            self._index = index
+        return self._index.get(value)
+
+
+class KBArtifactWriter:
+    """Collects arrays, string tables and JSON KB files and writes an artifact."""
+
+    def __init__(self):
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._strings: List[str] = []
+        self._json: List[str] = []
+
+    def add_array(self, name: str, array: Any):
+        """Add a NumPy array (stored C-contiguous, little-endian)."""
+        if name in self._arrays:
+            raise ValueError(f"Duplicate artifact array: {name}")
+        array = np.ascontiguousarray(array)
+        if array.dtype.byteorder == ">":
+            array = array.astype(array.dtype.newbyteorder("<"))
+        if array.dtype.hasobject:
+            raise ValueError(f"Artifact array {name} has object dtype")
+        self._arrays[name] = array
+
+    def add_strings(self, name: str, values: Iterable[Optional[str]]):
+        """Add a string table (None is kept as null)."""
+        encoded = [None if value is None else str(value).encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        if encoded:
+            offsets[1:] = np.cumsum([len(value or b"") for value in encoded])
+        self.add_array(f"{name}.offsets", offsets)
+        self.add_array(f"{name}.data", np.frombuffer(b"".join(value or b"" for value in encoded), dtype=np.uint8))
+        self.add_array(f"{name}.nulls", np.array([value is None for value in encoded], dtype=bool))
+        self._strings.append(name)
+
+    def add_json_kb(self, relative_path: str, text: Union[str, bytes]):
+        """Add a JSON KB file's text under its path relative to knowledge_base."""
+        data = text.encode("utf-8") if isinstance(text, str) else text
+        json.loads(data)  # Reject invalid JSON at build time, not at load time
+        self.add_array(f"{_JSON_PREFIX}{relative_path}", np.frombuffer(data, dtype=np.uint8))
+        self._json.append(relative_path)
+
+    def add_json_kbs(self, base_path: Path = KB_BASE_PATH) -> List[str]:
+        """
+        Add every JSON file under the knowledge_base directory.
+
+        Args:
+            base_path: Knowledge base directory
+
+        Returns:
+            Added relative paths
+        """
+        added = []
+        for path in sorted(base_path.rglob("*.json")):
+            relative = path.relative_to(base_path).as_posix()
+            self.add_json_kb(relative, path.read_bytes())
+            added.append(relative)
+        return added
+
+    def write(
+        self,
+        path: Union[str, Path],
+        kb_versions: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write the artifact atomically (temporary file, then rename).
+
+        Args:
+            path: Output file
+            kb_versions: KB version vector the artifact was built from
+            metadata: Extra JSON-serializable build information
+
+        Returns:
+            The artifact header
+        """
+        arrays: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        for name, array in self._arrays.items():
+            offset = _align(offset)
+            arrays[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset += array.nbytes
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "kb_versions": kb_versions or {},
+            "metadata": metadata or {},
+            "strings": self._strings,
+            "json": self._json,
+            "arrays": arrays,
+        }
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+        data_start = _align(len(MAGIC) + _HEADER_LENGTH.size + len(header_bytes))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(MAGIC)
+                f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+                f.write(header_bytes)
+                for name, array in self._arrays.items():
+                    f.seek(data_start + arrays[name]["offset"])
+                    f.write(array.tobytes())
+                f.truncate(data_start + offset)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        logger.info(f"Wrote KB artifact {path}: {len(arrays)} arrays, {data_start + offset} bytes")
+        return header
+
+
+class KBArtifact:
+    """
+    Read-only, memory-mapped KB artifact.
+
+    Arrays returned by array() are views of the mapping: they must not be
+    used after close(). Derived structures (indexes, row caches) can be kept
+    per artifact with memo().
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map an artifact file.
+
+        Args:
+            path: Artifact file
+
+        Raises:
+            ValueError: If the file is not a KB artifact of this format version
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            prefix_size = len(MAGIC) + _HEADER_LENGTH.size
+            if len(self._mmap) < prefix_size or self._mmap[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a KB artifact: {self.path}")
+            (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+            self.header: Dict[str, Any] = json.loads(self._mmap[prefix_size:prefix_size + header_length])
+            if self.header.get("format_version") != FORMAT_VERSION:
+                raise ValueError(
+                    f"KB artifact {self.path} has format version {self.header.get('format_version')}, "
+                    f"expected {FORMAT_VERSION}"
+                )
+        except Exception:
+            self._mmap.close()
+            raise
+        self._data_start = _align(prefix_size + header_length)
+        self._arrays: Dict[str, Dict[str, Any]] = self.header["arrays"]
+        self._json = set(self.header.get("json", ()))
+        self._memo: Dict[str, Any] = {}
+        self._memo_lock = threading.RLock()  # Derived values may build other memoized values
+
+    @property
+    def kb_versions(self) -> Dict[str, str]:
+        """KB version vector the artifact was built from."""
+        return self.header.get("kb_versions", {})
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.header.get("metadata", {})
+
+    def has_array(self, name: str) -> bool:
+        return name in self._arrays
+
+    def array(self, name: str) -> np.ndarray:
+        """
+        Zero-copy, read-only view of an array.
+
+        Raises:
+            KeyError: If the artifact has no such array
+        """
+        spec = self._arrays[name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + spec["offset"])
+        return array.reshape(spec["shape"])
+
+    def strings(self, name: str) -> StringTable:
+        """String table by name (cached)."""
+        return self.memo(
+            f"strings:{name}",
+            lambda: StringTable(
+                self.array(f"{name}.offsets"), self.array(f"{name}.data"), self.array(f"{name}.nulls")
+            )
+        )
+
+    def json_names(self) -> List[str]:
+        """Relative paths of the JSON KB files in the artifact."""
+        return sorted(self._json)
+
+    def has_json(self, relative_path: str) -> bool:
+        return relative_path in self._json
+
+    def json(self, relative_path: str) -> Any:
+        """
+        Parse a JSON KB file from the artifact.
+
+        Args:
+            relative_path: Path relative to knowledge_base (e.g., "medical/medical_conditions_kb_complete.json")
+
+        Raises:
+            KeyError: If the artifact has no such file
+        """
+        if relative_path not in self._json:
+            raise KeyError(relative_path)
+        return json.loads(self.array(f"{_JSON_PREFIX}{relative_path}").tobytes())
+
+    def memo(self, key: str, build: Callable[[], Any]) -> Any:
+        """Build a derived value once per artifact and return it on later calls."""
+        value = self._memo.get(key)
+        if value is None:
+            with self._memo_lock:
+                value = self._memo.get(key)
+                if value is None:
+                    value = build()
+                    self._memo[key] = value
+        return value
+
+    def close(self):
+        """Unmap the file (fails while array views are still referenced elsewhere)."""
+        self._memo.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> "KBArtifact":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_artifact: Optional[KBArtifact] = None
+_artifact_loaded = False
+_artifact_lock = threading.Lock()
+
+
+def get_kb_artifact() -> Optional[KBArtifact]:
+    """
+    Get the process-wide artifact at settings.KB_ARTIFACT_PATH (mapped on first use).
+
+    Returns:
+        KBArtifact, or None if no artifact is configured or it cannot be opened
+    """
+    global _artifact, _artifact_loaded
+    if _artifact_loaded:
+        return _artifact
+    with _artifact_lock:
+        if not _artifact_loaded:
+            if settings.KB_ARTIFACT_PATH:
+                try:
+                    _artifact = KBArtifact(settings.KB_ARTIFACT_PATH)
+                    logger.info(
+                        f"Mapped KB artifact {settings.KB_ARTIFACT_PATH} "
+                        f"(built {_artifact.header.get('created_at')})"
+                    )
+                except (OSError, ValueError) as e:
+                    logger.warning(f"KB artifact {settings.KB_ARTIFACT_PATH} not used: {e}")
+                    _artifact = None
+            _artifact_loaded = True
+        return _artifact
+
+
+def reset_kb_artifact():
+    """Forget the process-wide artifact; the next get_kb_artifact() maps it again."""
+    global _artifact, _artifact_loaded
+    with _artifact_lock:
+        _artifact = None
+        _artifact_loaded = False
+
+
+def read_kb_json(kb_path: Union[str, Path]) -> Any:
+    """
+    Load a JSON KB file, from the KB artifact if it has the file.
+
+    Args:
+        kb_path: Path of the JSON file under the knowledge_base directory
+
+    Returns:
+        Parsed JSON
+
+    Raises:
+        FileNotFoundError: If neither the artifact nor the file system has the file
+    """
+    artifact = get_kb_artifact()
+    if artifact is not None:
+        try:
+            relative = Path(kb_path).resolve().relative_to(KB_BASE_PATH).as_posix()
+        except ValueError:
+            relative = None
+        if relative is not None and artifact.has_json(relative):
+            return artifact.json(relative)
+    with open(kb_path, "r", encoding="utf-8") as f:
+        return json.load(f)
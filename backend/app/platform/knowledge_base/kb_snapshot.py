@@ -0,0 +1,111 @@
+"""
+KB Snapshots.
+Versioned views of the JSON rule KBs for in-flight requests.
+
+The KB modules (kb_mnt_rules, kb_meal_structure, ...) cache each JSON file in
+a module global on first use. KBManager (core.orchestration.kb_manager)
+rebuilds those caches when the KB changes and records the result of every
+loader in a KBSnapshot, one per KB version.
+
+Loaders are marked with @versioned_kb_loader. While a snapshot is pinned
+with use_kb_snapshot() (the NCP orchestrator pins the version it started on
+around each stage), they return the snapshot's data instead of the module
+cache, so a KB swap in the middle of a plan generation does not mix versions.
+Outside a pinned block they behave exactly as before.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+import functools
+import hashlib
+
+
+class KBSnapshot:
+    """
+    One KB version: file/table checksums and the data of every loader.
+
+    Treat as immutable; the loaded data is shared with the module caches.
+    """
+
+    def __init__(self, version: int, checksums: Dict[str, str], loaded: Dict[str, Any]):
+        """
+        Initialize snapshot.
+
+        Args:
+            version: KB version number (increases by one per swap in this process)
+            checksums: Source key (file path, "artifact", "table:<name>") -> content digest
+            loaded: Loader key (see kb_loader_key) -> loader result
+        """
+        self.version = version
+        self.checksums = dict(checksums)
+        self.loaded = loaded
+        self.created_at = datetime.utcnow()
+
+    @property
+    def digest(self) -> str:
+        """Digest of all checksums; equal for equal KB content in any process."""
+        content = hashlib.sha256()
+        for key, checksum in sorted(self.checksums.items()):
+            content.update(f"{key}:{checksum};".encode("utf-8"))
+        return content.hexdigest()[:16]
+
+    def __repr__(self) -> str:
+        return f"KBSnapshot(version={self.version}, digest={self.digest}, loaders={len(self.loaded)})"
+
+
+_MISSING = object()
+
+_pinned: ContextVar[Optional[KBSnapshot]] = ContextVar("kb_snapshot", default=None)
+
+
+def kb_loader_key(func: Callable[..., Any]) -> str:
+    """Snapshot key of a KB loader ("<module>.<function>")."""
+    return f"{func.__module__}.{func.__name__}"
+
+
+def versioned_kb_loader(func: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Mark a zero-argument KB loader whose result is part of a KB snapshot.
+
+    The wrapped loader returns the pinned snapshot's result if a snapshot is
+    pinned and has one, and otherwise calls the loader.
+
+    Args:
+        func: Loader that caches its KB in a module global
+
+    Returns:
+        Wrapped loader (the original is available as __wrapped__)
+    """
+    key = kb_loader_key(func)
+
+    @functools.wraps(func)
+    def loader():
+        snapshot = _pinned.get()
+        if snapshot is not None:
+            value = snapshot.loaded.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return func()
+
+    return loader
+
+
+def get_pinned_kb_snapshot() -> Optional[KBSnapshot]:
+    """Return the snapshot pinned in the current context, if any."""
+    return _pinned.get()
+
+
+@contextmanager
+def use_kb_snapshot(snapshot: Optional[KBSnapshot]) -> Iterator[None]:
+    """
+    Pin a KB snapshot for the duration of a block (current thread/task only).
+
+    Args:
+        snapshot: Snapshot to read KB data from (None: live module caches)
+    """
+    token = _pinned.set(snapshot)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
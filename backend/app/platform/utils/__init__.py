@@ -17,9 +17,17 @@ from .helpers import (
     filter_none_values,
     chunk_list,
 )
+from .food_name_index import (
+    FoodNameIndex,
+    FoodNameMatch,
+    normalize_food_name,
+    food_group_key,
+)
 from .security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     verify_token,
 )
@@ -37,9 +45,16 @@ __all__ = [
     "safe_get",
     "filter_none_values",
     "chunk_list",
+    # Food name matching
+    "FoodNameIndex",
+    "FoodNameMatch",
+    "normalize_food_name",
+    "food_group_key",
     # Security
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "create_access_token",
     "verify_token",
 ]
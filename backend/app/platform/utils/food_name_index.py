@@ -0,0 +1,392 @@
+"""
+Food Name Index.
+
+Indexed fuzzy matching of free-text food names against knowledge base foods.
+
+Names are normalized once when added, and a character n-gram inverted index
+is used to generate a short candidate list for each query. The exact
+SequenceMatcher ratio is only computed for those candidates, so a lookup no
+longer scans every food in the KB.
+
+Also defines food_group_key(), the variation-group key stored on
+kb_food_master.dedup_group_key and used by FoodDeduplicator.
+
+Used by:
+- KB population scripts (matching target food lists to source databases)
+- Intake extraction (matching free-text food mentions to kb_food_master.food_id)
+- Food deduplication (grouping variations of the same food)
+"""
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+from dataclasses import dataclass
+from collections import defaultdict
+from difflib import SequenceMatcher
+import re
+
+_PARENTHETICAL_RE = re.compile(r'\s*\([^)]*\)\s*')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+_SCIENTIFIC_NAME_RE = re.compile(r'\(([^)]+)\)')
+
+# Base names too generic to group variations by
+_GROUP_KEY_SKIP_WORDS = frozenset({"other", "mixed", "various", "assorted", "combination"})
+
+
+def normalize_food_name(name: str) -> str:
+    """
+    Normalize food name for matching.
+
+    Removes parenthetical variations, lowercases, strips special
+    characters and collapses whitespace.
+
+    Args:
+        name: Raw food name
+
+    Returns:
+        Normalized food name
+    """
+    if not name:
+        return ""
+    name = _PARENTHETICAL_RE.sub(' ', name).strip()
+    name = name.lower()
+    name = _NON_WORD_RE.sub(' ', name)
+    name = _WHITESPACE_RE.sub(' ', name)
+    return name.strip()
+
+
+def extract_scientific_name(display_name: str) -> Optional[str]:
+    """Extract scientific name from parentheses (lowercased)."""
+    if not display_name:
+        return None
+    match = _SCIENTIFIC_NAME_RE.search(display_name)
+    if match:
+        return match.group(1).strip().lower()
+    return None
+
+
+def extract_base_food_name(display_name: str) -> Optional[str]:
+    """Extract base food name (before first comma, lowercased)."""
+    if not display_name:
+        return None
+    name_without_scientific = _SCIENTIFIC_NAME_RE.sub('', display_name).strip()
+    base_name = name_without_scientific.split(',')[0].strip()
+    return base_name.lower().strip() if base_name else None
+
+
+def food_group_key(
+    display_name: str,
+    match_scientific_name: bool = True,
+    match_base_name: bool = True
+) -> Optional[str]:
+    """
+    Variation group key for a food display name.
+
+    Foods with the same key are variations of the same food (e.g.
+    "Rice, raw, milled" and "Rice, parboiled"). The scientific name in
+    parentheses takes precedence over the base name before the first comma.
+
+    Args:
+        display_name: Food display name
+        match_scientific_name: Group by scientific name when present
+        match_base_name: Group by base name
+
+    Returns:
+        "scientific:<name>", "base:<name>" or None if the food can't be grouped
+    """
+    if not display_name:
+        return None
+
+    if match_scientific_name:
+        scientific_name = extract_scientific_name(display_name)
+        if scientific_name:
+            return f"scientific:{scientific_name}"
+
+    if match_base_name:
+        base_name = extract_base_food_name(display_name)
+        if base_name and base_name not in _GROUP_KEY_SKIP_WORDS and len(base_name) > 2:
+            return f"base:{base_name}"
+
+    return None
+
+
+def _ngrams(normalized_name: str, size: int) -> set:
+    """Character n-grams of a normalized name (padded with spaces)."""
+    padded = f" {normalized_name} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+@dataclass
+class FoodNameMatch:
+    """Result of a food name lookup."""
+    key: Any  # Food identifier (food_id, row index, ...)
+    name: str  # Indexed name that matched (display name or alias)
+    score: float  # SequenceMatcher ratio on normalized names (0.0 - 1.0)
+    payload: Any = None  # Optional object registered with the food
+
+
+class FoodNameIndex:
+    """
+    Character n-gram index over food names.
+
+    Each food can be registered under several names (display name plus
+    aliases). Lookups return at most one match per food key.
+    """
+
+    def __init__(self, ngram_size: int = 3, candidate_limit: int = 25):
+        """
+        Initialize empty index.
+
+        Args:
+            ngram_size: Character n-gram size used for candidate generation
+            candidate_limit: Number of n-gram candidates scored exactly per query
+        """
+        self.ngram_size = ngram_size
+        self.candidate_limit = candidate_limit
+        # Parallel arrays, one slot per indexed name
+        self._keys: List[Any] = []
+        self._names: List[str] = []
+        self._normalized: List[str] = []
+        self._ngram_counts: List[int] = []
+        self._groups: List[Optional[str]] = []
+        self._payloads: Dict[Any, Any] = {}
+        # Inverted indexes
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(
+        self,
+        key: Any,
+        name: str,
+        group: Optional[str] = None,
+        payload: Any = None
+    ):
+        """
+        Register a single name for a food.
+
+        Args:
+            key: Food identifier returned in matches
+            name: Name to index
+            group: Optional group (e.g. category) usable as a search filter
+            payload: Optional object returned with matches for this key
+        """
+        normalized = normalize_food_name(name)
+        if not normalized:
+            return
+
+        slot = len(self._keys)
+        grams = _ngrams(normalized, self.ngram_size)
+        self._keys.append(key)
+        self._names.append(name)
+        self._normalized.append(normalized)
+        self._ngram_counts.append(len(grams))
+        self._groups.append(group)
+        if payload is not None or key not in self._payloads:
+            self._payloads[key] = payload
+
+        for gram in grams:
+            self._postings[gram].append(slot)
+        self._exact[normalized].append(slot)
+
+    def add_food(
+        self,
+        food_id: Any,
+        display_name: str,
+        aliases: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        payload: Any = None
+    ):
+        """
+        Register a food under its display name and aliases.
+
+        Args:
+            food_id: Food identifier
+            display_name: Primary food name
+            aliases: Optional alternative names
+            group: Optional group (e.g. category) usable as a search filter
+            payload: Optional object returned with matches
+        """
+        self.add(food_id, display_name, group=group, payload=payload)
+        for alias in aliases or []:
+            if alias:
+                self.add(food_id, alias, group=group, payload=payload)
+
+    @classmethod
+    def from_food_master(cls, db, include_inactive: bool = False, **kwargs) -> "FoodNameIndex":
+        """
+        Build index from kb_food_master (display_name + aliases).
+
+        Args:
+            db: Database session
+            include_inactive: Include non-active foods
+            **kwargs: Passed to FoodNameIndex constructor
+
+        Returns:
+            Index keyed by food_id, grouped by category
+        """
+        from app.platform.data.models.kb_food_master import KBFoodMaster
+
+        query = db.query(
+            KBFoodMaster.food_id,
+            KBFoodMaster.display_name,
+            KBFoodMaster.aliases,
+            KBFoodMaster.category,
+        )
+        if not include_inactive:
+            query = query.filter(KBFoodMaster.status == 'active')
+
+        index = cls(**kwargs)
+        for food_id, display_name, aliases, category in query.all():
+            index.add_food(food_id, display_name, aliases=aliases, group=category)
+        return index
+
+    def _candidate_slots(self, normalized_query: str, group: Optional[str]) -> List[int]:
+        """Rank indexed names by n-gram Jaccard similarity and keep the best."""
+        grams = _ngrams(normalized_query, self.ngram_size)
+        overlap: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for slot in self._postings.get(gram, ()):
+                overlap[slot] += 1
+
+        if group is not None:
+            overlap = {s: c for s, c in overlap.items() if self._groups[s] == group}
+
+        query_count = len(grams)
+        scored = [
+            (count / (query_count + self._ngram_counts[slot] - count), slot)
+            for slot, count in overlap.items()
+        ]
+        scored.sort(reverse=True)
+        return [slot for _, slot in scored[:self.candidate_limit]]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: float = 0.6,
+        group: Optional[str] = None
+    ) -> List[FoodNameMatch]:
+        """
+        Find foods whose names best match a query.
+
+        Args:
+            query: Free-text food name
+            limit: Maximum number of matches
+            threshold: Minimum similarity score
+            group: Optional group filter
+
+        Returns:
+            Matches sorted by score (highest first), one per food key
+        """
+        normalized_query = normalize_food_name(query)
+        if not normalized_query:
+            return []
+
+        best_by_key: Dict[Any, Tuple[float, int]] = {}
+
+        # Exact normalized-name hits need no scoring
+        for slot in self._exact.get(normalized_query, ()):
+            if group is None or self._groups[slot] == group:
+                best_by_key.setdefault(self._keys[slot], (1.0, slot))
+
+        if len(best_by_key) < limit:
+            matcher = SequenceMatcher(None, b=normalized_query)
+            for slot in self._candidate_slots(normalized_query, group):
+                key = self._keys[slot]
+                current = best_by_key.get(key)
+                floor = max(threshold, current[0] if current else 0.0)
+                matcher.set_seq1(self._normalized[slot])
+                # Cheap upper bounds first; only compute ratio() when it can win
+                if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                    continue
+                score = matcher.ratio()
+                if score >= floor and (current is None or score > current[0]):
+                    best_by_key[key] = (score, slot)
+
+        ranked = sorted(best_by_key.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            FoodNameMatch(
+                key=key,
+                name=self._names[slot],
+                score=score,
+                payload=self._payloads.get(key),
+            )
+            for key, (score, slot) in ranked[:limit]
+        ]
+
+    def best_match(
+        self,
+        query: str,
+        threshold: float = 0.6,
+        group: Optional[str] = None
+    ) -> Optional[FoodNameMatch]:
+        """
+        Find the single best matching food.
+
+        Args:
+            query: Free-text food name
+            threshold: Minimum similarity score
+            group: Optional group filter
+
+        Returns:
+            Best match or None if nothing reaches the threshold
+        """
+        matches = self.search(query, limit=1, threshold=threshold, group=group)
+        return matches[0] if matches else None
+
+    def extract_food_references(
+        self,
+        text: str,
+        threshold: float = 0.8,
+        review_threshold: float = 0.9,
+        max_words: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract KB food references from free text.
+
+        Scans word spans (longest first) and keeps non-overlapping spans that
+        match an indexed food. Output follows IntakeTextNormalizer.extract_food_references.
+
+        Args:
+            text: Free text (e.g. dietary recall)
+            threshold: Minimum similarity for a span to be reported
+            review_threshold: Matches below this score are flagged for review
+            max_words: Maximum words per candidate span
+
+        Returns:
+            List of {food_id, food_name, confidence, needs_review} in text order
+        """
+        if not text:
+            return []
+
+        words = [(m.group(0), m.start(), m.end()) for m in _WORD_RE.finditer(text)]
+        taken = [False] * len(words)
+        references = []
+
+        for span_len in range(min(max_words, len(words)), 0, -1):
+            for start in range(len(words) - span_len + 1):
+                end = start + span_len
+                if any(taken[start:end]):
+                    continue
+                span_text = text[words[start][1]:words[end - 1][2]]
+                if len(normalize_food_name(span_text)) < 3:
+                    continue
+                match = self.best_match(span_text, threshold=threshold)
+                if match is None:
+                    continue
+                for i in range(start, end):
+                    taken[i] = True
+                references.append((words[start][1], {
+                    "food_id": match.key,
+                    "food_name": span_text,
+                    "matched_name": match.name,
+                    "confidence": round(match.score, 3),
+                    "needs_review": match.score < review_threshold,
+                }))
+
+        references.sort(key=lambda item: item[0])
+        return [ref for _, ref in references]
@@ -3,6 +3,9 @@ Security utilities for authentication and password hashing.
 """
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
@@ -10,6 +13,12 @@ from app.config import settings
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Bounded pool for bcrypt: a login storm queues here instead of stalling the event loop
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -21,10 +30,26 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded bcrypt pool (for async endpoints)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_hash_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bounded bcrypt pool (for async endpoints)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
     
+    Each token gets a unique "jti" claim (used as the principal cache key).
+    
     Args:
         data: Data to encode in the token
         expires_delta: Token expiration time
@@ -40,6 +65,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for production (multiple workers per box).
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported in the master (preload_app) and all KB data is loaded
+and frozen there before workers are forked, so workers share it
+copy-on-write (see app.platform.core.orchestration.kb_preload).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))  # Plan generation with LLM recipes is slow
+graceful_timeout = 30
+
+
+def when_ready(server):
+    """Load and freeze KB data in the master, right before the workers are forked."""
+    from app.config import settings
+    from app.platform.core.orchestration.kb_preload import prefork_preload
+
+    if settings.KB_PREFORK_PRELOAD:
+        prefork_preload()
@@ -0,0 +1,61 @@
+"""
+Build the memory-mapped KB artifact.
+
+Compiles the JSON rule KBs and the food KB tables of the database into one
+binary file (see app/platform/knowledge_base/kb_artifact.py). Point
+KB_ARTIFACT_PATH at the output to serve the KB from it.
+
+Usage:
+    python scripts/build_kb_artifact.py kb/aahaar_kb.bin
+    python scripts/build_kb_artifact.py kb/aahaar_kb.bin --no-foods   # JSON KBs only, no database
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.platform.core.orchestration.pipeline_cache import get_kb_version_vector
+from app.platform.knowledge_base.kb_artifact import KBArtifactWriter
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def build(output: Path, include_foods: bool = True) -> dict:
+    """Build the artifact and return its header."""
+    writer = KBArtifactWriter()
+    json_files = writer.add_json_kbs()
+    logger.info(f"Added {len(json_files)} JSON KB files")
+
+    metadata = {"json_files": len(json_files)}
+    if include_foods:
+        from app.database import SessionLocal
+        from app.platform.engines.food_engine.kb_food_artifact import add_food_tables_from_db
+
+        db = SessionLocal()
+        try:
+            counts = add_food_tables_from_db(writer, db)
+        finally:
+            db.close()
+        logger.info(f"Added food tables: {counts['foods']} foods, {counts['compatibilities']} compatibility records")
+        metadata.update(counts)
+
+    return writer.write(output, kb_versions=get_kb_version_vector(), metadata=metadata)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped KB artifact")
+    parser.add_argument("output", type=Path, help="Artifact file to write")
+    parser.add_argument("--no-foods", action="store_true", help="Skip the food KB tables (no database needed)")
+    args = parser.parse_args()
+
+    header = build(args.output, include_foods=not args.no_foods)
+    logger.info(f"KB artifact written: {args.output} ({len(header['arrays'])} arrays)")
+
+
+if __name__ == "__main__":
+    main()
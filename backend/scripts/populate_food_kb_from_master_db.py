@@ -29,6 +29,7 @@ from app.database import SessionLocal
 from app.platform.data.models.kb_food_master import KBFoodMaster
 from app.platform.data.models.kb_food_nutrition_base import KBFoodNutritionBase
 from app.platform.data.models.kb_food_exchange_profile import KBFoodExchangeProfile
+from app.platform.utils.food_name_index import FoodNameIndex, normalize_food_name
 from app.utils.logger import logger
 
 
@@ -69,17 +70,20 @@ MASTER_TO_FOOD_LIST_CATEGORY = {
 STARCHY_VEGETABLES = {"potato", "sweet potato", "yam", "taro", "arbi", "beetroot", "carrot"}
 
 
-def normalize_food_name(name: str) -> str:
+def build_master_index(master_db: List[Dict]) -> FoodNameIndex:
     """
-    Normalize food name for matching.
-    Removes extra spaces, converts to lowercase, removes special chars.
+    Build a food name index over the master database.
+    Names are normalized once; entries are keyed by row position and grouped by category.
     """
-    # Remove parenthetical cooking states/variations for matching
-    name = re.sub(r'\s*\([^)]*\)\s*', ' ', name).strip()
-    name = name.lower()
-    name = re.sub(r'[^\w\s]', ' ', name)
-    name = re.sub(r'\s+', ' ', name)
-    return name.strip()
+    index = FoodNameIndex()
+    for position, food in enumerate(master_db):
+        index.add(
+            position,
+            food.get("Food Name", ""),
+            group=food.get("Category", ""),
+            payload=food,
+        )
+    return index
 
 
 def similarity_score(name1: str, name2: str) -> float:
@@ -89,33 +93,31 @@ def similarity_score(name1: str, name2: str) -> float:
     return SequenceMatcher(None, norm1, norm2).ratio()
 
 
-def find_best_match(target_name: str, master_db: List[Dict], category_filter: Optional[str] = None) -> Optional[Dict]:
+def find_best_match(
+    target_name: str,
+    master_db: List[Dict],
+    category_filter: Optional[str] = None,
+    index: Optional[FoodNameIndex] = None
+) -> Optional[Dict]:
     """
     Find best matching food in master database.
     Returns the master DB entry with highest similarity score.
+    
+    Pass a prebuilt index (see build_master_index) when matching many foods;
+    otherwise one is built for this call.
     """
-    best_match = None
-    best_score = 0.0
     threshold = 0.6  # Minimum similarity threshold
     
-    for food in master_db:
-        master_name = food.get("Food Name", "")
-        master_category = food.get("Category", "")
-        
-        # Category filtering
-        if category_filter:
-            expected_master_category = MASTER_TO_FOOD_LIST_CATEGORY.get(category_filter)
-            if expected_master_category and master_category != expected_master_category:
-                # Skip if category doesn't match (unless no category filter)
-                continue
-        
-        score = similarity_score(target_name, master_name)
-        
-        if score > best_score and score >= threshold:
-            best_score = score
-            best_match = food
+    if index is None:
+        index = build_master_index(master_db)
+    
+    # Category filtering
+    group = None
+    if category_filter:
+        group = MASTER_TO_FOOD_LIST_CATEGORY.get(category_filter)
     
-    return best_match
+    match = index.best_match(target_name, threshold=threshold, group=group)
+    return match.payload if match else None
 
 
 def generate_food_id(display_name: str) -> str:
@@ -368,10 +370,13 @@ def populate_food_kb(db: Session, food_list_data: Dict, master_db_data: List[Dic
     
     unmatched_foods = []
     
+    # Index master database once for all lookups
+    master_index = build_master_index(master_db_data)
+    
     for food_name, category, subcategory in target_foods:
         try:
             # Find match in master database
-            master_match = find_best_match(food_name, master_db_data, category)
+            master_match = find_best_match(food_name, master_db_data, category, index=master_index)
             
             if not master_match:
                 unmatched_foods.append((food_name, category))
@@ -0,0 +1,4 @@
+"""
+Platform AI tests.
+Unit tests for the LLM gateway and AI interfaces.
+"""
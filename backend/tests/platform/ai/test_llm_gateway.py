@@ -0,0 +1,215 @@
+"""
+Tests for LLM Gateway.
+
+Unit tests for coalescing, concurrency limits, retries/fallback and usage
+accounting, using the local stub backend.
+"""
+import threading
+import time
+
+import pytest
+
+from app.platform.ai.gateway import (
+    LLMGateway,
+    LLMResponse,
+    StubLLMBackend,
+    get_llm_gateway,
+    reset_llm_gateways,
+)
+from app.platform.ai.gateway.llm_gateway import is_model_unavailable_error, is_rate_limit_error, is_retryable_error
+from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message=""):
+        super().__init__(f"Error code: {status_code} {message}")
+        self.status_code = status_code
+
+
+def make_gateway(responder=None, **kwargs):
+    kwargs.setdefault("backoff_base_seconds", 0)
+    backend = StubLLMBackend(responder)
+    return LLMGateway(backend, **kwargs), backend
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class TestCoalescing:
+    def test_identical_inflight_requests_share_one_call(self):
+        release = threading.Event()
+
+        def responder(request, model):
+            release.wait(5)
+            return '{"ok": true}'
+
+        gateway, backend = make_gateway(responder)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(gateway.complete(MESSAGES, model="m")))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(backend.calls) == 1
+        assert {r.content for r in results} == {'{"ok": true}'}
+        assert sum(r.coalesced for r in results) == 4
+        assert gateway.usage.snapshot()["models"]["m"]["coalesced"] == 4
+
+    def test_coalesce_disabled(self):
+        gateway, backend = make_gateway()
+        gateway.complete(MESSAGES, model="m", coalesce=False)
+        gateway.complete(MESSAGES, model="m", coalesce=False)
+        assert len(backend.calls) == 2
+
+
+class TestConcurrencyLimit:
+    def test_semaphore_bounds_upstream_calls(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def responder(request, model):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            return "{}"
+
+        gateway, _ = make_gateway(responder, max_concurrency=2)
+        threads = [
+            threading.Thread(target=gateway.complete, args=([{"role": "user", "content": str(i)}],), kwargs={"model": "m"})
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 2
+
+
+class TestRetriesAndFallback:
+    def test_transient_error_retried(self):
+        attempts = []
+
+        def responder(request, model):
+            attempts.append(model)
+            if len(attempts) < 3:
+                raise StatusError(429, "rate limited")
+            return "{}"
+
+        gateway, _ = make_gateway(responder, max_retries=2)
+        response = gateway.complete(MESSAGES, model="m")
+
+        assert response.model == "m"
+        assert attempts == ["m", "m", "m"]
+        assert gateway.usage.snapshot()["models"]["m"]["retries"] == 2
+
+    def test_falls_back_after_retries_exhausted(self):
+        def responder(request, model):
+            if model == "primary":
+                raise StatusError(503)
+            return "{}"
+
+        gateway, backend = make_gateway(responder, max_retries=1)
+        response = gateway.complete(MESSAGES, model="primary", fallback_models=["secondary"])
+
+        assert response.model == "secondary"
+        assert [model for model, _ in backend.calls] == ["primary", "primary", "secondary"]
+
+    def test_non_retryable_error_raised_unchanged(self):
+        error = StatusError(400, "tools not supported")
+
+        def responder(request, model):
+            raise error
+
+        gateway, backend = make_gateway(responder)
+        with pytest.raises(StatusError) as exc:
+            gateway.complete(MESSAGES, model="m", fallback_models=["n"])
+
+        assert exc.value is error
+        assert len(backend.calls) == 1
+
+    def test_unknown_model_falls_through_to_fallback(self):
+        def responder(request, model):
+            if model == "retired":
+                raise StatusError(404, "No endpoints found for retired")
+            return "ok"
+
+        gateway, backend = make_gateway(responder, max_retries=2)
+        response = gateway.complete(MESSAGES, model="retired", fallback_models=["current"])
+
+        assert response.model == "current"
+        assert [model for model, _ in backend.calls] == ["retired", "current"]
+
+    def test_unknown_model_error_raised_when_no_fallback_left(self):
+        error = StatusError(400, "retired is not a valid model ID")
+
+        def responder(request, model):
+            raise error
+
+        gateway, backend = make_gateway(responder)
+        with pytest.raises(StatusError) as exc:
+            gateway.complete(MESSAGES, model="retired", fallback_models=["also_retired"])
+
+        assert exc.value is error
+        assert len(backend.calls) == 2
+
+    def test_error_classification_uses_status_code(self):
+        unsupported = StatusError(400, "Unsupported parameter: 'temperature'")
+
+        assert not is_rate_limit_error(unsupported)
+        assert not is_retryable_error(unsupported)
+        assert is_rate_limit_error(StatusError(429))
+        assert is_retryable_error(StatusError(503, "generate failed"))
+        assert is_rate_limit_error(Exception("Rate limit exceeded"))
+        assert not is_rate_limit_error(Exception("could not generate"))
+        assert is_model_unavailable_error(StatusError(404))
+        assert is_model_unavailable_error(StatusError(400, "model x is not available"))
+        assert not is_model_unavailable_error(StatusError(400, "tools not supported"))
+
+
+class TestUsageAccounting:
+    def test_tokens_and_cost(self):
+        def responder(request, model):
+            return LLMResponse(content="{}", model=model, prompt_tokens=1000, completion_tokens=500)
+
+        gateway, _ = make_gateway(responder, prices={"m": (3.0, 15.0)})
+        gateway.complete(MESSAGES, model="m")
+
+        usage = gateway.usage.snapshot()
+        assert usage["models"]["m"]["prompt_tokens"] == 1000
+        assert usage["totals"]["cost_usd"] == pytest.approx(0.0105)
+
+
+class TestSharedGateway:
+    def test_stub_backend_setting(self, monkeypatch):
+        from app.config import settings
+
+        reset_llm_gateways()
+        monkeypatch.setattr(settings, "LLM_BACKEND", "stub")
+        try:
+            gateway = get_llm_gateway()
+            assert isinstance(gateway.backend, StubLLMBackend)
+            assert get_llm_gateway("any-key") is gateway
+        finally:
+            reset_llm_gateways()
+
+    def test_recipe_engine_uses_gateway(self):
+        recipe = '{"dish_name": "Poha", "ingredients": [], "cooking_steps": [], ' \
+                 '"approx_cooking_time_minutes": 10, "serving_instructions": ""}'
+        gateway, backend = make_gateway(lambda request, model: recipe)
+        engine = RecipeGenerationEngine(api_key="test-key", model="m", gateway=gateway)
+
+        assert engine._call_llm("prompt")["dish_name"] == "Poha"
+        model, request = backend.calls[0]
+        assert model == "m"
+        assert request.response_format == {"type": "json_object"}
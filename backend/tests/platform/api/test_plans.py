@@ -5,7 +5,11 @@ import uuid
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
 
+from app.platform.api.plans import plans as plans_module
+from app.platform.core.orchestration.meal_plan_store import MealPlanStore
 from app.platform.data.repositories.platform_assessment_repository import PlatformAssessmentRepository
+from app.platform.data.repositories.platform_diet_plan_repository import PlatformDietPlanRepository
+from app.platform.engines.food_engine.nutrient_matrix import NutrientMatrix
 from app.platform.data.repositories.platform_mnt_constraint_repository import PlatformMNTConstraintRepository
 from app.platform.data.repositories.platform_nutrition_target_repository import PlatformNutritionTargetRepository
 
@@ -57,3 +61,55 @@ class TestGeneratePlan:
         )
         assert response.status_code == 404
 
+
+class TestPlanAnalysis:
+    FOODS = [
+        {"food_id": "rice", "nutrition": {"calories": 350, "macros": {"protein_g": 7, "carbs_g": 78, "fat_g": 1, "fiber_g": 2}}},
+        {"food_id": "dal", "nutrition": {"calories": 340, "macros": {"protein_g": 24, "carbs_g": 60, "fat_g": 1.5, "fiber_g": 10}}},
+    ]
+
+    @staticmethod
+    def _days(num_days):
+        return {
+            f"day_{n}": {"day_number": n, "meals": {
+                "lunch": {"allocated_foods": [
+                    {"food_id": "rice", "quantity_g": 100.0},
+                    {"food_id": "dal", "quantity_g": 50.0},
+                ]},
+            }}
+            for n in range(1, num_days + 1)
+        }
+
+    def test_persisted_plan_is_analyzed(self, platform_client: TestClient, create_test_client, platform_db: Session, monkeypatch):
+        """Stored plans keep their days under seven_day_plan / meal_allocation."""
+        monkeypatch.setattr(plans_module, "get_nutrient_matrix", lambda db: NutrientMatrix.from_foods(self.FOODS))
+        client = create_test_client(name="Plan Client")
+        assessment = PlatformAssessmentRepository(platform_db).create({
+            "client_id": client.id,
+            "assessment_snapshot": {},
+            "assessment_status": "draft",
+        })
+        plan = PlatformDietPlanRepository(platform_db).create({
+            "client_id": client.id,
+            "assessment_id": assessment.id,
+            "plan_version": 1,
+            "status": "draft",
+        })
+        store = MealPlanStore(platform_db)
+
+        store.save_meal_plan(plan.id, {"meal_allocation": {"days": self._days(2)}})
+        response = platform_client.get(f"/api/v1/platform/plans/{plan.id}/analysis")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["num_days"] == 2
+        assert data["plan"]["totals"]["calories"] == 2 * (350 + 170)
+
+        store.save_meal_plan(plan.id, {
+            "meal_allocation": {"days": self._days(2)},
+            "seven_day_plan": {"days": self._days(3)},
+        })
+        data = platform_client.get(f"/api/v1/platform/plans/{plan.id}/analysis").json()
+
+        assert data["num_days"] == 3
+        assert data["missing_foods"] == []
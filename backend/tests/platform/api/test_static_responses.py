@@ -0,0 +1,107 @@
+"""
+Tests for Static Responses.
+
+Unit tests for pre-encoded, ETag-cached quiz and KB endpoints.
+"""
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi import Request
+
+from app.platform.api.quizzes import quizzes
+from app.platform.api.static_responses import StaticResponseCache, static_responses
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def call(endpoint, headers=None):
+    return asyncio.run(endpoint(make_request(headers)))
+
+
+@pytest.fixture(autouse=True)
+def empty_static_responses():
+    static_responses.clear()
+    yield
+    static_responses.clear()
+
+
+class TestQuizEndpoints:
+    def test_payload_unchanged(self):
+        response = call(quizzes.get_gut_health_quiz_questions)
+
+        assert response.status_code == 200
+        questions = json.loads(response.body)["questions"]
+        assert questions == quizzes._build_gut_health_quiz_questions().model_dump()["questions"]
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        assert response.headers["etag"].startswith('"')
+
+    def test_if_none_match_returns_304(self):
+        endpoint = quizzes.get_ayurveda_assessment_questions
+        etag = call(endpoint).headers["etag"]
+
+        second = call(endpoint, {"If-None-Match": etag})
+        stale = call(endpoint, {"If-None-Match": '"old"'})
+
+        assert second.status_code == 304
+        assert second.body == b""
+        assert second.headers["etag"] == etag
+        assert stale.status_code == 200
+
+    def test_gzip_representation(self):
+        endpoint = quizzes.get_ayurveda_assessment_questions
+        response = call(endpoint, {"Accept-Encoding": "gzip, br;q=0"})
+        identity = call(endpoint, {"Accept-Encoding": "identity"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in identity.headers
+        assert response.headers["etag"] != identity.headers["etag"]
+        assert gzip.decompress(response.body) == identity.body
+        # Either representation's ETag validates
+        assert call(endpoint, {"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+class TestStaticResponseCache:
+    def test_built_once_per_version(self):
+        cache = StaticResponseCache()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {"items": [1, 2, 3]}
+
+        first = cache.get("x", build, version=1)
+        assert cache.get("x", build, version=1) is first
+        assert len(builds) == 1
+
+        assert cache.get("x", build, version=2) is not first
+        assert len(builds) == 2
+
+    def test_encoding_matches_json_response(self):
+        cache = StaticResponseCache(compress_min_bytes=0)
+        payload = cache.get("x", lambda: {"name": "Pitta – fire", "n": 1})
+
+        assert payload.body == json.dumps(
+            {"name": "Pitta – fire", "n": 1}, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        assert gzip.decompress(payload.gzip_body) == payload.body
+
+    def test_small_bodies_not_compressed(self):
+        payload = StaticResponseCache(compress_min_bytes=1024).get("x", lambda: [])
+        assert payload.gzip_body is None
+
+    def test_weak_and_star_validators(self):
+        cache = StaticResponseCache()
+        respond = lambda headers=None: cache.respond(make_request(headers), "x", lambda: {"a": 1})
+        etag = respond().headers["etag"]
+
+        assert respond({"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+        assert respond({"If-None-Match": "*"}).status_code == 304
@@ -0,0 +1,158 @@
+"""
+Tests for Streaming Responses.
+
+Unit tests for NDJSON/SSE plan events and per-day recipe stage streaming.
+"""
+import asyncio
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.platform.api.streaming import encode_event, stream_response
+from app.platform.core.context import ExchangeContext, InterventionContext, MealStructureContext
+from app.platform.core.orchestration.engine_pool import EnginePool
+from app.platform.core.orchestration.ncp_orchestrator import NCPOrchestrator
+from app.platform.core.orchestration.plan_stream import run_to_completion
+from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
+from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+
+MEALS = ["breakfast", "lunch"]
+
+
+def read_body(response):
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+    return b"".join(asyncio.run(collect())).decode()
+
+
+def parse_ndjson(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def events(*items, fail=None):
+    for item in items:
+        yield item
+    if fail is not None:
+        raise fail
+    return "done"
+
+
+class RecordingRecipeEngine(RecipeGenerationEngine):
+    def __init__(self):
+        super().__init__(api_key="test", gateway=object())
+        self.calls = []
+
+    def generate_recipe_for_meal(self, meal_name, meal_data, day_name, **kwargs):
+        self.calls.append((day_name, meal_name))
+        return {
+            "meal_name": meal_name,
+            "recipe": {"dish_name": f"{meal_name} dish"},
+            "allocated_foods": meal_data.get("allocated_foods", []),
+            "validation": {"is_valid": meal_name != "lunch", "validation_failed": meal_name == "lunch"},
+        }
+
+
+def make_orchestrator(recipe_engine):
+    orchestrator = NCPOrchestrator(db=None, client_id=uuid4(), engine_pool=EnginePool({}))
+    orchestrator.meal_allocation_engine = MealAllocationEngine()
+    orchestrator.recipe_generation_engine = recipe_engine
+    return orchestrator
+
+
+def recipe_stage_args():
+    assessment_id = uuid4()
+    intervention = InterventionContext(
+        assessment_id=assessment_id,
+        client_id=uuid4(),
+        meal_plan={
+            "category_wise_foods": {
+                "cereal": [{"food_id": f"cereal_{i}", "display_name": f"Cereal {i}"} for i in range(5)]
+            }
+        },
+    )
+    exchange = ExchangeContext(
+        assessment_id=assessment_id,
+        exchanges_per_meal={meal: {"cereal": 1} for meal in MEALS},
+        per_meal_targets={},
+    )
+    meal_structure = MealStructureContext(
+        assessment_id=assessment_id,
+        meal_count=2,
+        meals=MEALS,
+        timing_windows={},
+        energy_weight={meal: 0.5 for meal in MEALS},
+    )
+    return intervention, exchange, meal_structure, None, None
+
+
+class TestEncodeEvent:
+    def test_ndjson_line(self):
+        plan_id = uuid4()
+
+        line = encode_event("summary", {"plan_id": plan_id}, "ndjson")
+
+        assert line.endswith(b"\n") and line.count(b"\n") == 1
+        assert json.loads(line) == {"event": "summary", "data": {"plan_id": str(plan_id)}}
+
+    def test_sse_message(self):
+        message = encode_event("recipe", {"day_key": "day_1"}, "sse").decode()
+
+        assert message == 'event: recipe\ndata: {"day_key":"day_1"}\n\n'
+
+
+class TestStreamResponse:
+    def test_streams_events_in_order(self):
+        response = stream_response(events(("stage", {"stage": "mnt"}), ("summary", {"ok": True})), "ndjson")
+
+        assert response.media_type == "application/x-ndjson"
+        assert response.headers["cache-control"] == "no-cache"
+        assert [event["event"] for event in parse_ndjson(read_body(response))] == ["stage", "summary"]
+
+    def test_error_before_first_event_is_raised(self):
+        with pytest.raises(HTTPException) as exc_info:
+            stream_response(events(fail=HTTPException(status_code=404, detail="Assessment not found")), "sse")
+
+        assert exc_info.value.status_code == 404
+
+    def test_error_after_start_becomes_error_event(self):
+        response = stream_response(events(("recipe", {"day_key": "day_1"}), fail=RuntimeError("LLM timeout")), "ndjson")
+
+        body = parse_ndjson(read_body(response))
+
+        assert body[-1] == {"event": "error", "data": {"status_code": 500, "detail": "LLM timeout"}}
+
+
+class TestRecipeStageStream:
+    def test_days_are_yielded_as_they_complete(self):
+        recipe_engine = RecordingRecipeEngine()
+        stream = make_orchestrator(recipe_engine).stream_recipe_stage(*recipe_stage_args())
+
+        event, data = next(stream)
+        assert (event, data["day_key"]) == ("allocation", "day_1")
+        assert recipe_engine.calls == []  # Allocation is sent before any LLM call
+
+        event, data = next(stream)
+        assert (event, data["day_key"]) == ("recipe", "day_1")
+        assert len(recipe_engine.calls) == len(MEALS)
+
+        remaining = [(event, data["day_key"]) for event, data in stream]
+        assert remaining[-2:] == [("allocation", "day_7"), ("recipe", "day_7")]
+
+    def test_result_matches_batch_generation(self):
+        recipe_engine = RecordingRecipeEngine()
+
+        recipe_context = run_to_completion(make_orchestrator(recipe_engine).stream_recipe_stage(*recipe_stage_args()))
+        result = recipe_context.meals_with_recipes
+
+        intervention, exchange, meal_structure, _, _ = recipe_stage_args()
+        allocation = MealAllocationEngine().allocate_meal_plan(
+            exchange, meal_structure, intervention.meal_plan, num_days=7,
+            start_date=datetime.fromisoformat(result["start_date"]),
+        )
+        assert result == RecordingRecipeEngine().generate_recipes_for_meal_plan(allocation)
+        assert result["summary"] == {
+            "total_meals": 14, "successful_recipes": 7, "failed_recipes": 7, "validation_failures": 7
+        }
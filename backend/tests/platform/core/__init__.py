@@ -0,0 +1,5 @@
+"""
+Platform core tests.
+Unit tests for contracts, context and orchestration helpers.
+"""
+
@@ -0,0 +1,128 @@
+"""
+Tests for Engine Contract Validator.
+
+Unit tests for compiled contract plans and validation modes.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.platform.core.contracts import DiagnosisEngineInput, TargetEngineOutput
+from app.platform.core.contracts.validator import (
+    ContractValidationError,
+    EngineContractValidator,
+    ValidationMode,
+    contract_validation_mode,
+    get_validation_mode,
+    set_validation_mode,
+)
+
+
+@dataclass
+class SampleContract:
+    assessment_id: UUID
+    names: List[str]
+    scores: Dict[str, float]
+    note: Optional[str] = None
+    anything: Any = None
+    nested: Optional[List[Optional[int]]] = None
+
+
+TYPES = [
+    UUID, str, int, Any,
+    Optional[str], Optional[int], Optional[Dict[str, Any]],
+    List[str], List[int], List[Any], List[Optional[int]], Optional[List[str]],
+    Dict[str, Any], Dict[str, int],
+    Union[int, str],
+]
+
+VALUES = [
+    None, "x", 1, 1.5, True, uuid4(), [], ["a"], [1, 2], [1, None], ["a", 1],
+    {}, {"a": 1}, object(),
+]
+
+
+@pytest.fixture(autouse=True)
+def full_mode():
+    set_validation_mode("full", sample_rate=0.1)
+    yield
+    set_validation_mode("full", sample_rate=0.1)
+
+
+class TestCompiledPlan:
+    @pytest.mark.parametrize("expected_type", TYPES, ids=str)
+    def test_compiled_predicate_matches_check_type(self, expected_type):
+        check = EngineContractValidator._compile_type(expected_type)
+        for value in VALUES:
+            assert check(value) == EngineContractValidator._check_type(value, expected_type), value
+
+    def test_plan_is_cached(self):
+        plan = EngineContractValidator.compile_contract(SampleContract)
+        assert EngineContractValidator.compile_contract(SampleContract) is plan
+        assert [(f.name, f.required) for f in plan][:4] == [
+            ("assessment_id", True), ("names", True), ("scores", True), ("note", False),
+        ]
+
+    def test_valid_data(self):
+        data = {"assessment_id": uuid4(), "names": ["a"], "scores": {}, "nested": [1, None]}
+        assert EngineContractValidator.validate_input(SampleContract, data, "Test")
+
+    def test_missing_and_invalid_fields(self):
+        data = {"assessment_id": "not-a-uuid", "names": [1]}
+        with pytest.raises(ContractValidationError) as exc:
+            EngineContractValidator.validate_input(SampleContract, data, "Test")
+        message = str(exc.value)
+        assert "Missing required fields: scores" in message
+        assert "assessment_id: expected" in message
+        assert "names: expected" in message
+
+    def test_real_contracts(self):
+        assert EngineContractValidator.validate_input(
+            DiagnosisEngineInput, {"assessment_id": uuid4(), "assessment_snapshot": {}}, "DiagnosisEngine"
+        )
+        with pytest.raises(ContractValidationError):
+            EngineContractValidator.validate_output(TargetEngineOutput, {}, "TargetEngine")
+
+
+class TestValidationModes:
+    def test_off_skips_validation(self):
+        with contract_validation_mode("off"):
+            assert EngineContractValidator.validate_input(SampleContract, {}, "Test")
+        with pytest.raises(ContractValidationError):
+            EngineContractValidator.validate_input(SampleContract, {}, "Test")
+
+    def test_sampled_mode(self):
+        with contract_validation_mode("sampled", sample_rate=0.0):
+            assert EngineContractValidator.validate_input(SampleContract, {}, "Test")
+        with contract_validation_mode("sampled", sample_rate=1.0):
+            with pytest.raises(ContractValidationError):
+                EngineContractValidator.validate_input(SampleContract, {}, "Test")
+
+    def test_sampled_override_uses_configured_rate(self, monkeypatch):
+        set_validation_mode("full", sample_rate=0.25)
+        draws = iter([0.1, 0.5, 0.9, 0.2])
+        monkeypatch.setattr("app.platform.core.contracts.validator.random.random", lambda: next(draws))
+
+        validated = 0
+        with contract_validation_mode("sampled"):
+            assert get_validation_mode() == (ValidationMode.SAMPLED, 0.25)
+            for _ in range(4):
+                try:
+                    EngineContractValidator.validate_input(SampleContract, {}, "Test")
+                except ContractValidationError:
+                    validated += 1
+
+        assert validated == 2
+
+    def test_process_default_and_override(self):
+        set_validation_mode("off")
+        assert get_validation_mode()[0] is ValidationMode.OFF
+        with contract_validation_mode("full"):
+            assert get_validation_mode() == (ValidationMode.FULL, 1.0)
+        assert get_validation_mode()[0] is ValidationMode.OFF
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            set_validation_mode("sometimes")
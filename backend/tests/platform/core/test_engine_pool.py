@@ -0,0 +1,120 @@
+"""
+Tests for Engine Pool.
+
+Unit tests for shared engine construction and lazy orchestrator engines.
+"""
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.platform.core.context import ExchangeContext, MealStructureContext
+from app.platform.core.orchestration.engine_pool import EnginePool
+from app.platform.core.orchestration.ncp_orchestrator import NCPOrchestrator
+from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
+
+
+class CountingFactory:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+class TestEnginePool:
+    def test_engine_built_once(self):
+        factory = CountingFactory()
+        pool = EnginePool({"food_engine": factory})
+
+        assert not pool.is_built("food_engine")
+        assert pool.get("food_engine") is pool.get("food_engine")
+        assert factory.calls == 1
+
+    def test_concurrent_first_use_builds_once(self):
+        factory = CountingFactory()
+        pool = EnginePool({"food_engine": factory})
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pool.get("food_engine"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert factory.calls == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_failed_factory_not_cached(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            raise ValueError("OPENROUTER_API_KEY not configured")
+
+        pool = EnginePool({"recipe_generation_engine": factory, "mnt_engine": CountingFactory()})
+
+        assert pool.warm() == ["mnt_engine"]
+        with pytest.raises(ValueError):
+            pool.get("recipe_generation_engine")
+        assert len(attempts) == 2
+
+    def test_unknown_engine(self):
+        with pytest.raises(KeyError):
+            EnginePool({}).get("missing")
+
+
+class TestOrchestratorEngines:
+    def test_engines_resolved_lazily_and_shared(self):
+        factory = CountingFactory()
+        pool = EnginePool({"diagnosis_engine": factory})
+
+        first = NCPOrchestrator(db=None, client_id=uuid4(), engine_pool=pool)
+        second = NCPOrchestrator(db=None, client_id=uuid4(), engine_pool=pool)
+        assert factory.calls == 0
+
+        assert first.diagnosis_engine is second.diagnosis_engine
+        assert factory.calls == 1
+
+    def test_assignment_overrides_pooled_engine(self):
+        pool = EnginePool({"food_engine": CountingFactory()})
+        orchestrator = NCPOrchestrator(db=None, client_id=uuid4(), engine_pool=pool)
+        replacement = object()
+
+        orchestrator.food_engine = replacement
+
+        assert orchestrator.food_engine is replacement
+        assert not pool.is_built("food_engine")
+
+
+class TestMealAllocationEngineRuns:
+    def test_runs_do_not_share_variety_state(self):
+        engine = MealAllocationEngine()
+        assessment_id = uuid4()
+        exchange_context = ExchangeContext(
+            assessment_id=assessment_id,
+            exchanges_per_meal={"breakfast": {"cereal": 1}},
+            per_meal_targets={"breakfast": {"calories": 100}},
+        )
+        meal_structure = MealStructureContext(
+            assessment_id=assessment_id,
+            meal_count=1,
+            meals=["breakfast"],
+            timing_windows={},
+            energy_weight={"breakfast": 1.0},
+        )
+        foods = {
+            "category_wise_foods": {
+                "cereal": [
+                    {"food_id": f"food_{i}", "display_name": f"Food {i}", "ranking": {"rank": i}}
+                    for i in range(1, 4)
+                ]
+            }
+        }
+        start = datetime(2025, 1, 6)
+
+        first = engine.allocate_meal_plan(exchange_context, meal_structure, foods, num_days=3, start_date=start)
+        second = engine.allocate_meal_plan(exchange_context, meal_structure, foods, num_days=3, start_date=start)
+
+        assert first == second
@@ -0,0 +1,222 @@
+"""
+Tests for KB Hot Reload.
+
+Unit tests for checksum change detection, the off-to-the-side rebuild,
+the atomic version swap and pinning of in-flight requests to a KB version.
+"""
+import json
+import threading
+import time
+from types import ModuleType
+
+import pytest
+
+from app.platform.core.orchestration.engine_pool import EnginePool
+from app.platform.core.orchestration.kb_manager import KBManager, _shadow_load
+from app.platform.core.orchestration.ncp_orchestrator import _pins_kb
+from app.platform.engines.mnt_engine import kb_mnt_rules
+from app.platform.knowledge_base.kb_snapshot import get_pinned_kb_snapshot, use_kb_snapshot
+
+RULES_MODULE_SOURCE = '''
+import json
+
+from app.platform.knowledge_base.kb_snapshot import versioned_kb_loader
+
+_RULES_CACHE = None
+
+
+@versioned_kb_loader
+def _load_rules():
+    global _RULES_CACHE
+    if _RULES_CACHE is not None:
+        return _RULES_CACHE
+    with open(KB_PATH, encoding="utf-8") as f:
+        _RULES_CACHE = json.load(f)
+    return _RULES_CACHE
+
+
+def get_rules():
+    return _load_rules()
+'''
+
+
+def write_rules(path, rules):
+    path.write_text(json.dumps(rules), encoding="utf-8")
+
+
+@pytest.fixture
+def kb_file(tmp_path):
+    (tmp_path / "rules").mkdir()
+    path = tmp_path / "rules" / "rules_kb.json"
+    write_rules(path, [{"rule_id": "r1"}])
+    return path
+
+
+@pytest.fixture
+def rules_module(kb_file):
+    """KB module in the style of kb_mnt_rules, reading kb_file."""
+    module = ModuleType("kb_test_rules")
+    module.KB_PATH = str(kb_file)
+    exec(compile(RULES_MODULE_SOURCE, "kb_test_rules", "exec"), module.__dict__)
+    return module
+
+
+@pytest.fixture
+def pool():
+    return EnginePool({
+        "diagnosis_engine": lambda: object(),
+        "recipe_generation_engine": lambda: object(),
+    })
+
+
+@pytest.fixture
+def manager(tmp_path, rules_module, pool):
+    manager = KBManager(base_path=tmp_path, modules=[rules_module], engine_pool=pool)
+    yield manager
+    manager.stop_polling()
+
+
+class TestChangeDetection:
+    def test_unchanged_kb_is_not_reloaded(self, manager):
+        result = manager.reload()
+
+        assert (result["version"], result["reloaded"], result["changed"]) == (1, False, [])
+        assert manager.version == 1
+
+    def test_changed_file_is_detected_by_content(self, manager, kb_file):
+        manager.current()
+
+        write_rules(kb_file, [{"rule_id": "r1"}, {"rule_id": "r2"}])
+
+        assert manager.check() == ["rules/rules_kb.json"]
+
+    def test_rewrite_with_same_content_is_not_a_change(self, manager, kb_file):
+        manager.current()
+
+        time.sleep(0.01)
+        write_rules(kb_file, [{"rule_id": "r1"}])
+
+        assert manager.check() == []
+
+
+class TestSwap:
+    def test_new_version_replaces_module_cache(self, manager, rules_module, kb_file):
+        assert rules_module.get_rules() == [{"rule_id": "r1"}]
+        assert manager.version == 1
+
+        write_rules(kb_file, [{"rule_id": "r2"}])
+        result = manager.reload()
+
+        assert (result["version"], result["reloaded"]) == (2, True)
+        assert result["changed"] == ["rules/rules_kb.json"]
+        assert rules_module.get_rules() == [{"rule_id": "r2"}]
+        assert manager.current().loaded["kb_test_rules._load_rules"] is rules_module._RULES_CACHE
+
+    def test_pinned_snapshot_keeps_its_version(self, manager, rules_module, kb_file):
+        started_on = manager.current()
+
+        write_rules(kb_file, [{"rule_id": "r2"}])
+        manager.reload()
+
+        with use_kb_snapshot(started_on):
+            assert rules_module.get_rules() == [{"rule_id": "r1"}]
+        assert rules_module.get_rules() == [{"rule_id": "r2"}]
+
+    def test_broken_kb_is_rejected_and_not_retried(self, manager, rules_module, kb_file):
+        manager.current()
+        live = rules_module._RULES_CACHE
+
+        kb_file.write_text("{", encoding="utf-8")
+        result = manager.reload()
+
+        assert not result["reloaded"]
+        assert "kb_test_rules._load_rules" in result["failed"]
+        assert manager.version == 1
+        assert rules_module._RULES_CACHE is live
+        assert manager.reload()["failed"] == result["failed"]
+
+        write_rules(kb_file, [{"rule_id": "r3"}])
+        assert manager.reload()["version"] == 2
+
+    def test_kb_engines_are_rebuilt_and_held_engines_kept(self, manager, pool, kb_file):
+        held = pool.get("diagnosis_engine")
+        pool.get("recipe_generation_engine")
+        manager.current()
+
+        write_rules(kb_file, [{"rule_id": "r2"}])
+        manager.reload()
+
+        assert pool.is_built("diagnosis_engine")
+        assert pool.get("diagnosis_engine") is not held
+        assert not pool.is_built("recipe_generation_engine")
+
+    def test_forced_reload_and_listeners(self, manager):
+        digest = manager.current().digest
+        swapped = []
+        manager.add_listener(lambda snapshot: swapped.append(snapshot.version))
+
+        result = manager.reload(force=True)
+
+        assert result["reloaded"]
+        assert swapped == [2]
+        # Same content: same digest across versions (and processes)
+        assert manager.current().digest == digest
+
+
+class TestShadowLoad:
+    def test_real_kb_module_loads_without_touching_live_cache(self):
+        live = kb_mnt_rules._load_mnt_rules()
+
+        caches, loaded, failed = _shadow_load(kb_mnt_rules)
+
+        assert failed == {}
+        assert kb_mnt_rules._MNT_RULES_CACHE is live
+        assert caches["_MNT_RULES_CACHE"] is not live
+        assert caches["_MNT_RULES_CACHE"] == live
+        assert loaded["app.platform.engines.mnt_engine.kb_mnt_rules._load_mnt_rules"] is caches["_MNT_RULES_CACHE"]
+
+
+class TestPinning:
+    class Run:
+        def __init__(self, snapshot):
+            self.kb_snapshot = snapshot
+
+        @_pins_kb
+        def stage(self):
+            return get_pinned_kb_snapshot()
+
+        @_pins_kb
+        def stream(self):
+            yield get_pinned_kb_snapshot()
+            yield get_pinned_kb_snapshot()
+            return "done"
+
+    def test_stage_runs_pinned(self, manager):
+        snapshot = manager.current()
+
+        assert self.Run(snapshot).stage() is snapshot
+        assert get_pinned_kb_snapshot() is None
+
+    def test_stream_is_pinned_only_while_producing(self, manager):
+        snapshot = manager.current()
+        stream = self.Run(snapshot).stream()
+
+        assert next(stream) is snapshot
+        assert get_pinned_kb_snapshot() is None
+        assert next(stream) is snapshot
+        with pytest.raises(StopIteration) as done:
+            next(stream)
+        assert done.value.value == "done"
+
+
+class TestPolling:
+    def test_polling_picks_up_changes(self, manager, rules_module, kb_file):
+        manager.current()
+        swapped = threading.Event()
+        manager.add_listener(lambda snapshot: swapped.set())
+
+        manager.start_polling(0.01)
+        write_rules(kb_file, [{"rule_id": "r2"}])
+
+        assert swapped.wait(5)
+        assert rules_module.get_rules() == [{"rule_id": "r2"}]
@@ -0,0 +1,73 @@
+"""
+Tests for Pre-fork KB Preload.
+
+Unit tests for KB preloading, gc.freeze() and process memory reporting.
+"""
+import gc
+import os
+
+import pytest
+
+from app.platform.core.orchestration import kb_preload
+from app.platform.core.orchestration.engine_pool import EnginePool
+from app.platform.engines.mnt_engine import kb_mnt_rules
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    built = []
+    pool = EnginePool({"diagnosis_engine": lambda: built.append("diagnosis_engine") or object()})
+    monkeypatch.setattr(kb_preload, "engine_pool", pool)
+    return pool
+
+
+class TestPreload:
+    def test_loads_json_kbs_engines_and_templates(self, pool, monkeypatch):
+        monkeypatch.setattr(kb_mnt_rules, "_MNT_RULES_CACHE", None)
+
+        result = kb_preload.preload_kb()
+
+        assert result["failed"] == {}
+        assert "kb_mnt_rules._load_mnt_rules" in result["loaded"]
+        assert "kb_ayurveda._load_prakriti_scoring" in result["loaded"]
+        assert {"engine_pool", "recipe_templates"} <= set(result["loaded"])
+        assert kb_mnt_rules._MNT_RULES_CACHE is not None
+        assert pool.is_built("diagnosis_engine")
+
+    def test_loader_discovery_covers_every_kb_module(self):
+        modules = {name.split(".")[0] for name, _ in kb_preload._kb_loaders()}
+
+        assert modules == {module.__name__.rsplit(".", 1)[-1] for module in kb_preload.KB_MODULES}
+
+    def test_failures_are_reported_not_raised(self, pool, monkeypatch):
+        def broken():
+            raise ValueError("bad KB")
+        monkeypatch.setattr(kb_preload, "_kb_loaders", lambda: [("broken", broken)])
+
+        result = kb_preload.preload_kb()
+
+        assert result["failed"] == {"broken": "bad KB"}
+        assert "engine_pool" in result["loaded"]
+
+
+class TestMemory:
+    def test_freeze_moves_objects_to_permanent_generation(self):
+        try:
+            assert kb_preload.freeze_shared_memory() > 0
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="Linux smaps_rollup only")
+    def test_process_memory_on_linux(self):
+        memory = kb_preload.get_process_memory()
+
+        assert memory["rss"] > 0
+        assert memory["shared"] + memory["private"] == pytest.approx(memory["rss"], abs=1.0)
+
+    def test_report_logs_memory(self, caplog):
+        with caplog.at_level("INFO", logger=kb_preload.__name__):
+            memory = kb_preload.report_process_memory("worker")
+
+        assert memory
+        assert f"Memory (worker, pid {os.getpid()})" in caplog.text
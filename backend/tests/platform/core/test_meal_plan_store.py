@@ -0,0 +1,342 @@
+"""
+Tests for Meal Plan Store.
+
+Unit tests for chunked per-day meal plan storage with food references
+and delta-encoded plan versions.
+"""
+import copy
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.config import settings
+from app.platform.core.context import ExchangeContext, MealStructureContext
+from app.platform.core.orchestration.meal_plan_store import (
+    DELTA_FORMAT,
+    SNAPSHOT_REF_KEY,
+    STORAGE_FORMAT_KEY,
+    MealPlanStore,
+    apply_meal_plan_delta,
+    assemble_meal_plan,
+    diff_meal_plans,
+    is_chunked,
+    split_meal_plan,
+)
+from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
+
+MEALS = ["breakfast", "lunch", "dinner"]
+
+
+def ranked_food(category, i):
+    return {
+        "food_id": f"{category}_{i}",
+        "display_name": f"{category.title()} {i}",
+        "exchange_category": category,
+        "serving_size_per_exchange_g": 30.0,
+        "nutrition": {
+            "calories": 340.0,
+            "macros": {"protein_g": 10.0, "carbs_g": 60.0, "fat_g": 4.0, "fiber_g": 6.0},
+            "micros": {"sodium_mg": 12.0},
+        },
+        "ranking": {
+            "total_score": 90.0 - i,
+            "tier_scores": {
+                "medical_safety": 160.0, "nutrition_alignment": 27.0 - i, "ayurveda_alignment": 50.0,
+                "variety": 50.0, "preferences": 0.0, "practical": 8.0,
+            },
+            "ranking_factors": {
+                "condition_safe_tags": ["diabetes"], "safe_compatibility": 1, "mnt_compliance_flags": 1,
+                "moderate_protein_density": 2.6, "moderate_fiber": 3.0, "standard_serving_size": True,
+            },
+            "rank": i + 1,
+        },
+    }
+
+
+def make_meal_plan(num_days=28):
+    assessment_id = uuid4()
+    food_engine_output = {
+        "category_wise_foods": {
+            category: [ranked_food(category, i) for i in range(8)]
+            for category in ("cereal", "pulse", "vegetable")
+        }
+    }
+    allocation = MealAllocationEngine().allocate_meal_plan(
+        exchange_context=ExchangeContext(
+            assessment_id=assessment_id,
+            exchanges_per_meal={meal: {"cereal": 2, "pulse": 1, "vegetable": 1} for meal in MEALS},
+            per_meal_targets={meal: {"calories": 500} for meal in MEALS},
+        ),
+        meal_structure=MealStructureContext(
+            assessment_id=assessment_id,
+            meal_count=3,
+            meals=MEALS,
+            timing_windows={},
+            energy_weight={meal: 1 / 3 for meal in MEALS},
+        ),
+        food_engine_output=food_engine_output,
+        num_days=num_days,
+        start_date=datetime(2025, 1, 6),
+    )
+    for day in allocation["days"].values():
+        for meal in day["meals"].values():
+            meal["recipe"] = {"dish_name": "Khichdi", "cooking_steps": ["Cook"]}
+    return {**food_engine_output, "seven_day_plan": {**allocation, "summary": {"total_meals": 3 * num_days}}}
+
+
+class FakeDayRepo:
+    def __init__(self):
+        self.rows_by_plan = {}
+        self.calls = []
+
+    @property
+    def rows(self):
+        return [row for rows in self.rows_by_plan.values() for row in rows]
+
+    def get_by_plan_id(self, plan_id, day_from=None, day_to=None):
+        self.calls.append((day_from, day_to))
+        return [
+            row for row in self.rows_by_plan.get(plan_id, [])
+            if (day_from is None or row.day_number >= day_from) and (day_to is None or row.day_number <= day_to)
+        ]
+
+    def replace_for_plan(self, plan_id, days):
+        self.rows_by_plan[plan_id] = sorted((SimpleNamespace(**day) for day in days), key=lambda row: row.day_number)
+        return len(days)
+
+    def delete_by_plan_id(self, plan_id):
+        return len(self.rows_by_plan.pop(plan_id, []))
+
+
+class FakePlanRepo:
+    def __init__(self):
+        self.assessment_id = uuid4()
+        self.plans = {}
+        self.plan = self.add_version()
+
+    def add_version(self):
+        version = len(self.plans) + 1
+        plan = SimpleNamespace(
+            id=uuid4(), assessment_id=self.assessment_id, plan_version=version,
+            meal_plan=None, explanations=None, base_plan_id=None,
+        )
+        self.plans[plan.id] = plan
+        return plan
+
+    def get_by_id(self, plan_id):
+        return self.plans.get(plan_id)
+
+    def get_previous_version(self, assessment_id, plan_version):
+        earlier = [plan for plan in self.plans.values() if plan.plan_version < plan_version]
+        return max(earlier, key=lambda plan: plan.plan_version) if earlier else None
+
+    def get_by_base_plan_id(self, base_plan_id):
+        return [plan for plan in self.plans.values() if plan.base_plan_id == base_plan_id]
+
+    def update(self, plan_id, data):
+        plan = self.plans[plan_id]
+        for key, value in data.items():
+            setattr(plan, key, value)
+        return plan
+
+    def delete(self, plan_id):
+        return self.plans.pop(plan_id, None) is not None
+
+
+def make_store():
+    return MealPlanStore(db=None, plan_repo=FakePlanRepo(), day_repo=FakeDayRepo())
+
+
+def edit_recipe(meal_plan, day_key, meal, dish_name):
+    edited = copy.deepcopy(meal_plan)
+    edited["seven_day_plan"]["days"][day_key]["meals"][meal]["recipe"] = {"dish_name": dish_name}
+    return edited
+
+
+class TestSplitAndAssemble:
+    def test_round_trip(self):
+        meal_plan = make_meal_plan()
+        original = copy.deepcopy(meal_plan)
+
+        header, rows = split_meal_plan(meal_plan)
+
+        assert assemble_meal_plan(header, [(row["day_key"], row["payload"]) for row in rows]) == original
+        assert meal_plan == original  # Input not modified
+        assert is_chunked(header)
+        assert "days" not in header["seven_day_plan"]
+        assert [row["day_number"] for row in rows] == list(range(1, 29))
+
+    def test_allocated_foods_reference_snapshot(self):
+        header, rows = split_meal_plan(make_meal_plan(num_days=1))
+        food = rows[0]["payload"]["meals"]["breakfast"]["allocated_foods"][0]
+
+        assert food[SNAPSHOT_REF_KEY] is True
+        assert "ranking" not in food and "display_name" not in food
+        assert food["quantity_g"] > 0  # Portion data is kept
+
+    def test_foods_not_matching_snapshot_stay_inline(self):
+        meal_plan = make_meal_plan(num_days=1)
+        foods = meal_plan["seven_day_plan"]["days"]["day_1"]["meals"]["lunch"]["allocated_foods"]
+        foods[0]["display_name"] = "Edited name"
+        foods.append({"food_id": "custom_food", "display_name": "Custom", "quantity_g": 50.0})
+        original = copy.deepcopy(meal_plan)
+
+        header, rows = split_meal_plan(meal_plan)
+        stored = rows[0]["payload"]["meals"]["lunch"]["allocated_foods"]
+
+        assert SNAPSHOT_REF_KEY not in stored[0] and SNAPSHOT_REF_KEY not in stored[-1]
+        assert assemble_meal_plan(header, [(row["day_key"], row["payload"]) for row in rows]) == original
+
+    def test_stored_size_is_smaller(self):
+        meal_plan = make_meal_plan()
+        header, rows = split_meal_plan(meal_plan)
+        stored = len(json.dumps(header)) + sum(len(json.dumps(row["payload"])) for row in rows)
+
+        assert stored < 0.65 * len(json.dumps(meal_plan))
+
+
+class TestMealPlanStore:
+    def test_load_reads_only_requested_days(self):
+        store = make_store()
+        meal_plan = make_meal_plan()
+        plan = store.save_meal_plan(store.plan_repo.plan.id, meal_plan, extra_fields={"explanations": {"x": 1}})
+
+        week_two = store.load_meal_plan(plan, day_from=8, day_to=14)
+
+        assert store.day_repo.calls == [(8, 14)]
+        assert list(week_two["seven_day_plan"]["days"]) == [f"day_{n}" for n in range(8, 15)]
+        assert week_two["seven_day_plan"]["days"]["day_8"] == meal_plan["seven_day_plan"]["days"]["day_8"]
+        assert plan.explanations == {"x": 1}
+
+    def test_load_without_days_skips_day_rows(self):
+        store = make_store()
+        plan = store.save_meal_plan(store.plan_repo.plan.id, make_meal_plan())
+
+        result = store.load_meal_plan(plan, include_days=False)
+
+        assert store.day_repo.calls == []
+        assert result["seven_day_plan"]["days"] == {}
+        assert result["seven_day_plan"]["summary"] == {"total_meals": 84}
+
+    def test_header_only_update_keeps_day_rows(self):
+        store = make_store()
+        plan = store.save_meal_plan(store.plan_repo.plan.id, make_meal_plan())
+        # e.g. {**plan.meal_plan, "meal_allocation": ...} written back by the allocation flow
+        store.save_meal_plan(plan.id, {**plan.meal_plan, "meal_allocation": {"days": {}}})
+
+        assert len(store.day_repo.rows) == 28
+        assert store.load_meal_plan(plan)["meal_allocation"] == {"days": {}}
+
+    def test_plan_without_days_clears_rows(self):
+        store = make_store()
+        plan = store.save_meal_plan(store.plan_repo.plan.id, make_meal_plan())
+        store.save_meal_plan(plan.id, {"category_wise_foods": {}})
+
+        assert store.day_repo.rows == []
+        assert store.load_meal_plan(plan) == {"category_wise_foods": {}}
+
+    def test_inline_plans_are_filtered_in_memory(self):
+        store = make_store()
+        meal_plan = make_meal_plan(num_days=7)
+        plan = SimpleNamespace(id=uuid4(), meal_plan=meal_plan)
+
+        assert store.load_meal_plan(plan) is meal_plan
+        result = store.load_meal_plan(plan, day_from=6)
+        assert list(result["seven_day_plan"]["days"]) == ["day_6", "day_7"]
+        assert store.day_repo.calls == []
+
+
+class TestPlanVersionDeltas:
+    def test_diff_and_apply_round_trip(self):
+        base = make_meal_plan(num_days=7)
+        target = edit_recipe(base, "day_3", "lunch", "Rajma")
+        del target["seven_day_plan"]["days"]["day_7"]
+        del target["seven_day_plan"]["days"]["day_2"]["meals"]["dinner"]
+        target["meal_allocation"] = {"days": {}}
+
+        delta = diff_meal_plans(base, target)
+
+        assert set(delta["days"]) == {"day_2", "day_3"}
+        assert delta["removed_days"] == ["day_7"]
+        assert apply_meal_plan_delta(copy.deepcopy(base), delta) == target
+
+    def test_new_version_is_stored_as_delta(self):
+        store = make_store()
+        meal_plan = make_meal_plan()
+        store.save_meal_plan(store.plan_repo.plan.id, meal_plan)
+        edited = edit_recipe(meal_plan, "day_10", "dinner", "Palak paneer")
+        second = store.plan_repo.add_version()
+
+        plan = store.save_meal_plan(second.id, edited)
+
+        assert plan.meal_plan[STORAGE_FORMAT_KEY] == DELTA_FORMAT
+        assert plan.base_plan_id == store.plan_repo.plan.id
+        assert list(plan.meal_plan["delta"]["days"]) == ["day_10"]
+        assert store.day_repo.get_by_plan_id(second.id) == []
+        assert len(json.dumps(plan.meal_plan)) < 0.05 * len(json.dumps(edited))
+        assert store.load_meal_plan(plan) == edited
+        week_two = store.load_meal_plan(plan, day_from=8, day_to=14)
+        assert week_two["seven_day_plan"]["days"] == {
+            key: day for key, day in edited["seven_day_plan"]["days"].items() if 8 <= int(key[4:]) <= 14
+        }
+
+    def test_versions_delta_against_the_same_full_base(self):
+        store = make_store()
+        meal_plan = make_meal_plan(num_days=7)
+        store.save_meal_plan(store.plan_repo.plan.id, meal_plan)
+        second = store.save_meal_plan(store.plan_repo.add_version().id, edit_recipe(meal_plan, "day_1", "lunch", "A"))
+        third_plan = edit_recipe(meal_plan, "day_2", "lunch", "B")
+
+        third = store.save_meal_plan(store.plan_repo.add_version().id, third_plan)
+
+        assert second.base_plan_id == third.base_plan_id == store.plan_repo.plan.id
+        assert store.load_meal_plan(third) == third_plan
+
+    def test_rebases_when_delta_is_large(self):
+        store = make_store()
+        meal_plan = make_meal_plan(num_days=7)
+        store.save_meal_plan(store.plan_repo.plan.id, meal_plan)
+        regenerated = copy.deepcopy(meal_plan)
+        for day in regenerated["seven_day_plan"]["days"].values():
+            for meal in day["meals"].values():
+                meal["recipe"] = {"dish_name": "Vegetable pulao", "cooking_steps": ["Rinse", "Cook", "Rest"]}
+                for food in meal["allocated_foods"]:
+                    food["quantity_g"] = food["quantity_g"] + 5
+
+        plan = store.save_meal_plan(store.plan_repo.add_version().id, regenerated)
+
+        assert is_chunked(plan.meal_plan) and plan.base_plan_id is None
+
+    def test_rebases_after_interval(self, monkeypatch):
+        monkeypatch.setattr(settings, "DIET_PLAN_DELTA_REBASE_INTERVAL", 2)
+        store = make_store()
+        meal_plan = make_meal_plan(num_days=7)
+        store.save_meal_plan(store.plan_repo.plan.id, meal_plan)
+        saved = [
+            store.save_meal_plan(store.plan_repo.add_version().id, edit_recipe(meal_plan, "day_1", "lunch", str(n)))
+            for n in range(3)
+        ]
+
+        assert [plan.base_plan_id for plan in saved] == [
+            store.plan_repo.plan.id, store.plan_repo.plan.id, None
+        ]
+
+    def test_rewriting_or_deleting_base_keeps_dependents(self):
+        store = make_store()
+        meal_plan = make_meal_plan(num_days=7)
+        base = store.save_meal_plan(store.plan_repo.plan.id, meal_plan)
+        edited = edit_recipe(meal_plan, "day_4", "breakfast", "Poha")
+        dependent = store.save_meal_plan(store.plan_repo.add_version().id, edited)
+
+        store.save_meal_plan(base.id, edit_recipe(meal_plan, "day_4", "breakfast", "Upma"))
+        assert dependent.base_plan_id is None
+        assert store.load_meal_plan(dependent) == edited
+
+        third = store.save_meal_plan(store.plan_repo.add_version().id, edit_recipe(edited, "day_5", "lunch", "Dal"))
+        assert third.base_plan_id == dependent.id
+        assert store.delete_plan(dependent.id)
+        assert third.base_plan_id is None
+        assert store.load_meal_plan(third)["seven_day_plan"]["days"]["day_5"]["meals"]["lunch"]["recipe"] == {
+            "dish_name": "Dal"
+        }
@@ -0,0 +1,195 @@
+"""
+Tests for Pipeline Result Cache.
+
+Unit tests for snapshot-keyed reuse of deterministic stage outputs.
+"""
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.platform.core.context import (
+    AyurvedaContext,
+    DiagnosisContext,
+    ExchangeContext,
+    MealStructureContext,
+    MNTContext,
+    TargetContext,
+)
+from app.platform.core.orchestration.pipeline_cache import (
+    PipelineResultCache,
+    SQLitePipelineStore,
+    compute_pipeline_cache_key,
+)
+from app.platform.core.orchestration.ncp_orchestrator import NCPOrchestrator
+
+KB = {"medical": "a1", "mnt_rules": "b2"}
+
+
+def stage_contexts(assessment_id):
+    exchange = ExchangeContext(
+        assessment_id=assessment_id,
+        exchanges_per_meal={"breakfast": {"cereal": 2}},
+        per_meal_targets={"breakfast": {"calories": 400}},
+    )
+    exchange.daily_nutrition = {"calories": 1600}
+    return {
+        "diagnosis": DiagnosisContext(assessment_id=assessment_id, medical_conditions=[{"diagnosis_id": "t2dm"}]),
+        "mnt": MNTContext(assessment_id=assessment_id, rule_ids_used=["r1"]),
+        "target": TargetContext(assessment_id=assessment_id, calories_target=1600),
+        "meal_structure": MealStructureContext(
+            assessment_id=assessment_id, meal_count=1, meals=["breakfast"],
+            timing_windows={}, energy_weight={"breakfast": 1.0},
+        ),
+        "ayurveda": AyurvedaContext(assessment_id=assessment_id, dosha_primary="Vata"),
+        "exchange": exchange,
+    }
+
+
+class TestCacheKey:
+    def test_key_ignores_dict_order(self):
+        first = {"client_context": {"age": 40, "gender": "male"}, "goals": {}}
+        second = {"goals": {}, "client_context": {"gender": "male", "age": 40}}
+
+        assert compute_pipeline_cache_key(first, kb_versions=KB) == compute_pipeline_cache_key(second, kb_versions=KB)
+
+    def test_key_covers_inputs_and_kb_versions(self):
+        snapshot = {"client_context": {"age": 40}}
+        base = compute_pipeline_cache_key(snapshot, kb_versions=KB)
+
+        assert compute_pipeline_cache_key({"client_context": {"age": 41}}, kb_versions=KB) != base
+        assert compute_pipeline_cache_key(snapshot, {"diet_type": "veg"}, kb_versions=KB) != base
+        assert compute_pipeline_cache_key(snapshot, enable_ayurveda=False, kb_versions=KB) != base
+        assert compute_pipeline_cache_key(snapshot, kb_versions={**KB, "medical": "c3"}) != base
+
+
+class TestPipelineResultCache:
+    def test_hit_returns_fresh_contexts_without_assessment_id(self):
+        cache = PipelineResultCache()
+        contexts = stage_contexts(uuid4())
+        cache.set("k", contexts)
+
+        first = cache.get("k")
+        second = cache.get("k")
+
+        assert first["target"].calories_target == 1600
+        assert first["target"].assessment_id is None
+        assert first["exchange"].daily_nutrition == {"calories": 1600}
+        assert first["target"] is not second["target"]
+        # Caller's contexts are untouched
+        assert contexts["target"].assessment_id is not None
+        assert cache.stats["hits"] == 2
+
+    def test_memory_tier_lru_eviction(self):
+        cache = PipelineResultCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.set(key, stage_contexts(uuid4()))
+        cache.get("a")
+        cache.set("c", stage_contexts(uuid4()))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert len(cache) == 2
+
+    def test_sqlite_tier_shared_between_caches(self, tmp_path):
+        path = str(tmp_path / "pipeline.sqlite3")
+        PipelineResultCache(store=SQLitePipelineStore(path)).set("k", stage_contexts(uuid4()))
+
+        other = PipelineResultCache(store=SQLitePipelineStore(path))
+        result = other.get("k")
+
+        assert result["mnt"].rule_ids_used == ["r1"]
+        assert other.stats["store_hits"] == 1
+        assert len(other) == 1  # Promoted to memory tier
+
+    def test_sqlite_tier_evicts_least_recently_used(self, tmp_path):
+        store = SQLitePipelineStore(str(tmp_path / "pipeline.sqlite3"), max_entries=2)
+        store.set("a", b"1")
+        store.set("b", b"2")
+        store.get("a")
+        store.set("c", b"3")
+
+        assert store.get("b") is None
+        assert store.get("a") == b"1"
+        assert len(store) == 2
+
+
+class RecordingRepo:
+    def __init__(self):
+        self.created = []
+
+    def get_by_assessment_id(self, assessment_id):
+        return None
+
+    def create(self, data):
+        self.created.append(data)
+
+
+class CountingEngines:
+    def __init__(self):
+        self.calls = 0
+
+    def process_assessment(self, assessment_context):
+        self.calls += 1
+        return stage_contexts(assessment_context.assessment_id)["diagnosis"]
+
+    def process_diagnoses(self, diagnosis_context):
+        return stage_contexts(diagnosis_context.assessment_id)["mnt"]
+
+    def calculate_targets(self, client_profile, mnt_context, **kwargs):
+        return stage_contexts(mnt_context.assessment_id)["target"]
+
+    def generate_structure(self, target_context, **kwargs):
+        return stage_contexts(target_context.assessment_id)["meal_structure"]
+
+    def process_ayurveda_assessment(self, mnt_context, **kwargs):
+        return stage_contexts(mnt_context.assessment_id)["ayurveda"]
+
+    def generate_exchanges(self, meal_structure, **kwargs):
+        return {"per_meal_allocation": {"breakfast": {"cereal": 2}}, "notes": {"n": 1}}
+
+
+def no_recipe_events(*args, **kwargs):
+    """stream_recipe_stage stand-in: no day events, no recipe context."""
+    return None
+    yield
+
+
+def make_orchestrator(cache, engines, assessments):
+    orchestrator = NCPOrchestrator(db=None, client_id=uuid4(), pipeline_cache=cache)
+    for name in ("diagnosis_engine", "mnt_engine", "target_engine", "meal_structure_engine",
+                 "ayurveda_engine", "exchange_engine"):
+        setattr(orchestrator, name, engines)
+    for name in ("diagnosis_repo", "mnt_repo", "target_repo", "meal_structure_repo",
+                 "ayurveda_repo", "exchange_repo"):
+        setattr(orchestrator, name, RecordingRepo())
+    orchestrator.assessment_repo = SimpleNamespace(get_by_id=assessments.get)
+    orchestrator.execute_intervention_stage = lambda *args, **kwargs: None
+    orchestrator.execute_recipe_stage = lambda *args, **kwargs: None
+    orchestrator.stream_recipe_stage = no_recipe_events
+    return orchestrator
+
+
+class TestOrchestratorPipelineCache:
+    def test_identical_snapshot_skips_engines_but_persists(self):
+        snapshot = {"client_context": {"age": 40, "gender": "male"}}
+        first_id, second_id = uuid4(), uuid4()
+        assessments = {
+            assessment_id: SimpleNamespace(
+                id=assessment_id, intake_id=None, client_id=uuid4(),
+                assessment_snapshot=dict(snapshot), assessment_status="finalized",
+            )
+            for assessment_id in (first_id, second_id)
+        }
+        cache = PipelineResultCache()
+        engines = CountingEngines()
+
+        make_orchestrator(cache, engines, assessments).execute_full_pipeline(first_id, validation_mode="off")
+        second = make_orchestrator(cache, engines, assessments)
+        result = second.execute_full_pipeline(second_id, validation_mode="off")
+
+        assert engines.calls == 1
+        assert result["target"].assessment_id == second_id
+        assert result["exchange"].assessment_id == second_id
+        assert second.target_repo.created[0]["assessment_id"] == second_id
+        assert second.diagnosis_repo.created[0]["diagnosis_id"] == "t2dm"
+        assert second.exchange_repo.created[0]["notes"] == {"n": 1}
+        assert second.ayurveda_repo.created[0]["dosha_primary"] == "Vata"
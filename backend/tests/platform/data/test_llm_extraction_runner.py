@@ -0,0 +1,141 @@
+"""
+Tests for LLM Extraction Runner.
+
+Unit tests for the concurrent, resumable runner used by KB enrichment scripts.
+"""
+import threading
+
+import pytest
+
+from app.platform.knowledge_base.foods.llm_extraction_runner import (
+    CheckpointJournal,
+    ExtractionFailed,
+    ExtractionRunner,
+    RateLimiter,
+    TokenBucket,
+)
+
+
+def _fast_runner(models, **kwargs):
+    """Runner with a generous rate budget and no backoff delays."""
+    kwargs.setdefault("rate_limiter", RateLimiter(requests_per_minute=60000, burst=1000))
+    kwargs.setdefault("backoff_base_seconds", 0)
+    kwargs.setdefault("rate_limit_cooldown_seconds", 0.01)
+    return ExtractionRunner(models=models, **kwargs)
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket."""
+
+    def test_burst_then_wait(self):
+        """Test that tokens beyond capacity are not immediately available."""
+        bucket = TokenBucket(rate=1.0, capacity=2)
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() > 0.0
+
+    def test_invalid_rate(self):
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestCheckpointJournal:
+    """Test suite for CheckpointJournal."""
+
+    def test_resume_from_file(self, tmp_path):
+        """Test that completed entries survive reopening and failed ones are retried."""
+        path = tmp_path / "journal.jsonl"
+        journal = CheckpointJournal(str(path))
+        journal.record("a", [1, 2])
+        journal.record("b", status="failed", error="boom")
+
+        reopened = CheckpointJournal(str(path))
+        assert reopened.is_done("a")
+        assert not reopened.is_done("b")
+        assert reopened.results() == {"a": [1, 2]}
+
+    def test_ignores_truncated_line(self, tmp_path):
+        """Test that a partial line from an interrupted run is skipped."""
+        path = tmp_path / "journal.jsonl"
+        CheckpointJournal(str(path)).record("a", {"x": 1})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"key": "b", "sta')
+
+        assert CheckpointJournal(str(path)).completed_keys() == ["a"]
+
+
+class TestExtractionRunner:
+    """Test suite for ExtractionRunner."""
+
+    def test_runs_all_items_concurrently(self):
+        """Test that all items are processed and workers overlap."""
+        active = {"now": 0, "max": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def worker(payload, model):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            if payload < 3:
+                barrier.wait()
+            with lock:
+                active["now"] -= 1
+            return payload * 2
+
+        runner = _fast_runner(["m1"], max_workers=3)
+        results = {key: result for key, result, error in runner.run(((str(i), i) for i in range(6)), worker)}
+
+        assert results == {str(i): i * 2 for i in range(6)}
+        assert active["max"] >= 3
+
+    def test_skips_journaled_items(self, tmp_path):
+        """Test that items completed in a previous run are not resubmitted."""
+        journal = CheckpointJournal(str(tmp_path / "journal.jsonl"))
+        journal.record("done", "old")
+        calls = []
+
+        runner = _fast_runner(["m1"], journal=journal)
+        output = list(runner.run([("done", 1), ("new", 2)], lambda p, m: calls.append(p) or p))
+
+        assert calls == [2]
+        assert output == [("new", 2, None)]
+        assert runner.stats["skipped"] == 1
+        assert CheckpointJournal(str(tmp_path / "journal.jsonl")).results() == {"done": "old", "new": 2}
+
+    def test_rate_limited_model_falls_back(self):
+        """Test that a 429 moves the request to the next model."""
+        calls = []
+
+        def worker(model):
+            calls.append(model)
+            if model == "primary":
+                raise Exception("Error code: 429 - rate limit exceeded")
+            return ["ok"]
+
+        runner = _fast_runner(["primary", "fallback"], rate_limit_cooldown_seconds=60)
+        assert runner.call_with_fallback(worker) == ["ok"]
+        assert calls == ["primary", "fallback"]
+        assert runner.stats["rate_limited"] == 1
+
+    def test_rejected_results_are_retried(self):
+        """Test that results failing the accept predicate are retried until max_retries."""
+        calls = []
+        runner = _fast_runner(["m1"], max_retries=3)
+
+        with pytest.raises(ExtractionFailed):
+            runner.call_with_fallback(lambda model: calls.append(model) or [], accept=bool)
+        assert len(calls) == 3
+
+    def test_failed_items_are_reported_and_journaled(self):
+        """Test that a failing item is yielded with its error and marked failed."""
+        def worker(payload, model):
+            raise ValueError("bad batch")
+
+        runner = _fast_runner(["m1"], max_retries=1)
+        (key, result, error), = list(runner.run([("x", 1)], worker))
+
+        assert key == "x" and result is None
+        assert isinstance(error, ExtractionFailed)
+        assert not runner.journal.is_done("x")
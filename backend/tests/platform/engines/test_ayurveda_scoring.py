@@ -0,0 +1,111 @@
+"""
+Tests for Ayurvedic Assessment Scoring.
+
+Unit tests for questionnaire scoring compiled to weight arrays, single and batched.
+"""
+import pytest
+
+from app.platform.engines.ayurveda_engine import assessment_scorer, kb_ayurveda
+from app.platform.engines.ayurveda_engine.compiled_scoring import (
+    UNANSWERED,
+    UNKNOWN_ANSWER,
+    get_compiled_scoring,
+)
+
+
+def prakriti_ids():
+    return [rule["question_id"] for rule in kb_ayurveda.get_all_prakriti_scoring_rules()]
+
+
+def sample_responses():
+    compiled = get_compiled_scoring()
+    return [
+        {},
+        {question_id: "A" for question_id in prakriti_ids()},
+        {question_id: "B" for question_id in compiled.vikriti.question_ids + compiled.ama.question_ids},
+        {question_id: ["Yes"] for question_id in compiled.vikriti.question_ids},
+        {question_id: "C" for question_id in compiled.agni.question_ids + prakriti_ids()},
+        {question_id: "Z" for question_id in compiled.agni.question_ids},
+    ]
+
+
+class TestCompiledScoring:
+    def test_weight_tensor_shape(self):
+        prakriti = get_compiled_scoring().prakriti
+        assert prakriti.weights.shape[0] == len(prakriti_ids())
+        assert prakriti.weights.shape[2] == 3
+        # Unanswered / unknown codes contribute nothing
+        assert not prakriti.weights[:, [UNANSWERED, UNKNOWN_ANSWER]].any()
+
+    def test_answer_encoding(self):
+        prakriti = get_compiled_scoring().prakriti
+        first = prakriti.question_ids[0]
+        codes = prakriti.encode({first: " A ", prakriti.question_ids[1]: "?", prakriti.question_ids[2]: ["No"]})
+
+        assert codes[0] == prakriti.answer_codes[0]["A"]
+        assert codes[1] == UNKNOWN_ANSWER
+        assert codes[2] == UNANSWERED  # checkbox without "Yes"
+
+    def test_compiled_once_per_kb_load(self, monkeypatch):
+        compiled = get_compiled_scoring()
+        assert get_compiled_scoring() is compiled
+
+        reloaded = [dict(rule) for rule in kb_ayurveda.get_all_prakriti_scoring_rules()[:1]]
+        monkeypatch.setattr(kb_ayurveda, "_PRAKRITI_SCORING_CACHE", reloaded)
+
+        assert get_compiled_scoring().prakriti.question_ids == [reloaded[0]["question_id"]]
+
+    def test_reload_is_detected_by_identity_not_address(self, monkeypatch):
+        compiled = get_compiled_scoring()
+        # Equal content in new list objects, as after the KB cache is reloaded
+        reloaded = list(kb_ayurveda.get_all_prakriti_scoring_rules())
+        monkeypatch.setattr(kb_ayurveda, "_PRAKRITI_SCORING_CACHE", reloaded)
+
+        recompiled = get_compiled_scoring()
+
+        assert recompiled is not compiled
+        assert recompiled.kb_sources[0] is reloaded
+
+
+class TestScoringFunctions:
+    def test_prakriti_scores(self):
+        responses = {question_id: "A" for question_id in prakriti_ids()}
+        expected = {"Vata": 0, "Pitta": 0, "Kapha": 0}
+        for rule in kb_ayurveda.get_all_prakriti_scoring_rules():
+            for dosha, weight in rule["answer_options"]["A"]["dosha_weights"].items():
+                expected[dosha] += weight
+
+        scores = assessment_scorer.calculate_prakriti_scores(responses)
+
+        assert scores == expected
+        assert all(type(v) is int for v in scores.values())
+
+    def test_empty_responses(self):
+        assert assessment_scorer.calculate_prakriti_scores({}) == {"Vata": 0, "Pitta": 0, "Kapha": 0}
+        assert assessment_scorer.determine_agni_type({}) == "Sama"
+        assert assessment_scorer.determine_ama_level({}) == "none"
+
+    def test_agni_unknown_answer_uses_rule_fallback(self):
+        agni_rules = kb_ayurveda.get_all_agni_classification_rules()
+        responses = {rule["question_id"]: "Z" for rule in agni_rules}
+        assert assessment_scorer.determine_agni_type(responses) == agni_rules[-1].get("fallback_agni", "Sama")
+
+
+class TestBatchScoring:
+    @pytest.mark.parametrize("index", range(6))
+    def test_batch_matches_single(self, index):
+        responses_list = sample_responses()
+        batch = assessment_scorer.score_questionnaires_batch(responses_list)
+        responses = responses_list[index]
+
+        prakriti = assessment_scorer.calculate_prakriti_scores(responses)
+        assert batch[index]["prakriti"] == {
+            **assessment_scorer.determine_dosha_primary_secondary(prakriti),
+            "scores": prakriti,
+        }
+        assert batch[index]["vikriti"] == assessment_scorer.calculate_vikriti_scores(responses, prakriti)
+        assert batch[index]["agni"] == assessment_scorer.determine_agni_type(responses)
+        assert batch[index]["ama"] == assessment_scorer.determine_ama_level(responses)
+
+    def test_empty_batch(self):
+        assert assessment_scorer.score_questionnaires_batch([]) == []
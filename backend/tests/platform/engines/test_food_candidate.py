@@ -0,0 +1,136 @@
+"""
+Tests for Food Candidate.
+
+Unit tests for the compact candidate representation and its parity with
+the food dict pipeline (deduplicate → rank).
+"""
+from uuid import uuid4
+
+from app.platform.core.context import AyurvedaContext, MNTContext, TargetContext
+from app.platform.engines.food_engine.food_candidate import FoodCandidate, materialize_foods
+from app.platform.engines.food_engine.food_deduplicator import FoodDeduplicator
+from app.platform.engines.food_engine.food_ranker import FoodRanker
+from app.platform.utils.food_name_index import food_group_key
+
+NAMES = ["Rice, raw", "Rice, parboiled", "Ragi", "Moong dal", "Oats, rolled", "Mixed, vegetables", "Oats, steel cut"]
+
+
+def make_food(i, display_name, with_nutrition=True, with_mnt=True):
+    food = {
+        "food_id": f"food_{i}",
+        "display_name": display_name,
+        "category": "cereal",
+        "exchange_category": "cereal",
+        "food_exclusion_tags": ["fried_foods"] if i % 3 == 0 else [],
+        "dedup_group_key": food_group_key(display_name),
+        "serving_size_per_exchange_g": 20.0 + 15 * i,
+    }
+    if with_nutrition:
+        food["nutrition"] = {
+            "calories": 300.0 + i,
+            "macros": {"protein_g": 5.0 + i, "carbs_g": 60.0, "fat_g": 2.0, "fiber_g": float(i)},
+            "micros": {"sodium_mg": 5.0},
+            "calorie_density_kcal_per_g": 0.5 + i * 0.4,
+            "protein_density_g_per_100kcal": None,
+        }
+    if with_mnt:
+        food["mnt_profile"] = {
+            "macro_compliance": {"low_carb": i % 2 == 0},
+            "micro_compliance": {"low_sodium": True},
+            "medical_tags": {"diabetic_safe": i % 2 == 1},
+            "food_exclusion_tags": [],
+            "food_inclusion_tags": ["whole_grain"] if i % 4 == 0 else [],
+            "contraindications": [],
+            "preferred_conditions": ["diabetes"] if i == 2 else [],
+        }
+    food["compatibility_checked"] = True
+    food["compatibility_levels"] = {"diabetes": "safe"} if i % 2 else {}
+    if with_mnt:
+        food["mnt_profile_info"] = {"contraindications": []}
+    food["food_type"] = "grain" if i % 2 else None
+    food["cooking_state"] = "raw" if i < 3 else "cooked"
+    return food
+
+
+def sample_foods():
+    return [
+        make_food(i, name, with_nutrition=i != 5, with_mnt=i != 4)
+        for i, name in enumerate(NAMES)
+    ]
+
+
+def rank(foods):
+    return FoodRanker().rank_foods(
+        foods=foods,
+        medical_conditions=["diabetes"],
+        mnt_context=MNTContext(
+            assessment_id=uuid4(),
+            macro_constraints={"carbs_g": {"max": 200}},
+            micro_constraints={"sodium_mg": {"max": 2000}},
+        ),
+        target_context=TargetContext(assessment_id=uuid4(), calories_target=1800, macros={}),
+        ayurveda_context=AyurvedaContext(
+            assessment_id=uuid4(),
+            dosha_primary="Vata",
+            vikriti_notes={"food_preferences": [{"food_id": "food_3", "preference_type": "prefer"}]},
+        ),
+        client_preferences={"likes": ["food_1"]},
+        meal_targets={"calories": 450, "protein_g": 18},
+        rotation_history=["food_2", "food_6"],
+        meal_name="breakfast",
+    )
+
+
+class TestFoodCandidate:
+    def test_round_trip(self):
+        for food in sample_foods():
+            assert FoodCandidate.from_dict(food).to_dict() == food
+            assert list(FoodCandidate.from_dict(food).to_dict()) == list(food)
+
+    def test_dict_read_access(self):
+        food = make_food(2, "Ragi")
+        candidate = FoodCandidate.from_dict(food)
+
+        assert candidate.get("nutrition") == food["nutrition"]
+        assert candidate["food_id"] == "food_2"
+        assert "dedup_group_key" in candidate
+        assert "ranking" not in candidate
+        assert candidate.get("ranking", {}) == {}
+        assert candidate.get("unknown", "x") == "x"
+
+    def test_missing_optional_sections(self):
+        candidate = FoodCandidate.from_dict(make_food(5, "Mixed, vegetables", with_nutrition=False, with_mnt=False))
+
+        assert not candidate.has_nutrition
+        assert candidate.get("nutrition", {}) == {}
+        assert candidate.get("mnt_profile", {}) == {}
+        assert "nutrition" not in candidate.to_dict()
+
+    def test_slots_only(self):
+        assert not hasattr(FoodCandidate("f"), "__dict__")
+
+
+class TestCandidatePipelineParity:
+    def test_deduplicate_then_rank_matches_dicts(self):
+        deduplicator = FoodDeduplicator()
+        dict_result = rank(deduplicator.deduplicate_foods(sample_foods()))
+        candidates = [FoodCandidate.from_dict(food) for food in sample_foods()]
+        candidate_result = rank(deduplicator.deduplicate_foods(candidates))
+
+        assert materialize_foods(candidate_result) == dict_result
+
+    def test_rank_then_deduplicate_ranked_matches_dicts(self):
+        deduplicator = FoodDeduplicator()
+        dict_result = deduplicator.deduplicate_foods(rank(sample_foods()), keep_best_ranked=True)
+        candidates = [FoodCandidate.from_dict(food) for food in sample_foods()]
+        candidate_result = deduplicator.deduplicate_foods(rank(candidates), keep_best_ranked=True)
+
+        assert materialize_foods(candidate_result) == dict_result
+        assert any("deduplication" in food["ranking"] for food in dict_result)
+
+    def test_ranking_updates_candidates_in_place(self):
+        candidates = [FoodCandidate.from_dict(food) for food in sample_foods()]
+        ranked = rank(candidates)
+
+        assert {id(c) for c in ranked} == {id(c) for c in candidates}
+        assert [c.rank for c in ranked] == list(range(1, len(candidates) + 1))
@@ -0,0 +1,92 @@
+"""
+Tests for Food Deduplicator.
+
+Unit tests for variation grouping with precomputed group keys.
+"""
+from app.platform.engines.food_engine.food_deduplicator import FoodDeduplicator
+from app.platform.utils.food_name_index import food_group_key
+
+
+def make_food(food_id, display_name, rank=None, stored_key=True):
+    food = {"food_id": food_id, "display_name": display_name}
+    if stored_key:
+        food["dedup_group_key"] = food_group_key(display_name)
+    if rank is not None:
+        food["ranking"] = {"rank": rank}
+    return food
+
+
+class TestFoodGroupKey:
+    def test_scientific_name_takes_precedence(self):
+        assert food_group_key("Rice, raw (Oryza sativa)") == "scientific:oryza sativa"
+
+    def test_base_name(self):
+        assert food_group_key("Bajra, whole") == "base:bajra"
+
+    def test_generic_and_short_names_not_grouped(self):
+        assert food_group_key("Mixed, vegetables") is None
+        assert food_group_key("Ok") is None
+        assert food_group_key("") is None
+
+
+class TestDeduplicateFoods:
+    def test_keeps_first_per_group_with_variations(self):
+        foods = [
+            make_food("rice_raw", "Rice, raw"),
+            make_food("ragi", "Ragi"),
+            make_food("rice_parboiled", "Rice, parboiled"),
+            make_food("mixed", "Mixed, vegetables"),
+        ]
+        result = FoodDeduplicator().deduplicate_foods(foods)
+
+        assert [f["food_id"] for f in result] == ["rice_raw", "ragi", "mixed"]
+        dedup = result[0]["ranking"]["deduplication"]
+        assert dedup["group_key"] == "base:rice"
+        assert dedup["variation_food_ids"] == ["rice_parboiled"]
+        # Input foods are not mutated
+        assert "ranking" not in foods[0]
+
+    def test_stored_and_computed_keys_agree(self):
+        names = ["Rice, raw", "Rice, parboiled", "Wheat (Triticum aestivum)", "Wheat flour"]
+        stored = [make_food(str(i), n) for i, n in enumerate(names)]
+        computed = [make_food(str(i), n, stored_key=False) for i, n in enumerate(names)]
+        deduplicator = FoodDeduplicator()
+
+        assert (
+            [f["food_id"] for f in deduplicator.deduplicate_foods(stored)]
+            == [f["food_id"] for f in deduplicator.deduplicate_foods(computed)]
+        )
+
+    def test_stored_key_ignored_when_matcher_disabled(self):
+        foods = [
+            make_food("a", "Dal (Cajanus cajan), raw"),
+            make_food("b", "Dal, cooked"),
+        ]
+        result = FoodDeduplicator(enable_scientific_name_matching=False).deduplicate_foods(foods)
+
+        assert [f["food_id"] for f in result] == ["a"]
+
+    def test_keep_best_ranked_unsorted_input(self):
+        foods = [
+            make_food("rice_raw", "Rice, raw", rank=3),
+            make_food("rice_parboiled", "Rice, parboiled", rank=1),
+            make_food("ragi", "Ragi", rank=2),
+        ]
+        result = FoodDeduplicator().deduplicate_foods(foods, keep_best_ranked=True)
+
+        assert [f["food_id"] for f in result] == ["rice_parboiled", "ragi"]
+
+    def test_deduplicate_ranked_preserves_rank_order(self):
+        foods = [
+            make_food("rice_parboiled", "Rice, parboiled", rank=1),
+            make_food("ragi", "Ragi", rank=2),
+            make_food("rice_raw", "Rice, raw", rank=3),
+            make_food("mixed", "Mixed, vegetables", rank=4),
+        ]
+        deduplicator = FoodDeduplicator()
+        result = deduplicator.deduplicate_ranked(foods)
+
+        assert [f["food_id"] for f in result] == ["rice_parboiled", "ragi", "mixed"]
+        assert result[0]["ranking"]["deduplication"]["variation_food_ids"] == ["rice_raw"]
+        assert result[0]["ranking"]["rank"] == 1
+        assert result == deduplicator.deduplicate_foods(foods, keep_best_ranked=True)
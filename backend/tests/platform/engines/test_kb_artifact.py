@@ -0,0 +1,197 @@
+"""
+Tests for the KB Artifact.
+
+Unit tests for the memory-mapped artifact format, JSON KB loading from the
+artifact and FoodEngine running on artifact food tables without a database.
+"""
+import json
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.platform.data.models.kb_food_condition_compatibility import KBFoodConditionCompatibility
+from app.platform.data.models.kb_food_exchange_profile import KBFoodExchangeProfile
+from app.platform.data.models.kb_food_master import KBFoodMaster
+from app.platform.data.models.kb_food_mnt_profile import KBFoodMNTProfile
+from app.platform.data.models.kb_food_nutrition_base import KBFoodNutritionBase
+from app.platform.engines.diagnosis_engine.diagnosis_engine import DiagnosisEngine
+from app.platform.engines.food_engine.food_engine import FoodEngine
+from app.platform.engines.food_engine.kb_food_artifact import add_food_tables
+from app.platform.knowledge_base import kb_artifact
+from app.platform.knowledge_base.kb_artifact import ALIGNMENT, KBArtifact, KBArtifactWriter
+
+
+def make_food(food_id, category="cereal", status="active", exclusion_tags=None, contraindications=None, nutrition=True):
+    return KBFoodMaster(
+        food_id=food_id,
+        display_name=food_id.replace("_", " ").title(),
+        category="grains",
+        food_type="whole_grain",
+        cooking_state="cooked",
+        status=status,
+        exchange_profile=KBFoodExchangeProfile(
+            food_id=food_id, exchange_category=category, serving_size_per_exchange_g=Decimal("30.00")
+        ),
+        nutrition=KBFoodNutritionBase(
+            food_id=food_id,
+            calories_kcal=Decimal("120.00"),
+            macros={"protein_g": 3.5, "carbs_g": 25.0, "fat_g": 1.0, "fiber_g": 2.0},
+            micros={"sodium_mg": 5.0},
+        ) if nutrition else None,
+        mnt_profile=KBFoodMNTProfile(
+            food_id=food_id,
+            medical_tags={"diabetic_safe": False},
+            food_exclusion_tags=exclusion_tags or [],
+            contraindications=contraindications or [],
+        ),
+    )
+
+
+@pytest.fixture
+def food_artifact(tmp_path):
+    foods = [
+        make_food("brown_rice"),
+        make_food("white_bread", exclusion_tags=["refined_grains"]),
+        make_food("sugar_cereal"),
+        make_food("barley", contraindications=["celiac_disease"]),
+        make_food("old_millet", status="inactive"),
+        make_food("moong_dal", category="pulse", nutrition=False),
+    ]
+    compatibilities = [
+        KBFoodConditionCompatibility(food_id="sugar_cereal", condition_id="diabetes", compatibility="avoid", status="active"),
+        KBFoodConditionCompatibility(food_id="brown_rice", condition_id="diabetes", compatibility="safe", status="active"),
+        KBFoodConditionCompatibility(food_id="brown_rice", condition_id="ckd", compatibility="avoid", status="deprecated"),
+    ]
+    writer = KBArtifactWriter()
+    add_food_tables(writer, foods, compatibilities)
+    path = tmp_path / "kb.bin"
+    writer.write(path)
+    artifact = KBArtifact(path)
+    yield artifact
+    artifact._memo.clear()
+
+
+@pytest.fixture
+def configured_artifact(tmp_path, monkeypatch):
+    """Point settings.KB_ARTIFACT_PATH at a fresh artifact file."""
+    kb_artifact.reset_kb_artifact()
+    path = tmp_path / "configured.bin"
+    monkeypatch.setattr(settings, "KB_ARTIFACT_PATH", str(path))
+    yield path
+    kb_artifact.reset_kb_artifact()
+
+
+class TestFormat:
+    def test_round_trip(self, tmp_path):
+        writer = KBArtifactWriter()
+        writer.add_array("values", np.arange(5, dtype=np.float32))
+        writer.add_array("matrix", np.ones((2, 3), dtype=np.int64))
+        writer.add_strings("names", ["dal", None, "", "पालक"])
+        writer.add_json_kb("medical/test_kb.json", '[{"id": 1}]')
+        writer.write(tmp_path / "kb.bin", kb_versions={"medical": "abc"}, metadata={"foods": 0})
+
+        artifact = KBArtifact(tmp_path / "kb.bin")
+
+        assert artifact.array("values").tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert artifact.array("matrix").shape == (2, 3)
+        assert list(artifact.strings("names")) == ["dal", None, "", "पालक"]
+        assert artifact.strings("names")[-1] == "पालक"
+        assert artifact.strings("names").index_of("") == 2
+        assert artifact.json("medical/test_kb.json") == [{"id": 1}]
+        assert artifact.json_names() == ["medical/test_kb.json"]
+        assert artifact.kb_versions == {"medical": "abc"}
+        assert artifact.metadata == {"foods": 0}
+
+    def test_arrays_are_aligned_read_only_views(self, tmp_path):
+        writer = KBArtifactWriter()
+        writer.add_array("a", np.arange(3, dtype=np.uint8))
+        writer.add_array("b", np.arange(3, dtype=np.float64))
+        writer.write(tmp_path / "kb.bin")
+        artifact = KBArtifact(tmp_path / "kb.bin")
+
+        array = artifact.array("b")
+
+        assert not array.flags.writeable
+        assert all(spec["offset"] % ALIGNMENT == 0 for spec in artifact.header["arrays"].values())
+        with pytest.raises(ValueError):
+            array[0] = 1.0
+
+    def test_rejects_other_files_and_versions(self, tmp_path, monkeypatch):
+        (tmp_path / "other.bin").write_bytes(b"not an artifact at all")
+        with pytest.raises(ValueError, match="Not a KB artifact"):
+            KBArtifact(tmp_path / "other.bin")
+
+        KBArtifactWriter().write(tmp_path / "kb.bin")
+        monkeypatch.setattr(kb_artifact, "FORMAT_VERSION", kb_artifact.FORMAT_VERSION + 1)
+        with pytest.raises(ValueError, match="format version"):
+            KBArtifact(tmp_path / "kb.bin")
+
+    def test_invalid_json_is_rejected_at_build_time(self):
+        with pytest.raises(ValueError):
+            KBArtifactWriter().add_json_kb("medical/broken.json", "{")
+
+
+class TestJSONKBs:
+    def test_engines_read_json_kbs_from_artifact(self, configured_artifact, tmp_path):
+        conditions = [{"condition_id": "artifact_only", "status": "active"}]
+        (tmp_path / "medical").mkdir()
+        (tmp_path / "medical" / "medical_conditions_kb_complete.json").write_text(json.dumps(conditions))
+        writer = KBArtifactWriter()
+        writer.add_json_kbs(tmp_path)
+        writer.write(configured_artifact)
+
+        assert DiagnosisEngine().medical_kb == conditions
+
+    def test_missing_artifact_falls_back_to_files(self, configured_artifact):
+        assert kb_artifact.get_kb_artifact() is None
+        assert len(DiagnosisEngine().medical_kb) > 1
+
+    def test_all_json_kbs_are_included(self, tmp_path):
+        writer = KBArtifactWriter()
+        added = writer.add_json_kbs()
+        writer.write(tmp_path / "kb.bin")
+
+        artifact = KBArtifact(tmp_path / "kb.bin")
+
+        assert "exchange_system/exchange_category_definitions_kb.json" in added
+        assert artifact.json_names() == sorted(added)
+
+
+class TestOfflineFoodEngine:
+    def test_category_foods_without_database(self, food_artifact):
+        engine = FoodEngine(kb_artifact=food_artifact)
+
+        candidates = engine.get_food_candidates(db=None, exchange_category="cereal", food_exclusions=["refined_grains"])
+
+        assert [c.food_id for c in candidates] == ["brown_rice", "sugar_cereal", "barley"]
+        rice = candidates[0]
+        assert rice.serving_size_per_exchange_g == 30.0
+        assert rice.to_dict()["nutrition"]["calories"] == 120.0
+        assert rice.to_dict()["nutrition"]["macros"]["protein_g"] == 3.5
+
+    def test_condition_compatibility_and_contraindications(self, food_artifact):
+        engine = FoodEngine(kb_artifact=food_artifact)
+
+        candidates = engine.get_food_candidates(
+            db=None,
+            exchange_category="cereal",
+            food_exclusions=[],
+            medical_conditions=["Diabetes", "celiac_disease", "ckd"],
+        )
+
+        assert [c.food_id for c in candidates] == ["brown_rice", "white_bread"]
+        assert candidates[0].compatibility_levels == {"diabetes": "safe"}
+
+    def test_food_without_nutrition(self, food_artifact):
+        candidates = FoodEngine(kb_artifact=food_artifact).get_food_candidates(
+            db=None, exchange_category="pulse", food_exclusions=[]
+        )
+
+        assert [c.food_id for c in candidates] == ["moong_dal"]
+        assert "nutrition" not in candidates[0].to_dict()
+
+    def test_without_database_or_artifact(self, configured_artifact):
+        with pytest.raises(ValueError, match="Database session is required"):
+            FoodEngine().get_food_candidates(db=None, exchange_category="cereal", food_exclusions=[])
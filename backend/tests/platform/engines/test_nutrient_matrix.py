@@ -0,0 +1,163 @@
+"""
+Tests for Nutrient Matrix.
+
+Parity of matrix portion/total nutrition with the MealAllocator dict path.
+"""
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.platform.engines.food_engine import nutrient_matrix
+from app.platform.engines.food_engine.food_candidate import FoodCandidate
+from app.platform.engines.food_engine.nutrient_matrix import CORE_NUTRIENTS, NutrientMatrix
+from app.platform.engines.recipe_engine.meal_allocator import MealAllocator
+
+MICROS = ("sodium_mg", "potassium_mg", "calcium_mg", "iron_mg", "vitamin_c_mg")
+
+
+def make_foods(count=40, seed=7):
+    rng = random.Random(seed)
+    foods = []
+    for i in range(count):
+        micros = {name: round(rng.uniform(0, 500), 2) for name in rng.sample(MICROS, rng.randint(0, len(MICROS)))}
+        if i % 5 == 0:
+            micros["note"] = "estimated"  # Non-numeric micros are not reported
+        foods.append({
+            "food_id": f"food_{i}",
+            "serving_size_per_exchange_g": rng.choice([25.0, 30.0, 100.0, 150.0]),
+            "nutrition": {
+                "calories": round(rng.uniform(10, 900), 2),
+                "macros": {
+                    "protein_g": round(rng.uniform(0, 40), 2),
+                    "carbs_g": round(rng.uniform(0, 90), 2),
+                    "fat_g": round(rng.uniform(0, 100), 2),
+                    "fiber_g": round(rng.uniform(0, 15), 2),
+                    "saturated_fat_g": round(rng.uniform(0, 20), 2),
+                },
+                "micros": micros,
+            },
+        })
+    return foods
+
+
+def assert_nutrition_equal(actual, expected):
+    assert set(actual) == set(expected)
+    for key, value in expected.items():
+        # float32 storage may flip a value at a rounding boundary by one step (0.1)
+        assert actual[key] == pytest.approx(value, abs=0.1 + 1e-6), key
+
+
+class TestNutrientMatrix:
+    def test_schema_has_core_macros_then_sorted_micros(self):
+        matrix = NutrientMatrix.from_foods(make_foods())
+
+        assert matrix.schema.names[:len(CORE_NUTRIENTS)] == CORE_NUTRIENTS
+        assert matrix.schema.macros == ("saturated_fat_g",)
+        assert matrix.schema.micros == tuple(sorted(MICROS))
+        assert matrix.values.dtype.name == "float32"
+        assert matrix.values.shape == (40, len(CORE_NUTRIENTS) + 1 + len(MICROS))
+
+    def test_portion_parity_with_dict_path(self):
+        foods = make_foods()
+        matrix = NutrientMatrix.from_foods(foods)
+        allocator = MealAllocator()
+
+        for food in foods:
+            for quantity_g in (12.5, 30.0, 75.0, 180.0):
+                expected = allocator._calculate_portion_nutrition(food["nutrition"], quantity_g)
+                assert_nutrition_equal(matrix.portion_nutrition(food["food_id"], quantity_g), expected)
+
+    def test_total_parity_with_dict_path(self):
+        foods = make_foods()
+        matrix = NutrientMatrix.from_foods(foods)
+        allocated = [
+            {"food_id": food["food_id"], "quantity_g": food["serving_size_per_exchange_g"] * 2,
+             "nutrition": MealAllocator()._calculate_portion_nutrition(food["nutrition"], food["serving_size_per_exchange_g"] * 2)}
+            for food in foods[:6]
+        ]
+
+        expected = MealAllocator().calculate_total_nutrition(allocated)
+        actual = MealAllocator(nutrient_matrix=matrix).calculate_total_nutrition(allocated)
+
+        assert set(actual) == set(expected)
+        for key, value in expected.items():
+            # The dict path sums portions rounded to 0.1
+            assert actual[key] == pytest.approx(value, abs=0.05 * len(allocated) + 0.1 + 1e-6), key
+
+    def test_food_without_nutrition_has_zero_core(self):
+        matrix = NutrientMatrix.from_foods([{"food_id": "plain"}])
+
+        assert matrix.portion_nutrition("plain", 50.0) == {key: 0.0 for key in CORE_NUTRIENTS}
+
+    def test_from_candidates_and_kb_rows_match_dicts(self):
+        foods = make_foods(count=5)
+        row = SimpleNamespace(
+            food_id="food_0",
+            calories_kcal=Decimal(str(foods[0]["nutrition"]["calories"])),
+            macros=foods[0]["nutrition"]["macros"],
+            micros=foods[0]["nutrition"]["micros"],
+        )
+
+        from_dicts = NutrientMatrix.from_foods(foods)
+        from_candidates = NutrientMatrix.from_foods(FoodCandidate.from_dict(food) for food in foods)
+        from_rows = NutrientMatrix.from_kb_rows([row])
+
+        for food in foods:
+            assert from_candidates.portion_nutrition(food["food_id"], 40.0) == from_dicts.portion_nutrition(food["food_id"], 40.0)
+        assert from_rows.portion_nutrition("food_0", 40.0) == from_dicts.portion_nutrition("food_0", 40.0)
+
+    def test_first_occurrence_wins(self):
+        foods = make_foods(count=2)
+        duplicate = dict(foods[1], food_id="food_0")
+
+        matrix = NutrientMatrix.from_foods(foods + [duplicate])
+
+        assert len(matrix) == 2
+        assert matrix.rows(["food_1", "food_0"]).tolist() == [1, 0]
+
+
+class TestSharedKBMatrix:
+    def test_rebuilt_when_food_tables_change(self, monkeypatch):
+        fingerprint = [((10, "2025-01-01 00:00:00"), (10, "2025-01-01 00:00:00"))]
+        loads = []
+
+        def load_rows(db):
+            loads.append(db)
+            return [SimpleNamespace(food_id="rice", calories_kcal=Decimal("350"), macros={}, micros={})]
+
+        monkeypatch.setattr(nutrient_matrix, "_food_tables_fingerprint", lambda db: fingerprint[0])
+        monkeypatch.setattr(nutrient_matrix, "_load_kb_rows", load_rows)
+        nutrient_matrix.invalidate_nutrient_matrix()
+        try:
+            first = nutrient_matrix.get_nutrient_matrix("db")
+            assert nutrient_matrix.get_nutrient_matrix("db") is first
+            assert len(loads) == 1
+
+            # A nutrition row edited in the DB (same count, later updated_at)
+            fingerprint[0] = ((10, "2025-01-01 00:00:00"), (10, "2025-02-01 09:30:00"))
+
+            assert nutrient_matrix.get_nutrient_matrix("db") is not first
+            assert len(loads) == 2
+        finally:
+            nutrient_matrix.invalidate_nutrient_matrix()
+
+
+class TestAllocatorWithMatrix:
+    def test_allocated_nutrition_matches_dict_path(self):
+        foods = make_foods(count=10)
+        for food in foods:
+            food["exchange_category"] = "cereal"
+        ranked_foods = {"cereal": foods}
+        targets = {"cereal": 2.0}
+
+        with_matrix = MealAllocator(nutrient_matrix=NutrientMatrix.from_foods(foods)).allocate_foods_to_meal(
+            "breakfast", targets, ranked_foods, day=1
+        )
+        dict_path = MealAllocator().allocate_foods_to_meal("breakfast", targets, ranked_foods, day=1)
+
+        assert [f["food_id"] for f in with_matrix["allocated_foods"]] == [f["food_id"] for f in dict_path["allocated_foods"]]
+        for actual, expected in zip(with_matrix["allocated_foods"], dict_path["allocated_foods"]):
+            assert_nutrition_equal(actual["nutrition"], expected["nutrition"])
+        assert_nutrition_equal(with_matrix["total_nutrition"], dict_path["total_nutrition"])
@@ -0,0 +1,229 @@
+"""
+Tests for Plan Analysis Engine.
+
+Unit tests for vectorized plan totals, target deviations, MNT compliance and
+per-food contributions.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.platform.core.context import MNTContext, TargetContext
+from app.platform.engines.food_engine.nutrient_matrix import NutrientMatrix
+from app.platform.engines.plan_analysis_engine import PlanAnalysisEngine
+from app.platform.engines.recipe_engine.meal_allocation_engine import MealAllocationEngine
+from app.platform.engines.recipe_engine.meal_allocator import MealAllocator
+
+
+def make_food(food_id, calories, protein, carbs, fat, fiber, micros=None, macros=None):
+    return {
+        "food_id": food_id,
+        "nutrition": {
+            "calories": calories,
+            "macros": dict({"protein_g": protein, "carbs_g": carbs, "fat_g": fat, "fiber_g": fiber}, **(macros or {})),
+            "micros": micros or {},
+        },
+    }
+
+
+FOODS = [
+    make_food("rice", 350, 7, 78, 1, 2, {"sodium_mg": 5}),
+    make_food("dal", 340, 24, 60, 1.5, 10, {"sodium_mg": 20, "iron_mg": 7}),
+    make_food("pickle", 100, 1, 5, 8, 1, {"sodium_mg": 3000}, {"saturated_fat_g": 1}),
+]
+
+
+def allocated(food_id, quantity_g):
+    food = next(f for f in FOODS if f["food_id"] == food_id)
+    return {
+        "food_id": food_id,
+        "quantity_g": quantity_g,
+        "nutrition": MealAllocator()._calculate_portion_nutrition(food["nutrition"], quantity_g),
+    }
+
+
+def make_plan():
+    return {
+        "days": {
+            "day_1": {"day_number": 1, "meals": {
+                "lunch": {"allocated_foods": [allocated("rice", 100), allocated("dal", 50)]},
+                "dinner": {"allocated_foods": [allocated("rice", 100), allocated("pickle", 50)]},
+            }},
+            "day_2": {"day_number": 2, "meals": {
+                "lunch": {"allocated_foods": [allocated("dal", 100)]},
+            }},
+        }
+    }
+
+
+def analyze(plan=None, **kwargs):
+    return PlanAnalysisEngine().analyze(plan or make_plan(), NutrientMatrix.from_foods(FOODS), **kwargs)
+
+
+class TestTotals:
+    def test_meal_and_day_totals_match_allocator(self):
+        plan = make_plan()
+
+        analysis = analyze(plan)
+
+        for day_key, day in plan["days"].items():
+            day_foods = []
+            for meal_name, meal in day["meals"].items():
+                expected = MealAllocator().calculate_total_nutrition(meal["allocated_foods"])
+                actual = analysis["days"][day_key]["meals"][meal_name]
+                for key in ("calories", "protein_g", "carbs_g", "fat_g", "fiber_g"):
+                    assert actual[key] == pytest.approx(expected[key], abs=0.1)
+                day_foods.extend(meal["allocated_foods"])
+            assert analysis["days"][day_key]["totals"]["calories"] == pytest.approx(
+                sum(f["nutrition"]["calories"] for f in day_foods), abs=0.1
+            )
+
+    def test_plan_totals_and_average(self):
+        analysis = analyze()
+
+        assert analysis["num_days"] == 2
+        assert analysis["meals"] == ["lunch", "dinner"]
+        assert analysis["plan"]["totals"]["calories"] == 350 + 170 + 350 + 50 + 340
+        assert analysis["plan"]["average_daily"]["calories"] == 630.0
+        assert analysis["plan"]["totals"]["sodium_mg"] == pytest.approx(5 + 10 + 5 + 1500 + 20)
+        assert "dinner" not in analysis["days"]["day_2"]["meals"]
+
+    def test_repeated_food_in_meal_adds_up(self):
+        plan = {"days": {"day_1": {"meals": {"lunch": {"allocated_foods": [
+            {"food_id": "rice", "quantity_g": 50}, {"food_id": "rice", "quantity_g": 50},
+        ]}}}}}
+
+        analysis = analyze(plan, include_contributions=True)
+
+        assert analysis["days"]["day_1"]["totals"]["calories"] == 350.0
+        assert analysis["contributions"]["rice"]["quantity_g"] == 100.0
+
+    def test_missing_foods_are_reported(self):
+        plan = make_plan()
+        plan["days"]["day_2"]["meals"]["lunch"]["allocated_foods"].append({"food_id": "unknown", "quantity_g": 80})
+
+        analysis = analyze(plan)
+
+        assert analysis["missing_foods"] == ["unknown"]
+        assert analysis["days"]["day_2"]["totals"]["calories"] == 340.0
+
+
+class TestTargetDeviations:
+    def test_daily_deviations(self):
+        target = TargetContext(
+            assessment_id=uuid4(),
+            calories_target=800,
+            macros={"proteins": {"g": 40}, "carbohydrates": {"g": 0}, "fats": {"min_g": 20}},
+        )
+
+        deviations = analyze(target_context=target)["target_deviations"]
+
+        assert deviations["targets"] == {"calories": 800.0, "protein_g": 40.0, "fat_g": 20.0}
+        day_1 = deviations["days"]["day_1"]["calories"]
+        assert day_1 == {"value": 920.0, "target": 800.0, "deviation": 120.0, "deviation_percent": 15.0}
+        assert deviations["average_daily"]["calories"]["deviation"] == -170.0
+
+    def test_per_meal_deviations(self):
+        deviations = analyze(per_meal_targets={"lunch": {"calories": 500, "protein_g": None}})["target_deviations"]
+
+        assert deviations["meals"]["day_1"]["lunch"] == {
+            "calories": {"value": 520.0, "target": 500.0, "deviation": 20.0, "deviation_percent": 4.0}
+        }
+        assert "targets" not in deviations
+
+
+class TestCompliance:
+    def make_mnt(self, macro=None, micro=None):
+        return MNTContext(assessment_id=uuid4(), macro_constraints=macro or {}, micro_constraints=micro or {})
+
+    def test_sodium_max_violation(self):
+        compliance = analyze(mnt_context=self.make_mnt(micro={"sodium_mg": {"max": 1500, "unit": "mg"}}))["compliance"]
+
+        assert compliance["compliant"] is False
+        assert compliance["violations"] == [{
+            "constraint": "sodium_mg", "scope": "micro", "day": "day_1", "bound": "max", "limit": 1500, "value": 1520.0,
+        }]
+        assert compliance["constraints"]["sodium_mg"] == {
+            "scope": "micro", "min": None, "max": 1500, "unit": "mg", "average": 770.0,
+            "days_violated": ["day_1"], "compliant": False,
+        }
+
+    def test_percent_of_calories_and_min_constraints(self):
+        mnt = self.make_mnt(
+            macro={
+                "carbohydrates_percent": {"max": 60, "unit": "%"},
+                "fiber_g": {"min": 10, "unit": "g"},
+                "saturated_fat_percent": {"max": 7, "unit": "%"},
+            },
+            micro={"sodium_mg": {"max": 1000}},
+        )
+
+        compliance = analyze(mnt_context=mnt)["compliance"]
+
+        carbs = compliance["constraints"]["carbohydrates_percent"]
+        # day_1: (78 + 30 + 78 + 2.5) g * 4 / 920 kcal = 82%; day_2: 60 * 4 / 340 = 70.6%
+        assert carbs["days_violated"] == ["day_1", "day_2"]
+        assert compliance["constraints"]["fiber_g"]["days_violated"] == ["day_1"]  # 9.5g < 10g
+        assert compliance["constraints"]["saturated_fat_percent"]["compliant"] is True
+        assert compliance["constraints"]["sodium_mg"]["days_violated"] == ["day_1"]
+        assert {(v["constraint"], v["day"], v["bound"]) for v in compliance["violations"]} == {
+            ("carbohydrates_percent", "day_1", "max"),
+            ("carbohydrates_percent", "day_2", "max"),
+            ("fiber_g", "day_1", "min"),
+            ("sodium_mg", "day_1", "max"),
+        }
+
+    def test_not_evaluated_constraints(self):
+        mnt = self.make_mnt(
+            macro={"calories": {"surplus_percent": 10}, "protein_g_per_kg": {"min": 1.2}},
+            micro={"vitamin_B12_mcg": {"min": 2.4}, "IRON_mg": {"min": 5}},
+        )
+
+        compliance = analyze(mnt_context=mnt)["compliance"]
+
+        assert compliance["not_evaluated"] == {
+            "calories": "no_min_max",
+            "protein_g_per_kg": "weight_required",
+            "vitamin_B12_mcg": "no_nutrient_data",
+        }
+        # Constraint keys match food KB nutrients case-insensitively
+        assert compliance["constraints"]["IRON_mg"]["days_violated"] == ["day_1"]  # 3.5mg
+
+    def test_per_kg_constraint_with_weight(self):
+        mnt = self.make_mnt(macro={"protein_g_per_kg": {"min": 0.5}})
+
+        compliance = analyze(mnt_context=mnt, weight_kg=60)["compliance"]
+
+        # day_1 protein: 7 + 12 + 7 + 0.5 = 26.5g -> 0.44 g/kg; day_2: 24g -> 0.4 g/kg
+        assert compliance["constraints"]["protein_g_per_kg"]["days_violated"] == ["day_1", "day_2"]
+
+
+class TestContributions:
+    def test_shares_sum_to_total(self):
+        contributions = analyze(include_contributions=True)["contributions"]
+
+        assert set(contributions) == {"rice", "dal", "pickle"}
+        assert contributions["rice"]["quantity_g"] == 200.0
+        assert sum(food["share_percent"]["calories"] for food in contributions.values()) == pytest.approx(100.0, abs=0.2)
+        assert contributions["pickle"]["share_percent"]["sodium_mg"] == pytest.approx(97.4, abs=0.1)
+        assert "iron_mg" not in contributions["rice"]["nutrients"]
+
+
+class TestNutritionSummary:
+    def test_summary_statistics(self):
+        days = {
+            "day_1": {"daily_totals": {"calories": 1800.0, "protein_g": 60.0, "carbs_g": 200.0, "fat_g": 50.0}, "meals": {}},
+            "day_2": {"daily_totals": {"calories": 2000.0, "protein_g": 70.0, "carbs_g": 220.0, "fat_g": 60.0}, "meals": {}},
+        }
+
+        summary = MealAllocationEngine()._calculate_nutrition_summary(days)
+
+        assert summary["average_daily"] == {"calories": 1900.0, "protein_g": 65.0, "carbs_g": 210.0, "fat_g": 55.0}
+        assert summary["daily_variation"]["calories"] == {"min": 1800.0, "max": 2000.0, "avg": 1900.0, "std": 100.0}
+        assert summary["all_days_valid"] is True
+
+    def test_empty_plan(self):
+        summary = MealAllocationEngine()._calculate_nutrition_summary({})
+
+        assert summary["average_daily"]["calories"] == 0
+        assert summary["daily_variation"]["fat_g"] == {"min": 0, "max": 0, "avg": 0, "std": 0}
@@ -0,0 +1,151 @@
+"""
+Tests for Recipe Generation Engine.
+
+Unit tests for batched recipe generation: stable system prefix, one call per
+day and retries limited to the failed meals.
+"""
+import json
+
+from app.platform.ai.gateway import LLMGateway, StubLLMBackend
+from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+
+
+def make_day(day_name="Monday"):
+    def meal(*names):
+        return {"allocated_foods": [
+            {"food_id": name.lower(), "display_name": name, "quantity_g": 50.0, "exchange_category": "cereal"}
+            for name in names
+        ]}
+    return {
+        "day_number": 1,
+        "day_name": day_name,
+        "meals": {
+            "breakfast": meal("Oats", "Milk"),
+            "lunch": meal("Rice", "Dal"),
+            "dinner": meal("Roti"),
+            "snack": {"allocated_foods": []},
+        },
+    }
+
+
+def recipe(*foods):
+    return {
+        "dish_name": "Dish",
+        "ingredients": [f"{food} – 50.0 g" for food in foods],
+        "cooking_steps": ["Cook"],
+        "approx_cooking_time_minutes": 10,
+        "serving_instructions": "Serve warm",
+    }
+
+
+FOODS = {"breakfast": ("Oats", "Milk"), "lunch": ("Rice", "Dal"), "dinner": ("Roti",)}
+
+
+def requested_meals(request):
+    prompt = request.messages[-1]["content"]
+    return [name.strip() for name in prompt.rsplit("GENERATE RECIPES FOR:", 1)[1].split(",")]
+
+
+def make_engine(responder, batch_size=0):
+    backend = StubLLMBackend(responder)
+    gateway = LLMGateway(backend, max_retries=0)
+    engine = RecipeGenerationEngine(api_key="test", gateway=gateway, batch_size=batch_size)
+    return engine, backend
+
+
+def batch_responder(broken=()):
+    """Answer batched requests; meals in broken get a recipe missing a food on the first attempt."""
+    def respond(request, model):
+        retry = "PREVIOUS ATTEMPT FAILED VALIDATION" in request.messages[-1]["content"]
+        recipes = {}
+        for meal_name in requested_meals(request):
+            foods = FOODS[meal_name]
+            recipes[meal_name] = recipe(*(foods[:1] if meal_name in broken and not retry else foods))
+        return json.dumps({"recipes": recipes})
+    return respond
+
+
+class TestBatchedRecipes:
+    def test_one_call_per_day(self):
+        engine, backend = make_engine(batch_responder())
+        constraints = engine.build_recipe_constraints()
+
+        day = engine.generate_recipes_for_day(make_day(), constraints)
+
+        assert len(backend.calls) == 1
+        assert list(day["meals"]) == ["breakfast", "lunch", "dinner", "snack"]
+        for meal_name in FOODS:
+            assert day["meals"][meal_name]["validation"] == {"is_valid": True, "warnings": [], "validation_failed": False}
+            assert day["meals"][meal_name]["recipe"]["ingredients"] == recipe(*FOODS[meal_name])["ingredients"]
+        assert day["meals"]["snack"]["recipe"] is None
+        assert requested_meals(backend.calls[0][1]) == ["breakfast", "lunch", "dinner"]
+
+    def test_system_prefix_is_stable_across_days(self):
+        engine, backend = make_engine(batch_responder())
+        constraints = engine.build_recipe_constraints()
+
+        engine.generate_recipes_for_day(make_day("Monday"), constraints)
+        engine.generate_recipes_for_day(make_day("Tuesday"), constraints)
+
+        first, second = (request.messages for _, request in backend.calls)
+        assert first[0] == second[0]
+        assert first[0]["role"] == "system"
+        assert "Monday" not in json.dumps(first[0])
+        assert "Tuesday" in second[1]["content"]
+
+    def test_retry_covers_only_failed_meals(self):
+        engine, backend = make_engine(batch_responder(broken={"lunch"}))
+
+        day = engine.generate_recipes_for_day(make_day(), engine.build_recipe_constraints())
+
+        assert len(backend.calls) == 2
+        assert requested_meals(backend.calls[1][1]) == ["lunch"]
+        assert "Missing foods in recipe: dal" in backend.calls[1][1].messages[-1]["content"]
+        assert day["meals"]["breakfast"]["validation"]["is_valid"] is True
+        lunch = day["meals"]["lunch"]
+        assert lunch["recipe"]["ingredients"] == recipe("Rice", "Dal")["ingredients"]
+        # Same flags as the per-meal path after a successful retry
+        assert lunch["validation"]["validation_failed"] is True
+        assert lunch["validation"]["warnings"] == ["Missing foods in recipe: dal"]
+
+    def test_missing_meal_in_response_is_retried(self):
+        def respond(request, model):
+            meals = requested_meals(request)
+            return json.dumps({"recipes": {name: recipe(*FOODS[name]) for name in meals if name != "dinner" or len(meals) == 1}})
+        engine, backend = make_engine(respond)
+
+        day = engine.generate_recipes_for_day(make_day(), engine.build_recipe_constraints())
+
+        assert requested_meals(backend.calls[1][1]) == ["dinner"]
+        assert day["meals"]["dinner"]["recipe"]["dish_name"] == "Dish"
+
+    def test_batch_size_splits_calls(self):
+        engine, backend = make_engine(batch_responder(), batch_size=2)
+
+        engine.generate_recipes_for_day(make_day(), engine.build_recipe_constraints())
+
+        assert [requested_meals(request) for _, request in backend.calls] == [["breakfast", "lunch"], ["dinner"]]
+
+    def test_invalid_batch_response_falls_back_to_per_meal(self):
+        def respond(request, model):
+            if request.messages[0]["role"] == "system":
+                return "not json"
+            meal_name = next(name for name in FOODS if f"Meal Name: {name}" in request.messages[0]["content"])
+            return json.dumps(recipe(*FOODS[meal_name]))
+        engine, backend = make_engine(respond)
+
+        day = engine.generate_recipes_for_day(make_day(), engine.build_recipe_constraints())
+
+        assert len(backend.calls) == 1 + len(FOODS)
+        assert all(day["meals"][name]["validation"]["is_valid"] for name in FOODS)
+
+    def test_per_meal_mode(self):
+        def respond(request, model):
+            meal_name = next(name for name in FOODS if f"Meal Name: {name}" in request.messages[0]["content"])
+            return json.dumps(recipe(*FOODS[meal_name]))
+        engine, backend = make_engine(respond, batch_size=1)
+
+        day = engine.generate_recipes_for_day(make_day(), engine.build_recipe_constraints())
+
+        assert len(backend.calls) == len(FOODS)
+        assert all(day["meals"][name]["validation"]["is_valid"] for name in FOODS)
@@ -0,0 +1,223 @@
+"""
+Tests for Recipe Template Matcher.
+
+Unit tests for matching allocated meals to recipe KB templates and for the
+template fast path of RecipeGenerationEngine.
+"""
+import json
+from uuid import uuid4
+
+from app.platform.ai.gateway import LLMGateway, StubLLMBackend
+from app.platform.core.context import AyurvedaContext, MNTContext
+from app.platform.engines.recipe_engine.recipe_generation_engine import RecipeGenerationEngine
+from app.platform.engines.recipe_engine.recipe_template_matcher import RecipeTemplateMatcher
+
+
+def food(food_id, category, quantity_g, display_name=None):
+    return {
+        "food_id": food_id,
+        "display_name": display_name or food_id.replace("_", " ").title(),
+        "exchange_category": category,
+        "quantity_g": quantity_g,
+    }
+
+
+def khichdi_meal():
+    return [food("brown_rice_cooked", "cereal", 150.0), food("moong_dal_cooked", "pulse", 75.0)]
+
+
+def palak_dal_meal(oil_g=5.0):
+    return [
+        food("moong_dal_cooked", "pulse", 100.0),
+        food("spinach_cooked", "vegetable_non_starchy", 180.0),
+        food("mustard_oil", "fat", oil_g),
+    ]
+
+
+class TestMatcher:
+    def test_kb_recipe_matches_without_optional_oil(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+
+        match = matcher.match("lunch", khichdi_meal())
+
+        assert match.recipe_id == "dal_khichdi_brown_rice"
+        assert match.missing == []
+        assert match.extra == []
+        assert match.portion_scale == 1.5  # 225g allocated / 150g in the recipe
+
+    def test_substitution_option_matches(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+        meal = [food("white_rice_cooked", "cereal", 100.0), food("moong_dal_cooked", "pulse", 50.0)]
+
+        assert matcher.match("dinner", meal).recipe_id == "dal_khichdi_brown_rice"
+
+    def test_extra_food_within_tolerance(self):
+        meal = khichdi_meal() + [food("cucumber", "vegetable_non_starchy", 50.0)]
+
+        assert RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0).match("lunch", meal) is None
+        match = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=1).match("lunch", meal)
+        assert match.extra == ["cucumber"]
+
+    def test_missing_required_ingredient_within_tolerance(self):
+        meal = [food("moong_dal_cooked", "pulse", 150.0), food("whole_wheat_roti", "cereal", 80.0)]
+
+        assert RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0).match("lunch", meal) is None
+        match = RecipeTemplateMatcher.from_kb(max_missing=1, max_extra=0).match("lunch", meal)
+        assert match.recipe_id == "roti_with_dal"
+        assert match.missing == ["mustard_oil"]
+
+    def test_exchange_category_and_meal_type_must_fit(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+        wrong_category = [food("brown_rice_cooked", "fat", 150.0), food("moong_dal_cooked", "pulse", 75.0)]
+        snack = [food("apple", "fruit", 150.0), food("almonds", "nuts_seeds", 10.0)]
+
+        assert matcher.match("lunch", wrong_category) is None
+        assert matcher.match("evening_snack", snack).recipe_id == "breakfast_apple_almonds"
+        assert matcher.match("dinner", snack) is None
+
+    def test_best_match_prefers_fewest_differences(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=1, max_extra=1)
+        meal = [
+            food("moong_dal_cooked", "pulse", 100.0),
+            food("spinach_cooked", "vegetable_non_starchy", 180.0),
+            food("mustard_oil", "fat", 5.0),
+        ]
+
+        assert matcher.match("lunch", meal).recipe_id == "palak_dal"
+
+    def test_contraindicated_recipes_are_rejected(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+
+        assert matcher.match("lunch", palak_dal_meal(), conditions=["type_2_diabetes"]).recipe_id == "palak_dal"
+        assert matcher.match("lunch", palak_dal_meal(), conditions=["gerd"]) is None
+        # CKD of unknown stage is treated as contraindicated for ckd_stage_4_5
+        assert matcher.match("lunch", palak_dal_meal(), conditions=["ckd"]) is None
+
+    def test_recipes_tagged_unsafe_are_rejected(self):
+        recipes = [{
+            "recipe_id": "sweet_rice",
+            "ingredients": [{"food_id": "rice"}],
+            "mnt_compatibility": {"medical_tags": {"diabetic_safe": False, "cardiac_safe": True}},
+        }]
+        matcher = RecipeTemplateMatcher(recipes, max_missing=0, max_extra=0)
+        meal = [food("rice", "cereal", 100.0)]
+
+        assert matcher.match("lunch", meal, conditions=["prediabetes"]) is None
+        assert matcher.match("lunch", meal, conditions=["cardiovascular_disease"]).recipe_id == "sweet_rice"
+
+    def test_recipes_using_excluded_or_avoided_foods_are_rejected(self):
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+
+        # Steps add green chilies and red chili powder
+        assert matcher.match("lunch", palak_dal_meal(), food_exclusions=["spicy_foods"]) is None
+        assert matcher.match("lunch", palak_dal_meal(), food_exclusions=["chocolate"]).recipe_id == "palak_dal"
+        # Avoided as a step ingredient and as a recipe ingredient
+        assert matcher.match("lunch", palak_dal_meal(), avoid_foods=["garlic"]) is None
+        assert matcher.match("lunch", palak_dal_meal(), avoid_foods=["mustard_oil"]) is None
+
+    def test_inactive_recipes_are_not_indexed_and_stats(self):
+        recipes = [{"recipe_id": "old", "status": "inactive", "ingredients": [{"food_id": "rice"}]}]
+        matcher = RecipeTemplateMatcher(recipes, max_missing=0, max_extra=0)
+
+        assert len(matcher) == 0
+        assert matcher.match("lunch", [food("rice", "cereal", 100.0)]) is None
+        assert matcher.stats() == {"recipes": 0, "lookups": 1, "hits": 0, "hit_ratio": 0.0}
+
+
+class TestTemplateFastPath:
+    def make_engine(self):
+        def respond(request, model):
+            prompt = request.messages[-1]["content"]
+            meals = [name.strip() for name in prompt.rsplit("GENERATE RECIPES FOR:", 1)[1].split(",")]
+            return json.dumps({"recipes": {name: {
+                "dish_name": "Upma",
+                "ingredients": ["Semolina – 40.0 g"],
+                "cooking_steps": ["Roast"],
+                "approx_cooking_time_minutes": 15,
+                "serving_instructions": "Serve hot",
+            } for name in meals}})
+        backend = StubLLMBackend(respond)
+        matcher = RecipeTemplateMatcher.from_kb(max_missing=0, max_extra=0)
+        engine = RecipeGenerationEngine(api_key="test", gateway=LLMGateway(backend), template_matcher=matcher)
+        return engine, backend
+
+    def test_matched_meals_skip_llm(self):
+        engine, backend = self.make_engine()
+        day = {"day_name": "Monday", "meals": {
+            "breakfast": {"allocated_foods": [food("semolina", "cereal", 40.0)]},
+            "lunch": {"allocated_foods": khichdi_meal()},
+        }}
+
+        result = engine.generate_recipes_for_day(day, engine.build_recipe_constraints())
+
+        assert len(backend.calls) == 1
+        assert "lunch" not in backend.calls[0][1].messages[-1]["content"]
+        assert list(result["meals"]) == ["breakfast", "lunch"]
+        lunch = result["meals"]["lunch"]
+        assert lunch["recipe_source"] == "template"
+        assert lunch["validation"]["is_valid"] is True
+        assert lunch["recipe"]["dish_name"] == "Dal Khichdi with Brown Rice"
+        assert lunch["recipe"]["ingredients"] == ["Brown Rice Cooked – 150.0 g", "Moong Dal Cooked – 75.0 g"]
+        assert lunch["recipe"]["tips"][0] == "Skip Mustard Oil (not part of this meal)"
+        assert result["meals"]["breakfast"]["recipe_source"] == "llm"
+
+    def test_fat_steps_follow_the_oil_allocation(self):
+        engine, _ = self.make_engine()
+        constraints = engine.build_recipe_constraints()
+        day = {"day_name": "Monday", "meals": {
+            "lunch": {"allocated_foods": khichdi_meal()},
+            "dinner": {"allocated_foods": palak_dal_meal(oil_g=20.0)},
+        }}
+
+        meals = engine.generate_recipes_for_day(day, constraints)["meals"]
+
+        # No oil allocated: no tempering in oil, no ghee to serve
+        lunch = meals["lunch"]["recipe"]
+        assert not any("oil" in step.lower() or "ghee" in step.lower() for step in lunch["cooking_steps"])
+        assert lunch["tips"][-1] == "Cook without added oil or ghee (none allocated for this meal)"
+        # More oil allocated than the 15 ml limit: capped
+        dinner = meals["dinner"]["recipe"]
+        assert dinner["cooking_steps"][3] == (
+            "Heat oil in a pan, add cumin seeds, garlic, and green chilies (use at most 15 ml of oil or ghee)"
+        )
+
+    def test_client_conditions_and_avoid_list_skip_templates(self):
+        engine, backend = self.make_engine()
+        assessment_id = uuid4()
+        mnt_context = MNTContext(
+            assessment_id=assessment_id,
+            food_exclusions=["spicy_foods"],
+            rule_ids_used=["mnt_gerd_reflux_control"],
+        )
+        ayurveda_context = AyurvedaContext(
+            assessment_id=assessment_id,
+            vikriti_notes={"food_preferences": [{"food_id": "garlic", "preference_type": "avoid"}]},
+        )
+        day = {"day_name": "Monday", "meals": {"lunch": {"allocated_foods": palak_dal_meal()}}}
+
+        constraints = engine.build_recipe_constraints(mnt_context, ayurveda_context)
+        result = engine.generate_recipes_for_day(day, constraints)
+
+        assert constraints["conditions"] == ["gerd"]
+        assert constraints["food_exclusions"] == ["spicy_foods"]
+        assert constraints["avoid_foods"] == ["garlic"]
+        assert result["meals"]["lunch"]["recipe_source"] == "llm"
+        assert "lunch" in backend.calls[0][1].messages[-1]["content"]
+
+    def test_hit_ratio_reported(self):
+        engine, backend = self.make_engine()
+        meal_plan = {"days": {
+            "day_1": {"day_name": "Monday", "meals": {
+                "lunch": {"allocated_foods": khichdi_meal()},
+                "dinner": {"allocated_foods": khichdi_meal()},
+                "snack": {"allocated_foods": []},
+            }},
+            "day_2": {"day_name": "Tuesday", "meals": {
+                "breakfast": {"allocated_foods": [food("semolina", "cereal", 40.0)]},
+            }},
+        }}
+
+        template_matching = engine.generate_recipes_for_meal_plan(meal_plan)["template_matching"]
+
+        assert template_matching == {"meals": 3, "template_recipes": 2, "hit_ratio": 0.667}
+        assert len(backend.calls) == 1
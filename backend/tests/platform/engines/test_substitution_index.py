@@ -0,0 +1,132 @@
+"""
+Tests for Food Substitution Index.
+
+Unit tests for nearest-neighbour substitutes, Tier 1 exclusion masks and
+MealAllocator.substitute_food().
+"""
+import pytest
+
+from app.platform.engines.food_engine.substitution_index import FoodSubstitutionIndex, faiss
+from app.platform.engines.recipe_engine.meal_allocator import MealAllocator
+
+
+def make_food(food_id, category="cereal", calories=350.0, protein=10.0, carbs=70.0, fat=2.0,
+              serving=30.0, conditions=None, diabetic_safe=None):
+    return {
+        "food_id": food_id,
+        "display_name": food_id.replace("_", " ").title(),
+        "exchange_category": category,
+        "serving_size_per_exchange_g": serving,
+        "nutrition": {
+            "calories": calories,
+            "protein_g": protein,
+            "carbs_g": carbs,
+            "fat_g": fat,
+            "fiber_g": 3.0,
+            "sodium_mg": 5.0,
+            "macros": {"protein_g": protein, "carbs_g": carbs, "fat_g": fat, "fiber_g": 3.0},
+            "micros": {"potassium_mg": 200.0},
+            "glycemic_properties": {"glycemic_index": 60},
+        },
+        "mnt_profile": {"medical_tags": {"diabetic_safe": diabetic_safe}},
+        "contraindicated_conditions": conditions or [],
+    }
+
+
+def make_foods():
+    return [
+        make_food("rice", calories=350, protein=7, carbs=78),
+        make_food("wheat", calories=345, protein=8, carbs=76),
+        make_food("millet", calories=360, protein=11, carbs=72, conditions=["ckd"]),
+        make_food("oats", calories=390, protein=17, carbs=66, fat=7, diabetic_safe=False),
+        make_food("sugar_cereal", calories=420, protein=4, carbs=95),
+        make_food("dal", category="pulse", calories=340, protein=24, carbs=60),
+    ]
+
+
+def ids(substitutes):
+    return [sub.food_id for sub in substitutes]
+
+
+class TestSubstitutes:
+    def test_nearest_first_within_category(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        substitutes = index.substitutes("rice", k=10)
+
+        assert ids(substitutes)[0] == "wheat"
+        assert "rice" not in ids(substitutes)
+        assert "dal" not in ids(substitutes)
+        assert {sub.exchange_category for sub in substitutes} == {"cereal"}
+        distances = [sub.distance for sub in substitutes]
+        assert distances == sorted(distances)
+
+    def test_k_limits_results(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        assert len(index.substitutes("rice", k=2)) == 2
+
+    def test_unknown_food_returns_empty(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        assert index.substitutes("unknown") == []
+        assert "unknown" not in index
+        assert len(index) == 6
+
+    def test_excluded_food_ids(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        substitutes = index.substitutes("rice", k=10, exclude_food_ids={"wheat"})
+
+        assert "wheat" not in ids(substitutes)
+
+    def test_contraindicated_condition(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        assert "millet" in ids(index.substitutes("rice", k=10))
+        assert "millet" not in ids(index.substitutes("rice", k=10, medical_conditions=["CKD"]))
+
+    def test_diabetic_unsafe_excluded_for_diabetes(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        assert "oats" in ids(index.substitutes("rice", k=10))
+        assert "oats" not in ids(index.substitutes("rice", k=10, medical_conditions=["diabetes"]))
+
+    def test_all_excluded_returns_empty(self):
+        index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+
+        assert index.substitutes("dal", k=5) == []
+
+    @pytest.mark.skipif(faiss is None, reason="faiss not installed")
+    def test_faiss_matches_numpy(self):
+        numpy_index = FoodSubstitutionIndex(make_foods(), use_faiss=False)
+        faiss_index = FoodSubstitutionIndex(make_foods(), use_faiss=True)
+
+        for food_id in ("rice", "wheat", "oats"):
+            expected = numpy_index.substitutes(food_id, k=3, medical_conditions=["ckd"])
+            actual = faiss_index.substitutes(food_id, k=3, medical_conditions=["ckd"])
+            assert ids(actual) == ids(expected)
+            assert [sub.distance for sub in actual] == pytest.approx([sub.distance for sub in expected], abs=1e-3)
+
+
+class TestMealAllocatorSubstitution:
+    def test_substitute_keeps_exchanges_and_reportions(self):
+        foods = make_foods()
+        foods[1]["serving_size_per_exchange_g"] = 40.0  # wheat
+        allocator = MealAllocator(substitution_index=FoodSubstitutionIndex(foods, use_faiss=False))
+        allocated = {"food_id": "rice", "exchange_category": "cereal", "exchanges": 2.0, "quantity_g": 60.0}
+
+        alternatives = allocator.substitute_food(allocated, k=10, exclude_food_ids={"millet"})
+
+        assert {alt["food_id"] for alt in alternatives} == {"wheat", "oats", "sugar_cereal"}
+        wheat = next(alt for alt in alternatives if alt["food_id"] == "wheat")
+        assert wheat["exchanges"] == 2.0
+        assert wheat["quantity_g"] == 80.0
+        assert wheat["nutrition"]["calories"] == pytest.approx(276.0)
+        assert wheat["nutrition"]["protein_g"] == pytest.approx(6.4)
+        assert wheat["substitution_distance"] > 0
+
+    def test_without_index_returns_empty(self):
+        allocator = MealAllocator()
+
+        assert allocator.substitute_food({"food_id": "rice", "exchanges": 1.0}) == []
@@ -171,3 +171,77 @@ class TestCalculateTargets:
         assert target_context.macros["carbohydrates"]["percent_range"]["max"] <= 50
 
 
+
+
+class TestCalculateTargetsBatch:
+    """Tests for vectorized batch calculation and what-if sweeps."""
+
+    PROFILES = [
+        {"height_cm": 175, "gender": "male", "age": 30, "activity_level": "moderately_active"},
+        {"height_cm": 160.5, "gender": "Female", "age": 55, "activity_level": "sedentary"},
+        {"height_cm": 182, "gender": "f", "age": 72, "activity_level": "very_active"},
+        {"height_cm": 150, "gender": None, "age": None, "activity_level": None},
+        {"height_cm": 99, "gender": "male", "age": 40, "activity_level": "sedentary"},
+        {"gender": "male", "age": 40},
+    ]
+
+    MNT_CONSTRAINTS = [
+        {},
+        {"calories": {"min": 1500, "max": 1800}},
+        {"protein_percent": {"min": 25}, "fat_percent": {"max": 20}},
+        {"carbohydrates_percent": {"max": 45}},
+    ]
+
+    def test_batch_matches_scalar(self):
+        engine = TargetEngine()
+        profiles, mnts = [], []
+        for profile in self.PROFILES:
+            for constraints in self.MNT_CONSTRAINTS:
+                profiles.append(profile)
+                mnts.append(make_mnt_context(
+                    macro_constraints=constraints, micro_constraints={"sodium_mg": {"max": 1500}}
+                ))
+
+        batch = engine.calculate_targets_batch(profiles, mnts)
+
+        for profile, mnt, result in zip(profiles, mnts, batch):
+            expected = engine.calculate_targets(profile, mnt, activity_level=profile.get("activity_level"))
+            assert result == expected
+
+    def test_shared_mnt_context(self):
+        engine = TargetEngine()
+        mnt = make_mnt_context()
+
+        batch = engine.calculate_targets_batch(self.PROFILES[:2], mnt)
+
+        assert [t.assessment_id for t in batch] == [mnt.assessment_id] * 2
+        assert batch[0].key_micros is not batch[1].key_micros
+
+    def test_sweep_grid(self):
+        engine = TargetEngine()
+        mnt = make_mnt_context()
+        grid = {"activity_level": ["sedentary", "very_active"], "height_cm": [160, 170]}
+
+        results = engine.sweep_targets({"gender": "male", "age": 30}, mnt, grid)
+
+        assert [r["scenario"] for r in results] == [
+            {"activity_level": "sedentary", "height_cm": 160},
+            {"activity_level": "sedentary", "height_cm": 170},
+            {"activity_level": "very_active", "height_cm": 160},
+            {"activity_level": "very_active", "height_cm": 170},
+        ]
+        assert results[0]["targets"].calories_target == pytest.approx(60 * 22.5)
+        assert results[3]["targets"].calories_target == pytest.approx(70 * 32.5)
+
+    def test_cohort_sweep(self):
+        engine = TargetEngine()
+        profiles = self.PROFILES[:3]
+        mnts = [make_mnt_context() for _ in profiles]
+
+        results = engine.sweep_cohort_targets(profiles, mnts, {"activity_level": ["sedentary", "very_active"]})
+
+        assert len(results) == 3
+        assert all(len(client_results) == 2 for client_results in results)
+        assert results[1][0]["targets"] == engine.calculate_targets(
+            {**profiles[1], "activity_level": "sedentary"}, mnts[1], activity_level="sedentary"
+        )
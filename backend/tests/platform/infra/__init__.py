@@ -0,0 +1,5 @@
+"""
+Platform infra tests.
+Unit tests for platform caching, logging and configuration.
+"""
+
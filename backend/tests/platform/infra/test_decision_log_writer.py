@@ -0,0 +1,142 @@
+"""
+Tests for Async Decision Log Writer.
+
+Unit tests for batching, flushing, backpressure overflow (drop and spill)
+and shutdown of the queued platform_decision_logs writer.
+"""
+import json
+import threading
+from uuid import uuid4
+
+from app.platform.infra.logging.decision_log_writer import AsyncDecisionLogWriter
+
+
+class RecordingSession:
+    """Session stand-in that records bulk inserts (one list of rows per execute)."""
+
+    def __init__(self, batches, fail=False, gate=None):
+        self.batches = batches
+        self.fail = fail
+        self.gate = gate
+
+    def execute(self, statement, rows):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(rows))
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_writer(batches, fail=False, gate=None, **kwargs):
+    kwargs.setdefault("batch_size", 100)
+    kwargs.setdefault("flush_interval_ms", 60000)
+    kwargs.setdefault("spill_path", "")
+    return AsyncDecisionLogWriter(session_factory=lambda: RecordingSession(batches, fail, gate), **kwargs)
+
+
+class TestBatching:
+    def test_rows_are_inserted_in_batches(self):
+        batches = []
+        writer = make_writer(batches, batch_size=3)
+
+        for i in range(7):
+            writer.log_decision("mnt", str(uuid4()), [f"rule_{i}"])
+        assert writer.flush()
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert writer.stats()["written"] == 7
+        writer.close()
+
+    def test_interval_flushes_partial_batch(self):
+        batches = []
+        writer = make_writer(batches, flush_interval_ms=20)
+
+        writer.log_decision("plan", str(uuid4()), ["rule_a"])
+        writer._thread.join(0.5)
+
+        assert len(batches) == 1
+        writer.close()
+
+    def test_row_layout(self):
+        batches = []
+        writer = make_writer(batches)
+        entity_id = uuid4()
+
+        writer.log_decision("diagnosis", str(entity_id), ["dx_1"], notes="HbA1c 7.2", context={"severity": "mild"})
+        writer.log_decision("ranking", "breakfast_day_1", ["tier_1"])
+        writer.log_rule_application("mnt_rule_1", {"entity_type": "mnt", "entity_id": str(entity_id)}, {"carbs": 45})
+        writer.log_constraint_source("micro", {"sodium_mg": {"max": 2000}}, "hypertension", ["mnt_htn"])
+        writer.close()
+
+        diagnosis, ranking, rule, constraint = batches[0]
+        assert diagnosis["entity_id"] == entity_id
+        assert diagnosis["notes"] == 'HbA1c 7.2\ncontext: {"severity": "mild"}'
+        assert diagnosis["created_at"] is not None
+        assert ranking["entity_id"] is None
+        assert ranking["notes"] == 'entity_ref: "breakfast_day_1"'
+        assert (rule["entity_type"], rule["entity_id"], rule["rule_ids_used"]) == ("mnt", entity_id, ["mnt_rule_1"])
+        assert 'result: {"carbs": 45}' in rule["notes"]
+        assert constraint["notes"] == 'micro = {"sodium_mg": {"max": 2000}} from hypertension'
+
+
+class TestOverflow:
+    def test_full_queue_drops_without_spill_file(self):
+        gate = threading.Event()
+        batches = []
+        writer = make_writer(batches, gate=gate, batch_size=1, max_queue_size=2)
+
+        for _ in range(10):
+            writer.log_decision("mnt", str(uuid4()), ["rule"])
+        gate.set()
+        writer.close()
+
+        stats = writer.stats()
+        assert stats["dropped"] > 0
+        assert stats["written"] + stats["dropped"] == 10
+
+    def test_overflow_and_failed_batches_spill_and_replay(self, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        writer = make_writer([], fail=True, batch_size=2, spill_path=str(spill))
+        entity_id = uuid4()
+
+        writer.log_decision("mnt", str(entity_id), ["rule_a"])
+        writer.log_decision("mnt", str(entity_id), ["rule_b"])
+        writer.close()
+
+        assert writer.stats()["spilled"] == 2
+        assert writer.stats()["failed_batches"] == 1
+        lines = [json.loads(line) for line in spill.read_text().splitlines()]
+        assert [line["rule_ids_used"] for line in lines] == [["rule_a"], ["rule_b"]]
+
+        batches = []
+        replayer = make_writer(batches, spill_path=str(spill))
+        assert replayer.replay_spill() == 2
+        assert [row["entity_id"] for row in batches[0]] == [entity_id, entity_id]
+        assert not spill.exists()
+
+
+class TestShutdown:
+    def test_close_flushes_and_later_rows_overflow(self):
+        batches = []
+        writer = make_writer(batches)
+
+        writer.log_decision("plan", str(uuid4()), ["rule"])
+        writer.close()
+        writer.log_decision("plan", str(uuid4()), ["late"])
+
+        assert len(batches) == 1
+        assert not writer._thread.is_alive()
+        assert writer.stats()["dropped"] == 1
+
+    def test_no_thread_until_first_row(self):
+        writer = make_writer([])
+
+        assert writer._thread is None
+        assert writer.flush() is True
+        writer.close()
@@ -0,0 +1,177 @@
+"""
+Tests for Platform Cache.
+
+Unit tests for the memory LRU/TTL backend, the shared SQLite backend, the
+two-tier composition and single-flight loading.
+"""
+import threading
+import time
+
+import pytest
+
+from app.platform.infra.cache.cache import (
+    MemoryCacheBackend,
+    PlatformCache,
+    SQLiteCacheBackend,
+    TwoTierCacheBackend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=3)
+    return SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=3)
+
+
+class TestBackends:
+    def test_get_set_delete_exists(self, backend):
+        backend.set("rule:a", {"priority": 1})
+
+        assert backend.get("rule:a") == {"priority": 1}
+        assert backend.exists("rule:a")
+        backend.delete("rule:a")
+        assert backend.get("rule:a") is None
+        assert not backend.exists("rule:a")
+
+    def test_ttl_expiry(self, backend):
+        backend.set("session:1", "data", ttl=0.05)
+        backend.set("session:2", "data")
+
+        time.sleep(0.1)
+
+        assert backend.get("session:1") is None
+        assert not backend.exists("session:1")
+        assert backend.get("session:2") == "data"
+        assert backend.stats()["expirations"] == 1
+
+    def test_lru_eviction(self, backend):
+        for key in ("a", "b", "c"):
+            backend.set(key, key)
+            time.sleep(0.01)  # Distinct last-used times for the SQLite backend
+        backend.get("a")
+        time.sleep(0.01)
+
+        backend.set("d", "d")
+
+        assert backend.get("b") is None
+        assert [backend.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+        assert backend.stats()["evictions"] == 1
+
+    def test_clear_by_pattern_and_tag(self, backend):
+        backend.set("rule:mnt_1", 1, tags=["mnt"])
+        backend.set("rule:dx_1", 2, tags=["diagnosis"])
+        backend.set("session:1", 3, tags=["mnt"])
+
+        assert backend.clear(pattern="rule:*", tag="mnt") == 1
+        assert backend.get("rule:mnt_1") is None
+        assert backend.get("session:1") == 3
+        assert backend.clear(tag="mnt") == 1
+        assert backend.clear(pattern="rule:dx_?") == 1
+        assert backend.stats()["entries"] == 0
+
+    def test_stats_count_hits_and_misses(self, backend):
+        backend.set("k", "v")
+        backend.get("k")
+        backend.get("missing")
+
+        stats = backend.stats()
+
+        assert (stats["hits"], stats["misses"], stats["sets"], stats["entries"]) == (1, 1, 1, 1)
+
+    def test_none_is_not_cached(self, backend):
+        backend.set("k", None)
+
+        assert not backend.exists("k")
+
+
+class TestSQLiteSharing:
+    def test_instances_on_one_file_share_entries(self, tmp_path):
+        path = str(tmp_path / "shared.sqlite3")
+        first = SQLiteCacheBackend(path)
+        second = SQLiteCacheBackend(path)
+
+        first.set("rule:a", [1, 2], tags=["kb"])
+
+        assert second.get("rule:a") == [1, 2]
+        assert second.clear(tag="kb") == 1
+        assert first.get("rule:a") is None
+
+
+class TestTwoTier:
+    def test_read_through_fills_local_tier(self, tmp_path):
+        path = str(tmp_path / "shared.sqlite3")
+        writer = TwoTierCacheBackend(MemoryCacheBackend(), SQLiteCacheBackend(path))
+        local = MemoryCacheBackend()
+        reader = TwoTierCacheBackend(local, SQLiteCacheBackend(path), local_ttl=30)
+
+        writer.set("rule:a", "value", ttl=3600)
+
+        assert reader.get("rule:a") == "value"
+        assert local.get("rule:a") == "value"
+        assert 0 < local.ttl("rule:a") <= 30
+        assert reader.stats()["shared"]["hits"] == 1
+
+    def test_invalidation_reaches_both_tiers(self, tmp_path):
+        cache = TwoTierCacheBackend(MemoryCacheBackend(), SQLiteCacheBackend(str(tmp_path / "shared.sqlite3")))
+        cache.set("rule:a", 1)
+        cache.set("rule:b", 2)
+
+        assert cache.clear(pattern="rule:*") == 2
+        assert cache.get("rule:a") is None
+        assert not cache.exists("rule:b")
+
+    def test_tag_invalidation_drops_read_through_copy(self, tmp_path):
+        path = str(tmp_path / "shared.sqlite3")
+        worker_a = TwoTierCacheBackend(MemoryCacheBackend(), SQLiteCacheBackend(path))
+        worker_b = TwoTierCacheBackend(MemoryCacheBackend(), SQLiteCacheBackend(path))
+        worker_a.set("plan:1", "v1", tags=["client:9"])
+
+        assert worker_b.get("plan:1") == "v1"
+        assert worker_b.local.get_with_tags("plan:1") == ("v1", ("client:9",))
+        assert worker_b.clear(tag="client:9") == 1
+        assert worker_b.get("plan:1") is None
+
+
+class TestPlatformCache:
+    def test_default_backend_is_bounded_memory(self):
+        cache = PlatformCache()
+        cache.cache_rule("mnt_1", {"rule": 1})
+
+        assert isinstance(cache.cache_backend, MemoryCacheBackend)
+        assert cache.get_rule("mnt_1") == {"rule": 1}
+
+    def test_single_flight_runs_loader_once(self):
+        cache = PlatformCache()
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("key", loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while cache.stats()["coalesced"] < 7:
+            time.sleep(0.005)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [1]
+        assert results == ["value"] * 8
+        assert cache.get_or_set("key", loader) == "value"
+        assert calls == [1]
+
+    def test_loader_error_reaches_waiters_and_is_not_cached(self):
+        cache = PlatformCache()
+
+        def failing():
+            raise ValueError("KB unavailable")
+
+        with pytest.raises(ValueError):
+            cache.get_or_set("key", failing)
+        assert cache.get_or_set("key", lambda: "recovered") == "recovered"
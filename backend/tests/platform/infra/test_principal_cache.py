@@ -0,0 +1,143 @@
+"""
+Tests for Authenticated Principal Cache.
+
+Unit tests for the token-keyed user cache used by platform auth.
+"""
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.platform.api.auth import auth
+from app.platform.data.models.platform_user import PlatformUser
+from app.platform.data.repositories.platform_user_repository import PlatformUserRepository
+from app.platform.infra.cache.principal_cache import PrincipalCache, principal_cache
+from app.platform.utils.security import (
+    create_access_token,
+    get_password_hash,
+    verify_password_async,
+    verify_token,
+)
+
+
+def make_user(username="doctor1", is_active=True):
+    return PlatformUser(
+        id=uuid4(),
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="hashed",
+        full_name="Dr. Test",
+        role="doctor",
+        is_active=is_active,
+        is_superuser=False,
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+class TestPrincipalCache:
+    def test_token_key_prefers_jti(self):
+        assert PrincipalCache.token_key({"jti": "abc", "sub": "u"}) == "jti:abc"
+        assert PrincipalCache.token_key({"sub": "u", "exp": 10}) == "sub:u:10"
+        assert PrincipalCache.token_key({}) is None
+
+    def test_ttl_bounded_by_token_expiry(self):
+        cache = PrincipalCache(max_ttl_seconds=3600)
+        cache.set("k", "u", {"username": "u"}, token_expires_at=time.time() - 1)
+        assert cache.get("k") is None
+
+        cache.set("k", "u", {"username": "u"}, token_expires_at=time.time() + 60)
+        assert cache.get("k") == {"username": "u"}
+
+    def test_invalidate_user(self):
+        cache = PrincipalCache()
+        cache.set("a", "u1", {"username": "u1"})
+        cache.set("b", "u1", {"username": "u1"})
+        cache.set("c", "u2", {"username": "u2"})
+
+        cache.invalidate_user("u1")
+
+        assert cache.get("a") is None and cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_stale_load_not_cached_after_invalidation(self):
+        cache = PrincipalCache()
+        generation = cache.generation("u1")
+        cache.invalidate_user("u1")  # e.g. password changed while the user was being loaded
+        cache.set("a", "u1", {"username": "u1"}, generation=generation)
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        cache = PrincipalCache(max_entries=2)
+        cache.set("a", "u1", {})
+        cache.set("b", "u2", {})
+        cache.get("a")
+        cache.set("c", "u3", {})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+
+    def test_disabled(self):
+        cache = PrincipalCache(max_ttl_seconds=0)
+        cache.set("a", "u1", {})
+        assert cache.get("a") is None
+
+
+class TestGetCurrentUser:
+    def test_second_request_skips_lookup(self, monkeypatch):
+        user = make_user()
+        calls = []
+        monkeypatch.setattr(
+            PlatformUserRepository, "get_by_username",
+            lambda self, username: calls.append(username) or user
+        )
+        token = create_access_token({"sub": user.username})
+
+        first = auth.get_current_user(token, db=None)
+        second = auth.get_current_user(token, db=None)
+
+        assert calls == ["doctor1"]
+        assert first is user
+        assert second is not user
+        assert (second.id, second.username, second.is_active) == (user.id, user.username, True)
+
+    def test_invalidation_forces_lookup(self, monkeypatch):
+        user = make_user()
+        calls = []
+        monkeypatch.setattr(
+            PlatformUserRepository, "get_by_username",
+            lambda self, username: calls.append(username) or user
+        )
+        token = create_access_token({"sub": user.username})
+
+        auth.get_current_user(token, db=None)
+        principal_cache.invalidate_user(user.username)
+        auth.get_current_user(token, db=None)
+
+        assert len(calls) == 2
+
+    def test_unknown_user_not_cached(self, monkeypatch):
+        monkeypatch.setattr(PlatformUserRepository, "get_by_username", lambda self, username: None)
+        token = create_access_token({"sub": "ghost"})
+
+        with pytest.raises(HTTPException):
+            auth.get_current_user(token, db=None)
+        assert len(principal_cache) == 0
+
+
+class TestSecurity:
+    def test_tokens_have_unique_jti(self):
+        first = verify_token(create_access_token({"sub": "u"}))
+        second = verify_token(create_access_token({"sub": "u"}))
+        assert first["jti"] and first["jti"] != second["jti"]
+
+    def test_verify_password_async(self):
+        hashed = get_password_hash("secret")
+        assert asyncio.run(verify_password_async("secret", hashed))
+        assert not asyncio.run(verify_password_async("wrong", hashed))
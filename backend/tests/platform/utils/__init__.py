@@ -0,0 +1,4 @@
+"""
+Platform utils tests.
+Unit tests for platform utilities.
+"""
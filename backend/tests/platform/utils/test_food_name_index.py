@@ -0,0 +1,107 @@
+"""
+Tests for Food Name Index.
+"""
+from difflib import SequenceMatcher
+
+import pytest
+
+from app.platform.utils.food_name_index import FoodNameIndex, normalize_food_name
+
+
+MASTER_FOODS = [
+    ("rice_white_raw", "Rice, white (raw)", ["chawal"], "cereal"),
+    ("rice_brown_raw", "Rice, brown (raw)", [], "cereal"),
+    ("wheat_flour_whole", "Wheat flour, whole (atta)", ["atta"], "cereal"),
+    ("moong_dal", "Green gram, dal (Moong dal)", ["moong dal"], "pulse"),
+    ("toor_dal", "Red gram, dal (Toor dal)", ["arhar dal", "toor dal"], "pulse"),
+    ("spinach", "Spinach (Palak)", ["palak"], "vegetable_non_starchy"),
+    ("potato", "Potato", ["aloo"], "vegetable_starchy"),
+    ("cow_milk", "Milk, cow", ["doodh"], "milk"),
+]
+
+
+def make_index():
+    index = FoodNameIndex()
+    for food_id, name, aliases, category in MASTER_FOODS:
+        index.add_food(food_id, name, aliases=aliases, group=category)
+    return index
+
+
+def brute_force_best(query, threshold=0.6):
+    best, best_score = None, 0.0
+    for food_id, name, aliases, _ in MASTER_FOODS:
+        for candidate in [name] + aliases:
+            score = SequenceMatcher(None, normalize_food_name(candidate), normalize_food_name(query)).ratio()
+            if score > best_score and score >= threshold:
+                best, best_score = food_id, score
+    return best, best_score
+
+
+class TestNormalizeFoodName:
+    def test_strips_parentheses_and_punctuation(self):
+        assert normalize_food_name("Rice, white (raw)") == "rice white"
+        assert normalize_food_name("  Green   gram-dal ") == "green gram dal"
+
+    def test_empty(self):
+        assert normalize_food_name("") == ""
+        assert normalize_food_name(None) == ""
+
+
+class TestFoodNameIndexSearch:
+    def test_exact_alias_match(self):
+        index = make_index()
+        match = index.best_match("Palak")
+        assert match.key == "spinach"
+        assert match.score == 1.0
+
+    @pytest.mark.parametrize("query", ["rice white", "brown rice", "wheat flour whole", "toor dal", "cow milk", "potatoes"])
+    def test_matches_brute_force(self, query):
+        index = make_index()
+        expected_id, expected_score = brute_force_best(query)
+        match = index.best_match(query)
+        if expected_id is None:
+            assert match is None
+        else:
+            assert match.key == expected_id
+            assert match.score == pytest.approx(expected_score)
+
+    def test_group_filter(self):
+        index = make_index()
+        assert index.best_match("toor dal", group="cereal") is None
+        match = index.best_match("toor dal", group="pulse")
+        assert match.key == "toor_dal"
+
+    def test_threshold_rejects_unrelated(self):
+        index = make_index()
+        assert index.best_match("chocolate cake") is None
+
+    def test_one_match_per_food(self):
+        index = make_index()
+        keys = [m.key for m in index.search("toor dal", limit=5, threshold=0.3)]
+        assert len(keys) == len(set(keys))
+
+    def test_payload_returned(self):
+        index = FoodNameIndex()
+        row = {"Food Name": "Ragi", "Category": "Cereal"}
+        index.add(0, "Ragi", group="Cereal", payload=row)
+        assert index.best_match("ragi").payload is row
+
+
+class TestExtractFoodReferences:
+    def test_extracts_foods_in_text_order(self):
+        index = make_index()
+        refs = index.extract_food_references("Breakfast: 2 cups doodh and aloo paratha, lunch toor dal with chawal")
+        assert [r["food_id"] for r in refs] == ["cow_milk", "potato", "toor_dal", "rice_white_raw"]
+        for ref in refs:
+            assert set(ref) >= {"food_id", "food_name", "confidence", "needs_review"}
+
+    def test_low_confidence_flagged_for_review(self):
+        index = make_index()
+        refs = index.extract_food_references("ate some potatos", threshold=0.8, review_threshold=0.99)
+        assert refs and refs[0]["food_id"] == "potato"
+        assert refs[0]["needs_review"] is True
+
+    def test_no_foods(self):
+        index = make_index()
+        assert index.extract_food_references("went for a walk") == []
+        assert index.extract_food_references("") == []